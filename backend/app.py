@@ -5,18 +5,22 @@ import os
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 
+# ollama builds an httpx client at import time, and httpcore then loads trio if it is installed.
+# trio's epoll backend needs select.epoll, which eventlet removes, so load trio before patching.
+try:
+    import trio  # noqa: F401
+except ImportError:
+    pass
+
 import eventlet
 eventlet.monkey_patch()
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import subprocess
 import os
 import json
-import threading
 import logging
-import re
 from src.param_evaluator import ParamEvaluator
 import tempfile
 import shutil
@@ -24,9 +28,20 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import io
 import base64
 from src.fluid_simulator import FluidSimulator
+from src.forcing import validate_bitmap
+from src.solver_engines import SOLVER_ENGINES
+from backend.job_scheduler import JobScheduler
+from backend.job_store import JobStore
+from backend.llm_service import LLMInferenceService, LLMInferenceError, LLMInferenceTimeout
+from src.llm_cache import LLMResponseCache
+from src.run_full_pipeline import BLENDER_EXECUTABLE_PATH
+from backend.blender_pool import BlenderWorkerPool
+from src.glyph_placement import GlyphPlacer
+from src.streamlines import FlowTracer, seed_points
 
 # Initialize ParamEvaluator
 param_evaluator = ParamEvaluator()
@@ -45,8 +60,110 @@ app = Flask(__name__)
 CORS(app) # Enable CORS for all origins
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
-# Global variable to store the pipeline process
-pipeline_process = None
+# Pipeline job scheduling
+OUTPUTS_DIR = os.path.join(PROJECT_ROOT, 'outputs')
+JOBS_OUTPUT_DIR = os.path.join(OUTPUTS_DIR, 'jobs')
+PIPELINE_SCRIPT = os.path.join(PROJECT_ROOT, 'src', 'run_full_pipeline.py')
+VENV_PYTHON = os.path.join(PROJECT_ROOT, 'venv', 'bin', 'python3')
+
+# Concurrency limits (overridable from the environment)
+MAX_PIPELINE_WORKERS = int(os.getenv("EFFECT_STOKES_MAX_WORKERS", "2"))
+MAX_SIMULATION_JOBS = int(os.getenv("EFFECT_STOKES_MAX_SIMULATION_JOBS", "2"))
+MAX_BLENDER_JOBS = int(os.getenv("EFFECT_STOKES_MAX_BLENDER_JOBS", "1"))
+JOB_DB_PATH = os.getenv("EFFECT_STOKES_JOB_DB", os.path.join(os.path.dirname(__file__), 'jobs.db'))
+LLM_CACHE_PATH = os.getenv("EFFECT_STOKES_LLM_CACHE", os.path.join(os.path.dirname(__file__), 'llm_cache.db'))
+LLM_CACHE_TTL = float(os.getenv("EFFECT_STOKES_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("EFFECT_STOKES_LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_DETERMINISTIC = os.getenv("EFFECT_STOKES_LLM_DETERMINISTIC", "0") == "1"
+# Render frames while the simulation is still producing them (one overlapped stage per job)
+STREAMING_PIPELINE = os.getenv("EFFECT_STOKES_STREAMING", "0") == "1"
+# Warm Blender processes the 'blender' stage renders on instead of starting Blender per job (0 disables)
+BLENDER_EXECUTABLE = os.getenv("EFFECT_STOKES_BLENDER", BLENDER_EXECUTABLE_PATH)
+BLENDER_POOL_SIZE = int(os.getenv("EFFECT_STOKES_BLENDER_POOL_SIZE", str(MAX_BLENDER_JOBS)))
+BLENDER_WORKER_MAX_JOBS = int(os.getenv("EFFECT_STOKES_BLENDER_WORKER_MAX_JOBS", "50"))
+SERVER_PORT = int(os.getenv("EFFECT_STOKES_PORT", "5000"))
+
+def _pipeline_stage_command(stage, extra_args=()):
+    def build_command(job):
+        command = [
+            VENV_PYTHON,
+            PIPELINE_SCRIPT,
+            json.dumps(job.simulation_params), # Pass simulation params as JSON string
+            json.dumps(job.visualization_params), # Pass visualization params as JSON string
+            "--stage", stage,
+            "--output_dir", job.output_dir,
+            *extra_args,
+        ]
+        # Hand the stage the warm workers that are up right now; it falls back to exec'ing Blender without them
+        if stage == "blender" and blender_pool is not None and blender_pool.addresses():
+            command += ["--blender-workers", ",".join(blender_pool.addresses())]
+        return command
+    return build_command
+
+def _job_output_urls(job_id):
+    # Mirrors the layout written by run_full_pipeline.py --output_dir
+    output_frames_path = f"/outputs/jobs/{job_id}/frames"
+    gif_output_path = f"/outputs/jobs/{job_id}/my_custom_fluid_vfx.gif"
+    return output_frames_path, f"http://localhost:{SERVER_PORT}{gif_output_path}"
+
+def _collect_job_artifacts(job):
+    artifacts = {
+        "log": job.log_path,
+        "fluid_data": os.path.join(job.output_dir, "fluid_data"),
+        "simulation_result": os.path.join(job.output_dir, "simulation_result.json"),
+        "frames": os.path.join(job.output_dir, "frames"),
+        "gif": os.path.join(job.output_dir, "my_custom_fluid_vfx.gif"),
+    }
+    return {kind: path for kind, path in artifacts.items() if os.path.exists(path)}
+
+def _emit_pipeline_event(event_name, payload):
+    if event_name == 'pipeline_status' and payload.get("status") == "completed":
+        payload["output_url"], payload["gif_url"] = _job_output_urls(payload["job_id"])
+    if event_name == 'pipeline_log':
+        logger.info(f"PIPELINE[{payload['job_id']}]: {payload['message']}") # Log pipeline output
+    socketio.emit(event_name, payload)
+
+# Warm in-process streaming LLM client for parameter inference, backed by the shared response cache
+llm_cache = LLMResponseCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+llm_service = LLMInferenceService(
+    llm_type=os.getenv("EFFECT_STOKES_LLM_TYPE", "ollama"),
+    model_name=os.getenv("EFFECT_STOKES_LLM_MODEL", "llama2"),
+    base_url=os.getenv("EFFECT_STOKES_LLM_BASE_URL", "http://localhost:11434"),
+    pool_size=int(os.getenv("EFFECT_STOKES_LLM_POOL_SIZE", "2")),
+    timeout=float(os.getenv("EFFECT_STOKES_LLM_TIMEOUT", "120")),
+    cache=llm_cache,
+    deterministic=LLM_DETERMINISTIC,
+)
+
+os.makedirs(JOBS_OUTPUT_DIR, exist_ok=True)
+job_store = JobStore(JOB_DB_PATH)
+# Started with the server (see __main__); the streaming stage drives its own Blender process
+blender_pool = None
+if BLENDER_POOL_SIZE > 0 and not STREAMING_PIPELINE:
+    blender_pool = BlenderWorkerPool(BLENDER_EXECUTABLE, size=BLENDER_POOL_SIZE,
+                                     max_jobs_per_worker=BLENDER_WORKER_MAX_JOBS)
+if STREAMING_PIPELINE:
+    # The overlapped stage runs Blender for its whole duration, so it takes the Blender limit
+    pipeline_stages = [("streaming", _pipeline_stage_command("all", ["--stream"]))]
+    pipeline_stage_limits = {"streaming": MAX_BLENDER_JOBS}
+else:
+    pipeline_stages = [
+        ("simulation", _pipeline_stage_command("simulation")),
+        ("blender", _pipeline_stage_command("blender")),
+    ]
+    pipeline_stage_limits = {"simulation": MAX_SIMULATION_JOBS, "blender": MAX_BLENDER_JOBS}
+scheduler = JobScheduler(
+    stages=pipeline_stages,
+    output_root=JOBS_OUTPUT_DIR,
+    max_workers=MAX_PIPELINE_WORKERS,
+    stage_limits=pipeline_stage_limits,
+    cwd=PROJECT_ROOT,
+    on_event=_emit_pipeline_event,
+    store=job_store,
+    collect_artifacts=_collect_job_artifacts,
+    # A cancelled 'blender' stage keeps its slot until the warm worker it used has stopped rendering
+    stage_drains={"blender": lambda job: blender_pool.wait_until_released(job.job_id)} if blender_pool else None,
+)
 
 # Utility function for parameter validation (detailed)
 def _validate_type(value, expected_type, param_name):
@@ -93,11 +210,12 @@ def validate_params(params):
         "grid_resolution": {"type": list, "len": 2, "item_type": int, "min_item": 20, "max_item": 200},
         "time_steps": {"type": int, "min": 10, "max": 2000},
         "viscosity": {"type": float, "min": 0.001, "max": 0.1},
-        "initial_shape_type": {"type": str, "allowed": ["vortex", "crescent", "circle_burst"]},
+        "initial_shape_type": {"type": str, "allowed": ["vortex", "crescent", "circle_burst", "ring", "slash", "bitmap"]},
         "initial_shape_position": {"type": list, "len": 2, "item_type": float, "min_item": 0.0, "max_item": 2.0},
         "initial_shape_size": {"type": float, "min": 0.1, "max": 1.0},
         "initial_velocity": {"type": list, "len": 2, "item_type": float, "min_item": -5.0, "max_item": 5.0},
         "boundary_conditions": {"type": str, "allowed": ["no_slip_walls"]}, # Currently fixed
+        "solver": {"type": str, "allowed": list(SOLVER_ENGINES)},
         "vortex_strength": {"type": float, "min": 0.0, "max": 5.0},
         "source_strength": {"type": float, "min": 0.0, "max": 5.0},
     }
@@ -128,6 +246,16 @@ def validate_params(params):
         elif rules["type"] == str:
             if "allowed" in rules and value not in rules["allowed"]:
                 return False, f"Parameter '{param}' must be one of {rules['allowed']}"
+
+    # A bitmap shape has nothing to draw without its mask; catch that here rather than mid-simulation
+    if sim_params.get("initial_shape_type") == "bitmap":
+        is_valid, msg = validate_bitmap(sim_params.get("shape_params"), "shape_params")
+        if not is_valid: return False, msg
+    emitters = sim_params.get("emitters")
+    for index, emitter in enumerate(emitters if isinstance(emitters, list) else []):
+        if isinstance(emitter, dict) and emitter.get("type") == "bitmap":
+            is_valid, msg = validate_bitmap(emitter, f"emitters[{index}]")
+            if not is_valid: return False, msg
     
     # Visualization Parameters Validation
     viz_validation_rules = {
@@ -166,156 +294,128 @@ def validate_params(params):
     return True, None
 
 
-# API Endpoint to run the pipeline
+# API Endpoint to run the pipeline (queues a job; several jobs may run at once)
 @app.route('/api/run_pipeline', methods=['POST'])
 def run_pipeline():
-    global pipeline_process
-    if pipeline_process and pipeline_process.poll() is None:
-        return jsonify({"status": "error", "message": "Pipeline is already running."}), 400
-
     params = request.get_json()
     is_valid, error_msg = validate_params(params)
     if not is_valid:
         return jsonify({"status": "error", "message": error_msg}), 400
 
-    # Extract params for the pipeline script
-    simulation_params = params.get("simulation_params", {})
-    visualization_params = params.get("visualization_params", {})
-
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    pipeline_script = os.path.join(project_root, 'src', 'run_full_pipeline.py')
-    venv_python = os.path.join(project_root, 'venv', 'bin', 'python3')
-
-    # Construct the command to run the pipeline
-    command = [
-        venv_python,
-        pipeline_script,
-        json.dumps(simulation_params), # Pass simulation params as JSON string
-        json.dumps(visualization_params) # Pass visualization params as JSON string
-    ]
-
-    def run_in_thread(cmd):
-        global pipeline_process
-        try:
-            socketio.emit('pipeline_status', {"type": "status", "status": "running", "message": "Pipeline started.", "current_step": "initial"})
-            pipeline_process = subprocess.Popen(
-                cmd,
-                cwd=project_root,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True, # Decode stdout/stderr as text
-                bufsize=1, # Line-buffered
-                universal_newlines=True # Ensure cross-platform line endings
-            )
-
-            for line in iter(pipeline_process.stdout.readline, ''):
-                stripped_line = line.strip()
-                socketio.emit('pipeline_log', {"type": "log", "message": stripped_line})
-                logger.info(f"PIPELINE: {stripped_line}") # Log pipeline output
-                frame = 0
-                sample = 0
-                total_samples = 0
-                percentage = 0.0
-                # Basic progress parsing (can be enhanced)
-                if "Fra:" in line and "Mem:" in line:
-                    match = re.search(r"Fra:(\d+).*Sample (\d+)/(\d+)", line)
-                    if match:
-                        frame = int(match.group(1))
-                        sample = int(match.group(2))
-                        total_samples = int(match.group(3))
-                        percentage = (sample / total_samples) * 100
-            socketio.emit('pipeline_status', {
-                            "type": "status", 
-                            "status": "running", 
-                            "message": f"Rendering frame {frame}...", 
-                            "current_step": "rendering",
-                            "progress": percentage,
-                            "current_frame": frame,
-                            "total_samples": total_samples,
-                            "current_sample": sample
-                        })
-
-            pipeline_process.wait()
-            if pipeline_process.returncode == 0:
-                # Assuming run_full_pipeline.py prints the GIF path as the last line
-                # Or we can infer it based on the blend_file_name_without_ext
-                output_dir_name = "my_custom_fluid_vfx" # Default name from pipeline
-                output_frames_path = f"/outputs/temp_frames/{output_dir_name}"
-                gif_output_path = f"/outputs/{output_dir_name}.gif"
-                full_gif_url = f"http://localhost:5000{gif_output_path}"
-                socketio.emit('pipeline_status', {"type": "status", "status": "completed", "message": "Pipeline completed successfully.", "current_step": "completed", "output_url": output_frames_path, "gif_url": full_gif_url})
-            else:
-                socketio.emit('pipeline_status', {"type": "status", "status": "failed", "message": f"Pipeline failed with exit code {pipeline_process.returncode}", "current_step": "failed"})
-        except Exception as e:
-            socketio.emit('pipeline_status', {"type": "status", "status": "failed", "message": f"An error occurred: {e}", "current_step": "failed"})
-        finally:
-            pipeline_process = None
-
-    thread = threading.Thread(target=run_in_thread, args=(command,))
-    thread.daemon = True # Allow main program to exit even if thread is running
-    thread.start()
-
-    return jsonify({"status": "success", "message": "Pipeline execution initiated."}), 200
+    priority = params.get("priority", 0)
+    if not isinstance(priority, int):
+        return jsonify({"status": "error", "message": "Parameter 'priority' must be of type int"}), 400
+
+    job = scheduler.submit(
+        params.get("simulation_params", {}),
+        params.get("visualization_params", {}),
+        priority=priority
+    )
+    return jsonify({
+        "status": "success",
+        "message": "Pipeline execution initiated.",
+        "job_id": job.job_id,
+        "queue_position": scheduler.queue_position(job.job_id)
+    }), 200
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    status_filter = request.args.get("status")
+    limit = min(request.args.get("limit", 100, type=int), 1000)
+    offset = request.args.get("offset", 0, type=int)
+    jobs = [job.to_dict() for job in scheduler.list_jobs(status=status_filter, limit=limit, offset=offset)]
+    return jsonify({
+        "status": "success",
+        "jobs": jobs,
+        "total": job_store.count_jobs(status=status_filter),
+        "limit": limit,
+        "offset": offset
+    }), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = scheduler.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job '{job_id}' not found."}), 404
+    job_info = job.to_dict()
+    job_info["queue_position"] = scheduler.queue_position(job_id)
+    job_info["stages"] = job_store.get_stages(job_id)
+    job_info["artifacts"] = job_store.get_artifacts(job_id)
+    if job.status == "completed":
+        job_info["output_url"], job_info["gif_url"] = _job_output_urls(job_id)
+    return jsonify({"status": "success", "job": job_info}), 200
+
+@app.route('/api/jobs/<job_id>/log', methods=['GET'])
+def get_job_log(job_id):
+    job = scheduler.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job '{job_id}' not found."}), 404
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 500, type=int)
+    lines = job.read_log(offset=offset, limit=limit)
+    return jsonify({"status": "success", "job_id": job_id, "offset": offset, "lines": lines}), 200
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = scheduler.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job '{job_id}' not found."}), 404
+    if not scheduler.cancel(job_id):
+        return jsonify({"status": "info", "message": f"Job '{job_id}' is already {job.status}."}), 200
+    return jsonify({"status": "success", "message": f"Job '{job_id}' cancelled."}), 200
+
+@app.route('/api/blender_workers', methods=['GET'])
+def get_blender_workers():
+    if blender_pool is None:
+        return jsonify({"status": "success", "enabled": False, "workers": []}), 200
+    return jsonify({"status": "success", "enabled": True, "workers": blender_pool.status(),
+                    "restarts": blender_pool.restarts}), 200
 
 @app.route('/api/get_llm_inferred_params', methods=['POST'])
 def get_llm_inferred_params():
     params = request.get_json()
     effect_description = params.get("effect_description", {"vfx_type": "swirling vortex", "style": "blue liquid"})
 
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    venv_python = os.path.join(project_root, 'venv', 'bin', 'python3')
-
-    command = [
-        venv_python,
-        "-m", "src.run_full_simulation", # Run as a module
-        "--infer_only",
-        json.dumps(effect_description) # Pass effect_description as JSON string
-    ]
-
     try:
-        # Get the current environment and set PYTHONPATH for the subprocess
-        env = os.environ.copy()
-        env['PYTHONPATH'] = project_root
-
-        process = subprocess.run(
-            command,
-            cwd=project_root,
-            capture_output=True,
-            text=True,
-            check=True,
-            env=env # Pass the modified environment
-        )
-        logger.info(f"stdout from simulation script: {process.stdout}")
-        logger.error(f"stderr from simulation script: {process.stderr}")
-        output = json.loads(process.stdout)
+        simulation_params, visualization_params = llm_service.infer(effect_description)
         return jsonify({
             "status": "success",
-            "simulation_params": output.get("simulation_params"),
-            "visualization_params": output.get("visualization_params")
+            "simulation_params": simulation_params,
+            "visualization_params": visualization_params
         }), 200
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error inferring parameters: {e.stderr}")
-        return jsonify({"status": "error", "message": f"Failed to infer parameters: {e.stderr}"}), 500
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing JSON from simulation script: {e}")
-        return jsonify({"status": "error", "message": "Failed to parse parameters from simulation script."}), 500
+    except LLMInferenceTimeout as e:
+        logger.error(f"Timed out inferring parameters: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 504
+    except LLMInferenceError as e:
+        logger.error(f"Error parsing parameters from LLM response: {e}")
+        return jsonify({"status": "error", "message": f"Failed to parse parameters from LLM response: {e}"}), 500
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}")
-        return jsonify({"status": "error", "message": "An internal server error occurred."}), 500
+        logger.error(f"Error inferring parameters: {e}")
+        return jsonify({"status": "error", "message": f"Failed to infer parameters: {e}"}), 500
 
-def _create_frame_image(u, v, x, y, frame_idx) -> str:
+def _create_frame_image(u, v, x, y, frame_idx, glyph_placer=None, streamlines=None) -> str:
     """
     Generates a single frame image (quiver plot) from fluid data and returns it as a base64 string.
+    With a GlyphPlacer, arrows go where the flow is most active instead of on a uniform stride.
+    streamlines (a src.streamlines.PolylineSet) are drawn under the arrows.
     """
     fig, ax = plt.subplots(figsize=(6, 6))
-    
-    # Downsample the data for a clearer plot
-    step = max(1, len(x) // 20) # Aim for about 20 arrows
-    x_s, y_s = x[::step], y[::step]
-    u_s, v_s = u[::step, ::step], v[::step, ::step]
-    X_s, Y_s = np.meshgrid(x_s, y_s)
 
-    ax.quiver(X_s, Y_s, u_s.T, v_s.T, scale=1, scale_units='xy') # Transpose u and v for correct orientation
+    if streamlines is not None:
+        ax.add_collection(LineCollection(streamlines.segments(), colors='tab:blue', linewidths=0.6, alpha=0.6))
+
+    if glyph_placer is not None:
+        points = glyph_placer.place(u, v)
+        u_p, v_p = glyph_placer.velocities(u, v)
+        ax.quiver(points[:, 0], points[:, 1], u_p, v_p, scale=1, scale_units='xy')
+    else:
+        # Downsample the data for a clearer plot
+        step = max(1, len(x) // 20) # Aim for about 20 arrows
+        x_s, y_s = x[::step], y[::step]
+        u_s, v_s = u[::step, ::step], v[::step, ::step]
+        X_s, Y_s = np.meshgrid(x_s, y_s)
+
+        ax.quiver(X_s, Y_s, u_s, v_s, scale=1, scale_units='xy') # Fields are (ny, nx), indexed [j, i] like X_s, Y_s
     ax.set_aspect('equal')
     ax.set_title(f'Fluid Velocity Preview - Frame {frame_idx}')
     ax.set_xlabel('X')
@@ -357,6 +457,13 @@ def run_preview():
             return jsonify({"status": "error", "message": result.get("message", "Simulation failed.")}), 500
 
         b64_images = []
+        # One placer for the whole preview keeps adaptive arrows coherent from frame to frame
+        glyph_placer = None
+        adaptive_placement = preview_settings.get("arrow_placement", "uniform") == "adaptive"
+        # Optional streamline overlay, traced from the same seeds every frame so the lines morph rather than jump
+        tracer = None
+        streamline_seeds = None
+        show_streamlines = preview_settings.get("streamlines", False)
         for i in range(num_frames_for_preview):
             frame_fluid_data_path = os.path.join(output_dir, f"fluid_data_frame_{i:04d}.npz")
             if not os.path.exists(frame_fluid_data_path):
@@ -366,7 +473,16 @@ def run_preview():
             data = np.load(frame_fluid_data_path)
             u, v, x, y = data['u'], data['v'], data['x'], data['y']
             
-            b64_image = _create_frame_image(u, v, x, y, i)
+            if adaptive_placement and glyph_placer is None:
+                glyph_placer = GlyphPlacer(x, y, budget=preview_settings.get("arrow_budget", 400),
+                                           importance=preview_settings.get("arrow_importance", "speed"))
+            streamlines = None
+            if show_streamlines:
+                if tracer is None:
+                    tracer = FlowTracer(x, y)
+                    streamline_seeds = seed_points(x, y, preview_settings.get("streamline_seeds", 150))
+                streamlines = tracer.streamlines(u, v, streamline_seeds, steps=preview_settings.get("streamline_steps", 60))
+            b64_image = _create_frame_image(u, v, x, y, i, glyph_placer=glyph_placer, streamlines=streamlines)
             b64_images.append(b64_image)
 
         return jsonify({
@@ -386,21 +502,23 @@ def run_preview():
             shutil.rmtree(output_dir)
             logger.info(f"Removed temporary directory: {output_dir}")
 
-# API Endpoint to stop the pipeline
+# API Endpoint to stop the pipeline (a single job if job_id is given, otherwise every active job)
 @app.route('/api/stop_pipeline', methods=['POST'])
 def stop_pipeline():
-    global pipeline_process
-    if pipeline_process and pipeline_process.poll() is None:
-        try:
-            # Terminate the process group to ensure all child processes are killed
-            os.killpg(os.getpgid(pipeline_process.pid), subprocess.signal.SIGTERM)
-            pipeline_process.wait(timeout=5) # Give it some time to terminate
-            socketio.emit('pipeline_status', {"type": "status", "status": "stopped", "message": "Pipeline stopped by user.", "current_step": "stopped"})
-            return jsonify({"status": "success", "message": "Pipeline stopped."}), 200
-        except Exception as e:
-            return jsonify({"status": "error", "message": f"Failed to stop pipeline: {e}"}), 500
-    else:
+    params = request.get_json(silent=True) or {}
+    job_id = params.get("job_id")
+    if job_id:
+        return cancel_job(job_id)
+
+    active_jobs = scheduler.list_jobs(status="running") + scheduler.list_jobs(status="queued")
+    if not active_jobs:
         return jsonify({"status": "info", "message": "No pipeline is currently running."}), 200
+    try:
+        for job in active_jobs:
+            scheduler.cancel(job.job_id)
+        return jsonify({"status": "success", "message": "Pipeline stopped."}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Failed to stop pipeline: {e}"}), 500
 
 # Serve static files (rendered images)
 @app.route('/outputs/<path:filename>')
@@ -421,4 +539,12 @@ if __name__ == '__main__':
         print("Eventlet not found. Falling back to default threading mode for SocketIO.")
         print("Real-time performance might be affected. Install with: pip install eventlet")
 
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+    debug_mode = True
+    # With the debug reloader the script runs twice; only the serving child recovers jobs
+    if not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        scheduler.recover()
+        if blender_pool is not None:
+            ready = blender_pool.start()
+            logger.info(f"{ready}/{blender_pool.size} warm Blender workers ready.")
+
+    socketio.run(app, host='0.0.0.0', port=SERVER_PORT, debug=debug_mode)
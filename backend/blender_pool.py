@@ -0,0 +1,192 @@
+import os
+import time
+import logging
+import threading
+import subprocess
+from src.blender_worker import LISTENING_PREFIX, DEFAULT_HOST, ping_worker
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WORKER_SERVER_SCRIPT = os.path.join(PROJECT_ROOT, "blender_worker_server.py")
+
+
+class BlenderWorker:
+    """One warm Blender process serving render jobs on a local port."""
+
+    def __init__(self, index, process):
+        self.index = index
+        self.process = process
+        self.port = None
+        self.ready = threading.Event()
+        self.started_at = time.time()
+
+    @property
+    def address(self):
+        return f"{DEFAULT_HOST}:{self.port}"
+
+    def alive(self):
+        return self.process.poll() is None
+
+
+class BlenderWorkerPool:
+    """
+    Keeps warm Blender processes running blender_worker_server.py.
+
+    Pipeline stages claim an idle worker over its socket (see
+    src.blender_worker.render_with_worker) instead of exec'ing Blender per job,
+    so a job skips Blender's startup, factory settings and add-on
+    initialisation. The pool only owns the processes: it starts them, forwards
+    their output to the log, and replaces any worker that exits, whether it
+    crashed or retired itself after `max_jobs_per_worker` jobs.
+
+    Args:
+        blender_executable (str): Path to the Blender binary.
+        size (int): Number of warm workers.
+        script (str): Worker server script passed to Blender's --python.
+        max_jobs_per_worker (int): Jobs before a worker restarts, bounding leaked Blender memory (0: never).
+        startup_timeout (float): Seconds to wait for a worker to start listening.
+        monitor_interval (float): Seconds between checks for exited workers.
+        env (dict): Environment for the worker processes.
+    """
+
+    def __init__(self, blender_executable, size=1, script=WORKER_SERVER_SCRIPT, max_jobs_per_worker=50,
+                 startup_timeout=60.0, monitor_interval=2.0, env=None):
+        self.blender_executable = blender_executable
+        self.size = max(1, int(size))
+        self.script = script
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.startup_timeout = startup_timeout
+        self.monitor_interval = monitor_interval
+        self.env = env
+        self.workers = []
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._monitor = None
+
+    def _command(self):
+        return [self.blender_executable, "--background", "--python", self.script, "--",
+                "--port", "0", "--max-jobs", str(self.max_jobs_per_worker)]
+
+    def _follow_output(self, worker):
+        for line in worker.process.stdout:
+            line = line.rstrip()
+            if not worker.ready.is_set() and line.startswith(LISTENING_PREFIX):
+                worker.port = int(line[len(LISTENING_PREFIX):])
+                worker.ready.set()
+                logger.info(f"Blender worker {worker.index} listening on {worker.address}")
+            elif line:
+                logger.debug(f"BLENDER[{worker.index}]: {line}")
+
+    def _launch(self, index):
+        process = subprocess.Popen(self._command(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                   encoding='utf-8', errors='replace', cwd=PROJECT_ROOT, env=self.env)
+        worker = BlenderWorker(index, process)
+        threading.Thread(target=self._follow_output, args=(worker,), name=f"blender-worker-{index}-output",
+                         daemon=True).start()
+        return worker
+
+    def start(self):
+        """
+        Launches the workers and waits until they listen.
+
+        Returns:
+            int: Number of workers that came up. Stages fall back to exec'ing Blender when it is 0.
+        """
+        with self._lock:
+            try:
+                for index in range(self.size):
+                    self.workers.append(self._launch(index))
+            except OSError as e:
+                # No usable Blender binary: stages exec Blender themselves (and report the error there)
+                logger.warning(f"Blender workers could not be started ({e}); rendering without a warm pool.")
+                for worker in self.workers:
+                    worker.process.kill()
+                self.workers = []
+                return 0
+        deadline = time.monotonic() + self.startup_timeout
+        for worker in self.workers:
+            while not worker.ready.wait(timeout=0.1):
+                if not worker.alive() or time.monotonic() > deadline:
+                    break
+            if not worker.ready.is_set():
+                logger.warning(f"Blender worker {worker.index} did not start (exit code {worker.process.poll()}).")
+        self._monitor = threading.Thread(target=self._monitor_loop, name="blender-pool-monitor", daemon=True)
+        self._monitor.start()
+        return len(self.addresses())
+
+    def _monitor_loop(self):
+        while not self._stopped.wait(self.monitor_interval):
+            with self._lock:
+                for position, worker in enumerate(self.workers):
+                    if worker.alive() or self._stopped.is_set():
+                        continue
+                    # Don't spin on a binary that cannot start at all
+                    if not worker.ready.is_set() and time.time() - worker.started_at < self.startup_timeout:
+                        continue
+                    logger.info(f"Blender worker {worker.index} exited with {worker.process.poll()}; restarting.")
+                    self.workers[position] = self._launch(worker.index)
+                    self.restarts += 1
+
+    def addresses(self):
+        """Addresses of the workers that are up, for the stages' --blender-workers option."""
+        with self._lock:
+            return [worker.address for worker in self.workers if worker.ready.is_set() and worker.alive()]
+
+    def wait_until_released(self, job_id, timeout=300.0, poll_interval=0.2):
+        """
+        Waits until no worker is still running a render for `job_id` (a
+        cancelled stage's job stops at its next frame). Workers that are still
+        on it after `timeout` are terminated and replaced by the monitor, so
+        they cannot outlive the stage's Blender slot.
+
+        Returns:
+            bool: True if the workers let go of the job by themselves.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                workers = [worker for worker in self.workers if worker.ready.is_set() and worker.alive()]
+            holding = []
+            for worker in workers:
+                pong = ping_worker(worker.address)
+                if pong and pong.get("busy") and pong.get("job_id") == job_id:
+                    holding.append(worker)
+            if not holding:
+                return True
+            if time.monotonic() > deadline:
+                for worker in holding:
+                    logger.warning(f"Blender worker {worker.index} still renders cancelled job {job_id}; terminating it.")
+                    worker.process.terminate()
+                return False
+            time.sleep(poll_interval)
+
+    def status(self):
+        """Health snapshot of every worker (pings each live one)."""
+        with self._lock:
+            workers = list(self.workers)
+        snapshot = []
+        for worker in workers:
+            pong = ping_worker(worker.address) if worker.ready.is_set() and worker.alive() else None
+            snapshot.append({
+                "index": worker.index,
+                "address": worker.address if worker.ready.is_set() else None,
+                "alive": worker.alive(),
+                "busy": pong.get("busy") if pong else None,
+                "jobs_done": pong.get("jobs_done") if pong else None,
+            })
+        return snapshot
+
+    def shutdown(self, timeout=5.0):
+        self._stopped.set()
+        with self._lock:
+            workers = list(self.workers)
+        for worker in workers:
+            if worker.alive():
+                worker.process.terminate()
+        for worker in workers:
+            try:
+                worker.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
@@ -0,0 +1,627 @@
+import os
+import re
+import sys
+import time
+import uuid
+import heapq
+import itertools
+import signal
+import logging
+import threading
+import subprocess
+from collections import deque
+from src.progress import parse_progress_line
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_ORPHANED = "orphaned"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED, JOB_ORPHANED)
+# Stage processes find their job's id here (e.g. to tag work handed to a warm Blender worker)
+JOB_ID_ENV = "EFFECT_STOKES_JOB_ID"
+
+# Blender prints lines like "Fra:12 Mem:... | Sample 64/128"
+BLENDER_PROGRESS_RE = re.compile(r"Fra:(\d+).*Sample (\d+)/(\d+)")
+
+STAGE_RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stage_runner.py")
+LOG_POLL_INTERVAL = 0.1 # Seconds between log reads when a stage is quiet
+MAX_LOG_LINES_PER_UPDATE = 200 # Older lines in a burst are dropped from the live feed (the log file keeps them)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Job:
+    """A single pipeline run with its own output directory and log."""
+
+    def __init__(self, job_id, simulation_params, visualization_params, priority, output_dir):
+        self.job_id = job_id
+        self.simulation_params = simulation_params
+        self.visualization_params = visualization_params
+        self.priority = priority
+        self.output_dir = output_dir
+        self.log_path = os.path.join(output_dir, "pipeline.log")
+
+        self.status = JOB_QUEUED
+        self.current_step = "queued"
+        self.current_stage = None
+        self.message = "Job queued."
+        self.progress = 0.0
+        self.current_frame = 0
+        self.current_sample = 0
+        self.total_samples = 0
+        self.progress_stage = None
+        self.progress_step = 0
+        self.progress_total = None
+        self.eta = None
+        self.returncode = None
+        self.pid = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.process = None
+        self.cancel_requested = False
+        self.recent_log = deque(maxlen=200)
+
+        # Live updates waiting for the next throttled flush
+        self.pending_log = deque(maxlen=MAX_LOG_LINES_PER_UPDATE)
+        self.dropped_log_lines = 0
+        self.progress_dirty = False
+        self.last_flush = 0.0
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuilds a Job from a JobStore row."""
+        job = cls(record["job_id"], record["simulation_params"], record["visualization_params"],
+                  record["priority"], record["output_dir"])
+        job.status = record["status"]
+        job.current_step = record["current_step"]
+        job.current_stage = record["current_stage"]
+        job.message = record["message"]
+        job.progress = record["progress"]
+        job.returncode = record["returncode"]
+        job.pid = record["pid"]
+        job.created_at = record["created_at"]
+        job.started_at = record["started_at"]
+        job.finished_at = record["finished_at"]
+        return job
+
+    def exit_code_path(self, stage_name):
+        return os.path.join(self.output_dir, f"{stage_name}.exitcode")
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "current_step": self.current_step,
+            "message": self.message,
+            "priority": self.priority,
+            "progress": self.progress,
+            "current_frame": self.current_frame,
+            "current_sample": self.current_sample,
+            "total_samples": self.total_samples,
+            "progress_stage": self.progress_stage,
+            "progress_step": self.progress_step,
+            "progress_total": self.progress_total,
+            "eta": self.eta,
+            "returncode": self.returncode,
+            "output_dir": self.output_dir,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def read_log(self, offset=0, limit=500):
+        """Returns up to `limit` log lines starting at line `offset`."""
+        if not os.path.exists(self.log_path):
+            return []
+        lines = []
+        with open(self.log_path, "r", encoding="utf-8", errors="replace") as f:
+            for line_no, line in enumerate(f):
+                if line_no < offset:
+                    continue
+                if len(lines) >= limit:
+                    break
+                lines.append(line.rstrip("\n"))
+        return lines
+
+
+class JobScheduler:
+    """
+    Runs pipeline jobs on a bounded pool of worker threads.
+
+    Jobs are taken from a priority queue (higher priority first, FIFO within the
+    same priority). Each job runs a fixed list of stages; every stage is a
+    subprocess command and holds a per-stage semaphore while it runs, so the
+    number of concurrent simulations and Blender processes can be limited
+    independently of the worker count.
+
+    Stage processes write straight to the job's log file through
+    stage_runner.py, which also records the exit code. With a JobStore attached,
+    recover() can therefore re-attach to stages that outlived a server restart.
+
+    Args:
+        stages (list): (stage_name, build_command) pairs. build_command(job) returns the argv list.
+        output_root (str): Directory under which each job gets its own output directory.
+        max_workers (int): Number of jobs that may be in flight at once.
+        stage_limits (dict): Maximum concurrent processes per stage name. Stages not listed are unlimited.
+        cwd (str): Working directory for stage commands.
+        env (dict): Environment for stage commands.
+        on_event (callable): on_event(event_name, payload) for 'pipeline_status' / 'pipeline_log' updates.
+                             Progress and log lines are coalesced and emitted at most once per
+                             `update_interval` seconds per job.
+        update_interval (float): Minimum seconds between live updates for one job.
+        store (JobStore): Optional persistent store. Finished jobs are then served from the store
+                          instead of being kept in memory.
+        collect_artifacts (callable): collect_artifacts(job) -> {kind: path}, recorded when a job completes.
+        stage_drains (dict): drain(job) per stage name, called after the stage process exits and before its
+                             slot is released. It returns once work the stage handed to another process
+                             (e.g. a warm Blender worker) has stopped, so a cancelled stage does not free
+                             its slot while that work is still running.
+    """
+
+    def __init__(self, stages, output_root, max_workers=2, stage_limits=None, cwd=None, env=None, on_event=None,
+                 update_interval=0.5, store=None, collect_artifacts=None, stage_drains=None):
+        self.stages = stages
+        self.output_root = output_root
+        self.max_workers = max(1, int(max_workers))
+        self.cwd = cwd
+        self.env = dict(env if env is not None else os.environ)
+        self.env.setdefault("PYTHONUNBUFFERED", "1") # Stage output goes to a file; keep it line-timely
+        self.on_event = on_event
+        self.update_interval = update_interval
+        self.store = store
+        self.collect_artifacts = collect_artifacts
+        self.stage_drains = stage_drains or {}
+
+        stage_limits = stage_limits or {}
+        self.stage_semaphores = {
+            name: threading.BoundedSemaphore(max(1, int(limit)))
+            for name, limit in stage_limits.items()
+        }
+
+        self.jobs = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._workers = []
+        self._shutdown = False
+
+    # --- Public API ---
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"pipeline-worker-{i}")
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+
+    def shutdown(self):
+        with self._not_empty:
+            self._shutdown = True
+            self._not_empty.notify_all()
+
+    def submit(self, simulation_params, visualization_params, priority=0):
+        job_id = uuid.uuid4().hex[:12]
+        output_dir = os.path.join(self.output_root, job_id)
+        os.makedirs(output_dir, exist_ok=True)
+        job = Job(job_id, simulation_params, visualization_params, int(priority), output_dir)
+        if self.store is not None:
+            self.store.insert_job(job)
+
+        self._enqueue(job)
+        self.start()
+        self._emit_status(job)
+        return job
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            record = self.store.get_job(job_id)
+            if record is not None:
+                job = Job.from_record(record)
+        return job
+
+    def list_jobs(self, status=None, limit=100, offset=0):
+        if self.store is not None:
+            # Live in-memory jobs carry fresher progress than the stored row
+            return [self.jobs.get(record["job_id"]) or Job.from_record(record)
+                    for record in self.store.list_jobs(status=status, limit=limit, offset=offset)]
+        jobs = sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+        if status:
+            jobs = [j for j in jobs if j.status == status]
+        return jobs[offset:offset + limit]
+
+    def queue_position(self, job_id):
+        """1-based position of a queued job, or None if it is not waiting."""
+        with self._lock:
+            waiting = [entry for entry in sorted(self._queue)
+                       if entry[2] in self.jobs and self.jobs[entry[2]].status == JOB_QUEUED]
+        for position, entry in enumerate(waiting, start=1):
+            if entry[2] == job_id:
+                return position
+        return None
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if the job is unknown or already finished."""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+
+        with self._lock:
+            job.cancel_requested = True
+            queued = job.status == JOB_QUEUED
+            if queued:
+                # Claimed under the lock so no worker starts the job; the queue entry is skipped when popped
+                job.status = JOB_CANCELLED
+            pid = job.pid
+
+        if queued:
+            # Persisting and emitting happen outside the lock so they never hold up the workers
+            self._finish(job, JOB_CANCELLED, "Job cancelled by user.")
+            return True
+        if _pid_alive(pid):
+            self._terminate(pid)
+        return True
+
+    def recover(self):
+        """
+        Restores unfinished jobs from the store after a restart.
+
+        Queued jobs are queued again. A job that was running is re-attached if its
+        stage process is still alive; if the process already exited, its recorded
+        exit code decides whether the job continues. Running jobs whose stage
+        left no exit code behind are marked orphaned.
+        """
+        if self.store is None:
+            return {"requeued": 0, "reattached": 0, "orphaned": 0}
+
+        summary = {"requeued": 0, "reattached": 0, "orphaned": 0}
+        for record in self.store.jobs_with_status((JOB_QUEUED, JOB_RUNNING)):
+            job = Job.from_record(record)
+            if job.status == JOB_QUEUED:
+                self._enqueue(job)
+                summary["requeued"] += 1
+                continue
+
+            stage_name = job.current_stage
+            stage_known = stage_name in [name for name, _ in self.stages]
+            if stage_known and (_pid_alive(job.pid) or os.path.exists(job.exit_code_path(stage_name))):
+                self.jobs[job.job_id] = job
+                # Count the surviving process against its stage limit before requeued jobs can start that stage
+                semaphore = self.stage_semaphores.get(stage_name)
+                holds_slot = semaphore is not None and semaphore.acquire(blocking=False)
+                worker = threading.Thread(target=self._resume_job, args=(job, holds_slot),
+                                          name=f"pipeline-reattach-{job.job_id}")
+                worker.daemon = True
+                worker.start()
+                summary["reattached"] += 1
+            else:
+                self._finish(job, JOB_ORPHANED, "Job was interrupted by a server restart and could not be recovered.")
+                summary["orphaned"] += 1
+
+        if summary["requeued"]:
+            self.start()
+        logger.info(f"Job recovery: {summary}")
+        return summary
+
+    # --- Worker internals ---
+
+    def _enqueue(self, job):
+        with self._not_empty:
+            self.jobs[job.job_id] = job
+            heapq.heappush(self._queue, (-job.priority, next(self._sequence), job.job_id))
+            self._not_empty.notify()
+
+    def _next_job(self):
+        with self._not_empty:
+            while True:
+                while self._queue:
+                    _, _, job_id = heapq.heappop(self._queue)
+                    job = self.jobs.get(job_id)
+                    if job is not None and job.status == JOB_QUEUED:
+                        job.status = JOB_RUNNING
+                        job.started_at = time.time()
+                        return job
+                if self._shutdown:
+                    return None
+                self._not_empty.wait()
+
+    def _worker_loop(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            except Exception as e:
+                logger.exception(f"Job {job.job_id} crashed")
+                self._finish(job, JOB_FAILED, f"An error occurred: {e}")
+
+    def _run_job(self, job, first_stage=0):
+        job.message = "Pipeline started."
+        job.current_step = "initial"
+        self._persist(job, "status", "current_step", "message", "started_at")
+        self._emit_status(job)
+
+        for stage_name, build_command in self.stages[first_stage:]:
+            if job.cancel_requested:
+                # Cancelled before this stage started (e.g. between two stages): nothing was completed
+                self._finish(job, JOB_CANCELLED, "Pipeline stopped by user.")
+                return
+            returncode = self._run_stage(job, stage_name, build_command(job))
+            if not self._stage_succeeded(job, stage_name, returncode):
+                return
+
+        self._complete(job)
+
+    def _resume_job(self, job, holds_slot=False):
+        """
+        Follows a stage that survived a restart, then runs the stages after it.
+
+        The stage holds a slot of its stage semaphore while it is followed, like a
+        stage started by _run_stage. `holds_slot` is True if recover() already took it.
+        """
+        stage_names = [name for name, _ in self.stages]
+        stage_index = stage_names.index(job.current_stage)
+        stage_name = job.current_stage
+        semaphore = self.stage_semaphores.get(stage_name)
+        try:
+            try:
+                job.message = f"Re-attached to '{stage_name}' stage."
+                self._emit_status(job)
+                offset = os.path.getsize(job.log_path) if os.path.exists(job.log_path) else 0
+                if semaphore is not None and not holds_slot:
+                    semaphore.acquire()
+                    holds_slot = True
+                returncode = self._follow_stage(job, stage_name, lambda: None if _pid_alive(job.pid) else -1, offset)
+            finally:
+                self._release_stage(job, stage_name, semaphore if holds_slot else None)
+            if not self._stage_succeeded(job, stage_name, returncode):
+                return
+            if stage_index + 1 < len(self.stages):
+                self._run_job(job, first_stage=stage_index + 1)
+            else:
+                self._complete(job)
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} crashed after re-attaching")
+            self._finish(job, JOB_FAILED, f"An error occurred: {e}")
+
+    def _stage_succeeded(self, job, stage_name, returncode):
+        job.returncode = returncode
+        if self.store is not None:
+            self.store.record_stage_end(job.job_id, stage_name, returncode)
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED, "Pipeline stopped by user.")
+            return False
+        if returncode is None:
+            self._finish(job, JOB_ORPHANED, f"Stage '{stage_name}' exited without recording an exit code.")
+            return False
+        if returncode != 0:
+            self._finish(job, JOB_FAILED, f"Pipeline failed with exit code {returncode} during '{stage_name}'.")
+            return False
+        return True
+
+    def _complete(self, job):
+        job.progress = 100.0
+        if self.store is not None and self.collect_artifacts is not None:
+            for kind, path in self.collect_artifacts(job).items():
+                self.store.set_artifact(job.job_id, kind, path)
+        self._finish(job, JOB_COMPLETED, "Pipeline completed successfully.")
+
+    def _run_stage(self, job, stage_name, command):
+        semaphore = self.stage_semaphores.get(stage_name)
+        job.current_step = f"waiting_for_{stage_name}"
+        job.message = f"Waiting for a free '{stage_name}' slot."
+        if semaphore is not None:
+            # Poll so a cancel request is noticed while waiting for a slot
+            while not semaphore.acquire(timeout=0.5):
+                if job.cancel_requested:
+                    return -1
+        try:
+            exit_code_path = job.exit_code_path(stage_name)
+            if os.path.exists(exit_code_path):
+                os.remove(exit_code_path)
+
+            logger.info(f"Job {job.job_id} stage '{stage_name}': {' '.join(command)}")
+            with self._lock:
+                if job.cancel_requested:
+                    return -1
+                with open(job.log_path, "a", encoding="utf-8") as log_file:
+                    offset = log_file.tell()
+                    job.process = subprocess.Popen(
+                        [sys.executable, STAGE_RUNNER_SCRIPT, exit_code_path, "--"] + command,
+                        cwd=self.cwd,
+                        env=dict(self.env, **{JOB_ID_ENV: job.job_id}),
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        stdin=subprocess.DEVNULL,
+                        start_new_session=True,  # Own process group so cancel can kill the whole tree
+                    )
+                job.pid = job.process.pid
+                job.current_step = stage_name
+                job.current_stage = stage_name
+                job.message = f"Running '{stage_name}' stage."
+
+            if self.store is not None:
+                self.store.record_stage_start(job.job_id, stage_name)
+            self._persist(job, "current_step", "current_stage", "message", "pid")
+            self._emit_status(job)
+            return self._follow_stage(job, stage_name, job.process.poll, offset)
+        finally:
+            job.process = None
+            self._release_stage(job, stage_name, semaphore)
+
+    def _release_stage(self, job, stage_name, semaphore):
+        """Drains work the stage handed off, then frees its slot."""
+        drain = self.stage_drains.get(stage_name)
+        if drain is not None:
+            try:
+                drain(job)
+            except Exception as e:
+                logger.error(f"Job {job.job_id}: draining stage '{stage_name}' failed: {e}")
+        if semaphore is not None:
+            semaphore.release()
+
+    def _follow_stage(self, job, stage_name, poll, offset):
+        """
+        Tails the job log from `offset` until the stage process exits.
+
+        `poll` returns None while the process is running. The exit code is read
+        from the file written by stage_runner.py so the same path works for
+        processes this server did not start.
+        """
+        exited = False
+        partial = ""
+        with open(job.log_path, "r", encoding="utf-8", errors="replace") as log_file:
+            log_file.seek(offset)
+            while True:
+                chunk = log_file.readline()
+                if chunk:
+                    partial += chunk
+                    if partial.endswith("\n"):
+                        self._handle_log_line(job, partial.rstrip())
+                        partial = ""
+                    continue
+                if exited:
+                    break
+                # Read whatever was flushed before the exit on the next pass
+                exited = poll() is not None
+                if not exited:
+                    self._flush_updates(job)
+                    time.sleep(LOG_POLL_INTERVAL)
+        if partial:
+            self._handle_log_line(job, partial.rstrip())
+        self._flush_updates(job, force=True)
+
+        exit_code_path = job.exit_code_path(stage_name)
+        if os.path.exists(exit_code_path):
+            with open(exit_code_path) as f:
+                return int(f.read().strip())
+        return None
+
+    def _handle_log_line(self, job, line):
+        event = parse_progress_line(line)
+        if event is not None:
+            self._apply_progress_event(job, event)
+        else:
+            job.recent_log.append(line)
+            if len(job.pending_log) == job.pending_log.maxlen:
+                job.dropped_log_lines += 1
+            job.pending_log.append(line)
+            self._update_progress(job, line)
+        self._flush_updates(job)
+
+    def _apply_progress_event(self, job, event):
+        stage = event["stage"]
+        if stage != job.progress_stage:
+            # Stage changes are always worth an immediate update
+            job.last_flush = 0.0
+        job.progress_stage = stage
+        if event.get("status") == "started":
+            job.progress_step, job.progress_total, job.eta = 0, None, None
+            job.progress = 0.0
+            job.message = f"Stage '{stage}' started."
+        else:
+            job.progress_step = event.get("step", job.progress_step)
+            job.progress_total = event.get("total", job.progress_total)
+            job.eta = event.get("eta")
+            if job.progress_total:
+                job.progress = min(100.0, job.progress_step / job.progress_total * 100)
+            if "frame" in event:
+                job.current_frame = event["frame"]
+            job.message = f"{stage}: {job.progress_step}/{job.progress_total or '?'}"
+        job.progress_dirty = True
+
+    def _update_progress(self, job, line):
+        # Fallback for Blender's own sample counter; structured events take precedence per frame
+        if "Fra:" not in line:
+            return
+        match = BLENDER_PROGRESS_RE.search(line)
+        if match:
+            job.current_sample = int(match.group(2))
+            job.total_samples = int(match.group(3))
+            job.progress_dirty = True
+
+    def _flush_updates(self, job, force=False):
+        """Emits the coalesced log lines and latest progress if the job's update interval has passed."""
+        now = time.monotonic()
+        if not force and now - job.last_flush < self.update_interval:
+            return
+        if not job.pending_log and not job.progress_dirty:
+            return
+        job.last_flush = now
+
+        if job.pending_log:
+            lines = list(job.pending_log)
+            job.pending_log.clear()
+            payload = {"type": "log", "job_id": job.job_id, "message": "\n".join(lines), "lines": lines}
+            if job.dropped_log_lines:
+                payload["dropped_lines"] = job.dropped_log_lines
+                job.dropped_log_lines = 0
+            self._emit("pipeline_log", payload)
+        if job.progress_dirty:
+            job.progress_dirty = False
+            self._emit_status(job)
+
+    def _terminate(self, pid, timeout=5):
+        try:
+            pgid = os.getpgid(pid)
+            os.killpg(pgid, signal.SIGTERM)
+            deadline = time.time() + timeout
+            while _pid_alive(pid) and time.time() < deadline:
+                time.sleep(0.05)
+            if _pid_alive(pid):
+                os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _finish(self, job, status, message):
+        job.status = status
+        job.current_step = status
+        job.message = message
+        job.finished_at = time.time()
+        self._persist(job, "status", "current_step", "message", "progress", "returncode", "finished_at")
+        if self.store is not None:
+            # The store now holds the final state; keep memory bounded by active jobs
+            self.jobs.pop(job.job_id, None)
+        self._emit_status(job)
+
+    def _persist(self, job, *columns):
+        if self.store is None:
+            return
+        self.store.update_job(job.job_id, **{column: getattr(job, column) for column in columns})
+
+    # --- Events ---
+
+    def _emit_status(self, job):
+        payload = {"type": "status"}
+        payload.update(job.to_dict())
+        self._emit("pipeline_status", payload)
+
+    def _emit(self, event_name, payload):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(event_name, payload)
+        except Exception as e:
+            logger.error(f"Failed to emit '{event_name}': {e}")
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    simulation_params TEXT NOT NULL,
+    visualization_params TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    current_step TEXT,
+    current_stage TEXT,
+    message TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    returncode INTEGER,
+    pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+
+CREATE TABLE IF NOT EXISTS job_stages (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    exit_code INTEGER,
+    PRIMARY KEY (job_id, stage)
+);
+
+CREATE TABLE IF NOT EXISTS job_artifacts (
+    job_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (job_id, kind)
+);
+"""
+
+# Columns that may be changed through update_job()
+UPDATABLE_COLUMNS = (
+    "status", "current_step", "current_stage", "message", "progress",
+    "returncode", "pid", "started_at", "finished_at",
+)
+
+
+class JobStore:
+    """
+    SQLite-backed record of pipeline jobs, their stage timings and artifacts.
+
+    A single connection is shared between the Flask handlers and the scheduler
+    workers, serialized with a lock. WAL mode keeps readers from blocking the
+    worker that is writing a status update.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Jobs ---
+
+    def insert_job(self, job):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, priority, simulation_params, visualization_params, output_dir, "
+                "current_step, message, progress, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.job_id, job.status, job.priority,
+                    json.dumps(job.simulation_params), json.dumps(job.visualization_params),
+                    job.output_dir, job.current_step, job.message, job.progress, job.created_at,
+                ),
+            )
+
+    def update_job(self, job_id, **fields):
+        unknown = set(fields) - set(UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update job columns: {sorted(unknown)}")
+        if not fields:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_jobs(self, status=None, limit=100, offset=0):
+        query = "SELECT * FROM jobs"
+        args = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        args.extend([int(limit), int(offset)])
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def count_jobs(self, status=None):
+        with self._lock:
+            if status:
+                return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def jobs_with_status(self, statuses):
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                tuple(statuses),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    # --- Stages and artifacts ---
+
+    def record_stage_start(self, job_id, stage, started_at=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, started_at, finished_at, exit_code) "
+                "VALUES (?, ?, ?, NULL, NULL)",
+                (job_id, stage, started_at or time.time()),
+            )
+
+    def record_stage_end(self, job_id, stage, exit_code, finished_at=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_stages SET finished_at = ?, exit_code = ? WHERE job_id = ? AND stage = ?",
+                (finished_at or time.time(), exit_code, job_id, stage),
+            )
+
+    def get_stages(self, job_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, started_at, finished_at, exit_code FROM job_stages WHERE job_id = ? ORDER BY started_at",
+                (job_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_artifact(self, job_id, kind, path):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_artifacts (job_id, kind, path) VALUES (?, ?, ?)",
+                (job_id, kind, path),
+            )
+
+    def get_artifacts(self, job_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, path FROM job_artifacts WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["kind"]: row["path"] for row in rows}
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = dict(row)
+        record["simulation_params"] = json.loads(record["simulation_params"])
+        record["visualization_params"] = json.loads(record["visualization_params"])
+        return record
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from src.async_llm_interface import AsyncLLMInterface, LLMRequestError
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks whether the service loop has calls left and can stop
+IDLE_POLL_INTERVAL = 0.05
+
+
+class LLMInferenceError(Exception):
+    """The model gave no usable simulation/visualization parameters (no valid JSON, or the server kept failing)."""
+
+
+class LLMInferenceTimeout(Exception):
+    """No answer arrived within the request deadline."""
+
+
+class _ServiceLoop:
+    """
+    The asyncio event loop that every LLMInferenceService runs its client on.
+
+    The loop runs in a background thread only while calls are in flight. Under
+    eventlet the server's threads are greenlets on one OS thread, and asyncio
+    allows a single running loop per OS thread, so the services share this one
+    loop and leave no loop running between requests.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = False
+
+    def submit(self, coroutine):
+        """Schedules a coroutine on the loop, starting the loop if it is idle."""
+        with self._lock:
+            self._pending += 1
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, name="llm-inference-loop", daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        future.add_done_callback(self._call_done)
+        return future
+
+    def _call_done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self):
+        while True:
+            self._loop.run_until_complete(self._until_idle())
+            # Only give up the loop once it has stopped; a call submitted meanwhile is already queued on it
+            with self._lock:
+                if self._pending == 0:
+                    self._running = False
+                    return
+
+    async def _until_idle(self):
+        while self._pending:
+            await asyncio.sleep(IDLE_POLL_INTERVAL)
+
+
+_service_loop = _ServiceLoop()
+
+
+class LLMInferenceService:
+    """
+    Keeps a warm AsyncLLMInterface inside the server process.
+
+    The client streams completions over a pooled HTTP connection, so requests
+    skip interpreter startup, module imports and client construction, and a
+    JSON answer is returned as soon as its object closes. It runs on the
+    shared service event loop: infer() submits a call there and waits for it,
+    so concurrent requests share one client instead of holding a thread each.
+    Each call has a deadline of `timeout` seconds, enforced by the client
+    itself (retries included).
+
+    Args:
+        llm_type (str): 'ollama' or 'openai'.
+        model_name (str): Model to query.
+        base_url (str): LLM server URL.
+        pool_size (int): HTTP connections, i.e. concurrent model calls.
+        timeout (float): Default per-request deadline in seconds.
+        client_factory (callable): Builds the client; defaults to AsyncLLMInterface with the settings above.
+        cache (LLMResponseCache): Response cache, so identical concurrent requests are coalesced into one model call.
+        deterministic (bool): Ask the model for temperature-0, fixed-seed answers.
+    """
+
+    def __init__(self, llm_type="ollama", model_name="llama2", base_url="http://localhost:11434",
+                 pool_size=2, timeout=120.0, client_factory=None, cache=None, deterministic=False):
+        self.timeout = timeout
+        self.pool_size = max(1, int(pool_size))
+        self.cache = cache
+        if client_factory is None:
+            def client_factory():
+                return AsyncLLMInterface(llm_type=llm_type, model_name=model_name, base_url=base_url,
+                                         timeout=timeout, max_connections=self.pool_size, cache=cache,
+                                         deterministic=deterministic)
+
+        self._client = client_factory()
+
+    def infer(self, effect_description, timeout=None):
+        """
+        Infers parameters for an effect description.
+
+        Returns:
+            tuple: (simulation_params, visualization_params)
+
+        Raises:
+            LLMInferenceTimeout: If no result arrives within the deadline.
+            LLMInferenceError: If the model response holds no parameter JSON.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        future = _service_loop.submit(self._client.infer_simulation_and_visualization_parameters(effect_description,
+                                                                                         timeout=timeout))
+        try:
+            # The client stops at its own deadline; the margin only covers handing the result back
+            llm_response = future.result(timeout=timeout + 1.0)
+        except (FutureTimeoutError, asyncio.TimeoutError):
+            future.cancel()
+            raise LLMInferenceTimeout(f"LLM inference did not finish within {timeout} seconds.")
+        except LLMRequestError as e:
+            raise LLMInferenceError(str(e))
+
+        if not isinstance(llm_response, dict) or "error" in llm_response:
+            message = llm_response.get("error") if isinstance(llm_response, dict) else "Unexpected LLM response."
+            raise LLMInferenceError(message)
+        return llm_response.get("simulation_params", {}), llm_response.get("visualization_params", {})
+
+    def shutdown(self):
+        try:
+            _service_loop.submit(self._client.aclose()).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Closing the LLM client failed: {e}")
@@ -0,0 +1,37 @@
+"""
+Runs one pipeline stage command and records its exit code in a file.
+
+The scheduler launches stages through this wrapper with stdout redirected to
+the job log, so a stage keeps running (and its result stays observable) even
+if the backend server restarts while it is in flight.
+
+Usage: python stage_runner.py <exit_code_path> -- <command> [args...]
+"""
+import os
+import subprocess
+import sys
+
+
+def main(argv):
+    if len(argv) < 4 or argv[2] != "--":
+        print("Usage: python stage_runner.py <exit_code_path> -- <command> [args...]", file=sys.stderr)
+        return 2
+
+    exit_code_path = argv[1]
+    command = argv[3:]
+    try:
+        returncode = subprocess.call(command)
+    except OSError as e:
+        print(f"Failed to start stage command: {e}", flush=True)
+        returncode = 127
+
+    # Write atomically so a reader never sees a partial exit code
+    tmp_path = exit_code_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(returncode))
+    os.replace(tmp_path, exit_code_path)
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
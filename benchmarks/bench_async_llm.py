@@ -0,0 +1,75 @@
+"""
+Compares blocking LLMInterface calls with the streaming AsyncLLMInterface
+against a local stub LLM that streams tokens and keeps talking after the JSON.
+
+The blocking client waits for the whole completion before it parses; the async
+client stops reading as soon as the top-level JSON object closes and runs
+concurrent requests on one event loop over a pooled connection.
+
+Usage: python benchmarks/bench_async_llm.py [requests] [concurrency] [chunk_delay_seconds]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stub_llm_server import StubLLMServer, STUB_PARAMS
+from src.llm_interface import LLMInterface
+from src.async_llm_interface import AsyncLLMInterface
+
+EFFECT_DESCRIPTION = {"vfx_type": "swirling vortex", "style": "blue liquid"}
+# Models often append prose after the JSON; streaming lets us skip waiting for it
+TRAILING_CHATTER = "\n\nThese parameters give a slowly decaying blue vortex. Feel free to tweak them!" * 4
+
+
+def _summarize(name, samples, wall):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(samples_ms)
+    p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+    print(f"{name:<26} n={len(samples_ms):<4} p50={p50:8.1f} ms  p99={p99:8.1f} ms  wall={wall * 1000:8.1f} ms")
+
+
+def bench_blocking(base_url, requests, concurrency):
+    clients = [LLMInterface(base_url=base_url, timeout=30) for _ in range(concurrency)]
+
+    def one_call(index):
+        start = time.perf_counter()
+        clients[index % concurrency].infer_simulation_and_visualization_parameters(EFFECT_DESCRIPTION)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one_call, range(requests)))
+    return samples, time.perf_counter() - start
+
+
+async def bench_async(base_url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncLLMInterface(base_url=base_url, timeout=30, max_connections=concurrency) as llm:
+        async def one_call():
+            async with semaphore:
+                start = time.perf_counter()
+                await llm.infer_simulation_and_visualization_parameters(EFFECT_DESCRIPTION)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*[one_call() for _ in range(requests)])
+        return samples, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    chunk_delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.002
+    content = json.dumps(STUB_PARAMS) + TRAILING_CHATTER
+    with StubLLMServer(content=content, chunk_size=4, chunk_delay=chunk_delay) as stub:
+        print(f"Stub LLM at {stub.base_url}: {len(content)} chars in 4-char chunks, "
+              f"{chunk_delay * 1000:.1f} ms per chunk, concurrency {concurrency}")
+        _summarize("blocking LLMInterface", *bench_blocking(stub.base_url, requests, concurrency))
+        _summarize("streaming AsyncLLMInterface", *asyncio.run(bench_async(stub.base_url, requests, concurrency)))
@@ -0,0 +1,92 @@
+"""
+Forcing cost per simulation step: the old full-grid Gaussian evaluation
+versus src.forcing's windowed, cached stamps, for a number of emitters of a
+given radius on an n x n grid. "moving" emitters change position every step;
+their stamp is cached per radius and only shifted into place. --shape also
+times a moving shape emitter
+(e.g. crescent): its cached stamp shifted into place versus rebuilding it
+at every new position.
+
+Usage: python benchmarks/bench_forcing.py [emitters ...] [--grid N] [--radius R] [--steps S] [--shape TYPE]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.forcing import Emitter, ForcingField, SHAPE_TYPES, shape_stamp
+
+
+def dense_step(X, Y, emitters):
+    source_x, source_y = np.zeros_like(X), np.zeros_like(X)
+    for emitter in emitters:
+        center_x, center_y = emitter.position
+        dist = np.sqrt((X - center_x) ** 2 + (Y - center_y) ** 2)
+        source_x += emitter.strength * (Y - center_y) * np.exp(-(dist / emitter.radius) ** 2)
+        source_y -= emitter.strength * (X - center_x) * np.exp(-(dist / emitter.radius) ** 2)
+    return source_x, source_y
+
+
+def timed(function, steps):
+    start = time.perf_counter()
+    for step in range(steps):
+        function(step)
+    return (time.perf_counter() - start) / steps * 1000
+
+
+def bench(count, grid, radius, steps):
+    x = np.linspace(0, 2, grid)
+    X, Y = np.meshgrid(x, x)
+    positions = np.random.default_rng(0).uniform(0.2, 1.8, (count, 2))
+    emitters = [Emitter("vortex", position, radius, 1.0) for position in positions]
+    forcing = ForcingField(x, x, cache_size=max(64, count))
+
+    def windowed(step, moving=False):
+        source_x, source_y = np.zeros_like(X), np.zeros_like(X)
+        current = emitters
+        if moving:
+            current = [Emitter("vortex", e.position + np.array([1e-3 * step, 0.0]), radius, 1.0) for e in emitters]
+        forcing.apply(current, source_x, source_y)
+
+    dense_ms = timed(lambda step: dense_step(X, Y, emitters), steps)
+    windowed(0) # Warm the stamp cache
+    static_ms = timed(windowed, steps)
+    moving_ms = timed(lambda step: windowed(step + 1, moving=True), steps)
+    print(f"{count:>4} emitters r={radius} on {grid}x{grid}: dense {dense_ms:8.2f} ms, windowed {static_ms:6.2f} ms "
+          f"(static), {moving_ms:6.2f} ms (moving)")
+
+
+def bench_shape(shape_type, grid, size, steps):
+    x = np.linspace(0, 2, grid)
+    forcing = ForcingField(x, x)
+    spacing = x[1] - x[0]
+    options = {"bitmap": np.eye(16).tolist()} if shape_type == "bitmap" else {}
+
+    def shifted(step):
+        source_x, source_y = np.zeros((grid, grid)), np.zeros((grid, grid))
+        forcing.apply([Emitter(shape_type, (0.5 + 0.0137 * step, 1.0), size, 1.0, options)], source_x, source_y)
+
+    def rebuilt(step):
+        shape_stamp(shape_type, size, spacing, spacing, options)
+        shifted(step)
+
+    print(f"moving {shape_type} size={size} on {grid}x{grid}: shifted {timed(shifted, steps):6.2f} ms, "
+          f"rebuilt every step {timed(rebuilt, steps):6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("emitters", nargs="*", type=int, default=[1, 10, 100])
+    parser.add_argument("--grid", type=int, default=201)
+    parser.add_argument("--radius", type=float, default=0.05)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--shape", choices=SHAPE_TYPES)
+    args = parser.parse_args()
+    for count in args.emitters:
+        bench(count, args.grid, args.radius, args.steps)
+    if args.shape:
+        bench_shape(args.shape, args.grid, 0.4, args.steps)
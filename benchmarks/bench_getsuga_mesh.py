@@ -0,0 +1,72 @@
+"""
+Compares the per-cell Python loops create_getsuga_mesh used to run with the
+vectorized src.getsuga_mesh.build_getsuga_surface, outside Blender.
+
+The loop version below builds plain lists where the old code called
+bm.verts.new / bm.faces.new, so it understates the old cost: bmesh calls are
+slower than list appends.
+
+Usage: python benchmarks/bench_getsuga_mesh.py [resolution ...] [--frames N]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.getsuga_mesh import build_getsuga_surface
+
+
+def loop_surface(x_coords, y_coords, pressure, threshold=0.1, extrusion=0.5):
+    vertices, index = [], {}
+    for i in range(len(x_coords)):
+        for j in range(len(y_coords)):
+            p_val = pressure[j, i]
+            if p_val > threshold:
+                index[(i, j)] = len(vertices)
+                vertices.append((x_coords[i], y_coords[j], p_val * extrusion))
+    faces = []
+    for i in range(len(x_coords) - 1):
+        for j in range(len(y_coords) - 1):
+            v1, v2, v3, v4 = index.get((i, j)), index.get((i + 1, j)), index.get((i + 1, j + 1)), index.get((i, j + 1))
+            if None not in (v1, v2, v3, v4):
+                faces.append((v1, v2, v3, v4))
+    return vertices, faces
+
+
+def vortex_pressure(n, t):
+    x = np.linspace(0, 2, n)
+    X, Y = np.meshgrid(x, x)
+    r2 = (X - 1.0 - 0.2 * np.sin(t)) ** 2 + (Y - 1.0) ** 2
+    return x, x, 0.6 * np.exp(-r2 / 0.3)
+
+
+def bench(resolution, frames):
+    data = [vortex_pressure(resolution, t) for t in np.linspace(0, 3, frames)]
+
+    start = time.perf_counter()
+    for x, y, p in data:
+        vertices, faces = loop_surface(x, y, p)
+    loop_time = (time.perf_counter() - start) / frames
+
+    start = time.perf_counter()
+    for x, y, p in data:
+        surface = build_getsuga_surface(x, y, p)
+    vector_time = (time.perf_counter() - start) / frames
+
+    assert surface.vertex_count == len(vertices) and surface.face_count == len(faces)
+    print(f"{resolution:>4}x{resolution:<4} verts={surface.vertex_count:<7} faces={surface.face_count:<7} "
+          f"loops={loop_time * 1000:9.2f} ms/frame  numpy={vector_time * 1000:7.2f} ms/frame  "
+          f"speedup={loop_time / vector_time:6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("resolutions", nargs="*", type=int, default=[64, 101, 256])
+    parser.add_argument("--frames", type=int, default=10)
+    args = parser.parse_args()
+    for resolution in args.resolutions:
+        bench(resolution, args.frames)
@@ -0,0 +1,46 @@
+"""
+Frames per second of the CPU LIC renderer (src/lic_renderer.py) on a moving
+vortex, per output resolution, in a single process. render_lic_frames spreads
+frames over one process per core on top of this.
+
+Usage: python benchmarks/bench_lic_renderer.py [resolution ...] [--frames N] [--length L]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.lic_renderer import LICRenderer, DEFAULT_LIC_LENGTH
+
+
+def vortex_velocity(n, t):
+    """Velocity of a Gaussian vortex drifting across an n x n grid on [0, 2]^2, indexed [j, i]."""
+    x = np.linspace(0, 2, n)
+    X, Y = np.meshgrid(x, x)
+    cx, cy = 0.6 + 0.3 * t, 1.0
+    envelope = np.exp(-((X - cx) ** 2 + (Y - cy) ** 2) / 0.15)
+    return x, -(Y - cy) * envelope + 0.1, (X - cx) * envelope
+
+
+def bench(resolution, frames, length, grid=101):
+    fields = [vortex_velocity(grid, t) for t in np.linspace(0, 2, frames)]
+    renderer = LICRenderer(fields[0][0], fields[0][0], resolution=resolution, length=length)
+    start = time.perf_counter()
+    for _, u, v in fields:
+        renderer.render(u, v)
+    seconds = (time.perf_counter() - start) / frames
+    print(f"{resolution}x{renderer.height} length={length}: {seconds * 1000:7.1f} ms/frame, {1 / seconds:5.1f} fps")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("resolutions", nargs="*", type=int, default=[256, 512])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--length", type=int, default=DEFAULT_LIC_LENGTH)
+    args = parser.parse_args()
+    for resolution in args.resolutions:
+        bench(resolution, args.frames, args.length)
@@ -0,0 +1,72 @@
+"""
+Compares parameter-inference latency of the old subprocess-per-request path
+with the warm in-process LLMInferenceService, against a local stub LLM.
+
+Usage: python benchmarks/bench_llm_inference.py [requests] [stub_delay_seconds]
+"""
+import os
+import sys
+import time
+import json
+import subprocess
+import statistics
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stub_llm_server import StubLLMServer
+from backend.llm_service import LLMInferenceService
+
+EFFECT_DESCRIPTION = {"vfx_type": "swirling vortex", "style": "blue liquid"}
+
+# Equivalent of `python -m src.run_full_simulation --infer_only`, pointed at the stub server
+COLD_START_SCRIPT = """
+import json, sys
+from src.simulation_agent import SimulationAgent
+from src.llm_interface import LLMInterface
+agent = SimulationAgent()
+agent.llm = LLMInterface(base_url=sys.argv[1])
+sim, viz = agent.infer_parameters(json.loads(sys.argv[2]))
+print(json.dumps({"simulation_params": sim, "visualization_params": viz}))
+"""
+
+
+def _summarize(name, samples):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(samples_ms)
+    p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+    print(f"{name:<28} n={len(samples_ms):<4} p50={p50:8.1f} ms  p99={p99:8.1f} ms  mean={statistics.mean(samples_ms):8.1f} ms")
+
+
+def bench_subprocess(base_url, requests):
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT, base_url, json.dumps(EFFECT_DESCRIPTION)],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, check=True,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_service(base_url, requests):
+    service = LLMInferenceService(base_url=base_url, pool_size=2, timeout=30)
+    service.infer(EFFECT_DESCRIPTION) # Warm the pooled connection
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        service.infer(EFFECT_DESCRIPTION)
+        samples.append(time.perf_counter() - start)
+    service.shutdown()
+    return samples
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    with StubLLMServer(delay=delay) as stub:
+        print(f"Stub LLM at {stub.base_url}, model delay {delay * 1000:.0f} ms")
+        _summarize("subprocess per request", bench_subprocess(stub.base_url, requests))
+        _summarize("in-process warm service", bench_service(stub.base_url, requests))
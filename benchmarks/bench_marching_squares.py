@@ -0,0 +1,54 @@
+"""
+Triangle count and build time of the thresholded Getsuga surface versus
+marching-squares contour ribbons for the same pressure frames.
+
+The single-level ribbon traces the outline of the thresholded surface (the
+same silhouette from above); the stacked variant adds two more iso-levels.
+
+Usage: python benchmarks/bench_marching_squares.py [resolution ...] [--frames N]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.getsuga_mesh import build_getsuga_surface
+from src.marching_squares import build_contour_ribbons
+from benchmarks.bench_getsuga_mesh import vortex_pressure
+
+THRESHOLD = 0.1
+
+
+def _time_per_frame(build, data):
+    start = time.perf_counter()
+    for x, y, p in data:
+        mesh = build(x, y, p)
+    return (time.perf_counter() - start) / len(data), mesh
+
+
+def bench(resolution, frames):
+    data = [vortex_pressure(resolution, t) for t in np.linspace(0, 3, frames)]
+    variants = [
+        ("threshold surface", lambda x, y, p: build_getsuga_surface(x, y, p, pressure_threshold=THRESHOLD)),
+        ("ribbon, 1 level", lambda x, y, p: build_contour_ribbons(x, y, p, [THRESHOLD])),
+        ("ribbons, 3 levels", lambda x, y, p: build_contour_ribbons(x, y, p, [THRESHOLD, 0.3, 0.5])),
+    ]
+    print(f"--- {resolution}x{resolution} ---")
+    for name, build in variants:
+        seconds, mesh = _time_per_frame(build, data)
+        # Every face is a quad, i.e. two triangles for Cycles
+        print(f"{name:<18} triangles={2 * mesh.face_count:<7} vertices={mesh.vertex_count:<7} "
+              f"{seconds * 1000:7.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("resolutions", nargs="*", type=int, default=[64, 101, 256])
+    parser.add_argument("--frames", type=int, default=10)
+    args = parser.parse_args()
+    for resolution in args.resolutions:
+        bench(resolution, args.frames)
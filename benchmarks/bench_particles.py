@@ -0,0 +1,59 @@
+"""
+Cost per simulation step of the particle subsystem (src/particles.py) at a
+full buffer: advect + age + cull + emit, and writing the frame's particle
+file, on a drifting vortex.
+
+Usage: python benchmarks/bench_particles.py [particles ...] [--steps N] [--grid G]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.particles import ParticleSystem
+
+
+def vortex_velocity(n, t):
+    """Velocity of a Gaussian vortex drifting across an n x n grid on [0, 2]^2, indexed [j, i]."""
+    x = np.linspace(0, 2, n)
+    X, Y = np.meshgrid(x, x)
+    cx, cy = 0.6 + 0.6 * t, 1.0
+    envelope = np.exp(-((X - cx) ** 2 + (Y - cy) ** 2) / 0.15)
+    return x, -(Y - cy) * envelope * 20 + 0.5, (X - cx) * envelope * 20
+
+
+def bench(particles, steps, grid):
+    x, _, _ = vortex_velocity(grid, 0.0)
+    lifetime = 60
+    system = ParticleSystem(x, x, max_particles=particles, lifetime=lifetime, emitter="uniform")
+    # Fill the buffer first so every measured step runs at capacity
+    system.emit(particles, np.zeros((grid, grid, 2), dtype=np.float32))
+    system.age[:particles] = system.rng.uniform(0, lifetime, particles)
+
+    fields = [vortex_velocity(grid, t)[1:] for t in np.linspace(0, 1, steps)]
+    start = time.perf_counter()
+    for u, v in fields:
+        system.step(u, v, dt=0.01)
+    step_seconds = (time.perf_counter() - start) / steps
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        system.save(os.path.join(tmp, "particles.npz"))
+        save_seconds = time.perf_counter() - start
+    print(f"{particles:>9} particles: step {step_seconds * 1000:7.1f} ms ({particles / step_seconds / 1e6:5.1f} M/s), "
+          f"save {save_seconds * 1000:6.1f} ms, {system.count} live")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("particles", nargs="*", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--grid", type=int, default=101)
+    args = parser.parse_args()
+    for count in args.particles:
+        bench(count, args.steps, args.grid)
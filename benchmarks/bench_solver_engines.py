@@ -0,0 +1,53 @@
+"""
+Compares the registered solver engines (src/solver_engines.py) on the same
+scenarios through FluidSimulator.run_simulation: time per step, and at the
+last frame the peak speed and the largest velocity divergence relative to
+speed / dx. A NaN or a huge speed means the engine blew up.
+
+Usage: python benchmarks/bench_solver_engines.py [engines ...] [--grid N] [--steps S] [--scenario NAME ...]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.fluid_simulator import FluidSimulator
+from src.solver_engines import SOLVER_ENGINES
+
+SCENARIOS = {
+    "vortex": {"initial_shape_type": "vortex", "vortex_strength": 1.2},
+    "circle_burst": {"initial_shape_type": "circle_burst", "source_strength": 2.0},
+    "crescent": {"initial_shape_type": "crescent", "initial_shape_position": [1.0, 0.8], "source_strength": 2.0},
+}
+
+
+def bench(engine, scenario, grid, steps):
+    params = dict(SCENARIOS[scenario], grid_resolution=[grid, grid], time_steps=steps, solver=engine)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        FluidSimulator().run_simulation(params, tmp)
+        step_ms = (time.perf_counter() - start) / steps * 1000
+        with np.load(os.path.join(tmp, f"fluid_data_frame_{steps - 1:04d}.npz")) as frame:
+            u, v, x = frame["u"], frame["v"], frame["x"]
+    dx = x[1] - x[0]
+    speed = np.hypot(u, v).max()
+    divergence = np.abs(np.gradient(u, dx, axis=1) + np.gradient(v, dx, axis=0))[2:-2, 2:-2].max()
+    print(f"{engine:>12} {scenario:>13} {grid}x{grid}: {step_ms:8.2f} ms/step, max speed {speed:10.3g}, "
+          f"divergence {divergence * dx / max(speed, 1e-12):8.3g} x speed/dx")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("engines", nargs="*", default=list(SOLVER_ENGINES))
+    parser.add_argument("--grid", type=int, default=81)
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+    for scenario in args.scenario:
+        for engine in args.engines:
+            bench(engine, scenario, args.grid, args.steps)
@@ -0,0 +1,61 @@
+"""
+Throughput of the vectorized flow tracer (src/streamlines.py): streamlines of
+one frame and pathlines across frames of a drifting vortex, per seed count
+and integrator, reported as seed-steps per second.
+
+Usage: python benchmarks/bench_streamlines.py [seeds ...] [--steps N] [--grid G] [--method rk2|rk4]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.streamlines import FlowTracer, seed_points
+
+
+def vortex_frames(n, frames):
+    """Velocity frames of a Gaussian vortex drifting across an n x n grid on [0, 2]^2, indexed [j, i]."""
+    x = np.linspace(0, 2, n)
+    X, Y = np.meshgrid(x, x)
+    fields = []
+    for t in np.linspace(0, 1, frames):
+        cx, cy = 0.6 + 0.6 * t, 1.0
+        envelope = np.exp(-((X - cx) ** 2 + (Y - cy) ** 2) / 0.15)
+        fields.append({"u": -(Y - cy) * envelope + 0.1, "v": (X - cx) * envelope})
+    return x, fields
+
+
+def report(label, seeds, seconds, lines):
+    steps = int(lines.lengths.sum())
+    print(f"{label:<11} {seeds:>7} seeds: {seconds * 1000:8.1f} ms, {steps / seconds / 1e6:6.2f} M seed-steps/s, "
+          f"{lines.points.nbytes / 1e6:6.1f} MB of vertices")
+
+
+def bench(seeds, steps, grid, method):
+    x, frames = vortex_frames(grid, steps // 4 + 1)
+    tracer = FlowTracer(x, x, method=method)
+    positions = seed_points(x, x, seeds, seed=1)
+
+    start = time.perf_counter()
+    lines = tracer.streamlines(frames[0]["u"], frames[0]["v"], positions, steps=steps, direction="forward")
+    report("streamlines", seeds, time.perf_counter() - start, lines)
+
+    start = time.perf_counter()
+    lines = tracer.pathlines(frames, positions, substeps=4, frame_dt=0.05)
+    report("pathlines", seeds, time.perf_counter() - start, lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("seeds", nargs="*", type=int, default=[10_000, 100_000])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--grid", type=int, default=101)
+    parser.add_argument("--method", choices=["rk2", "rk4"], default="rk4")
+    args = parser.parse_args()
+    print(f"{args.method}, {args.steps} steps, {args.grid}x{args.grid} grid")
+    for count in args.seeds:
+        bench(count, args.steps, args.grid, args.method)
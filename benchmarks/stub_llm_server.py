@@ -0,0 +1,150 @@
+"""
+Local stand-in for an Ollama server, used by the LLM benchmarks.
+
+It answers POST /api/chat (and the OpenAI-style /v1/chat/completions) with a
+fixed parameter JSON after a configurable delay, so benchmarks measure our own
+overhead rather than model latency. Streaming requests get the content in
+small chunks with a per-chunk delay, like tokens arriving from a real model.
+
+Usage: python benchmarks/stub_llm_server.py [port] [delay_seconds]
+"""
+import json
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_PARAMS = {
+    "simulation_params": {
+        "grid_resolution": [101, 101],
+        "time_steps": 30,
+        "viscosity": "0.02 + 0.01 * sin(t * 0.1)",
+        "initial_shape_type": "vortex",
+        "initial_shape_position": [1.0, 1.0],
+        "initial_shape_size": 0.4,
+        "initial_velocity": [0.0, 0.0],
+        "boundary_conditions": "no_slip_walls",
+        "vortex_strength": "1.2 * exp(-t / 30)",
+    },
+    "visualization_params": {
+        "arrow_color": [0.0, 0.0, 0.8],
+        "arrow_scale_factor": 3.0,
+        "arrow_density": 15,
+        "emission_strength": "50.0 * (t / 60)",
+        "transparency_alpha": 0.1,
+        "render_samples": 128,
+    },
+}
+
+
+class StubLLMServer:
+    """
+    Runs the stand-in server on a background thread. Use as a context manager.
+
+    Args:
+        delay (float): Seconds before the first byte of every answer.
+        content (str): Completion text. Defaults to STUB_PARAMS as JSON.
+        chunk_size (int): Characters per streamed chunk.
+        chunk_delay (float): Seconds between streamed chunks.
+        fail_first (int): Number of initial requests answered with HTTP 503.
+    """
+
+    def __init__(self, port=0, delay=0.0, content=None, chunk_size=8, chunk_delay=0.0, fail_first=0):
+        self.delay = delay
+        self.content = content if content is not None else json.dumps(STUB_PARAMS)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.fail_first = fail_first
+        self.request_count = 0
+        self.last_request = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                server.request_count += 1
+                server.last_request = request
+                if server.request_count <= server.fail_first:
+                    self.send_error(503)
+                    return
+                time.sleep(server.delay)
+                if self.path == "/api/chat" and request.get("stream"):
+                    self._stream(lambda text, done: json.dumps(self._ollama_message(request, text, done)))
+                elif self.path == "/api/chat":
+                    # A non-streamed answer still takes as long as generating every chunk
+                    time.sleep(server.chunk_delay * -(-len(server.content) // server.chunk_size))
+                    self._send_json(self._ollama_message(request, server.content, True))
+                elif self.path == "/v1/chat/completions" and request.get("stream"):
+                    self._stream(lambda text, done: "data: " + json.dumps({
+                        "choices": [{"delta": {} if done else {"content": text}, "finish_reason": "stop" if done else None}],
+                    }), end_line="data: [DONE]")
+                else:
+                    self.send_error(404)
+
+            def _ollama_message(self, request, text, done):
+                return {
+                    "model": request.get("model", "stub"),
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "message": {"role": "assistant", "content": text},
+                    "done": done,
+                }
+
+            def _stream(self, format_line, end_line=None):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                content = server.content
+                lines = [format_line(content[i:i + server.chunk_size], False)
+                         for i in range(0, len(content), server.chunk_size)]
+                lines.append(format_line("", True))
+                if end_line:
+                    lines.append(end_line)
+                try:
+                    for line in lines:
+                        data = (line + "\n").encode("utf-8")
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        time.sleep(server.chunk_delay)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The client stopped reading once it had what it needed
+
+            def _send_json(self, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 11435
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    with StubLLMServer(port=port, delay=delay) as stub:
+        print(f"Stub LLM server listening on {stub.base_url} (delay {delay}s)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,40 @@
+# blender_worker_server.py
+# Keeps one Blender process warm and renders jobs sent over a local socket.
+#
+# Usage: blender --background --python blender_worker_server.py -- [--port PORT] [--max-jobs N]
+#
+# Each job is what run_blender_oneshot.py takes on its command line:
+#   {"data_dir", "render_output_path", "simulation_params", "visualization_params", "frame_range"}
+# The scene is emptied in place between jobs instead of reloading factory settings.
+# A job stops between frames once its client cancels it or disconnects.
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.blender_worker import BlenderWorkerServer
+from run_blender_oneshot import run_oneshot_process
+
+
+def render_job(job):
+    frame_range = job.get("frame_range")
+    run_oneshot_process(
+        job["data_dir"],
+        job["render_output_path"],
+        job.get("simulation_params", {}),
+        job.get("visualization_params", {}),
+        frame_range=tuple(frame_range) if frame_range else None,
+        reuse_scene=True,
+        check_cancelled=server.check_cancelled,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm Blender render worker")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (0 picks a free one).")
+    parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs (0: never).")
+    args = parser.parse_args(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
+
+    server = BlenderWorkerServer(render_job, port=args.port, max_jobs=args.max_jobs or None)
+    server.serve_forever()
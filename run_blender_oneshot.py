@@ -6,7 +6,17 @@ import numpy as np
 import os
 import sys
 import json
-import bmesh
+
+# Make src/ importable from inside Blender's Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.progress import ProgressReporter
+from src.frame_manifest import FrameManifestReader, list_frame_files
+from src.getsuga_mesh import build_getsuga_surface, to_blender_mesh
+from src.marching_squares import ribbons_for_frame, mesh_fields, scalar_field
+from src.frame_sequence import FrameSequence, load_frame
+from src.vertex_cache import VertexCacheWriter, install_frame_handler, remove_frame_handlers
+from src.keyframe_curves import write_visibility_keys
+from src.particles import ParticleAnimator, create_particle_object, install_particle_handler, remove_particle_handlers
 
 # --- Copied Functions from blender_fluid_visualizer.py ---
 
@@ -28,37 +38,30 @@ def enable_gpu_rendering():
         print(f"[ERROR] Could not enable GPU rendering: {e}. Falling back to CPU.")
         bpy.context.scene.cycles.device = 'CPU'
 
+def build_frame_surface(fluid_data_frame, mesh_params):
+    if mesh_params.get('mesh_mode') == 'ribbon':
+        # Contour ribbons: far fewer faces than the thresholded surface for the same outline
+        return ribbons_for_frame(fluid_data_frame, mesh_params)
+    return build_getsuga_surface(
+        fluid_data_frame['x'], fluid_data_frame['y'], scalar_field(fluid_data_frame, mesh_params.get('surface_field', 'p')),
+        pressure_threshold=mesh_params.get('pressure_threshold', 0.1),
+        extrusion_scale=mesh_params.get('extrusion_scale', 0.5),
+    )
+
+def _mesh_settings(simulation_params, visualization_params):
+    """
+    The mesher's settings: visualization_params["mesh_params"], as in
+    BlenderFluidVisualizer, on top of the pressure_threshold / extrusion_scale
+    this script historically read from simulation_params.
+    """
+    mesh_params = {key: simulation_params[key] for key in ("pressure_threshold", "extrusion_scale")
+                   if key in simulation_params}
+    mesh_params.update(visualization_params.get("mesh_params", {}))
+    return mesh_params
+
 def create_getsuga_mesh(fluid_data_frame, mesh_params):
-    # ... (This function is large, assuming it's copied verbatim)
-    x_coords = fluid_data_frame['x']
-    y_coords = fluid_data_frame['y']
-    pressure = fluid_data_frame['p']
-    nx = len(x_coords)
-    ny = len(y_coords)
-    pressure_threshold = mesh_params.get('pressure_threshold', 0.1)
-    extrusion_scale = mesh_params.get('extrusion_scale', 0.5)
-    bm = bmesh.new()
-    verts = {}
-    for i in range(nx):
-        for j in range(ny):
-            p_val = pressure[j, i]
-            if p_val > pressure_threshold:
-                z = p_val * extrusion_scale
-                verts[(i, j)] = bm.verts.new((x_coords[i], y_coords[j], z))
-            else:
-                verts[(i, j)] = None
-    for i in range(nx - 1):
-        for j in range(ny - 1):
-            v1, v2, v3, v4 = verts.get((i,j)), verts.get((i+1,j)), verts.get((i+1,j+1)), verts.get((i,j+1))
-            if all([v1, v2, v3, v4]):
-                try:
-                    bm.faces.new((v1, v2, v3, v4))
-                except ValueError:
-                    pass
-    mesh_data = bpy.data.meshes.new("GetsugaMesh")
-    bm.to_mesh(mesh_data)
-    bm.free()
-    return mesh_data
+    name = "GetsugaRibbons" if mesh_params.get('mesh_mode') == 'ribbon' else "GetsugaMesh"
+    return to_blender_mesh(build_frame_surface(fluid_data_frame, mesh_params), name)
 
 def create_getsuga_material(material_params):
     # ... (Copied verbatim)
@@ -78,89 +81,78 @@ def create_getsuga_material(material_params):
     principled_node.inputs['Emission Strength'].default_value = emission_strength
     return mat
 
-def animate_getsuga_vfx(all_fluid_data, mesh_objects, viz_params, scene):
+def animate_getsuga_vfx(all_fluid_data, mesh_objects, viz_params, scene, first_frame=0):
     # ... (Copied verbatim with hide_viewport fix)
+    # first_frame: frame number of mesh_objects[0] when only a slice of the animation is built
     anim_params = viz_params.get("animation_params", {})
     forward_motion = np.array(anim_params.get("forward_motion", [0, 0.2, 0]))
-    for frame_idx, obj in enumerate(mesh_objects):
-        if frame_idx > scene.frame_end: continue
+    for frame_idx, obj in enumerate(mesh_objects, start=first_frame):
         obj.location = forward_motion * frame_idx
-        obj.keyframe_insert(data_path="location", frame=frame_idx)
-        if frame_idx > scene.frame_start:
-            obj.hide_viewport = True
-            obj.hide_render = True
-            obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx - 1)
-            obj.keyframe_insert(data_path="hide_render", frame=frame_idx - 1)
-        obj.hide_viewport = False
-        obj.hide_render = False
-        obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx)
-        obj.keyframe_insert(data_path="hide_render", frame=frame_idx)
-        if frame_idx < scene.frame_end:
-            obj.hide_viewport = True
-            obj.hide_render = True
-            obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx + 1)
-            obj.keyframe_insert(data_path="hide_render", frame=frame_idx + 1)
+    # Visibility keys for all objects are computed in NumPy and written in bulk
+    write_visibility_keys(mesh_objects, np.arange(first_frame, first_frame + len(mesh_objects)),
+                          scene.frame_start, scene.frame_end)
 
 # --- Main Execution Block ---
 
-def run_oneshot_process(data_dir, render_output_path, simulation_params, visualization_params):
-    print("--- Blender One-Shot Process Started ---")
-    
-    # 1. Scene Setup
-    print("\n--- Step 1: Setting up scene ---")
-    bpy.ops.wm.read_factory_settings(use_empty=True)
-    enable_gpu_rendering() # Configure GPU rendering AFTER clearing factory settings
-    scene = bpy.context.scene
-    
-    # Use provided simulation_params for time_steps
-    scene.frame_end = simulation_params.get("time_steps", 30) - 1 # Adjust for 0-based indexing
+def _build_frame_object(scene, frame_data_npz, mesh_params, material, frame_idx):
+    mesh_data = create_getsuga_mesh(frame_data_npz, mesh_params)
+    mesh_obj = bpy.data.objects.new(f"GetsugaVFX_Frame_{frame_idx:04d}", mesh_data)
+    scene.collection.objects.link(mesh_obj)
+    mesh_obj.data.materials.append(material)
+    return mesh_obj
 
-    # Use provided visualization_params for material and mesh
-    mesh_params = visualization_params.get("mesh_params", {})
-    material_params = visualization_params.get("material_params", {})
+def _build_vertex_cache_object(scene, all_fluid_data, mesh_params, material, first_frame, cache_path,
+                               visualization_params):
+    """
+    Writes every frame's mesh to a vertex cache and creates one object that a
+    frame-change handler fills from it, instead of one object per frame. Scene
+    memory stays at one frame's mesh however long the animation is.
+    """
+    build_progress = ProgressReporter("scene_build", total=len(all_fluid_data))
+    with VertexCacheWriter(cache_path) as writer:
+        for i, frame_data in enumerate(all_fluid_data):
+            writer.add_frame(first_frame + i, build_frame_surface(frame_data, mesh_params))
+            build_progress.update(i, frame=first_frame + i)
+    print(f"Wrote {len(writer.frames)} frames ({len(writer.topologies)} topologies) to vertex cache {cache_path}.")
 
-    # 2. Load Data
-    print("\n--- Step 2: Loading fluid data ---")
-    fluid_data_files = sorted([f for f in os.listdir(data_dir) if f.startswith("fluid_data_") and f.endswith(".npz")])
-    if not fluid_data_files:
-        raise FileNotFoundError(f"No fluid data files found in {data_dir}")
-    
-    # Only load up to scene.frame_end + 1 files
-    all_fluid_data = []
-    for i in range(scene.frame_end + 1):
-        # Assuming fluid_data_XXXX.npz corresponds to frame X
-        # We need to find the file for the current frame_idx
-        # The simulation saves every 10 steps, so we need to adjust
-        sim_step = i * 10 # Assuming simulation saves every 10 steps
-        filename = f"fluid_data_{sim_step:04d}.npz"
-        filepath = os.path.join(data_dir, filename)
-        if not os.path.exists(filepath):
-            print(f"Warning: Fluid data file for frame {i} (sim step {sim_step}) not found: {filepath}. Using previous frame's data.")
-            # Use previous frame's data if current not found, or break if first frame missing
-            if all_fluid_data:
-                all_fluid_data.append(all_fluid_data[-1])
-            else:
-                raise FileNotFoundError(f"First fluid data file {filepath} not found.")
-        else:
-            all_fluid_data.append(np.load(filepath))
+    mesh_obj = bpy.data.objects.new("GetsugaVFX", bpy.data.meshes.new("GetsugaVFX"))
+    scene.collection.objects.link(mesh_obj)
+    mesh_obj.data.materials.append(material)
+    anim_params = visualization_params.get("animation_params", {})
+    install_frame_handler(mesh_obj, cache_path, anim_params.get("forward_motion", [0, 0.2, 0]))
+    # The handler edits mesh data, which must not race the render thread
+    scene.render.use_lock_interface = True
+    return mesh_obj
 
-    # 3. Create Objects
-    print("\n--- Step 3: Creating VFX objects ---")
-    getsuga_material = create_getsuga_material(material_params)
-    mesh_objects = []
-    for i, frame_data_npz in enumerate(all_fluid_data):
-        # Pass simulation_params to create_getsuga_mesh for pressure_threshold etc.
-        mesh_data = create_getsuga_mesh(frame_data_npz, simulation_params)
-        mesh_obj = bpy.data.objects.new(f"GetsugaVFX_Frame_{i:04d}", mesh_data)
-        scene.collection.objects.link(mesh_obj)
-        mesh_obj.data.materials.append(getsuga_material)
-        mesh_objects.append(mesh_obj)
-    print(f"Created {len(mesh_objects)} objects.")
-
-    # 4. Animate
-    print("\n--- Step 4: Animating objects ---")
-    animate_getsuga_vfx(all_fluid_data, mesh_objects, visualization_params, scene) # Pass visualization_params
+def _create_particle_material(particle_params):
+    mat = bpy.data.materials.new(name="ParticleMaterial")
+    mat.use_nodes = True
+    emission = mat.node_tree.nodes.new(type='ShaderNodeEmission')
+    emission.inputs['Color'].default_value = (*particle_params.get("color", (0.8, 0.9, 1.0)), 1.0)
+    emission.inputs['Strength'].default_value = particle_params.get("emission_strength", 10.0)
+    output_node = mat.node_tree.nodes.get('Material Output')
+    mat.node_tree.links.new(emission.outputs['Emission'], output_node.inputs['Surface'])
+    return mat
+
+def _build_particle_object(scene, simulation_params, visualization_params):
+    """
+    The point cloud that shows the simulator's particle files (written when
+    simulation_params has "particles"), or None when the run has no particles.
+    """
+    if not simulation_params.get("particles"):
+        return None
+    particle_params = visualization_params.get("particle_params", {})
+    particle_obj = create_particle_object("FluidParticles", _create_particle_material(particle_params))
+    scene.collection.objects.link(particle_obj)
+    return particle_obj
+
+def _particle_radius(visualization_params):
+    return visualization_params.get("particle_params", {}).get("radius", 0.004)
+
+def _uses_vertex_cache(visualization_params):
+    return visualization_params.get("animation_params", {}).get("mesh_animation") == "vertex_cache"
 
+def _setup_camera_and_light(scene, visualization_params):
     # Basic Camera Setup (using visualization_params for location if available)
     camera_location = visualization_params.get("camera_location", (0, -5, 2))
     bpy.ops.object.camera_add(location=camera_location)
@@ -180,38 +172,258 @@ def run_oneshot_process(data_dir, render_output_path, simulation_params, visuali
     constraint = scene.camera.constraints.new(type='TRACK_TO')
     constraint.target = track_to_empty
 
-    # 5. Internal Verification
-    print("\n--- Step 5: Verifying scene before render ---")
+def _configure_render(scene, render_output_path, visualization_params):
+    scene.render.filepath = render_output_path
+    scene.render.image_settings.file_format = 'PNG'
+
+    # Set render samples from visualization_params, default to 128 for testing
+    render_samples = visualization_params.get("render_samples", 128)
+    bpy.context.scene.cycles.samples = render_samples
+    print(f"[INFO] Setting Cycles render samples to: {render_samples}")
+
+def _verify_scene(scene):
     if scene.render.engine != 'CYCLES': raise AssertionError("Engine is not CYCLES")
     if scene.cycles.device != 'GPU': raise AssertionError("Device is not GPU")
     if not scene.camera: raise AssertionError("No camera set")
+
+def reset_scene():
+    """
+    Empties the current scene in place for the next job of a warm worker
+    (blender_worker_server.py). Much cheaper than read_factory_settings, and it
+    keeps the already-initialised add-ons and GPU device list.
+    """
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.curves, bpy.data.materials, bpy.data.cameras,
+                       bpy.data.lights, bpy.data.actions, bpy.data.node_groups):
+        for block in list(collection):
+            collection.remove(block)
+    # Loaded textures and previous renders; the render result slots themselves are Blender's own
+    for image in list(bpy.data.images):
+        if image.type not in ('RENDER_RESULT', 'COMPOSITING'):
+            bpy.data.images.remove(image)
+    remove_frame_handlers()
+    remove_particle_handlers()
+    scene = bpy.context.scene
+    # Undo per-job render settings that _configure_render / _use_frame_slice may have changed
+    scene.frame_start = 1
+    scene.frame_current = 1
+    scene.render.use_placeholder = False
+    scene.render.use_overwrite = True
+    scene.render.use_lock_interface = False
+    scene.camera = None
+
+def _new_scene(simulation_params, reuse_scene=False):
+    if reuse_scene:
+        reset_scene()
+    else:
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+    enable_gpu_rendering() # Configure GPU rendering AFTER clearing factory settings
+    scene = bpy.context.scene
+    # Use provided simulation_params for time_steps
+    scene.frame_end = simulation_params.get("time_steps", 30) - 1 # Adjust for 0-based indexing
+    return scene
+
+def _use_frame_slice(scene, frame_range):
+    """
+    Restricts the scene to frames first..last of the animation for one of
+    several parallel render workers (src.parallel_render). Placeholder mode
+    claims each frame with an empty file before rendering it and skips frames
+    another worker has already claimed, so workers can share a range.
+    """
+    first, last = frame_range
+    scene.frame_start = max(first, scene.frame_start)
+    scene.frame_end = min(last, scene.frame_end)
+    scene.render.use_placeholder = True
+    scene.render.use_overwrite = False
+
+def _render_frames(scene, render_output_path, render_progress, check_cancelled):
+    """
+    Renders the scene's frames as stills, one at a time, calling
+    check_cancelled() before each. Used by warm workers, whose jobs must stop
+    when cancelled; a single animation render cannot be interrupted from Python.
+    """
+    for rendered, frame_idx in enumerate(range(scene.frame_start, scene.frame_end + 1)):
+        check_cancelled()
+        frame_path = render_output_path.replace("####", f"{frame_idx:04d}")
+        if not scene.render.use_overwrite and os.path.exists(frame_path + ".png"):
+            continue
+        scene.frame_set(frame_idx)
+        scene.render.filepath = frame_path
+        bpy.ops.render.render(write_still=True)
+        render_progress.update(rendered, frame=frame_idx)
+    scene.render.filepath = render_output_path
+
+def run_oneshot_process(data_dir, render_output_path, simulation_params, visualization_params, frame_range=None,
+                        reuse_scene=False, check_cancelled=None):
+    """
+    Builds the scene from the fluid frames in data_dir and renders it.
+
+    check_cancelled (a warm worker's BlenderWorkerServer.check_cancelled) is
+    called between frames while building and rendering, and raises to stop
+    a cancelled job.
+    """
+    print("--- Blender One-Shot Process Started ---")
+    
+    # 1. Scene Setup
+    print("\n--- Step 1: Setting up scene ---")
+    scene = _new_scene(simulation_params, reuse_scene=reuse_scene)
+    if frame_range:
+        _use_frame_slice(scene, frame_range)
+        print(f"Rendering frames {scene.frame_start}-{scene.frame_end} only.")
+    # Objects are only built for the frames this process renders
+    first_frame = scene.frame_start if frame_range else 0
+
+    # Use provided visualization_params for material and mesh
+    mesh_params = _mesh_settings(simulation_params, visualization_params)
+    material_params = visualization_params.get("material_params", {})
+
+    # 2. Load Data
+    print("\n--- Step 2: Loading fluid data ---")
+    # Frame order comes from the simulator's manifest (or the frame file names), not from a fixed save interval
+    fluid_data_files = list_frame_files(data_dir)
+    if not fluid_data_files:
+        raise FileNotFoundError(f"No fluid data files found in {data_dir}")
+    if scene.frame_end >= len(fluid_data_files):
+        print(f"Warning: Fluid data files for frames {len(fluid_data_files)}-{scene.frame_end} not found in {data_dir}. "
+              f"Using the last frame's data.")
+    slice_files = [fluid_data_files[min(i, len(fluid_data_files) - 1)] for i in range(first_frame, scene.frame_end + 1)]
+    # Frames are opened on demand with only the fields the mesher reads, so memory does not grow with the run
+    all_fluid_data = FrameSequence(slice_files, fields=mesh_fields(mesh_params))
+
+    getsuga_material = create_getsuga_material(material_params)
+    if _uses_vertex_cache(visualization_params):
+        # 3. Build one cached, animated object (frames are read one at a time, never all at once)
+        print("\n--- Step 3: Building vertex cache ---")
+        cache_name = f"vertex_cache_{first_frame}-{scene.frame_end}" if frame_range else "vertex_cache"
+        cache_path = os.path.join(os.path.dirname(render_output_path), cache_name)
+        mesh_objects = [_build_vertex_cache_object(scene, all_fluid_data, mesh_params, getsuga_material,
+                                                   first_frame, cache_path, visualization_params)]
+    else:
+        # 3. Create Objects
+        print("\n--- Step 3: Creating VFX objects ---")
+        mesh_objects = []
+        build_progress = ProgressReporter("scene_build", total=len(all_fluid_data))
+        for i, frame_data_npz in enumerate(all_fluid_data):
+            if check_cancelled is not None:
+                check_cancelled()
+            mesh_objects.append(_build_frame_object(scene, frame_data_npz, mesh_params, getsuga_material, first_frame + i))
+            build_progress.update(i, frame=first_frame + i)
+        print(f"Created {len(mesh_objects)} objects.")
+
+        # 4. Animate
+        print("\n--- Step 4: Animating objects ---")
+        animate_getsuga_vfx(all_fluid_data, mesh_objects, visualization_params, scene, first_frame=first_frame)
+
+    particle_obj = _build_particle_object(scene, simulation_params, visualization_params)
+    if particle_obj is not None:
+        # Each frame's particle file is loaded into the point cloud on frame change
+        install_particle_handler(particle_obj, data_dir, _particle_radius(visualization_params))
+        scene.render.use_lock_interface = True
+    _setup_camera_and_light(scene, visualization_params)
+
+    # 5. Internal Verification
+    print("\n--- Step 5: Verifying scene before render ---")
+    _verify_scene(scene)
     if len(mesh_objects) == 0: raise AssertionError("No VFX objects created")
     print("Verification PASSED.")
 
     # 6. Render
     print("\n--- Step 6: Starting final render ---")
-    scene.render.filepath = render_output_path
-    scene.render.image_settings.file_format = 'PNG'
-
-    # Set render samples from visualization_params, default to 128 for testing
-    render_samples = visualization_params.get("render_samples", 128)
-    bpy.context.scene.cycles.samples = render_samples
-    print(f"[INFO] Setting Cycles render samples to: {render_samples}")
+    _configure_render(scene, render_output_path, visualization_params)
 
-    bpy.ops.render.render(animation=True)
+    # Report each finished frame as a structured progress event
+    render_progress = ProgressReporter("render", total=scene.frame_end - scene.frame_start + 1)
+    def _report_rendered_frame(render_scene, *args):
+        render_progress.update(render_scene.frame_current - render_scene.frame_start, frame=render_scene.frame_current)
+    if check_cancelled is not None:
+        try:
+            _render_frames(scene, render_output_path, render_progress, check_cancelled)
+        finally:
+            remove_frame_handlers()
+            remove_particle_handlers()
+        print("--- Blender One-Shot Process Finished ---")
+        return
+    bpy.app.handlers.render_post.append(_report_rendered_frame)
+    try:
+        bpy.ops.render.render(animation=True)
+    finally:
+        bpy.app.handlers.render_post.remove(_report_rendered_frame)
+        remove_frame_handlers()
+        remove_particle_handlers()
 
     print("--- Blender One-Shot Process Finished ---")
 
+def run_streaming_process(data_dir, render_output_path, simulation_params, visualization_params):
+    """
+    Builds and renders each frame as soon as the simulator records it in the
+    frame manifest, so rendering overlaps the solve instead of following it.
+    Renders the same frame range and file names as run_oneshot_process.
+    """
+    print("--- Blender Streaming Process Started ---")
+    scene = _new_scene(simulation_params)
+    mesh_params = _mesh_settings(simulation_params, visualization_params)
+    material_params = visualization_params.get("material_params", {})
+    getsuga_material = create_getsuga_material(material_params)
+    _setup_camera_and_light(scene, visualization_params)
+    _configure_render(scene, render_output_path, visualization_params)
+    _verify_scene(scene)
+
+    anim_params = visualization_params.get("animation_params", {})
+    forward_motion = np.array(anim_params.get("forward_motion", [0, 0.2, 0]))
+    render_progress = ProgressReporter("render", total=scene.frame_end - scene.frame_start + 1)
+    particle_obj = _build_particle_object(scene, simulation_params, visualization_params)
+    particle_loader = ParticleAnimator(particle_obj.name, data_dir, _particle_radius(visualization_params)) if particle_obj else None
+
+    previous_obj = None
+    rendered = 0
+    print(f"Waiting for frames in {data_dir} ...")
+    for frame_idx, frame_path in FrameManifestReader(data_dir).frames():
+        if frame_idx > scene.frame_end:
+            break
+        if frame_idx < scene.frame_start:
+            continue
+        mesh_obj = _build_frame_object(scene, load_frame(frame_path, mesh_fields(mesh_params)), mesh_params, getsuga_material, frame_idx)
+        mesh_obj.location = forward_motion * frame_idx
+        # Only the current frame's object is visible, as in the keyframed batch animation
+        if previous_obj is not None:
+            previous_obj.hide_viewport = True
+            previous_obj.hide_render = True
+        previous_obj = mesh_obj
+        if particle_loader is not None:
+            # The simulator writes a frame's particle file before recording the frame in the manifest
+            particle_loader.load(particle_obj.data, frame_idx)
+
+        scene.frame_set(frame_idx)
+        scene.render.filepath = render_output_path.replace("####", f"{frame_idx:04d}")
+        bpy.ops.render.render(write_still=True)
+        render_progress.update(rendered, frame=frame_idx)
+        rendered += 1
+
+    if rendered == 0: raise AssertionError("No VFX objects created")
+    print(f"--- Blender Streaming Process Finished ({rendered} frames) ---")
+
 if __name__ == "__main__":
     if "--" in sys.argv:
         args = sys.argv[sys.argv.index("--") + 1:]
+        # --stream: render frames while the simulator is still writing them
+        stream = "--stream" in args
+        if stream:
+            args.remove("--stream")
+        # --frames FIRST-LAST: render only this slice (one of several parallel workers)
+        frame_range = None
+        if "--frames" in args:
+            position = args.index("--frames")
+            frame_range = tuple(int(frame) for frame in args[position + 1].split("-"))
+            del args[position:position + 2]
         if len(args) == 4: # data_dir, render_path, sim_params_json, viz_params_json
             data_dir, render_path, sim_params_json, viz_params_json = args
             simulation_params = json.loads(sim_params_json)
             visualization_params = json.loads(viz_params_json)
-            run_oneshot_process(data_dir, render_path, sim_params_json, viz_params_json)
+            if stream:
+                run_streaming_process(data_dir, render_path, simulation_params, visualization_params)
+            else:
+                run_oneshot_process(data_dir, render_path, simulation_params, visualization_params, frame_range=frame_range)
         else:
-            print("Usage: blender --background --python run_blender_oneshot.py -- <data_dir> <render_output_path> <simulation_params_json> <visualization_params_json>")
+            print("Usage: blender --background --python run_blender_oneshot.py -- <data_dir> <render_output_path> <simulation_params_json> <visualization_params_json> [--stream | --frames FIRST-LAST]")
             sys.exit(1)
     else:
         print("Error: No arguments provided.")
@@ -0,0 +1,182 @@
+import sys
+import json
+import random
+import asyncio
+import time
+import httpx
+from src.json_stream import IncrementalJSONExtractor
+from src.llm_interface import (
+    DETERMINISTIC_SEED,
+    JSON_TASKS,
+    build_inference_messages,
+    build_task_messages,
+    _debug,
+)
+
+# HTTP statuses worth retrying: rate limiting and transient server trouble
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class LLMRequestError(Exception):
+    """The LLM server kept failing after all retries, or its answer held no usable or well-formed JSON."""
+
+
+class AsyncLLMInterface:
+    """
+    asyncio-native counterpart of LLMInterface that streams completions.
+
+    One pooled httpx.AsyncClient is reused for every call. Each call has a
+    deadline covering all of its attempts; transport errors and retryable HTTP
+    statuses are retried with jittered exponential backoff while time remains.
+    JSON answers are parsed incrementally while tokens stream in, and the
+    stream is closed as soon as the top-level object is complete.
+
+    Args:
+        llm_type (str): 'ollama' (/api/chat) or 'openai' (/v1/chat/completions).
+        model_name (str): Model to query.
+        base_url (str): Server URL.
+        api_key (str): Bearer token for OpenAI-compatible servers.
+        timeout (float): Default per-call deadline in seconds.
+        max_retries (int): Extra attempts after the first failure.
+        backoff (float): Base delay in seconds for the retry backoff.
+        max_connections (int): Size of the HTTP connection pool.
+        cache (LLMResponseCache): Optional response cache shared with other clients.
+        deterministic (bool): Ask for temperature-0, fixed-seed answers.
+    """
+
+    def __init__(self, llm_type="ollama", model_name="llama2", base_url="http://localhost:11434", api_key=None,
+                 timeout=120.0, max_retries=2, backoff=0.5, max_connections=10, cache=None, deterministic=False):
+        if llm_type not in ("ollama", "openai"):
+            raise ValueError(f"Unsupported LLM type: {llm_type}. Choose 'openai' or 'ollama'.")
+        self.llm_type = llm_type
+        self.model_name = model_name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self.deterministic = deterministic
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _request_body(self, messages, json_response):
+        temperature = 0.0 if self.deterministic else 0.7
+        if self.llm_type == "ollama":
+            options = {"temperature": temperature}
+            if self.deterministic:
+                options["seed"] = DETERMINISTIC_SEED
+            return "/api/chat", {"model": self.model_name, "messages": messages, "stream": True, "options": options}
+
+        body = {"model": self.model_name, "messages": messages, "stream": True, "temperature": temperature,
+                "response_format": {"type": "json_object"} if json_response else {"type": "text"}}
+        if self.deterministic:
+            body["seed"] = DETERMINISTIC_SEED
+        return "/v1/chat/completions", body
+
+    def _content_delta(self, line):
+        """Text carried by one streamed line, or None for keep-alives and end markers."""
+        if self.llm_type == "openai":
+            if not line.startswith("data:"):
+                return None
+            line = line[len("data:"):].strip()
+            if line == "[DONE]":
+                return None
+            choices = json.loads(line).get("choices") or [{}]
+            return choices[0].get("delta", {}).get("content")
+        return json.loads(line).get("message", {}).get("content")
+
+    async def _stream_once(self, messages, json_response):
+        path, body = self._request_body(messages, json_response)
+        extractor = IncrementalJSONExtractor() if json_response else None
+        parts = []
+        async with self.client.stream("POST", path, json=body) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    delta = self._content_delta(line)
+                    if not delta:
+                        continue
+                    if extractor is None:
+                        parts.append(delta)
+                    elif extractor.feed(delta) is not None:
+                        # Leaving the block closes the connection; the rest of the completion is never read
+                        return extractor.result
+                except ValueError as e:
+                    raise LLMRequestError(f"Malformed JSON in LLM response: {e}") from e
+        if extractor is not None:
+            raise LLMRequestError("Could not extract valid JSON from LLM response.")
+        return "".join(parts)
+
+    async def _complete(self, messages, json_response, deadline):
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError("LLM call deadline expired.")
+            try:
+                return await asyncio.wait_for(self._stream_once(messages, json_response), remaining)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise LLMRequestError(f"LLM request failed after {attempt + 1} attempt(s): {e}") from e
+                # Full jitter keeps concurrent callers from retrying in lockstep
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+                print(f"[AsyncLLMInterface] Attempt {attempt + 1} failed ({e}); retrying in {delay:.2f}s", file=sys.stderr)
+                attempt += 1
+                await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+
+    async def _cached(self, task, prompt, compute):
+        """Serves from the response cache, which also shares one in-flight call between identical requests."""
+        if self.cache is None:
+            return await compute()
+        mode = "deterministic" if self.deterministic else "sampled"
+        return await self.cache.get_or_compute_async(f"{self.llm_type}:{self.model_name}:{mode}", task, prompt, compute)
+
+    async def infer_simulation_and_visualization_parameters(self, effect_keywords, timeout=None):
+        """
+        Returns the parsed {"simulation_params": ..., "visualization_params": ...} object.
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passes before the JSON object is complete.
+            LLMRequestError: If the server keeps failing or the answer holds no JSON object.
+        """
+        messages = build_inference_messages(effect_keywords)
+        _debug(f"[AsyncLLMInterface] Messages being sent to LLM for parameter inference: {messages}")
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        return await self._cached("infer_parameters", messages,
+                                  lambda: self._complete(messages, True, deadline))
+
+    async def generate_code(self, task_name, params, timeout=None):
+        """Async generate_code: a parsed dict for JSON tasks, the completion text otherwise."""
+        messages = build_task_messages(task_name, params)
+        _debug(f"[AsyncLLMInterface] Messages being sent to LLM: {messages}")
+        json_response = task_name in JSON_TASKS
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+
+        async def request_task():
+            result = await self._complete(messages, json_response, deadline)
+            # Handle nested 'viz_params' if present (from generate_blender_script_params)
+            if task_name == "generate_blender_script_params" and "viz_params" in result:
+                return result["viz_params"]
+            return result
+
+        return await self._cached(task_name, messages, request_task)
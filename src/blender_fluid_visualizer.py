@@ -7,6 +7,10 @@ import sys
 # Add the src directory to the Python path to import ParamEvaluator
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.param_evaluator import ParamEvaluator
+from src.progress import ProgressReporter
+from src.glyphs import arrow_glyphs, glyphs_at_points, create_glyph_instancer, update_glyph_points
+from src.glyph_placement import GlyphPlacer
+from src.streamlines import FlowTracer, seed_points, create_polyline_curve, update_polyline_curve
 
 class BlenderFluidVisualizer:
     def __init__(self):
@@ -75,7 +79,23 @@ class BlenderFluidVisualizer:
         else:
             base_arrow.data.materials.append(arrow_material)
 
+        # One point cloud instances the base arrow on every vertex; each frame only rewrites its points
+        arrow_points = create_glyph_instancer("FluidArrows", base_arrow)
+        fluid_collection.objects.link(arrow_points)
+
+        # "adaptive" places a fixed budget of arrows where the flow is fast (or swirling) instead of on a uniform stride;
+        # the placer lives across frames so arrows stay put while their region stays active
+        glyph_placer = None
+        adaptive_placement = visualization_params.get("arrow_placement", "uniform") == "adaptive"
+
+        # Optional streamline trails: one curve object whose splines are retraced from fixed seeds each frame
+        tracer = None
+        streamline_seeds = None
+        streamline_curve = None
+        show_streamlines = visualization_params.get("streamlines", False)
+
         # Load fluid data and create instances per frame
+        render_progress = ProgressReporter("render", total=total_frames)
         for frame_idx in range(total_frames):
             bpy.context.scene.frame_set(frame_idx)
 
@@ -142,50 +162,37 @@ class BlenderFluidVisualizer:
             x = fluid_data['x']
             y = fluid_data['y']
 
-            # Clear previous arrows for this frame (if any) - for animation
-            # For instancing, we create them once and update visibility/position
-            # For now, we'll just create new ones and let Blender handle cleanup if needed
-            # A more efficient way would be to update existing instances.
-            for obj in fluid_collection.objects:
-                if obj.name.startswith("FluidArrow_"):
-                    bpy.data.objects.remove(obj, do_unlink=True)
-
-            # Create arrows based on fluid velocity (simplified)
-            arrow_density = current_viz_params.get("arrow_density", 15)
+            # Arrow transforms for the whole frame in one NumPy pass
             arrow_scale_factor = current_viz_params.get("arrow_scale_factor", 3.0)
-
-            # Downsample grid for arrow visualization
-            step_x = max(1, u.shape[0] // arrow_density)
-            step_y = max(1, u.shape[1] // arrow_density)
-
-            for i_x in range(0, u.shape[0], step_x):
-                for i_y in range(0, u.shape[1], step_y):
-                    pos_x = x[i_x]
-                    pos_y = y[i_y]
-                    vel_u = u[i_x, i_y]
-                    vel_v = v[i_x, i_y]
-
-                    speed = np.sqrt(vel_u**2 + vel_v**2)
-                    if speed > 1e-6: # Avoid division by zero for zero velocity
-                        direction_x = vel_u / speed
-                        direction_y = vel_v / speed
-
-                        # Create an instance of the base arrow
-                        arrow_instance = bpy.data.objects.new(f"FluidArrow_{frame_idx}_{i_x}_{i_y}", base_arrow.data)
-                        fluid_collection.objects.link(arrow_instance)
-                        arrow_instance.location = (pos_x, pos_y, 0) # Z-position can be adjusted
-                        
-                        # Scale arrow based on speed
-                        arrow_instance.scale = (arrow_scale_factor * speed, arrow_scale_factor * speed, arrow_scale_factor * speed)
-
-                        # Rotate arrow to align with velocity direction
-                        # Angle from positive X-axis to (direction_x, direction_y)
-                        angle = np.arctan2(direction_y, direction_x)
-                        arrow_instance.rotation_euler = (0, 0, angle)
+            if adaptive_placement:
+                if glyph_placer is None:
+                    glyph_placer = GlyphPlacer(x, y, budget=visualization_params.get("arrow_budget", 225),
+                                               importance=visualization_params.get("arrow_importance", "speed"))
+                points = glyph_placer.place(u, v)
+                vel_u, vel_v = glyph_placer.velocities(u, v)
+                glyphs = glyphs_at_points(points, vel_u, vel_v, arrow_scale_factor=arrow_scale_factor)
+            else:
+                glyphs = arrow_glyphs(x, y, u, v, arrow_density=current_viz_params.get("arrow_density", 15),
+                                      arrow_scale_factor=arrow_scale_factor)
+            update_glyph_points(arrow_points.data, glyphs)
+
+            if show_streamlines:
+                if tracer is None:
+                    tracer = FlowTracer(x, y, method=visualization_params.get("streamline_method", "rk4"))
+                    streamline_seeds = seed_points(x, y, visualization_params.get("streamline_seeds", 300))
+                lines = tracer.streamlines(u, v, streamline_seeds,
+                                           steps=visualization_params.get("streamline_steps", 100))
+                if streamline_curve is None:
+                    streamline_curve = create_polyline_curve("FluidStreamlines", lines)
+                    streamline_curve.data.materials.append(arrow_material)
+                    fluid_collection.objects.link(streamline_curve)
+                else:
+                    update_polyline_curve(streamline_curve.data, lines)
 
             # Render the current frame
             bpy.context.scene.render.filepath = os.path.join(render_output_path, f"frame_{frame_idx:04d}")
             bpy.ops.render.render(write_still=True)
+            render_progress.update(frame_idx, frame=frame_idx)
 
         print("Blender rendering complete.")
 
@@ -211,7 +218,12 @@ if __name__ == "__main__":
         sys.exit(1)
 import sys
 import json
-import bmesh
+from src.getsuga_mesh import build_getsuga_surface, to_blender_mesh
+from src.marching_squares import ribbons_for_frame, mesh_fields, scalar_field
+from src.frame_sequence import FrameSequence
+from src.frame_manifest import list_frame_files
+from src.vertex_cache import VertexCacheWriter, install_frame_handler, embed_loader
+from src.keyframe_curves import dissipation_curve, write_keyframes, write_visibility_keys
 
 def enable_gpu_rendering():
     """Attempts to enable GPU rendering and logs the process for debugging."""
@@ -302,62 +314,48 @@ def create_basic_material(name, base_color_rgb, emission_strength=0.0):
 
     return mat
 
+def build_frame_surface(fluid_data_frame, mesh_params):
+    if mesh_params.get('mesh_mode') == 'ribbon':
+        # Contour ribbons: far fewer faces than the thresholded surface for the same outline
+        return ribbons_for_frame(fluid_data_frame, mesh_params)
+
+    # Vertices and quads are computed in NumPy (src/getsuga_mesh.py) and handed to Blender in bulk
+    return build_getsuga_surface(
+        # Pressure (or the surface_field, e.g. 'dye') is indexed [j, i]
+        fluid_data_frame['x'], fluid_data_frame['y'], scalar_field(fluid_data_frame, mesh_params.get('surface_field', 'p')),
+        pressure_threshold=mesh_params.get('pressure_threshold', 0.1),
+        extrusion_scale=mesh_params.get('extrusion_scale', 0.5),
+        scale_x=mesh_params.get('scale_x', 1.0),
+        scale_y=mesh_params.get('scale_y', 1.0),
+    )
+
 def create_getsuga_mesh(fluid_data_frame, mesh_params):
     print("Creating Getsuga Tenshou mesh from fluid data...")
+    name = "GetsugaRibbons" if mesh_params.get('mesh_mode') == 'ribbon' else "GetsugaMesh"
+    return to_blender_mesh(build_frame_surface(fluid_data_frame, mesh_params), name)
 
-    x_coords = fluid_data_frame['x']
-    y_coords = fluid_data_frame['y']
-    pressure = fluid_data_frame['p']
-
-    nx = len(x_coords)
-    ny = len(y_coords)
-
-    # Get parameters from mesh_params
-    pressure_threshold = mesh_params.get('pressure_threshold', 0.1)
-    extrusion_scale = mesh_params.get('extrusion_scale', 0.5)
-    scale_x = mesh_params.get('scale_x', 1.0)
-    scale_y = mesh_params.get('scale_y', 1.0)
-
-    bm = bmesh.new()
-    verts = {}
-
-    # Create vertices
-    for i in range(nx):
-        for j in range(ny):
-            p_val = pressure[j, i] # Assuming pressure is (ny, nx)
-            if p_val > pressure_threshold:
-                # Scale coordinates and use pressure for Z-height
-                x = x_coords[i] * scale_x
-                y = y_coords[j] * scale_y
-                z = p_val * extrusion_scale
-                vert = bm.verts.new((x, y, z))
-                verts[(i, j)] = vert
-            else:
-                verts[(i, j)] = None # Mark as no vertex created
-
-    # Create faces
-    for i in range(nx - 1):
-        for j in range(ny - 1):
-            v1 = verts.get((i, j))
-            v2 = verts.get((i + 1, j))
-            v3 = verts.get((i + 1, j + 1))
-            v4 = verts.get((i, j + 1))
-
-            # Only create a face if all 4 vertices exist
-            if all([v1, v2, v3, v4]):
-                try:
-                    bm.faces.new((v1, v2, v3, v4))
-                except ValueError:
-                    # Handle cases where face creation might fail (e.g., non-planar quads)
-                    # For simplicity, we'll just skip for now. More robust handling might be needed.
-                    pass
-
-    # Create a new mesh data block
-    mesh_data = bpy.data.meshes.new("GetsugaMesh")
-    bm.to_mesh(mesh_data)
-    bm.free()
-
-    return mesh_data
+def create_vertex_cached_object(all_fluid_data, mesh_params, scene, cache_path, forward_motion):
+    """
+    One object whose mesh a frame-change handler streams from a vertex cache,
+    in place of one GetsugaVFX_Frame_XXXX object per frame. The .blend then
+    holds a single frame's mesh however long the animation is; the cache
+    directory has to travel with it.
+    """
+    print(f"[INFO] Writing vertex cache to {cache_path}...")
+    build_progress = ProgressReporter("scene_build", total=scene.frame_end - scene.frame_start + 1)
+    with VertexCacheWriter(cache_path) as writer:
+        for frame_idx in range(scene.frame_start, scene.frame_end + 1):
+            writer.add_frame(frame_idx, build_frame_surface(all_fluid_data[frame_idx], mesh_params))
+            build_progress.update(frame_idx - scene.frame_start, frame=frame_idx)
+    print(f"[INFO] Cached {len(writer.frames)} frames with {len(writer.topologies)} distinct topologies.")
+
+    mesh_obj = bpy.data.objects.new("GetsugaVFX", bpy.data.meshes.new("GetsugaVFX"))
+    scene.collection.objects.link(mesh_obj)
+    install_frame_handler(mesh_obj, cache_path, forward_motion)
+    # Handlers are not saved with the file; this registered text block re-installs them on load
+    embed_loader(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    scene.render.use_lock_interface = True
+    return mesh_obj
 
 def create_getsuga_material(material_params):
     # Placeholder for Getsuga Tenshou material creation
@@ -439,61 +437,21 @@ def animate_getsuga_vfx(all_fluid_data, mesh_objects, viz_params, scene):
         return
 
     # --- Animate Material Properties over the entire timeline ---
-    for frame in range(scene.frame_start, scene.frame_end + 1):
-        # Dissipation (투명도/밝기 점점 감소)
-        if dissipation_start <= frame <= dissipation_end:
-            # Calculate dissipation factor (0.0 at start, 1.0 at end)
-            factor = (frame - dissipation_start) / (dissipation_end - dissipation_start)
-            
-            # Fade out emission strength
-            current_emission_strength = material_params.get("emission_strength", 5.0) * (1 - factor)
-            principled_node.inputs['Emission Strength'].default_value = current_emission_strength
-            
-            # Fade out alpha (become more transparent)
-            current_alpha = material_params.get("transparency_alpha", 0.7) * (1 - factor)
-            principled_node.inputs['Alpha'].default_value = current_alpha
-        elif frame < dissipation_start:
-            # Before dissipation, use full values
-            principled_node.inputs['Emission Strength'].default_value = material_params.get("emission_strength", 5.0)
-            principled_node.inputs['Alpha'].default_value = material_params.get("transparency_alpha", 0.7)
-        else: # frame > dissipation_end
-            # After dissipation, fully transparent/dark
-            principled_node.inputs['Emission Strength'].default_value = 0.0
-            principled_node.inputs['Alpha'].default_value = 0.0
-        
-        # Insert keyframes for the material properties at the current frame
-        principled_node.inputs['Emission Strength'].keyframe_insert(data_path="default_value", frame=frame)
-        principled_node.inputs['Alpha'].keyframe_insert(data_path="default_value", frame=frame)
+    # The fade is computed for every frame at once and written straight into the F-curves
+    frames = np.arange(scene.frame_start, scene.frame_end + 1)
+    emission_strength = dissipation_curve(frames, dissipation_start, dissipation_end,
+                                          material_params.get("emission_strength", 5.0))
+    alpha = dissipation_curve(frames, dissipation_start, dissipation_end, material_params.get("transparency_alpha", 0.7))
+    for input_name, values in (('Emission Strength', emission_strength), ('Alpha', alpha)):
+        socket = principled_node.inputs[input_name]
+        socket.default_value = values[0]
+        write_keyframes(getsuga_material.node_tree, socket.path_from_id("default_value"), frames, values)
 
     # --- Animate Object Visibility and Position ---
+    # Each object sits still at its frame's position, so it needs no location keys
     for frame_idx, obj in enumerate(mesh_objects):
-        if frame_idx > scene.frame_end:
-            continue
-
-        # The object's base position is determined by the forward motion
         obj.location = forward_motion * frame_idx
-        obj.keyframe_insert(data_path="location", frame=frame_idx)
-
-        # The object should only be visible on its corresponding frame
-        # Hide it on the frame before it appears
-        if frame_idx > scene.frame_start:
-            obj.hide_set(True)
-            obj.hide_render = True
-            obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx - 1)
-            obj.keyframe_insert(data_path="hide_render", frame=frame_idx - 1)
-
-        # Show it on its correct frame
-        obj.hide_set(False)
-        obj.hide_render = False
-        obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx)
-        obj.keyframe_insert(data_path="hide_render", frame=frame_idx)
-
-        # Hide it on the frame after it appears
-        if frame_idx < scene.frame_end:
-            obj.hide_set(True)
-            obj.hide_render = True
-            obj.keyframe_insert(data_path="hide_viewport", frame=frame_idx + 1)
-            obj.keyframe_insert(data_path="hide_render", frame=frame_idx + 1)
+    write_visibility_keys(mesh_objects, np.arange(len(mesh_objects)), scene.frame_start, scene.frame_end)
 
     print("Getsuga Tenshou VFX animation complete.")
 
@@ -529,22 +487,16 @@ def visualize_fluid_data(data_dir, output_blend_path, viz_params):
 
     # --- Load Fluid Data ---
     print("[INFO] Loading fluid data files...")
-    fluid_data_files = sorted([f for f in os.listdir(data_dir) if f.startswith("fluid_data_") and f.endswith(".npz")])
+    # Frame order comes from the manifest (or the numeric frame in the file names)
+    fluid_data_files = list_frame_files(data_dir)
     if not fluid_data_files:
         print(f"[ERROR] No fluid data files found in {data_dir}")
         return
 
     print(f"[INFO] Found {len(fluid_data_files)} fluid data files.")
 
-    all_fluid_data = []
-    for f_name in fluid_data_files:
-        f_path = os.path.join(data_dir, f_name)
-        data = np.load(f_path)
-        all_fluid_data.append({"u": data["u"], "v": data["v"], "p": data["p"], "x": data["x"], "y": data["y"]})
-
-    if not all_fluid_data:
-        print("[ERROR] Failed to load any fluid data.")
-        return
+    # Frames are opened on demand with only the fields the mesher reads; at most a couple are held in memory
+    all_fluid_data = FrameSequence(fluid_data_files, fields=mesh_fields(mesh_params))
 
     # Get grid info from the first frame (still useful for domain size)
     first_frame_data = all_fluid_data[0]
@@ -574,27 +526,36 @@ def visualize_fluid_data(data_dir, output_blend_path, viz_params):
     # 3. Generate meshes for each frame and link material
     print("[INFO] Generating meshes for each frame...")
     mesh_objects = []
-    for frame_idx, frame_data in enumerate(all_fluid_data):
-        if frame_idx > scene.frame_end:
-            break # Don't create more objects than frames in the scene
-        print(f"[DEBUG] Processing frame {frame_idx}...")
-
-        mesh_data = create_getsuga_mesh(frame_data, mesh_params)
-        mesh_obj = bpy.data.objects.new(f"GetsugaVFX_Frame_{frame_idx:04d}", mesh_data)
-        scene.collection.objects.link(mesh_obj)
-
+    if animation_params.get("mesh_animation") == "vertex_cache":
+        cache_path = os.path.splitext(output_blend_path)[0] + "_vcache"
+        forward_motion = animation_params.get("forward_motion", [0, 0.2, 0])
+        cached_obj = create_vertex_cached_object(all_fluid_data, mesh_params, scene, cache_path, forward_motion)
         if getsuga_material:
-            if mesh_obj.data.materials:
-                mesh_obj.data.materials[0] = getsuga_material
-            else:
-                mesh_obj.data.materials.append(getsuga_material)
+            cached_obj.data.materials.append(getsuga_material)
+    else:
+        build_progress = ProgressReporter("scene_build", total=scene.frame_end - scene.frame_start + 1)
+        for frame_idx, frame_data in enumerate(all_fluid_data):
+            if frame_idx > scene.frame_end:
+                break # Don't create more objects than frames in the scene
+            print(f"[DEBUG] Processing frame {frame_idx}...")
+
+            mesh_data = create_getsuga_mesh(frame_data, mesh_params)
+            mesh_obj = bpy.data.objects.new(f"GetsugaVFX_Frame_{frame_idx:04d}", mesh_data)
+            scene.collection.objects.link(mesh_obj)
+
+            if getsuga_material:
+                if mesh_obj.data.materials:
+                    mesh_obj.data.materials[0] = getsuga_material
+                else:
+                    mesh_obj.data.materials.append(getsuga_material)
 
-        # Hide all meshes by default, animation will control visibility
-        mesh_obj.hide_set(True)
-        mesh_obj.hide_render = True
+            # Hide all meshes by default, animation will control visibility
+            mesh_obj.hide_set(True)
+            mesh_obj.hide_render = True
 
-        mesh_objects.append(mesh_obj)
-    print(f"[INFO] Generated {len(mesh_objects)} mesh objects.")
+            mesh_objects.append(mesh_obj)
+            build_progress.update(frame_idx, frame=frame_idx)
+        print(f"[INFO] Generated {len(mesh_objects)} mesh objects.")
     
     # 4. Animate meshes and material properties
     animate_getsuga_vfx(all_fluid_data, mesh_objects, viz_params, scene)
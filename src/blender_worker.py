@@ -0,0 +1,328 @@
+import io
+import sys
+import json
+import queue
+import socket
+import threading
+import traceback
+
+# A warm worker prints this line once its socket is listening, followed by the port
+LISTENING_PREFIX = "@@blender-worker listening "
+DEFAULT_HOST = "127.0.0.1"
+
+
+class BlenderWorkerError(Exception):
+    """A render job failed inside a warm Blender worker."""
+
+
+class BlenderJobCancelled(BaseException):
+    """
+    Raised inside a worker job whose client cancelled it or went away. A
+    BaseException, like KeyboardInterrupt, so a job's own `except Exception`
+    blocks do not swallow it.
+    """
+
+
+def send_message(sock_file, message):
+    sock_file.write((json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8"))
+    sock_file.flush()
+
+
+def read_message(sock_file):
+    """Reads one JSON line, or returns None when the peer closed the connection."""
+    line = sock_file.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
+
+
+def _close_quietly(sock_file):
+    """Closes a socket file whose peer may be gone (closing flushes unsent data)."""
+    try:
+        sock_file.close()
+    except OSError:
+        pass
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+class _SocketLineWriter(io.TextIOBase):
+    """
+    Stands in for sys.stdout during a job: each complete line is sent to the
+    client as an output event. Once the job is cancelled, the next print
+    raises BlenderJobCancelled, so a job that reports progress stops there.
+    """
+
+    def __init__(self, sock_file, echo=None, cancelled=None):
+        self.sock_file = sock_file
+        self.echo = echo
+        self.cancelled = cancelled or threading.Event()
+        self._buffer = ""
+
+    def write(self, text):
+        if self.cancelled.is_set():
+            raise BlenderJobCancelled()
+        if self.echo is not None:
+            self.echo.write(text)
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._send(line)
+        return len(text)
+
+    def flush(self):
+        if self.echo is not None:
+            self.echo.flush()
+
+    def close_line(self):
+        if self._buffer:
+            self._send(self._buffer)
+            self._buffer = ""
+
+    def _send(self, line):
+        try:
+            send_message(self.sock_file, {"event": "output", "line": line})
+        except OSError:
+            # Nobody is waiting for this job any more
+            self.cancelled.set()
+
+
+class BlenderWorkerServer:
+    """
+    Serves render jobs to clients over a local TCP socket, one job at a time.
+
+    Runs inside a long-lived Blender process (see blender_worker_server.py), so
+    each job skips Blender's startup and add-on initialisation. Jobs run on the
+    thread that calls serve_forever(), as bpy requires; a background thread
+    accepts connections and turns clients away with a "busy" reply while a job
+    is running, so a client can move on to another idle worker instead of
+    queueing behind this one.
+
+    Protocol (JSON lines): the client sends {"command": "render", "job": {...}}
+    or {"command": "ping"}. For a render the server answers "accepted" or
+    "busy", then streams {"event": "output", "line": ...} for everything the job
+    prints (including progress lines), and ends with {"event": "done"},
+    {"event": "cancelled"} or {"event": "error", "message": ..., "traceback": ...}.
+    A pong reports the running job's "job_id" (from the render job, if given).
+
+    A job is cancelled when its client sends {"command": "cancel"} on the same
+    connection or closes it (e.g. the pipeline stage was killed). The job
+    then stops at its next print or check_cancelled() call, so the worker
+    does not keep rendering for nobody.
+
+    Args:
+        handler (callable): handler(job) runs one job; its printed output is streamed to the client.
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one.
+        max_jobs (int): Exit after this many jobs so the pool can replace the process (None: never).
+    """
+
+    def __init__(self, handler, host=DEFAULT_HOST, port=0, max_jobs=None):
+        self.handler = handler
+        self.max_jobs = max_jobs
+        self.jobs_done = 0
+        self._socket = socket.create_server((host, port))
+        self.port = self._socket.getsockname()[1]
+        self._jobs = queue.Queue()
+        self._busy = False
+        self._job_id = None
+        self._cancelled = threading.Event()
+        self._watcher = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        sock_file = conn.makefile("rwb")
+        try:
+            request = read_message(sock_file)
+            command = request.get("command") if request else None
+            if command == "ping":
+                send_message(sock_file, {"event": "pong", "busy": self._busy, "jobs_done": self.jobs_done,
+                                         "job_id": self._job_id})
+            elif command == "shutdown":
+                send_message(sock_file, {"event": "bye"})
+                self.stop()
+            elif command == "render":
+                job = request.get("job", {})
+                with self._lock:
+                    accepted = not self._busy
+                    if accepted:
+                        self._busy = True
+                        self._job_id = job.get("job_id")
+                if not accepted:
+                    send_message(sock_file, {"event": "busy"})
+                else:
+                    send_message(sock_file, {"event": "accepted"})
+                    # The job thread owns the connection from here and closes it
+                    self._jobs.put((conn, sock_file, job))
+                    return
+            else:
+                send_message(sock_file, {"event": "error", "message": f"Unknown command: {command!r}"})
+        except (OSError, ValueError):
+            pass
+        _close_quietly(sock_file)
+        conn.close()
+
+    def _watch_client(self, conn, cancelled):
+        """Sets `cancelled` when the client asks to cancel or disconnects; ends when the job closes conn."""
+        pending = b""
+        while not cancelled.is_set():
+            try:
+                data = conn.recv(4096)
+            except OSError:
+                return
+            if not data:
+                cancelled.set()
+                return
+            pending += data
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                try:
+                    if json.loads(line.decode("utf-8")).get("command") == "cancel":
+                        cancelled.set()
+                except (ValueError, AttributeError):
+                    pass
+
+    def check_cancelled(self):
+        """Raises BlenderJobCancelled if the running job was cancelled; for long steps that print nothing."""
+        if self._cancelled.is_set():
+            raise BlenderJobCancelled()
+
+    def _run_job(self, conn, sock_file, job):
+        self._cancelled = cancelled = threading.Event()
+        self._watcher = threading.Thread(target=self._watch_client, args=(conn, cancelled),
+                                         name="blender-worker-watch", daemon=True)
+        self._watcher.start()
+        writer = _SocketLineWriter(sock_file, echo=sys.__stdout__, cancelled=cancelled)
+        original_stdout = sys.stdout
+        sys.stdout = writer
+        try:
+            self.handler(job)
+            return {"event": "done"}
+        except BlenderJobCancelled:
+            return {"event": "cancelled"}
+        except Exception as e:
+            return {"event": "error", "message": str(e) or type(e).__name__, "traceback": traceback.format_exc()}
+        finally:
+            sys.stdout = original_stdout
+            try:
+                writer.close_line()
+            except BlenderJobCancelled:
+                pass
+            if cancelled.is_set():
+                print("[BlenderWorker] Job cancelled by its client.", flush=True)
+
+    def serve_forever(self):
+        """Runs jobs on the calling thread until stop() or max_jobs is reached."""
+        threading.Thread(target=self._accept_loop, name="blender-worker-accept", daemon=True).start()
+        print(f"{LISTENING_PREFIX}{self.port}", flush=True)
+        while not self._stopped.is_set():
+            try:
+                conn, sock_file, job = self._jobs.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            result = self._run_job(conn, sock_file, job)
+            self.jobs_done += 1
+            retiring = bool(self.max_jobs and self.jobs_done >= self.max_jobs)
+            # Free the worker before answering, so a client that moves straight on to its next job finds it idle.
+            # A retiring worker stays busy so nothing new is accepted before it exits.
+            if not retiring:
+                with self._lock:
+                    self._busy = False
+                    self._job_id = None
+            try:
+                send_message(sock_file, result)
+            except OSError:
+                pass
+            finally:
+                _close_quietly(sock_file)
+                try:
+                    # Wakes the job's client watcher, which is blocked reading this connection
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                # Only close once the watcher let go, so it never reads a reused file descriptor
+                self._watcher.join(timeout=1.0)
+                conn.close()
+            if retiring:
+                print(f"[BlenderWorker] Served {self.jobs_done} jobs, exiting for a fresh process.", flush=True)
+                self.stop()
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+
+
+def ping_worker(address, timeout=2.0):
+    """Returns the worker's pong message, or None if it does not answer."""
+    try:
+        with socket.create_connection(parse_address(address), timeout=timeout) as conn:
+            sock_file = conn.makefile("rwb")
+            send_message(sock_file, {"command": "ping"})
+            return read_message(sock_file)
+    except (OSError, ValueError):
+        return None
+
+
+def render_with_worker(addresses, job, connect_timeout=2.0, output=None):
+    """
+    Runs a render job on the first idle worker among `addresses`.
+
+    Everything the job prints is copied to `output` (default sys.stdout) as it
+    arrives, so progress lines reach the job log exactly as with a Blender
+    subprocess.
+
+    Returns:
+        str: Address of the worker that ran the job, or None if no worker was idle.
+
+    Raises:
+        BlenderWorkerError: If the job failed or the worker died mid-job.
+    """
+    output = output or sys.stdout
+    for address in addresses:
+        try:
+            conn = socket.create_connection(parse_address(address), timeout=connect_timeout)
+        except (OSError, ValueError):
+            continue
+        with conn:
+            sock_file = conn.makefile("rwb")
+            try:
+                send_message(sock_file, {"command": "render", "job": job})
+                reply = read_message(sock_file)
+            except (OSError, ValueError):
+                continue
+            if not reply or reply.get("event") != "accepted":
+                continue
+
+            # Renders take as long as they take; only the connection attempt is time-limited
+            conn.settimeout(None)
+            while True:
+                message = read_message(sock_file)
+                if message is None:
+                    raise BlenderWorkerError(f"Blender worker {address} closed the connection mid-job.")
+                event = message.get("event")
+                if event == "output":
+                    output.write(message["line"] + "\n")
+                    output.flush()
+                elif event == "done":
+                    return address
+                elif event == "cancelled":
+                    raise BlenderWorkerError(f"Render was cancelled in Blender worker {address}.")
+                elif event == "error":
+                    output.write(message.get("traceback", "") + "\n")
+                    raise BlenderWorkerError(f"Render failed in Blender worker {address}: {message.get('message')}")
+    return None
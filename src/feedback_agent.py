@@ -1,8 +1,8 @@
 import os
 import base64
 import json
-from llm_interface import LLMInterface
-from prompt_templates import PROMPT_TEMPLATES
+from src.llm_interface import LLMInterface
+from src.prompt_templates import PROMPT_TEMPLATES
 
 class FeedbackAgent:
     def __init__(self):
@@ -57,7 +57,7 @@ class FeedbackAgent:
         return feedback
 
     def apply_suggestions(self, current_params: dict, feedback: dict):
-        print(f"[FeedbackAgent] Applying suggestions {feedback.get("suggestions")} to params: {current_params}")
+        print(f"[FeedbackAgent] Applying suggestions {feedback.get('suggestions')} to params: {current_params}")
         
         if not isinstance(current_params, dict) or not isinstance(feedback, dict):
             raise TypeError("current_params and feedback must be dictionaries.")
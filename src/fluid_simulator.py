@@ -2,40 +2,77 @@ import numpy as np
 import os
 import json
 from src.param_evaluator import ParamEvaluator
+from src.frame_manifest import FrameManifestWriter
+from src.particles import ParticleSystem, particle_file
+from src.forcing import Emitter, ForcingField, SHAPE_TYPES, evaluate_options
+from src.solver_engines import DEFAULT_ENGINE, create_engine
 
 class FluidSimulator:
     def __init__(self):
         self.param_evaluator = ParamEvaluator()
 
-    def _solve_navier_stokes(self, u, v, p, dt, dx, dy, viscosity, density, source_x, source_y, boundary_conditions):
-        # This is a placeholder for the actual Navier-Stokes solver logic.
-        # In a real implementation, this would involve complex numerical methods.
-        # For now, we'll simulate some basic fluid behavior.
-
-        # Apply viscosity (simplified diffusion)
-        u_new = u + viscosity * dt * (np.roll(u, 1, axis=0) + np.roll(u, -1, axis=0) + np.roll(u, 1, axis=1) + np.roll(u, -1, axis=1) - 4 * u) / (dx*dx)
-        v_new = v + viscosity * dt * (np.roll(v, 1, axis=0) + np.roll(v, -1, axis=0) + np.roll(v, 1, axis=1) + np.roll(v, -1, axis=1) - 4 * v) / (dy*dy)
-
-        # Apply pressure gradient (simplified)
-        u_new -= dt * (np.roll(p, -1, axis=0) - np.roll(p, 1, axis=0)) / (2 * dx * density)
-        v_new -= dt * (np.roll(p, -1, axis=1) - np.roll(p, 1, axis=1)) / (2 * dy * density)
-
-        # Add source terms (simplified)
-        u_new += dt * source_x
-        v_new += dt * source_y
-
-        # Apply boundary conditions (simplified: no-slip walls)
-        u_new[0, :] = 0; u_new[-1, :] = 0; u_new[:, 0] = 0; u_new[:, -1] = 0
-        v_new[0, :] = 0; v_new[-1, :] = 0; v_new[:, 0] = 0; v_new[:, -1] = 0
-
-        # Update pressure (simplified: solve for divergence-free velocity)
-        divergence = (np.roll(u_new, -1, axis=0) - np.roll(u_new, 1, axis=0)) / (2 * dx) + \
-                     (np.roll(v_new, -1, axis=1) - np.roll(v_new, 1, axis=1)) / (2 * dy)
-        p_new = p - dt * divergence * density # Very simplified pressure update
-
-        return u_new, v_new, p_new
-
-    def run_simulation(self, simulation_params: dict, output_dir: str):
+    def _transport_dye(self, dye, u, v, dt, dx, dy, diffusivity, decay, source):
+        """
+        Advects and diffuses passive dye channels by one step, in a single
+        5-point stencil pass over all channels at once.
+
+        The neighbours the diffusion Laplacian needs also give first-order
+        upwind gradients for advection, so both terms share one set of shifted
+        arrays. Edges repeat their value (no flux through the walls, unlike the
+        velocity solver's wrap-around rolls, so dye cannot leak across them).
+
+        Args:
+            dye (np.ndarray): (channels, ny, nx) densities, indexed [c, j, i].
+            u, v (np.ndarray): Velocity indexed [j, i], the layout the forcing terms use.
+            diffusivity (float): Dye diffusion coefficient.
+            decay (float): Fraction of dye lost per unit time.
+            source (np.ndarray): (channels, ny, nx) injection rates.
+        """
+        padded = np.pad(dye, ((0, 0), (1, 1), (1, 1)), mode="edge")
+        west, east = padded[:, 1:-1, :-2], padded[:, 1:-1, 2:]
+        south, north = padded[:, :-2, 1:-1], padded[:, 2:, 1:-1]
+
+        # Upwinding is only stable below one cell per step; faster flow carries dye at that limit instead of blowing up
+        u = np.clip(u, -0.45 * dx / dt, 0.45 * dx / dt)
+        v = np.clip(v, -0.45 * dy / dt, 0.45 * dy / dt)
+        laplacian = (west + east - 2 * dye) / (dx * dx) + (south + north - 2 * dye) / (dy * dy)
+        ddx = np.where(u > 0, dye - west, east - dye) / dx
+        ddy = np.where(v > 0, dye - south, north - dye) / dy
+        dye_new = dye + dt * (diffusivity * laplacian - u * ddx - v * ddy + source - decay * dye)
+        return np.maximum(dye_new, 0.0, out=dye_new)
+
+    def run_simulation(self, simulation_params: dict, output_dir: str, progress_callback=None):
+        """
+        Runs the solver and writes one fluid_data_frame_XXXX.npz per time step.
+        With simulation_params["particles"] (a dict of ParticleSystem options,
+        or True for the defaults), a particles_frame_XXXX.npz is written
+        alongside each frame (see src.particles).
+
+        With simulation_params["dye"] (a dict, or True for the defaults), each
+        frame also stores `dye`, (channels, ny, nx) float32 densities injected
+        by the source shape and carried by the flow. Keys: channels (1),
+        injection_rate (1.0, or one per channel), diffusivity (0.001), decay (0.0).
+
+        simulation_params["solver"] names the solver engine (src.solver_engines:
+        "placeholder", the default, or "projection", the pressure-Poisson
+        scheme); simulation_params["solver_options"] is passed to its constructor.
+
+        An initial_shape_type of "crescent", "ring", "slash" or "bitmap" pushes
+        the fluid inside that shape with source_strength; simulation_params
+        ["shape_params"] holds its options (see src.forcing.shape_stamp), which
+        may be functions of t like the other parameters.
+
+        simulation_params["emitters"] lists extra force sources besides the
+        initial shape, each {"type": one of src.forcing.EMITTER_TYPES, "position",
+        "size", "strength"} plus any shape options (values may be functions of t).
+
+        Each frame is written atomically and then recorded in the directory's
+        frame manifest (src.frame_manifest), so a consumer can start building and
+        rendering frame k while later frames are still being solved.
+
+        progress_callback, if given, is called as progress_callback(step, total)
+        after each frame is saved (see src.progress.ProgressReporter).
+        """
         # Extract and evaluate fixed parameters
         grid_resolution = simulation_params.get("grid_resolution", [101, 101])
         time_steps = simulation_params.get("time_steps", 30)
@@ -48,89 +85,130 @@ class FluidSimulator:
         dt = 0.01 # Fixed time step for solver stability
         density = 1.0 # Assume constant density
 
-        # Initialize fluid fields
-        u = np.zeros((nx, ny))
-        v = np.zeros((nx, ny))
-        p = np.zeros((nx, ny))
-
         # Create meshgrids for initial conditions
         x = np.linspace(0, 2, nx)
         y = np.linspace(0, 2, ny)
         X, Y = np.meshgrid(x, y)
 
+        # Initialize fluid fields, (ny, nx) like X and Y, with the selected solver engine
+        engine = create_engine(simulation_params.get("solver", DEFAULT_ENGINE), x, y, density=density,
+                               boundary_conditions=boundary_conditions,
+                               options=simulation_params.get("solver_options"))
+        state = engine.initial_state()
+
         # Store evaluated parameters for each frame
         evaluated_params_per_frame = []
 
-        for i in range(time_steps):
-            t = i * dt # Current simulation time
-
-            # Evaluate time-dependent parameters for the current time step
-            current_sim_params = {}
-            for key, value in simulation_params.items():
-                if key in ["boundary_conditions", "initial_shape_type"]:
-                    current_sim_params[key] = value
-                elif isinstance(value, str):
-                    try:
-                        current_sim_params[key] = self.param_evaluator.evaluate(value, t=t)
-                    except ValueError as e:
-                        raise ValueError(f"Error evaluating simulation parameter '{key}' at time {t}: {e}")
-                elif isinstance(value, list):
-                    evaluated_list = []
-                    for item in value:
-                        if isinstance(item, str):
-                            try:
-                                evaluated_list.append(self.param_evaluator.evaluate(item, t=t))
-                            except ValueError as e:
-                                raise ValueError(f"Error evaluating list item in simulation parameter '{key}' at time {t}: {e}")
-                        else:
-                            evaluated_list.append(item)
-                    current_sim_params[key] = evaluated_list
-                else:
-                    current_sim_params[key] = value
+        # Localized forces, cached per emitter placement across steps
+        forcing = ForcingField(x, y)
+
+        # Optional passive particles, advected inside the step loop (one extra pass per step)
+        particle_params = simulation_params.get("particles")
+        particles = ParticleSystem.from_params(x, y, particle_params) if particle_params else None
+
+        # Optional passive dye channels, injected where the source shape forces the flow
+        dye_params = simulation_params.get("dye")
+        dye = None
+        if dye_params:
+            dye_params = dye_params if isinstance(dye_params, dict) else {}
+            dye_channels = int(dye_params.get("channels", 1))
+            injection_rate = np.broadcast_to(np.asarray(dye_params.get("injection_rate", 1.0), dtype=np.float64),
+                                             (dye_channels,))[:, None, None]
+            dye = np.zeros((dye_channels,) + X.shape)
+
+        manifest = FrameManifestWriter(output_dir, total=time_steps)
+        try:
+            for i in range(time_steps):
+                t = i * dt # Current simulation time
+                evaluate_at_t = lambda value, t=t: self.param_evaluator.evaluate(value, t=t)
+
+                # Evaluate time-dependent parameters for the current time step
+                current_sim_params = {}
+                for key, value in simulation_params.items():
+                    if key in ["boundary_conditions", "initial_shape_type", "solver"]:
+                        current_sim_params[key] = value
+                    elif isinstance(value, str):
+                        try:
+                            current_sim_params[key] = self.param_evaluator.evaluate(value, t=t)
+                        except ValueError as e:
+                            raise ValueError(f"Error evaluating simulation parameter '{key}' at time {t}: {e}")
+                    elif isinstance(value, list):
+                        evaluated_list = []
+                        for item in value:
+                            if isinstance(item, str):
+                                try:
+                                    evaluated_list.append(self.param_evaluator.evaluate(item, t=t))
+                                except ValueError as e:
+                                    raise ValueError(f"Error evaluating list item in simulation parameter '{key}' at time {t}: {e}")
+                            else:
+                                evaluated_list.append(item)
+                        current_sim_params[key] = evaluated_list
+                    else:
+                        current_sim_params[key] = value
             
-            # Apply initial shape / source based on evaluated parameters
-            source_x = np.zeros((nx, ny))
-            source_y = np.zeros((nx, ny))
-
-            initial_shape_position = current_sim_params.get("initial_shape_position", [1.0, 1.0])
-            initial_shape_size = current_sim_params.get("initial_shape_size", 0.4)
-            vortex_strength = current_sim_params.get("vortex_strength", 1.2)
-            source_strength = current_sim_params.get("source_strength", 2.0)
-            initial_velocity = current_sim_params.get("initial_velocity", [0.0, 0.0])
-
-            # Simple initial condition application (can be expanded)
-            if initial_shape_type == "vortex":
-                center_x, center_y = initial_shape_position
-                radius = initial_shape_size
-                dist = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-                # Apply a vortex force
-                source_x += vortex_strength * (Y - center_y) * np.exp(-(dist/radius)**2)
-                source_y -= vortex_strength * (X - center_x) * np.exp(-(dist/radius)**2)
-            elif initial_shape_type == "circle_burst":
-                center_x, center_y = initial_shape_position
-                radius = initial_shape_size
-                dist = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-                # Apply an outward burst force
-                source_x += source_strength * (X - center_x) * np.exp(-(dist/radius)**2)
-                source_y += source_strength * (Y - center_y) * np.exp(-(dist/radius)**2)
+                # Apply initial shape / source based on evaluated parameters
+                source_x = np.zeros_like(X)
+                source_y = np.zeros_like(X)
+                # Shape of the source regions, which also inject dye
+                envelope = np.zeros_like(X) if dye is not None else None
+
+                initial_shape_position = current_sim_params.get("initial_shape_position", [1.0, 1.0])
+                initial_shape_size = current_sim_params.get("initial_shape_size", 0.4)
+                vortex_strength = current_sim_params.get("vortex_strength", 1.2)
+                source_strength = current_sim_params.get("source_strength", 2.0)
+                initial_velocity = current_sim_params.get("initial_velocity", [0.0, 0.0])
+
+                # The initial shape is one emitter; simulation_params["emitters"] adds any number of others
+                emitters = []
+                if initial_shape_type == "vortex":
+                    emitters.append(Emitter("vortex", initial_shape_position, initial_shape_size, vortex_strength))
+                elif initial_shape_type == "circle_burst":
+                    emitters.append(Emitter("circle_burst", initial_shape_position, initial_shape_size, source_strength))
+                elif initial_shape_type in SHAPE_TYPES:
+                    shape_params = evaluate_options(current_sim_params.get("shape_params"), evaluate_at_t)
+                    emitters.append(Emitter(initial_shape_type, initial_shape_position, initial_shape_size,
+                                            source_strength, shape_params))
+                for emitter_params in current_sim_params.get("emitters", []):
+                    emitters.append(Emitter.from_params(emitter_params, evaluate_at_t))
+                # Each emitter is evaluated only inside its bounding window (src.forcing)
+                forcing.apply(emitters, source_x, source_y, envelope=envelope)
             
-            # Add initial velocity if any
-            u += initial_velocity[0]
-            v += initial_velocity[1]
-
-            # Solve Navier-Stokes for one time step
-            u, v, p = self._solve_navier_stokes(
-                u, v, p, dt, dx, dy,
-                current_sim_params.get("viscosity", 0.02),
-                density, source_x, source_y, boundary_conditions
-            )
-
-            # Save fluid data for the current frame
-            frame_output_path = os.path.join(output_dir, f"fluid_data_frame_{i:04d}.npz")
-            np.savez_compressed(frame_output_path, u=u, v=v, p=p, x=x, y=y)
+                # Add initial velocity if any
+                state.u += initial_velocity[0]
+                state.v += initial_velocity[1]
+
+                # Solve Navier-Stokes for one time step
+                state = engine.step(state, dt, current_sim_params.get("viscosity", 0.02), source_x, source_y)
+                u, v = state.u, state.v
+                frame_fields = dict(state.fields(), x=x, y=y)
+                if dye is not None:
+                    dye_source = injection_rate * envelope
+                    dye = self._transport_dye(dye, u, v, dt, dx, dy, dye_params.get("diffusivity", 0.001),
+                                              dye_params.get("decay", 0.0), dye_source)
+                    frame_fields["dye"] = dye.astype(np.float32)
+
+                # Save fluid data for the current frame (write-then-rename, so readers never see a partial file)
+                frame_filename = f"fluid_data_frame_{i:04d}.npz"
+                frame_output_path = os.path.join(output_dir, frame_filename)
+                with open(frame_output_path + ".tmp", "wb") as f:
+                    np.savez_compressed(f, **frame_fields)
+                os.replace(frame_output_path + ".tmp", frame_output_path)
+                if particles is not None:
+                    # Emitted at the forcing shape; saved before the manifest entry so consumers see both files
+                    particles.step(u, v, dt, center=initial_shape_position, radius=initial_shape_size)
+                    particles.save(particle_file(output_dir, i))
+                manifest.add_frame(i, frame_filename)
             
-            # Store evaluated parameters for this frame (for potential later use/debugging)
-            evaluated_params_per_frame.append(current_sim_params)
+                # Store evaluated parameters for this frame (for potential later use/debugging)
+                evaluated_params_per_frame.append(current_sim_params)
+
+                if progress_callback is not None:
+                    progress_callback(i, time_steps)
+        except BaseException as e:
+            # Tell streaming consumers to stop waiting for frames that will never come
+            manifest.fail(str(e) or type(e).__name__)
+            raise
+        manifest.close()
 
         return {
             "status": "success",
@@ -0,0 +1,400 @@
+import os
+import json
+import math
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+# Radii beyond which a Gaussian emitter is treated as zero (exp(-9) ~ 1e-4 of its peak)
+GAUSSIAN_CUTOFF = 3.0
+GAUSSIAN_TYPES = ("vortex", "circle_burst")
+SHAPE_TYPES = ("crescent", "ring", "slash", "bitmap")
+EMITTER_TYPES = GAUSSIAN_TYPES + SHAPE_TYPES
+# Shape options that are taken literally rather than evaluated as expressions of t
+LITERAL_OPTIONS = ("bitmap",)
+# Bitmap shapes load image / .npy files from here only: paths come from user and LLM params.
+# The repository ships sample masks there (e.g. "star.npy").
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+
+def evaluate_options(options, evaluate):
+    """
+    Shape options with their string expressions (e.g. functions of t) and the
+    string items of list options (e.g. direction) turned into numbers by
+    `evaluate`; LITERAL_OPTIONS are kept as given.
+    """
+    evaluated = {}
+    for key, value in (options or {}).items():
+        if key in LITERAL_OPTIONS:
+            evaluated[key] = value
+        elif isinstance(value, str):
+            evaluated[key] = evaluate(value)
+        elif isinstance(value, list):
+            evaluated[key] = [evaluate(item) if isinstance(item, str) else item for item in value]
+        else:
+            evaluated[key] = value
+    return evaluated
+
+
+class Emitter:
+    """
+    One localized force source at `position`, scaled by `strength` (the
+    simulator's vortex_strength / source_strength for the initial shape).
+
+    'vortex' and 'circle_burst' are Gaussians of the given radius that swirl
+    the flow or push it outwards. The shape types ('crescent', 'ring',
+    'slash', 'bitmap') push the fluid inside a mask of size `radius`; see
+    shape_stamp for their `options`.
+    """
+
+    def __init__(self, shape_type, position, radius, strength, options=None):
+        if shape_type not in EMITTER_TYPES:
+            raise ValueError(f"Unknown emitter type '{shape_type}'. Use one of {', '.join(EMITTER_TYPES)}.")
+        self.shape_type = shape_type
+        self.position = (float(position[0]), float(position[1]))
+        self.radius = float(radius)
+        self.strength = float(strength)
+        self.options = options or {}
+
+    @classmethod
+    def from_params(cls, params, evaluate=None):
+        """
+        An emitter from a simulation_params["emitters"] entry: {"type", "position",
+        "size", "strength"}, plus the shape options for shape types. `evaluate`
+        turns string expressions (e.g. functions of t) into numbers, in the
+        options too (see evaluate_options).
+        """
+        evaluate = evaluate or (lambda value: value)
+
+        def number(value):
+            return evaluate(value) if isinstance(value, str) else value
+
+        options = evaluate_options({key: value for key, value in params.items()
+                                    if key not in ("type", "position", "size", "strength")}, evaluate)
+        return cls(params.get("type", "vortex"), [number(value) for value in params.get("position", [1.0, 1.0])],
+                   number(params.get("size", 0.4)), number(params.get("strength", 1.0)), options)
+
+
+class ShapeStamp:
+    """
+    A shape's force, sampled once on the grid spacing around its centre.
+
+    Attributes:
+        mask (np.ndarray): (h, w) coverage in [0, 1], indexed [j, i].
+        force_x, force_y (np.ndarray): (h, w) mask times the unit push direction.
+        center (tuple): (row, column) of the shape's centre in the stamp.
+    """
+
+    def __init__(self, mask, direction_x, direction_y, center):
+        self.mask = mask
+        self.force_x = mask * direction_x
+        self.force_y = mask * direction_y
+        self.center = center
+
+
+def _rotate(offset_x, offset_y, angle):
+    """Offsets expressed in a frame rotated by `angle` (so shapes can be drawn unrotated)."""
+    cos, sin = np.cos(angle), np.sin(angle)
+    return cos * offset_x + sin * offset_y, -sin * offset_x + cos * offset_y
+
+
+def _asset_path(path):
+    """Resolves a bitmap path against ASSETS_DIR, refusing anything that ends up outside it."""
+    root = os.path.realpath(ASSETS_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Bitmap '{path}' is outside the assets directory {ASSETS_DIR}.")
+    return resolved
+
+
+def _load_bitmap(bitmap):
+    """A 2-D mask from nested lists or an image / .npy path in ASSETS_DIR; rows run top to bottom, as in an image."""
+    if isinstance(bitmap, str):
+        path = _asset_path(bitmap)
+        if path.endswith(".npy"):
+            return np.asarray(np.load(path, allow_pickle=False), dtype=np.float64)
+        with Image.open(path) as image:
+            return np.asarray(image.convert("L"), dtype=np.float64) / 255.0
+    return np.asarray(bitmap, dtype=np.float64)
+
+
+class GaussianStamp:
+    """
+    A Gaussian of one radius, sampled once on the grid spacing around a grid
+    point and cut off at cutoff * radius.
+
+    The Gaussian is separable, so only its 1-D profiles are kept: exp(-(o / r)^2)
+    along x and y, and the same times the offset o from the centre. The
+    window's envelope and the radial offsets (X - cx) * envelope and
+    (Y - cy) * envelope are outer products of these.
+
+    Attributes:
+        profiles_x, profiles_y (np.ndarray): (2, n) profile and offset-weighted profile along each axis.
+        center (tuple): (row, column) of the Gaussian's centre in the stamp.
+    """
+
+    def __init__(self, radius, dx, dy, cutoff=GAUSSIAN_CUTOFF):
+        half_x, half_y = int(np.ceil(cutoff * radius / dx)), int(np.ceil(cutoff * radius / dy))
+        offset_x = np.arange(-half_x, half_x + 1) * dx
+        offset_y = np.arange(-half_y, half_y + 1) * dy
+        profile_x = np.exp(-(offset_x / radius) ** 2)
+        profile_y = np.exp(-(offset_y / radius) ** 2)
+        self.profiles_x = np.stack([profile_x, profile_x * offset_x])
+        self.profiles_y = np.stack([profile_y, profile_y * offset_y])
+        self.center = (half_y, half_x)
+
+    @staticmethod
+    def _split(profiles, fraction):
+        """Profiles split over two neighbouring cells: 1 - fraction stays, fraction moves one cell on."""
+        split = np.zeros((2, profiles.shape[1] + 1))
+        split[:, :-1] = (1 - fraction) * profiles
+        split[:, 1:] += fraction * profiles
+        return split
+
+    def windows(self, frac_i, frac_j):
+        """
+        The envelope, (X - cx) * envelope and (Y - cy) * envelope for a centre
+        frac_i / frac_j of a cell past the stamp's centre point: the bilinear
+        split of the stamp over the four neighbouring cells, done on the 1-D
+        profiles. Each array is one cell larger than the stamp along both axes.
+        """
+        profile_x, moment_x = self._split(self.profiles_x, frac_i)
+        profile_y, moment_y = self._split(self.profiles_y, frac_j)[:, :, np.newaxis]
+        return profile_y * profile_x, profile_y * moment_x, moment_y * profile_x
+
+
+def validate_bitmap(options, where):
+    """
+    Checks that the options of a 'bitmap' shape (shape_params, or an emitter
+    entry) hold a mask it can draw: nested lists of numbers, or an image /
+    .npy file in ASSETS_DIR.
+
+    Returns:
+        tuple: (True, None), or (False, message) naming `where`.
+    """
+    if not isinstance(options, dict) or "bitmap" not in options:
+        return False, f"'{where}' needs a 'bitmap' (nested lists, or an image / .npy file in {ASSETS_DIR})."
+    bitmap = options["bitmap"]
+    if isinstance(bitmap, str):
+        try:
+            path = _asset_path(bitmap)
+        except ValueError as e:
+            return False, f"'{where}': {e}"
+        if not os.path.isfile(path):
+            return False, f"'{where}': bitmap '{bitmap}' was not found in {ASSETS_DIR}."
+        return True, None
+    try:
+        mask = np.asarray(bitmap, dtype=np.float64)
+    except (TypeError, ValueError):
+        mask = None
+    if mask is None or mask.ndim != 2 or not mask.size:
+        return False, f"'{where}': an inline bitmap must be a non-empty 2-D list of numbers."
+    return True, None
+
+
+def shape_stamp(shape_type, size, dx, dy, options=None):
+    """
+    Builds the ShapeStamp of one shape on a grid with spacing (dx, dy).
+
+    Every shape spans about `size` from its centre and is turned by
+    options["rotation"] (radians, counter-clockwise):
+      crescent: the arc inner_ratio * size..size (default 0.6) between
+                angle_start and angle_end (default pi/4..3pi/4, so it opens
+                upwards), pushed along its bisector, like a flying slash.
+      ring:     a band of `width` (default 0.2 * size) at radius size, pushed outwards.
+      slash:    a line of length 2 * size and `thickness` (default 0.15 * size)
+                at `angle` (default pi/4), pushed along its length.
+      bitmap:   options["bitmap"] (nested lists, or an image / .npy path
+                relative to ASSETS_DIR, e.g. "star.npy") stretched over a 2 * size square,
+                pushed along `direction` (default [0, 1]).
+    """
+    options = options or {}
+    rotation = float(options.get("rotation", 0.0))
+    half_x = int(np.ceil(size * 1.05 / dx)) + 1
+    half_y = int(np.ceil(size * 1.05 / dy)) + 1
+    offset_x, offset_y = np.meshgrid(np.arange(-half_x, half_x + 1) * dx, np.arange(-half_y, half_y + 1) * dy)
+    local_x, local_y = _rotate(offset_x, offset_y, rotation)
+    distance = np.hypot(local_x, local_y)
+
+    if shape_type == "crescent":
+        angle_start = float(options.get("angle_start", np.pi / 4))
+        angle_end = float(options.get("angle_end", 3 * np.pi / 4))
+        angle = np.arctan2(local_y, local_x) % (2 * np.pi)
+        mask = ((distance <= size) & (distance >= float(options.get("inner_ratio", 0.6)) * size) &
+                (angle >= angle_start) & (angle <= angle_end))
+        heading = np.full_like(distance, rotation + (angle_start + angle_end) / 2)
+        direction_x, direction_y = np.cos(heading), np.sin(heading)
+    elif shape_type == "ring":
+        mask = np.abs(distance - size) <= float(options.get("width", 0.2 * size)) / 2
+        safe = np.where(distance > 0, distance, 1.0)
+        direction_x, direction_y = offset_x / safe, offset_y / safe
+    elif shape_type == "slash":
+        angle = float(options.get("angle", np.pi / 4))
+        along, across = _rotate(local_x, local_y, angle)
+        mask = (np.abs(along) <= size) & (np.abs(across) <= float(options.get("thickness", 0.15 * size)) / 2)
+        heading = np.full_like(distance, rotation + angle)
+        direction_x, direction_y = np.cos(heading), np.sin(heading)
+    elif shape_type == "bitmap":
+        if "bitmap" not in options:
+            raise ValueError("A 'bitmap' emitter needs a 'bitmap' option (nested lists, or an image / .npy path).")
+        bitmap = _load_bitmap(options["bitmap"])
+        rows, columns = bitmap.shape
+        # Nearest bitmap pixel of each stamp point; row 0 of the bitmap is the top (highest y)
+        column = np.floor((local_x / (2 * size) + 0.5) * columns).astype(np.int64)
+        row = np.floor((0.5 - local_y / (2 * size)) * rows).astype(np.int64)
+        inside = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+        mask = np.zeros_like(distance)
+        mask[inside] = np.clip(bitmap[row[inside], column[inside]], 0.0, 1.0)
+        direction = np.asarray(options.get("direction", [0.0, 1.0]), dtype=np.float64)
+        direction = direction / max(np.hypot(*direction), 1e-12)
+        heading_x, heading_y = _rotate(direction[0], direction[1], -rotation)
+        direction_x, direction_y = np.full_like(distance, heading_x), np.full_like(distance, heading_y)
+    else:
+        raise ValueError(f"Unknown shape '{shape_type}'. Use one of {', '.join(SHAPE_TYPES)}.")
+    return ShapeStamp(mask.astype(np.float64), direction_x, direction_y, (half_y, half_x))
+
+
+class ForcingField:
+    """
+    Evaluates emitters on the simulator's grid inside their bounding windows only.
+
+    Each emitter covers the grid points within cutoff * radius of its centre.
+    Its Gaussian is sampled once per (radius, spacing) around a grid point
+    (GaussianStamp) and kept in a small LRU. Shape emitters use a ShapeStamp
+    built once per (shape, size, options) and cached the same way.
+
+    Stamps do not depend on the position: an emitter is placed by an integer
+    cell offset plus a bilinear split over the four neighbouring offsets for
+    the subpixel remainder, so moving emitters never rebuild their stamp. Cost
+    scales with the emitters' footprint, not the grid area times the number of
+    emitters.
+
+    Shapes need a uniform grid (the simulator's linspace grid). On other grids
+    a Gaussian is evaluated exactly in its window at every call.
+
+    Fields are indexed [j, i] (np.meshgrid of x and y), like the simulator's forcing terms.
+
+    Args:
+        x_coords, y_coords (array): Grid coordinates.
+        cutoff (float): Window half-width in radii.
+        cache_size (int): Number of stamps kept.
+    """
+
+    def __init__(self, x_coords, y_coords, cutoff=GAUSSIAN_CUTOFF, cache_size=64):
+        self.x_coords = np.asarray(x_coords, dtype=np.float64)
+        self.y_coords = np.asarray(y_coords, dtype=np.float64)
+        self.cutoff = cutoff
+        self.cache_size = max(1, cache_size)
+        self._stamps = OrderedDict()
+        self.spacing = None
+        if len(self.x_coords) > 1 and len(self.y_coords) > 1:
+            dx, dy = np.diff(self.x_coords), np.diff(self.y_coords)
+            if np.allclose(dx, dx[0]) and np.allclose(dy, dy[0]):
+                self.spacing = (dx[0], dy[0])
+
+    def _cached(self, key, build):
+        if key in self._stamps:
+            self._stamps.move_to_end(key)
+            return self._stamps[key]
+        stamp = self._stamps[key] = build()
+        if len(self._stamps) > self.cache_size:
+            self._stamps.popitem(last=False)
+        return stamp
+
+    def window(self, center, radius):
+        """Row and column slices of the grid points within cutoff * radius of center (possibly empty)."""
+        reach = self.cutoff * radius
+        columns = slice(np.searchsorted(self.x_coords, center[0] - reach, side="left"),
+                        np.searchsorted(self.x_coords, center[0] + reach, side="right"))
+        rows = slice(np.searchsorted(self.y_coords, center[1] - reach, side="left"),
+                     np.searchsorted(self.y_coords, center[1] + reach, side="right"))
+        return rows, columns
+
+    def stamp(self, radius):
+        """The cached GaussianStamp of `radius` on this grid (independent of its position)."""
+        return self._cached(("gaussian", float(radius), self.spacing),
+                            lambda: GaussianStamp(radius, self.spacing[0], self.spacing[1], self.cutoff))
+
+    def shape(self, emitter):
+        """The cached ShapeStamp of a shape emitter (independent of its position)."""
+        if self.spacing is None:
+            raise ValueError(f"'{emitter.shape_type}' emitters need a uniformly spaced grid.")
+        key = (emitter.shape_type, emitter.radius, json.dumps(emitter.options, sort_keys=True))
+        return self._cached(key, lambda: shape_stamp(emitter.shape_type, emitter.radius, self.spacing[0],
+                                                     self.spacing[1], emitter.options))
+
+    @staticmethod
+    def _add_shifted(target, values, row, column, weight):
+        """Adds weight * values to target with values[0, 0] at (row, column), clipped to the grid."""
+        height, width = values.shape
+        top, left = max(row, 0), max(column, 0)
+        bottom, right = min(row + height, target.shape[0]), min(column + width, target.shape[1])
+        if top < bottom and left < right:
+            target[top:bottom, left:right] += weight * values[top - row:bottom - row, left - column:right - column]
+
+    def _grid_index(self, position):
+        """The grid cell (row, column) at or below `position` and the subpixel remainder (frac_j, frac_i) past it."""
+        fi = float((position[0] - self.x_coords[0]) / self.spacing[0])
+        fj = float((position[1] - self.y_coords[0]) / self.spacing[1])
+        base_i, base_j = math.floor(fi), math.floor(fj)
+        return (base_j, base_i), (fj - base_j, fi - base_i)
+
+    def _place(self, stamp, position, targets):
+        """Adds scale * values for each (target, values, scale) with the ShapeStamp's centre at `position`."""
+        # Whole cells plus a subpixel remainder split bilinearly over the four neighbouring offsets
+        (base_j, base_i), (frac_j, frac_i) = self._grid_index(position)
+        for shift_j, weight_j in ((0, 1 - frac_j), (1, frac_j)):
+            for shift_i, weight_i in ((0, 1 - frac_i), (1, frac_i)):
+                weight = weight_i * weight_j
+                if weight == 0:
+                    continue
+                row = base_j + shift_j - stamp.center[0]
+                column = base_i + shift_i - stamp.center[1]
+                for target, values, scale in targets:
+                    self._add_shifted(target, values, row, column, scale * weight)
+
+    def _gaussian(self, emitter):
+        """
+        An emitter's Gaussian on the grid: the (row, column) of its window's
+        corner and the window's envelope, (X - cx) * envelope and
+        (Y - cy) * envelope.
+        """
+        if self.spacing is None:
+            # No uniform spacing to shift a stamp by: evaluate at the window's grid points
+            rows, columns = self.window(emitter.position, emitter.radius)
+            offset_x = self.x_coords[columns] - emitter.position[0]
+            offset_y = self.y_coords[rows] - emitter.position[1]
+            profile_x = np.exp(-(offset_x / emitter.radius) ** 2)
+            profile_y = np.exp(-(offset_y / emitter.radius) ** 2)
+            windows = (np.outer(profile_y, profile_x), np.outer(profile_y, profile_x * offset_x),
+                       np.outer(profile_y * offset_y, profile_x))
+            return (rows.start, columns.start), windows
+        stamp = self.stamp(emitter.radius)
+        (base_j, base_i), (frac_j, frac_i) = self._grid_index(emitter.position)
+        return (base_j - stamp.center[0], base_i - stamp.center[1]), stamp.windows(frac_i, frac_j)
+
+    def apply(self, emitters, source_x, source_y, envelope=None):
+        """
+        Adds every emitter's force to source_x / source_y in place.
+
+        If an `envelope` array is given, each emitter's Gaussian (or shape mask)
+        is added to it too (the simulator injects dye there).
+        """
+        for emitter in emitters:
+            if emitter.shape_type in SHAPE_TYPES:
+                stamp = self.shape(emitter)
+                targets = [(source_x, stamp.force_x, emitter.strength), (source_y, stamp.force_y, emitter.strength)]
+                if envelope is not None:
+                    targets.append((envelope, stamp.mask, 1.0))
+                self._place(stamp, emitter.position, targets)
+                continue
+
+            (row, column), (weights, radial_x, radial_y) = self._gaussian(emitter)
+            if emitter.shape_type == "vortex":
+                self._add_shifted(source_x, radial_y, row, column, emitter.strength)
+                self._add_shifted(source_y, radial_x, row, column, -emitter.strength)
+            else:
+                self._add_shifted(source_x, radial_x, row, column, emitter.strength)
+                self._add_shifted(source_y, radial_y, row, column, emitter.strength)
+            if envelope is not None:
+                self._add_shifted(envelope, weights, row, column, 1.0)
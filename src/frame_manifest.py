@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import time
+
+# Append-only JSON-lines file next to the .npz frames. The simulator adds one
+# line per finished frame; consumers tail it to start work before the solve ends.
+MANIFEST_FILE = "frames.jsonl"
+FRAME_FILE_PATTERN = re.compile(r"^fluid_data_(?:frame_)?(\d+)\.npz$")
+
+
+class ManifestError(Exception):
+    """The producer reported a failure, or stopped writing frames for too long."""
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_FILE)
+
+
+def append_event(directory, event):
+    """Appends one event line. A single short write keeps readers from seeing partial lines."""
+    with open(manifest_path(directory), "a") as f:
+        f.write(json.dumps(event, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def mark_failed(directory, message):
+    """Lets waiting consumers stop, e.g. when the simulator process died without closing its manifest."""
+    if os.path.isdir(directory):
+        append_event(directory, {"event": "error", "message": message})
+
+
+def remove_manifest(directory):
+    if os.path.exists(manifest_path(directory)):
+        os.remove(manifest_path(directory))
+
+
+class FrameManifestWriter:
+    """
+    Producer side: records frames in the manifest as they are saved.
+
+    Args:
+        directory (str): Fluid data directory holding the frames and the manifest.
+        total (int): Expected number of frames, if known.
+    """
+
+    def __init__(self, directory, total=None):
+        self.directory = directory
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+        # Truncate: a manifest left over from an earlier run must not be replayed
+        with open(manifest_path(directory), "w") as f:
+            f.write(json.dumps({"event": "start", "total": total, "time": time.time()}, separators=(",", ":")) + "\n")
+
+    def add_frame(self, index, filename):
+        append_event(self.directory, {"event": "frame", "frame": index, "file": filename})
+        self.count += 1
+
+    def close(self):
+        append_event(self.directory, {"event": "end", "frames": self.count})
+
+    def fail(self, message):
+        append_event(self.directory, {"event": "error", "message": message})
+
+
+class FrameManifestReader:
+    """
+    Consumer side: yields frames in order as the producer appends them.
+
+    Only complete lines are consumed, so a half-written line is picked up on
+    the next poll. Iteration ends at the producer's end event.
+
+    Args:
+        directory (str): Fluid data directory to watch.
+        poll_interval (float): Seconds between checks for new lines.
+        stall_timeout (float): Give up if neither a new line nor the manifest appears for this long.
+    """
+
+    def __init__(self, directory, poll_interval=0.05, stall_timeout=600.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+        self.total = None
+        self._offset = 0
+        self._partial = ""
+
+    def _read_new_events(self):
+        path = manifest_path(self.directory)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            f.seek(self._offset)
+            data = f.read()
+            self._offset = f.tell()
+        data = self._partial + data
+        lines = data.split("\n")
+        self._partial = lines.pop() # Empty unless the last line is still being written
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def frames(self):
+        """Yields (frame index, .npz path) for each frame as soon as it is recorded."""
+        last_progress = time.monotonic()
+        while True:
+            events = self._read_new_events()
+            if events:
+                last_progress = time.monotonic()
+            for event in events:
+                kind = event.get("event")
+                if kind == "start":
+                    self.total = event.get("total")
+                elif kind == "frame":
+                    yield event["frame"], os.path.join(self.directory, event["file"])
+                elif kind == "end":
+                    return
+                elif kind == "error":
+                    raise ManifestError(f"Simulation failed: {event.get('message')}")
+            if not events:
+                if time.monotonic() - last_progress > self.stall_timeout:
+                    raise ManifestError(f"No new frames in {self.directory} for {self.stall_timeout:.0f} seconds.")
+                time.sleep(self.poll_interval)
+
+
+def list_frame_files(directory):
+    """
+    Frame files of a finished simulation in frame order.
+
+    Uses the manifest when present; otherwise falls back to the file names
+    (fluid_data_frame_XXXX.npz from FluidSimulator, fluid_data_XXXX.npz from older solvers).
+    """
+    if os.path.exists(manifest_path(directory)):
+        with open(manifest_path(directory)) as f:
+            # A trailing line without its newline is still being written
+            events = [json.loads(line) for line in f if line.endswith("\n") and line.strip()]
+        return [os.path.join(directory, event["file"]) for event in events if event.get("event") == "frame"]
+
+    matches = []
+    for name in os.listdir(directory):
+        match = FRAME_FILE_PATTERN.match(name)
+        if match:
+            matches.append((int(match.group(1)), name))
+    return [os.path.join(directory, name) for _, name in sorted(matches)]
+
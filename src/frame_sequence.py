@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import numpy as np
+
+from src.frame_manifest import list_frame_files
+
+FRAME_FIELDS = ("u", "v", "p", "x", "y")
+
+
+def load_frame(path, fields=None):
+    """
+    Reads the requested arrays of one frame file and closes it.
+
+    Only the listed fields are decompressed; the rest of the .npz is never
+    read. fields=None loads every field the simulator writes.
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in (fields or FRAME_FIELDS)}
+
+
+class FrameSequence:
+    """
+    Lazily loaded, indexable view of a simulation's frame files.
+
+    Frames are read on first access and kept in a small LRU cache, so peak
+    memory is cache_size frames whatever the length of the run. Each frame is
+    a dict of the requested fields only (e.g. x, y, p for the surface mesher).
+
+    Args:
+        frame_files (list): Frame file paths in frame order (see list_frame_files).
+        fields (tuple): Arrays to read from each frame (default: all of FRAME_FIELDS).
+        cache_size (int): Number of decoded frames kept in memory.
+    """
+
+    def __init__(self, frame_files, fields=None, cache_size=2):
+        self.frame_files = list(frame_files)
+        self.fields = tuple(fields or FRAME_FIELDS)
+        self.cache_size = max(1, cache_size)
+        self._cache = OrderedDict()
+        self.loads = 0
+
+    @classmethod
+    def from_dir(cls, data_dir, fields=None, cache_size=2):
+        return cls(list_frame_files(data_dir), fields=fields, cache_size=cache_size)
+
+    def __len__(self):
+        return len(self.frame_files)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.frame_files)
+        if not 0 <= index < len(self.frame_files):
+            raise IndexError(f"Frame {index} out of range for {len(self.frame_files)} frames.")
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        frame = load_frame(self.frame_files[index], self.fields)
+        self.loads += 1
+        self._cache[index] = frame
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return frame
+
+    def __iter__(self):
+        for index in range(len(self.frame_files)):
+            yield self[index]
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class SurfaceMesh:
+    """
+    Quad surface extracted from one pressure frame, as flat NumPy arrays.
+
+    Attributes:
+        vertices (np.ndarray): (V, 3) float32 vertex positions.
+        faces (np.ndarray): (F, 4) int32 vertex indices, one row per quad.
+        attributes (dict): name -> (V,) float32 per-vertex values (e.g. "pressure").
+    """
+
+    def __init__(self, vertices, faces, attributes=None):
+        self.vertices = vertices
+        self.faces = faces
+        self.attributes = attributes or {}
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+
+def build_getsuga_surface(x_coords, y_coords, pressure, pressure_threshold=0.1, extrusion_scale=0.5,
+                          scale_x=1.0, scale_y=1.0):
+    """
+    Vectorized version of the per-cell bmesh loop create_getsuga_mesh used to run.
+
+    A vertex is placed at every grid point whose pressure exceeds the threshold,
+    lifted to pressure * extrusion_scale; a quad is added for every cell whose
+    four corners all have a vertex. Vertex and face order match the old loops
+    (i over x outermost, j over y innermost), and pressure is indexed [j, i] as
+    before, so the resulting meshes are identical.
+
+    Returns:
+        SurfaceMesh
+    """
+    x_coords = np.asarray(x_coords, dtype=np.float64)
+    y_coords = np.asarray(y_coords, dtype=np.float64)
+    nx, ny = len(x_coords), len(y_coords)
+    # [i, j] layout, so row-major order below is the old loop order
+    pressure_ij = np.asarray(pressure)[:ny, :nx].T
+    above = pressure_ij > pressure_threshold
+
+    # Index of each grid point's vertex, -1 where there is none
+    vertex_index = np.full((nx, ny), -1, dtype=np.int32)
+    vertex_index[above] = np.arange(np.count_nonzero(above), dtype=np.int32)
+    i, j = np.nonzero(above)
+    values = pressure_ij[i, j]
+    vertices = np.empty((len(i), 3), dtype=np.float32)
+    vertices[:, 0] = x_coords[i] * scale_x
+    vertices[:, 1] = y_coords[j] * scale_y
+    vertices[:, 2] = values * extrusion_scale
+
+    full_cells = above[:-1, :-1] & above[1:, :-1] & above[1:, 1:] & above[:-1, 1:]
+    ci, cj = np.nonzero(full_cells)
+    faces = np.stack([
+        vertex_index[ci, cj],
+        vertex_index[ci + 1, cj],
+        vertex_index[ci + 1, cj + 1],
+        vertex_index[ci, cj + 1],
+    ], axis=1).astype(np.int32)
+
+    return SurfaceMesh(vertices, faces, {"pressure": values.astype(np.float32)})
+
+
+def fill_blender_mesh(mesh, surface):
+    """
+    Fills an empty Blender mesh from a SurfaceMesh with bulk foreach_set calls.
+
+    Only usable inside Blender. Per-vertex attributes become POINT float
+    attributes that materials can read through an Attribute node.
+    """
+    face_count = surface.face_count
+    mesh.vertices.add(surface.vertex_count)
+    mesh.vertices.foreach_set("co", surface.vertices.ravel())
+    mesh.loops.add(face_count * 4)
+    mesh.loops.foreach_set("vertex_index", surface.faces.ravel())
+    mesh.polygons.add(face_count)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, face_count * 4, 4, dtype=np.int32))
+    if face_count and not mesh.polygons[0].bl_rna.properties["loop_total"].is_readonly:
+        # Blender < 4.0 also needs each polygon's corner count
+        mesh.polygons.foreach_set("loop_total", np.full(face_count, 4, dtype=np.int32))
+    for attribute_name, values in surface.attributes.items():
+        attribute = mesh.attributes.get(attribute_name) or mesh.attributes.new(name=attribute_name, type='FLOAT',
+                                                                                domain='POINT')
+        attribute.data.foreach_set("value", values)
+    mesh.update()
+    mesh.validate()
+    return mesh
+
+
+def to_blender_mesh(surface, name="GetsugaMesh"):
+    """Creates a new Blender mesh datablock from a SurfaceMesh (see fill_blender_mesh)."""
+    import bpy
+
+    return fill_blender_mesh(bpy.data.meshes.new(name), surface)
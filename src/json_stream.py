@@ -0,0 +1,60 @@
+import json
+
+
+def repair_llm_json(text):
+    """Fixes the common Python-literal slips models make in JSON output."""
+    return text.replace("True", "true").replace("False", "false")
+
+
+class IncrementalJSONExtractor:
+    """
+    Finds the first top-level JSON object in text that arrives in chunks.
+
+    feed() scans only the new characters, tracking brace depth and string/escape
+    state, and returns the parsed object as soon as the outermost '}' arrives.
+    Any prose or markdown fences before the object are skipped, and whatever the
+    model writes afterwards never has to be waited for.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.result = None
+        self.done = False
+
+    def feed(self, chunk):
+        """Consumes a chunk. Returns the parsed object once it is complete, otherwise None."""
+        if self.done:
+            return self.result
+        for char in chunk:
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = json.loads(repair_llm_json("".join(self._buffer)))
+                    self.done = True
+                    return self.result
+        return None
+
+    def text(self):
+        """The object text collected so far."""
+        return "".join(self._buffer)
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Values of Blender's keyframe interpolation enum, as foreach_set expects them
+INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+
+def dissipation_curve(frames, start, end, full_value):
+    """
+    Per-frame value of a property that fades linearly from full_value at
+    `start` to 0 at `end`: full before the fade, 0 after it. This is the
+    schedule animate_getsuga_vfx used to evaluate frame by frame.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    if end > start:
+        factor = np.clip((frames - start) / (end - start), 0.0, 1.0)
+    else:
+        factor = (frames >= start).astype(np.float64)
+    return full_value * (1.0 - factor)
+
+
+def visibility_schedule(object_frames, frame_start, frame_end):
+    """
+    Visibility keys for objects that are each shown on one frame only.
+
+    Every object gets up to three keys: hidden on the frame before its own
+    (unless that is before frame_start), shown on its frame, hidden on the
+    frame after (unless that is past frame_end). Objects whose frame lies past
+    frame_end get no keys.
+
+    Returns:
+        tuple: (frames (N, 3), hidden (N, 3) float, valid (N, 3) bool), one
+               row per object; only entries where `valid` is set are keys.
+    """
+    object_frames = np.asarray(object_frames, dtype=np.int64)
+    frames = object_frames[:, None] + np.array([-1, 0, 1])
+    hidden = np.tile(np.array([1.0, 0.0, 1.0]), (len(object_frames), 1))
+    in_range = object_frames <= frame_end
+    valid = np.column_stack([
+        in_range & (object_frames > frame_start),
+        in_range,
+        in_range & (object_frames < frame_end),
+    ]) if len(object_frames) else np.zeros((0, 3), dtype=bool)
+    return frames, hidden, valid
+
+
+# --- Blender side (only usable inside Blender) ---
+
+def ensure_fcurve(id_block, data_path, index=0):
+    """The F-curve animating id_block's data_path[index], creating the action and curve if needed."""
+    import bpy
+
+    animation_data = id_block.animation_data or id_block.animation_data_create()
+    if animation_data.action is None:
+        animation_data.action = bpy.data.actions.new(f"{id_block.name}Action")
+    action = animation_data.action
+    if hasattr(action, "fcurve_ensure_for_datablock"): # Blender 4.4+ slotted actions
+        return action.fcurve_ensure_for_datablock(id_block, data_path, index=index)
+    return action.fcurves.find(data_path, index=index) or action.fcurves.new(data_path, index=index)
+
+
+def write_keyframes(id_block, data_path, frames, values, index=0, interpolation='LINEAR'):
+    """
+    Replaces the keys of one F-curve with (frames, values) in a single bulk
+    write, instead of one keyframe_insert (and RNA path lookup) per key.
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    fcurve = ensure_fcurve(id_block, data_path, index)
+    fcurve.keyframe_points.clear()
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set("co", np.column_stack([frames, values]).ravel())
+    fcurve.keyframe_points.foreach_set("interpolation", np.full(len(frames), INTERPOLATION[interpolation], dtype=np.int32))
+    fcurve.update()
+    return fcurve
+
+
+def write_visibility_keys(objects, object_frames, frame_start, frame_end):
+    """Keys hide_viewport/hide_render so each object is visible on its own frame only."""
+    frames, hidden, valid = visibility_schedule(object_frames, frame_start, frame_end)
+    for obj, obj_frames, obj_hidden, obj_valid in zip(objects, frames, hidden, valid):
+        if not obj_valid.any():
+            continue
+        for data_path in ("hide_viewport", "hide_render"):
+            write_keyframes(obj, data_path, obj_frames[obj_valid], obj_hidden[obj_valid], interpolation='CONSTANT')
@@ -0,0 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+from src.field_sampling import fractional_index
+from src.frame_manifest import FrameManifestReader, list_frame_files
+from src.frame_sequence import load_frame
+from src.marching_squares import scalar_field, field_arrays
+from src.param_evaluator import ParamEvaluator
+from src.progress import ProgressReporter
+
+DEFAULT_RESOLUTION = 512
+# Pixels traced along the streamline in each direction
+DEFAULT_LIC_LENGTH = 12
+# The visualizer's default emission_strength; it renders at brightness 1
+REFERENCE_EMISSION = 50.0
+LIC_FIELDS = ("x", "y", "u", "v")
+
+
+class LICRenderer:
+    """
+    Line integral convolution of the velocity field, rendered on the CPU.
+
+    A fixed white-noise image is smeared along the flow: each pixel averages
+    the noise along the streamline through it, traced `length` pixels each way.
+    All pixels advance together, one vectorized step at a time, so a frame
+    costs 2 * length array passes whatever the flow looks like. The noise
+    stays the same from frame to frame, so the texture evolves smoothly.
+
+    Args:
+        x_coords, y_coords (array): Simulation grid coordinates.
+        resolution (int): Output width in pixels; the height keeps the domain's aspect ratio.
+        length (int): Streamline half-length in pixels.
+        seed (int): Noise seed.
+    """
+
+    def __init__(self, x_coords, y_coords, resolution=DEFAULT_RESOLUTION, length=DEFAULT_LIC_LENGTH, seed=0):
+        x_coords = np.asarray(x_coords, dtype=np.float64)
+        y_coords = np.asarray(y_coords, dtype=np.float64)
+        self.width = int(resolution)
+        self.height = max(1, int(round(resolution * np.ptp(y_coords) / np.ptp(x_coords))))
+        self.length = int(length)
+        self.noise = np.random.default_rng(seed).random(self.height * self.width).astype(np.float32)
+
+        # Bilinear weights from the simulation grid to pixel centres (row 0 is the lowest y here)
+        fi = fractional_index(x_coords, np.linspace(x_coords[0], x_coords[-1], self.width))
+        fj = fractional_index(y_coords, np.linspace(y_coords[0], y_coords[-1], self.height))
+        self._i0 = np.clip(np.floor(fi).astype(np.int64), 0, max(len(x_coords) - 2, 0))
+        self._j0 = np.clip(np.floor(fj).astype(np.int64), 0, max(len(y_coords) - 2, 0))
+        self._ti = (fi - self._i0).astype(np.float32)
+        self._tj = (fj - self._j0).astype(np.float32)[:, None]
+        self._i1 = np.minimum(self._i0 + 1, len(x_coords) - 1)
+        self._j1 = np.minimum(self._j0 + 1, len(y_coords) - 1)
+        rows, cols = np.mgrid[0:self.height, 0:self.width]
+        self._rows = rows.ravel().astype(np.float32)
+        self._cols = cols.ravel().astype(np.float32)
+
+    def upsample(self, values):
+        """A grid field indexed [j, i] resampled to (height, width) pixels."""
+        values = np.asarray(values, dtype=np.float32)
+        rows_0, rows_1 = values[self._j0], values[self._j1]
+        bottom = rows_0[:, self._i0] * (1 - self._ti) + rows_0[:, self._i1] * self._ti
+        top = rows_1[:, self._i0] * (1 - self._ti) + rows_1[:, self._i1] * self._ti
+        return bottom * (1 - self._tj) + top * self._tj
+
+    def convolve(self, u, v):
+        """
+        LIC texture for one velocity field (u, v indexed [j, i]).
+
+        Streamlines that reach the border stay on it (clamp to edge).
+
+        Returns:
+            tuple: (texture, speed), both (height, width) float32; the texture is
+                   the streamline-averaged noise, speed the upsampled |velocity|.
+        """
+        u_px, v_px = self.upsample(u), self.upsample(v)
+        speed = np.hypot(u_px, v_px)
+        safe = np.where(speed > 0, speed, 1.0)
+        # One pixel per step along the flow; still pixels don't move and just keep their own noise
+        step_x = (u_px / safe).ravel()
+        step_y = (v_px / safe).ravel()
+
+        size = self.noise.size
+        total = self.noise.copy()
+        # Scratch buffers: every operation in the loop below writes in place
+        step = np.empty(size, dtype=np.float32)
+        col_index = np.empty(size, dtype=np.int32)
+        row_index = np.empty(size, dtype=np.int32)
+        for direction in (1.0, -1.0):
+            col, row = self._cols.copy(), self._rows.copy()
+            index = np.arange(size, dtype=np.int32)
+            for _ in range(self.length):
+                np.take(step_x, index, out=step)
+                step *= direction
+                col += step
+                np.take(step_y, index, out=step)
+                step *= direction
+                row += step
+                np.clip(col, 0, self.width - 1, out=col)
+                np.clip(row, 0, self.height - 1, out=row)
+                np.add(col, 0.5, out=col_index, casting="unsafe")
+                np.add(row, 0.5, out=row_index, casting="unsafe")
+                np.multiply(row_index, self.width, out=index)
+                index += col_index
+                np.take(self.noise, index, out=step)
+                total += step
+        return (total / (2 * self.length + 1)).reshape(self.height, self.width), speed
+
+    def render(self, u, v, arrow_color=(0.0, 0.0, 0.8), emission_strength=REFERENCE_EMISSION, intensity=None):
+        """
+        One RGB frame: the LIC texture tinted with arrow_color, brighter where
+        the flow is faster (or where `intensity`, a grid field indexed [j, i]
+        such as dye density, is higher), scaled by emission_strength / REFERENCE_EMISSION.
+
+        Returns:
+            np.ndarray: (height, width, 3) uint8, top row = highest y.
+        """
+        texture, speed = self.convolve(u, v)
+        if intensity is not None:
+            speed = np.maximum(self.upsample(intensity), 0.0)
+        # Averaging flattens the noise towards 0.5; stretch it back to full contrast
+        spread = texture.std()
+        texture = np.clip(0.5 + (texture - texture.mean()) * (0.2 / spread if spread > 0 else 0.0), 0.0, 1.0)
+        peak = speed.max()
+        intensity = texture * (0.2 + 0.8 * (speed / peak if peak > 0 else speed))
+        brightness = np.clip(float(emission_strength) / REFERENCE_EMISSION, 0.0, 2.0)
+        color = np.asarray(arrow_color, dtype=np.float32)
+        # The colour tint plus a white core on the brightest streaks, like an emissive glow
+        rgb = intensity[..., None] * color + (intensity ** 3)[..., None] * 0.6
+        rgb = np.clip(rgb * brightness, 0.0, 1.0)
+        return (rgb[::-1] * 255).astype(np.uint8)
+
+
+def _evaluate(value, evaluator, frame_idx):
+    if isinstance(value, list):
+        return [evaluator.evaluate(item, t=frame_idx) for item in value]
+    return evaluator.evaluate(value, t=frame_idx)
+
+
+# One renderer per process, reused for every frame it renders (the noise and
+# resampling weights only depend on the grid and the output size)
+_renderers = {}
+
+
+def _render_frame(task):
+    """Renders and writes one frame; runs in the calling process or a pool worker."""
+    frame_idx, path, output_path, resolution, length, intensity_field, arrow_color, emission_strength = task
+    fields = LIC_FIELDS if intensity_field == "speed" else tuple(dict.fromkeys(LIC_FIELDS + field_arrays(intensity_field)))
+    frame = load_frame(path, fields)
+    key = (frame["x"].tobytes(), frame["y"].tobytes(), resolution, length)
+    if key not in _renderers:
+        _renderers.clear()
+        _renderers[key] = LICRenderer(frame["x"], frame["y"], resolution=resolution, length=length)
+    intensity = None if intensity_field == "speed" else scalar_field(frame, intensity_field)
+    image = _renderers[key].render(frame["u"], frame["v"], arrow_color=arrow_color,
+                                   emission_strength=emission_strength, intensity=intensity)
+    Image.fromarray(image).save(output_path)
+    return frame_idx
+
+
+def render_lic_frames(data_dir, render_output_path, visualization_params, simulation_params, stream=False,
+                      workers=None):
+    """
+    Renders frames 1..time_steps-1 with LICRenderer to the same frame_####.png
+    files the Blender render stage writes, so the GIF stage works unchanged.
+
+    visualization_params: arrow_color and emission_strength (both may be
+    functions of t, as for Blender), lic_resolution, lic_length and
+    lic_intensity (what drives brightness: 'speed' by default, or any
+    src.marching_squares.scalar_field name such as 'dye').
+    With `stream`, frames are rendered one by one as the simulator records
+    them in its frame manifest; otherwise they are spread over `workers`
+    processes (default: one per core).
+
+    Returns:
+        int: Number of frames written.
+    """
+    frame_end = simulation_params.get("time_steps", 30) - 1
+    resolution = int(visualization_params.get("lic_resolution", DEFAULT_RESOLUTION))
+    length = int(visualization_params.get("lic_length", DEFAULT_LIC_LENGTH))
+    intensity_field = visualization_params.get("lic_intensity", "speed")
+    evaluator = ParamEvaluator()
+    progress = ProgressReporter("render", total=frame_end)
+
+    if stream:
+        frames = FrameManifestReader(data_dir).frames()
+    else:
+        files = list_frame_files(data_dir)
+        if not files:
+            raise FileNotFoundError(f"No fluid data files found in {data_dir}")
+        # Frames past the end of the data hold the last one, as in the Blender renderer
+        frames = ((frame_idx, files[min(frame_idx, len(files) - 1)]) for frame_idx in range(1, frame_end + 1))
+
+    def tasks():
+        for frame_idx, path in frames:
+            if frame_idx > frame_end:
+                return
+            if frame_idx < 1:
+                continue
+            yield (frame_idx, path, render_output_path.replace("####", f"{frame_idx:04d}") + ".png", resolution, length,
+                   intensity_field,
+                   _evaluate(visualization_params.get("arrow_color", [0.0, 0.0, 0.8]), evaluator, frame_idx),
+                   _evaluate(visualization_params.get("emission_strength", REFERENCE_EMISSION), evaluator, frame_idx))
+
+    workers = 1 if stream else (workers or os.cpu_count() or 1)
+    written = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for frame_idx in pool.map(_render_frame, tasks(), chunksize=4):
+                progress.update(written, frame=frame_idx)
+                written += 1
+    else:
+        for task in tasks():
+            progress.update(written, frame=_render_frame(task))
+            written += 1
+    return written
@@ -0,0 +1,214 @@
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+
+
+def normalize_prompt(prompt):
+    """
+    Canonical text for a prompt: dicts and message lists are key-sorted JSON
+    and whitespace is collapsed. Case is kept, since prompts embed parameter
+    JSON where it matters.
+    """
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, sort_keys=True, ensure_ascii=False)
+    return " ".join(prompt.split())
+
+
+def make_cache_key(model, task, prompt):
+    material = json.dumps([model, task, normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._waiters = [] # (loop, future) of coroutines waiting for the result
+
+    def finish(self):
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of parsed LLM responses with single-flight coalescing.
+
+    Entries expire after `ttl` seconds; when more than `max_entries` are stored
+    the least recently used ones are evicted. get_or_compute() also makes
+    concurrent callers with the same key share one model call: the first caller
+    computes, the others wait for its result. Every caller gets its own copy,
+    so one caller editing its result in place does not change the others'.
+    get_or_compute_async() does the same for coroutines, sharing in-flight
+    calls with threaded callers.
+
+    Args:
+        path (str): SQLite file. ':memory:' keeps the cache in-process only.
+        ttl (float): Seconds an entry stays valid. None disables expiry.
+        max_entries (int): Upper bound on stored entries.
+    """
+
+    def __init__(self, path=":memory:", ttl=7 * 24 * 3600, max_entries=1000, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, model TEXT, task TEXT, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def put(self, key, value, model=None, task=None):
+        now = self.clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, task, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, task, json.dumps(value), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def get_or_compute(self, model, task, prompt, compute, should_cache=None):
+        """
+        Returns the cached value for (model, task, prompt) or computes it once.
+
+        Args:
+            compute (callable): Produces the value on a miss.
+            should_cache (callable): should_cache(value) -> bool. Values it rejects
+                                     (e.g. error responses) are returned but not stored.
+        """
+        key = make_cache_key(model, task, prompt)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            flight.done.wait()
+            return self._follower_result(flight)
+
+        self.misses += 1
+        try:
+            flight.value = compute()
+            if should_cache is None or should_cache(flight.value):
+                self.put(key, flight.value, model=model, task=task)
+            return copy.deepcopy(flight.value)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._leave_flight(key, flight)
+
+    async def get_or_compute_async(self, model, task, prompt, compute, should_cache=None):
+        """
+        get_or_compute for a coroutine function `compute`, awaited on the
+        calling event loop. SQLite reads and writes run in a worker thread, so
+        the loop never waits on the disk.
+        """
+        key = make_cache_key(model, task, prompt)
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            await flight.wait_async()
+            return self._follower_result(flight)
+
+        self.misses += 1
+
+        async def lead():
+            try:
+                flight.value = await compute()
+                if should_cache is None or should_cache(flight.value):
+                    await asyncio.to_thread(self.put, key, flight.value, model, task)
+                return flight.value
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                self._leave_flight(key, flight)
+
+        # shield() keeps the leading caller's cancellation from aborting the call the others wait for
+        return copy.deepcopy(await asyncio.shield(asyncio.ensure_future(lead())))
+
+    def _join_flight(self, key):
+        """The in-flight call for `key`, and whether the caller has to make it."""
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._in_flight[key] = _InFlight()
+            return flight, True
+
+    def _leave_flight(self, key, flight):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        flight.finish()
+
+    def _follower_result(self, flight):
+        if flight.error is not None:
+            raise flight.error
+        self.hits += 1
+        return copy.deepcopy(flight.value)
@@ -1,11 +1,18 @@
 # main.py
+import os
+import sys
+import copy
 import json
 import subprocess
+
+# Make the project root importable when run as a script (python src/main.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.llm_interface import LLMInterface
 from src.simulation_agent import SimulationAgent
 from src.style_agent import StyleAgent
 from src.feedback_agent import FeedbackAgent
 from src.render_agent import RenderAgent
+from src.stage_graph import StageGraph
 
 class EffectStokesOrchestrator:
     def __init__(self, llm_type: str = "ollama", llm_model: str = "llama2", llm_base_url: str = "http://localhost:11434"):
@@ -16,28 +23,64 @@ class EffectStokesOrchestrator:
         self.render_agent = RenderAgent()
         # self.feedback_agent = FeedbackAgent() # 피드백 에이전트는 나중에 통합
 
-    def run_pipeline(self, user_prompt: str, fluid_data_dir: str, output_blend_file: str, initial_viz_params: dict = None):
+    def build_stage_graph(self, user_prompt: str, fluid_data_dir: str, output_blend_file: str, initial_viz_params: dict = None):
+        """
+        파이프라인 단계를 의존성 그래프로 구성합니다.
+
+            parse --+-> simulate --+
+                    +-> style -----+-> render
+
+        시각화 파라미터 생성(LLM 호출)은 시뮬레이션 결과에 의존하지 않으므로 솔버와 동시에 실행됩니다.
+        """
+        graph = StageGraph()
+
+        def parse(deps):
+            print(f"1. 사용자 프롬프트 분석 중: '{user_prompt}'")
+            parsed_params = self.parse_prompt(user_prompt)
+            print(f" -> 분석된 파라미터: {parsed_params}")
+            return parsed_params
+
+        def simulate(deps):
+            print("2. 시뮬레이션 에이전트 실행...")
+            # Deep copies, because parameter validation fills in defaults (nested lists included) in place
+            # while the style stage reads the same parsed parameters concurrently
+            sim_output = self.sim_agent.run_simulation(copy.deepcopy(deps["parse"]), {}, output_dir=fluid_data_dir)
+            print(f" -> 시뮬레이션 결과물: {sim_output}")
+            return sim_output
+
+        def style(deps):
+            print("3. 스타일 에이전트 실행 (시각화 파라미터 생성/정제)...")
+            final_viz_params = self.style_agent.generate_viz_params(copy.deepcopy(deps["parse"]), initial_viz_params)
+            print(f" -> 최종 시각화 파라미터: {final_viz_params}")
+            return final_viz_params
+
+        def render(deps):
+            print("4. 렌더 에이전트 실행 (Blender 시각화)...")
+            fluid_data_path = deps["simulate"]['output_data_path']
+            render_output = self.render_agent.render_vfx(fluid_data_path, output_blend_file, deps["style"])
+            print(f" -> 렌더링 결과물: {render_output}")
+            return render_output
+
+        graph.add_stage("parse", parse)
+        graph.add_stage("simulate", simulate, deps=["parse"])
+        graph.add_stage("style", style, deps=["parse"])
+        graph.add_stage("render", render, deps=["simulate", "style"])
+        return graph
+
+    def run_pipeline(self, user_prompt: str, fluid_data_dir: str = None, output_blend_file: str = None, initial_viz_params: dict = None):
         """
         사용자 프롬프트를 받아 VFX 생성 파이프라인을 실행합니다.
+        독립적인 단계는 동시에 실행되며, 실행 후 단계별 소요 시간과 임계 경로(critical path)를 출력합니다.
         """
-        print(f"1. 사용자 프롬프트 분석 중: '{user_prompt}'")
-        parsed_params = self.parse_prompt(user_prompt)
-        print(f" -> 분석된 파라미터: {parsed_params}")
-
-        print("2. 시뮬레이션 에이전트 실행...")
-        sim_output = self.sim_agent.run_simulation(parsed_params)
-        print(f" -> 시뮬레이션 결과물: {sim_output}")
-        fluid_data_path = sim_output['output_data_path']
-
-        print("3. 스타일 에이전트 실행 (시각화 파라미터 생성/정제)...")
-        final_viz_params = self.style_agent.generate_viz_params(parsed_params, initial_viz_params)
-        print(f" -> 최종 시각화 파라미터: {final_viz_params}")
-
-        print("4. 렌더 에이전트 실행 (Blender 시각화)...")
-        render_output = self.render_agent.render_vfx(fluid_data_path, output_blend_file, final_viz_params)
-        print(f" -> 렌더링 결과물: {render_output}")
-        
+        graph = self.build_stage_graph(user_prompt, fluid_data_dir, output_blend_file, initial_viz_params)
+        results = graph.run()
+        self.last_stage_graph = graph
+
         print("5. 파이프라인 완료.")
+        print(graph.report())
+        render_output = results["render"]
+        render_output["critical_path"], _ = graph.critical_path()
+        render_output["stage_timings"] = graph.timings
         return render_output
 
     def parse_prompt(self, prompt: str):
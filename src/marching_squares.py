@@ -0,0 +1,283 @@
+import numpy as np
+from src.getsuga_mesh import SurfaceMesh
+
+# Cell layout (grid indexed [j, i], x along i, y along j):
+#
+#   c3 ---e2--- c2        corners: c0 = [j, i],     c1 = [j, i+1]
+#   |            |                 c2 = [j+1, i+1], c3 = [j+1, i]
+#   e3          e1        edges:   e0 = c0-c1, e1 = c1-c2, e2 = c3-c2, e3 = c0-c3
+#   |            |
+#   c0 ---e0--- c1        case index: bit k set when corner ck is above the level
+#
+_EDGE_CORNERS = ((0, 1), (1, 2), (3, 2), (0, 3))
+_CORNER_POSITIONS = np.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+_EDGE_MIDPOINTS = np.array([(0.5, 0.0), (1.0, 0.5), (0.5, 1.0), (0.0, 0.5)])
+# Saddle cells (cases 5 and 10) are resolved by the cell centre; a centre above the
+# level joins the two above corners, which uses these extra table rows
+_SADDLE_JOINED = {5: 16, 10: 17}
+
+
+def _crossing_pairs(case, centre_above):
+    above = [bool(case >> k & 1) for k in range(4)]
+    crossed = [e for e, (a, b) in enumerate(_EDGE_CORNERS) if above[a] != above[b]]
+    if len(crossed) == 2:
+        return [tuple(crossed)]
+    if len(crossed) == 4:
+        # Cut off the two corners that are *not* joined through the centre
+        isolated = [k for k in range(4) if above[k] != centre_above]
+        return [tuple(e for e in crossed if k in _EDGE_CORNERS[e]) for k in isolated]
+    return []
+
+
+def _orient(case, edge_a, edge_b):
+    """Orders a segment so the region above the level lies on its left."""
+    above = [bool(case >> k & 1) for k in range(4)]
+    shared = set(_EDGE_CORNERS[edge_a]) & set(_EDGE_CORNERS[edge_b])
+    # Adjacent edges cut off their shared corner; opposite edges split the cell in two halves
+    corner = shared.pop() if shared else next(k for k in range(4) if above[k])
+    direction = _EDGE_MIDPOINTS[edge_b] - _EDGE_MIDPOINTS[edge_a]
+    offset = _CORNER_POSITIONS[corner] - _EDGE_MIDPOINTS[edge_a]
+    corner_on_left = direction[0] * offset[1] - direction[1] * offset[0] > 0
+    return (edge_a, edge_b) if corner_on_left == above[corner] else (edge_b, edge_a)
+
+
+def _build_segment_table():
+    table = np.full((18, 2, 2), -1, dtype=np.int64)
+    for case in range(16):
+        for slot, (a, b) in enumerate(_crossing_pairs(case, centre_above=False)):
+            table[case, slot] = _orient(case, a, b)
+    for case, row in _SADDLE_JOINED.items():
+        for slot, (a, b) in enumerate(_crossing_pairs(case, centre_above=True)):
+            table[row, slot] = _orient(case, a, b)
+    return table
+
+
+# (case row, segment slot) -> (from edge, to edge), -1 for no segment
+SEGMENT_TABLE = _build_segment_table()
+
+
+def _dye_channel(field):
+    """Channel index of a 'dye' or 'dye:N' field name, None for any other field."""
+    name, _, channel = field.partition(":")
+    if name != "dye":
+        return None
+    try:
+        return int(channel) if channel else 0
+    except ValueError:
+        raise ValueError(f"Invalid dye field '{field}'. Use 'dye' or 'dye:N' for channel N.")
+
+
+def scalar_field(frame, field="p"):
+    """
+    A scalar field from a fluid frame ('u', 'v', 'p', 'x', 'y' arrays indexed [j, i],
+    plus 'dye' (channels, ny, nx) when the simulator carried dye).
+
+    field: 'p' (pressure), 'speed' (|velocity|), 'vorticity' (dv/dx - du/dy),
+    or 'dye' / 'dye:N' (density of dye channel 0 / N).
+    """
+    if field == "p":
+        return np.asarray(frame["p"], dtype=np.float64)
+    channel = _dye_channel(field)
+    if channel is not None:
+        return np.asarray(frame["dye"][channel], dtype=np.float64)
+    u = np.asarray(frame["u"], dtype=np.float64)
+    v = np.asarray(frame["v"], dtype=np.float64)
+    if field == "speed":
+        return np.hypot(u, v)
+    if field == "vorticity":
+        x_coords, y_coords = np.asarray(frame["x"]), np.asarray(frame["y"])
+        return np.gradient(v, x_coords, axis=1) - np.gradient(u, y_coords, axis=0)
+    raise ValueError(f"Unknown contour field '{field}'. Use 'p', 'speed', 'vorticity' or 'dye'.")
+
+
+class ContourExtractor:
+    """
+    Vectorized, lookup-table marching squares over one frame's scalar field.
+
+    Every grid edge the level crosses gets one interpolated vertex, shared by
+    the two cells on either side, so contours come out welded. Those edge
+    crossings are cached per level: extracting stacked bands [l0, l1], [l1, l2]
+    computes the shared level l1 only once.
+
+    Args:
+        x_coords (array): Grid x coordinates (length nx).
+        y_coords (array): Grid y coordinates (length ny).
+        values (array): Scalar field indexed [j, i], shape (ny, nx).
+    """
+
+    def __init__(self, x_coords, y_coords, values):
+        self.x_coords = np.asarray(x_coords, dtype=np.float64)
+        self.y_coords = np.asarray(y_coords, dtype=np.float64)
+        nx, ny = len(self.x_coords), len(self.y_coords)
+        self.values = np.asarray(values, dtype=np.float64)[:ny, :nx]
+        self._cache = {}
+
+    def _edge_crossings(self, level):
+        """(vertices (V, 2), edge id -> vertex index, above mask) for the grid edges the level crosses."""
+        if level in self._cache:
+            return self._cache[level]
+        f = self.values
+        above = f > level
+        ny, nx = f.shape
+        x, y = self.x_coords, self.y_coords
+
+        # Horizontal edges [j, i]-[j, i+1] get ids j*(nx-1)+i, vertical edges [j, i]-[j+1, i] follow them
+        h_cross = above[:, :-1] != above[:, 1:]
+        hj, hi = np.nonzero(h_cross)
+        t = (level - f[hj, hi]) / (f[hj, hi + 1] - f[hj, hi])
+        h_points = np.column_stack([x[hi] + t * (x[hi + 1] - x[hi]), y[hj]])
+
+        v_cross = above[:-1, :] != above[1:, :]
+        vj, vi = np.nonzero(v_cross)
+        t = (level - f[vj, vi]) / (f[vj + 1, vi] - f[vj, vi])
+        v_points = np.column_stack([x[vi], y[vj] + t * (y[vj + 1] - y[vj])])
+
+        edge_vertex = np.full(ny * (nx - 1) + (ny - 1) * nx, -1, dtype=np.int64)
+        edge_vertex[hj * (nx - 1) + hi] = np.arange(len(hj))
+        edge_vertex[ny * (nx - 1) + vj * nx + vi] = len(hj) + np.arange(len(vj))
+        result = (np.concatenate([h_points, v_points]), edge_vertex, above)
+        self._cache[level] = result
+        return result
+
+    def iso_lines(self, level):
+        """
+        Contour segments where the field equals `level`.
+
+        Returns:
+            tuple: (vertices (V, 2) float64, segments (S, 2) int64). Each segment
+                   runs with the region above the level on its left.
+        """
+        vertices, edge_vertex, above = self._edge_crossings(level)
+        ny, nx = self.values.shape
+        case = (above[:-1, :-1].astype(np.int64) | above[:-1, 1:] << 1
+                | above[1:, 1:] << 2 | above[1:, :-1] << 3)
+        saddle = (case == 5) | (case == 10)
+        if saddle.any():
+            centre = 0.25 * (self.values[:-1, :-1] + self.values[:-1, 1:] + self.values[1:, 1:] + self.values[1:, :-1])
+            joined = saddle & (centre > level)
+            case = np.where(joined & (case == 5), _SADDLE_JOINED[5], case)
+            case = np.where(joined & (case == 10), _SADDLE_JOINED[10], case)
+
+        cj, ci = np.nonzero((case != 0) & (case != 15))
+        cell_case = case[cj, ci]
+        # Global ids of each active cell's four edges, in e0..e3 order
+        n_horizontal = ny * (nx - 1)
+        cell_edges = np.stack([
+            cj * (nx - 1) + ci,
+            n_horizontal + cj * nx + ci + 1,
+            (cj + 1) * (nx - 1) + ci,
+            n_horizontal + cj * nx + ci,
+        ], axis=1)
+
+        segments = []
+        for slot in range(2):
+            local = SEGMENT_TABLE[cell_case, slot]
+            present = local[:, 0] >= 0
+            rows = np.nonzero(present)[0]
+            start = edge_vertex[cell_edges[rows, local[present, 0]]]
+            end = edge_vertex[cell_edges[rows, local[present, 1]]]
+            segments.append(np.column_stack([start, end]))
+        return vertices, np.concatenate(segments).reshape(-1, 2)
+
+    def iso_band_outline(self, low, high):
+        """
+        Boundary of the band low < field <= high as oriented segments (band on the left).
+
+        Returns:
+            tuple: (vertices (V, 2), segments (S, 2)); vertices of the low
+                   contour come first, then those of the high contour.
+        """
+        low_vertices, low_segments = self.iso_lines(low)
+        high_vertices, high_segments = self.iso_lines(high)
+        # Above `high` is outside the band, so the high contour runs the other way
+        flipped = high_segments[:, ::-1] + len(low_vertices)
+        return np.concatenate([low_vertices, high_vertices]), np.concatenate([low_segments, flipped])
+
+
+def extrude_ribbon(vertices, segments, z_bottom, z_top):
+    """
+    Extrudes 2D contour segments into a vertical ribbon: one quad per segment.
+
+    Returns:
+        SurfaceMesh: Bottom vertices first, then top vertices; faces wind
+                     bottom-a, bottom-b, top-b, top-a.
+    """
+    count = len(vertices)
+    ribbon = np.empty((2 * count, 3), dtype=np.float32)
+    ribbon[:count, :2] = vertices
+    ribbon[:count, 2] = z_bottom
+    ribbon[count:, :2] = vertices
+    ribbon[count:, 2] = z_top
+    a, b = segments[:, 0], segments[:, 1]
+    faces = np.column_stack([a, b, b + count, a + count]).astype(np.int32)
+    return SurfaceMesh(ribbon, faces)
+
+
+def build_contour_ribbons(x_coords, y_coords, values, levels, extrusion_scale=0.5, ribbon_height=0.05,
+                          scale_x=1.0, scale_y=1.0):
+    """
+    Stacked contour ribbons: one ribbon per iso-level, lifted to
+    level * extrusion_scale like the thresholded surface would be there.
+
+    The ribbon at the getsuga pressure_threshold traces the same outline as the
+    thresholded quad surface, with one quad per boundary crossing instead of
+    one per covered cell.
+
+    Returns:
+        SurfaceMesh: With a per-vertex "level" attribute.
+    """
+    extractor = ContourExtractor(x_coords, y_coords, values)
+    parts, level_values = [], []
+    for level in np.atleast_1d(levels):
+        vertices, segments = extractor.iso_lines(float(level))
+        if not len(segments):
+            continue
+        z = level * extrusion_scale
+        part = extrude_ribbon(vertices * (scale_x, scale_y), segments, z - ribbon_height / 2, z + ribbon_height / 2)
+        parts.append(part)
+        level_values.append(np.full(part.vertex_count, level, dtype=np.float32))
+
+    if not parts:
+        return SurfaceMesh(np.empty((0, 3), dtype=np.float32), np.empty((0, 4), dtype=np.int32),
+                           {"level": np.empty(0, dtype=np.float32)})
+    offsets = np.cumsum([0] + [part.vertex_count for part in parts[:-1]])
+    faces = np.concatenate([part.faces + offset for part, offset in zip(parts, offsets)]).astype(np.int32)
+    return SurfaceMesh(np.concatenate([part.vertices for part in parts]), faces,
+                       {"level": np.concatenate(level_values)})
+
+
+def ribbons_for_frame(frame, mesh_params):
+    """
+    build_contour_ribbons driven by the same mesh_params dict create_getsuga_mesh reads.
+
+    Keys: contour_field ('p', 'speed', 'vorticity', 'dye'), ribbon_levels (default:
+    [pressure_threshold]), ribbon_height, extrusion_scale, scale_x, scale_y.
+    """
+    levels = mesh_params.get("ribbon_levels", [mesh_params.get("pressure_threshold", 0.1)])
+    return build_contour_ribbons(
+        frame["x"], frame["y"], scalar_field(frame, mesh_params.get("contour_field", "p")), levels,
+        extrusion_scale=mesh_params.get("extrusion_scale", 0.5),
+        ribbon_height=mesh_params.get("ribbon_height", 0.05),
+        scale_x=mesh_params.get("scale_x", 1.0),
+        scale_y=mesh_params.get("scale_y", 1.0),
+    )
+
+
+def field_arrays(field):
+    """The frame arrays scalar_field(frame, field) reads."""
+    if field == "p":
+        return ("x", "y", "p")
+    if _dye_channel(field) is not None:
+        return ("x", "y", "dye")
+    return ("x", "y", "u", "v")
+
+
+def mesh_fields(mesh_params):
+    """
+    The frame arrays create_getsuga_mesh / ribbons_for_frame read for these
+    mesh_params: the ribbons' contour_field, or the surface's surface_field
+    (both default to pressure).
+    """
+    if mesh_params.get("mesh_mode") == "ribbon":
+        return field_arrays(mesh_params.get("contour_field", "p"))
+    return field_arrays(mesh_params.get("surface_field", "p"))
@@ -0,0 +1,227 @@
+import os
+import math
+import time
+import threading
+import subprocess
+from collections import deque
+from src.progress import PROGRESS_PREFIX, ProgressReporter
+
+# Each worker's slice is cut into this many chunks, so a worker that finishes
+# early pulls more work instead of idling while another one is still busy.
+CHUNKS_PER_WORKER = 3
+# Frames of a running range still unclaimed before an idle worker joins it
+MIN_FRAMES_TO_SHARE = 2
+
+
+def default_worker_count(cpu_count=None):
+    """
+    Number of concurrent Blender processes for one render.
+
+    EFFECT_STOKES_RENDER_WORKERS overrides it; otherwise one worker per four
+    cores, since a single Blender process already uses several threads.
+    """
+    configured = os.getenv("EFFECT_STOKES_RENDER_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, (cpu_count or os.cpu_count() or 1) // 4)
+
+
+def threads_per_worker(workers, cpu_count=None):
+    """Splits the CPU cores evenly between the workers."""
+    return max(1, (cpu_count or os.cpu_count() or 1) // workers)
+
+
+def split_frame_range(frame_start, frame_end, workers, chunk_size=None):
+    """
+    Cuts [frame_start, frame_end] into contiguous (first, last) chunks.
+
+    Contiguous chunks keep each Blender process loading only the fluid frames
+    it renders. Without `chunk_size`, each worker's even share is split into
+    CHUNKS_PER_WORKER chunks.
+    """
+    frame_count = frame_end - frame_start + 1
+    if frame_count <= 0:
+        return []
+    if chunk_size is None:
+        chunk_size = math.ceil(frame_count / (max(1, workers) * CHUNKS_PER_WORKER))
+    chunk_size = max(1, chunk_size)
+    return [(first, min(first + chunk_size - 1, frame_end)) for first in range(frame_start, frame_end + 1, chunk_size)]
+
+
+class ParallelRenderer:
+    """
+    Renders a frame range with several Blender processes writing into one shared
+    frame directory.
+
+    Workers pull contiguous chunks from a queue. Every process is started with
+    Blender's placeholder mode (an empty file claims a frame before it is
+    rendered, and frames whose file already exists are skipped), which lets
+    processes share a range safely: once the queue is empty, an idle worker
+    starts a second process on the unclaimed tail of the slowest running range,
+    and the two split the remaining frames between them. A final merge pass
+    checks that every frame exists, re-renders frames that were left behind as
+    empty placeholders (a frame Blender claimed but failed to write), and fails
+    if any are still missing.
+
+    Args:
+        build_command (callable): (first, last, threads) -> argv rendering frames first..last.
+        frame_start (int): First frame to render.
+        frame_end (int): Last frame to render (inclusive).
+        frame_path (callable): frame number -> path of the rendered image.
+        workers (int): Number of concurrent Blender processes.
+        chunk_size (int): Frames per queued chunk. See split_frame_range.
+        poll_interval (float): Seconds between checks of the frame directory.
+        progress_stage (str): Stage name for the aggregated progress events.
+    """
+
+    def __init__(self, build_command, frame_start, frame_end, frame_path, workers=None, chunk_size=None,
+                 poll_interval=0.5, progress_stage="render"):
+        self.build_command = build_command
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.frame_path = frame_path
+        self.workers = workers or default_worker_count()
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.progress_stage = progress_stage
+        self.threads = threads_per_worker(self.workers)
+        self.assignments = [] # (worker id, first, last) of every process started, for inspection
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._active = {} # worker id -> (first, last) it is rendering
+        self._processes = {}
+        self._errors = []
+        self._reported_frames = 0
+
+    def _is_claimed(self, frame):
+        return os.path.exists(self.frame_path(frame))
+
+    def _is_finished(self, frame):
+        path = self.frame_path(frame)
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+    def _unclaimed(self, first, last):
+        return [frame for frame in range(first, last + 1) if not self._is_claimed(frame)]
+
+    def _next_range(self, worker_id):
+        """The next chunk from the queue, else a share of the busiest running range, else None."""
+        with self._lock:
+            if self._errors:
+                return None
+            if self._queue:
+                assignment = self._queue.popleft()
+            else:
+                assignment = None
+                most_unclaimed = []
+                for other_id, (first, last) in self._active.items():
+                    unclaimed = self._unclaimed(first, last)
+                    if other_id != worker_id and len(unclaimed) > len(most_unclaimed):
+                        most_unclaimed = unclaimed
+                if len(most_unclaimed) >= MIN_FRAMES_TO_SHARE:
+                    # Start at the first free frame; the placeholders keep both processes off each other's frames
+                    assignment = (most_unclaimed[0], most_unclaimed[-1])
+            if assignment is not None:
+                self._active[worker_id] = assignment
+                self.assignments.append((worker_id, *assignment))
+            return assignment
+
+    def _render_range(self, worker_id, first, last):
+        command = self.build_command(first, last, self.threads)
+        print(f"[ParallelRenderer] Worker {worker_id}: frames {first}-{last}")
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                   encoding='utf-8', errors='replace')
+        with self._lock:
+            self._processes[worker_id] = process
+        for line in process.stdout:
+            # Per-worker progress would interleave into nonsense; the renderer reports the combined count instead
+            if not line.startswith(PROGRESS_PREFIX):
+                print(f"[render worker {worker_id}] {line.rstrip()}")
+        rc = process.wait()
+        with self._lock:
+            self._processes.pop(worker_id, None)
+        if rc != 0:
+            raise subprocess.CalledProcessError(rc, command)
+
+    def _worker(self, worker_id):
+        try:
+            while True:
+                assignment = self._next_range(worker_id)
+                if assignment is None:
+                    with self._lock:
+                        self._active.pop(worker_id, None)
+                        # Stay around while others are busy: one of them may turn into a straggler worth sharing
+                        if self._errors or not self._active:
+                            return
+                    time.sleep(self.poll_interval)
+                    continue
+                self._render_range(worker_id, *assignment)
+                with self._lock:
+                    self._active.pop(worker_id, None)
+        except BaseException as e:
+            with self._lock:
+                self._errors.append(e)
+                self._active.pop(worker_id, None)
+                # One failed slice fails the render; don't keep the other processes busy for nothing
+                for process in self._processes.values():
+                    process.terminate()
+
+    def _run_pass(self, ranges, reporter):
+        self._queue = deque(ranges)
+        threads = [threading.Thread(target=self._worker, args=(worker_id,), name=f"render-worker-{worker_id}")
+                   for worker_id in range(min(self.workers, len(ranges)))]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            self._report(reporter)
+            time.sleep(self.poll_interval)
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def _report(self, reporter):
+        finished = sum(1 for frame in range(self.frame_start, self.frame_end + 1) if self._is_finished(frame))
+        if finished and finished != self._reported_frames:
+            self._reported_frames = finished
+            reporter.update(finished - 1)
+
+    def _missing_ranges(self):
+        """Contiguous ranges of frames without a finished image; stale placeholders are removed."""
+        missing = []
+        for frame in range(self.frame_start, self.frame_end + 1):
+            if not self._is_finished(frame):
+                if self._is_claimed(frame):
+                    os.remove(self.frame_path(frame))
+                missing.append(frame)
+        ranges = []
+        for frame in missing:
+            if ranges and ranges[-1][1] == frame - 1:
+                ranges[-1] = (ranges[-1][0], frame)
+            else:
+                ranges.append((frame, frame))
+        return ranges
+
+    def run(self):
+        """
+        Renders every frame of the range.
+
+        Returns:
+            list: Paths of the rendered frames in frame order.
+
+        Raises:
+            subprocess.CalledProcessError: If a Blender process failed.
+            RuntimeError: If frames are still missing after the retry pass.
+        """
+        reporter = ProgressReporter(self.progress_stage, total=self.frame_end - self.frame_start + 1)
+        self._run_pass(split_frame_range(self.frame_start, self.frame_end, self.workers, self.chunk_size), reporter)
+
+        # Merge: an empty placeholder means a frame was claimed but never written, and nobody else will render it
+        missing = self._missing_ranges()
+        if missing:
+            print(f"[ParallelRenderer] Re-rendering unfinished frames: {missing}")
+            self._run_pass(missing, reporter)
+            missing = self._missing_ranges()
+            if missing:
+                raise RuntimeError(f"Frames {missing} were not rendered.")
+        self._report(reporter)
+        return [self.frame_path(frame) for frame in range(self.frame_start, self.frame_end + 1)]
@@ -0,0 +1,230 @@
+import os
+import numpy as np
+
+from src.field_sampling import GridSampler, sample_cells, index_to_coords
+from src.glyphs import GlyphSet
+
+DEFAULT_MAX_PARTICLES = 200_000
+# Frames a particle lives on average (each one gets +-25% so they do not all vanish together)
+DEFAULT_LIFETIME = 60
+EMITTERS = ("shape", "uniform", "speed")
+PARTICLE_FILE_FORMAT = "particles_frame_{:04d}.npz"
+
+
+def particle_file(directory, frame_idx):
+    return os.path.join(directory, PARTICLE_FILE_FORMAT.format(frame_idx))
+
+
+class ParticleSystem:
+    """
+    Passive particles carried by the simulated flow, for sparkle/dust effects.
+
+    State is kept as structure-of-arrays buffers preallocated for
+    max_particles (px, py, age, lifetime, speed); the live particles are always
+    the first `count` entries. Each step advects them all at once with a
+    midpoint (RK2) update, sampling u and v bilinearly, then ages them, culls
+    the expired and the ones that left the grid by compacting the buffers, and
+    emits new ones into the free tail.
+
+    Velocity fields are indexed [j, i], the layout the simulator's forcing
+    terms are built in (np.meshgrid of x and y).
+
+    Args:
+        x_coords, y_coords (array): Grid coordinates.
+        max_particles (int): Buffer capacity; emission stops while it is full.
+        lifetime (float): Mean particle lifetime in frames.
+        emit_rate (int): Particles emitted per step (default: enough to fill the buffer over one lifetime).
+        emitter (str): 'shape' (a disc at the forcing shape), 'uniform' (the whole grid)
+                       or 'speed' (density proportional to the local speed).
+        seed (int): Random seed, so runs are reproducible.
+    """
+
+    def __init__(self, x_coords, y_coords, max_particles=DEFAULT_MAX_PARTICLES, lifetime=DEFAULT_LIFETIME,
+                 emit_rate=None, emitter="shape", seed=0):
+        if emitter not in EMITTERS:
+            raise ValueError(f"Unknown particle emitter '{emitter}'. Use one of {', '.join(EMITTERS)}.")
+        self.x_coords = np.asarray(x_coords, dtype=np.float64)
+        self.y_coords = np.asarray(y_coords, dtype=np.float64)
+        self.sampler = GridSampler(self.x_coords, self.y_coords)
+        self.max_particles = int(max_particles)
+        self.lifetime = float(lifetime)
+        self.emit_rate = int(emit_rate) if emit_rate is not None else int(np.ceil(self.max_particles / self.lifetime))
+        self.emitter = emitter
+        self.rng = np.random.default_rng(seed)
+
+        self.px = np.empty(self.max_particles, dtype=np.float32)
+        self.py = np.empty(self.max_particles, dtype=np.float32)
+        self.age = np.empty(self.max_particles, dtype=np.float32)
+        self.life = np.empty(self.max_particles, dtype=np.float32)
+        self.speed = np.empty(self.max_particles, dtype=np.float32)
+        self.count = 0
+
+    @classmethod
+    def from_params(cls, x_coords, y_coords, particle_params):
+        """Builds a system from simulation_params["particles"] (True for the defaults)."""
+        particle_params = particle_params if isinstance(particle_params, dict) else {}
+        return cls(x_coords, y_coords,
+                   max_particles=particle_params.get("max_particles", DEFAULT_MAX_PARTICLES),
+                   lifetime=particle_params.get("lifetime", DEFAULT_LIFETIME),
+                   emit_rate=particle_params.get("emit_rate"),
+                   emitter=particle_params.get("emitter", "shape"),
+                   seed=particle_params.get("seed", 0))
+
+    def _buffers(self):
+        return (self.px, self.py, self.age, self.life, self.speed)
+
+    def _emit_positions(self, count, field, center, radius):
+        if self.emitter == "shape":
+            r = radius * np.sqrt(self.rng.random(count))
+            theta = self.rng.uniform(0, 2 * np.pi, count)
+            return center[0] + r * np.cos(theta), center[1] + r * np.sin(theta)
+        if self.emitter == "uniform":
+            return (self.rng.uniform(self.x_coords[0], self.x_coords[-1], count),
+                    self.rng.uniform(self.y_coords[0], self.y_coords[-1], count))
+        fi, fj = sample_cells(np.hypot(field[..., 0], field[..., 1]), count, self.rng)
+        return index_to_coords(self.x_coords, fi), index_to_coords(self.y_coords, fj)
+
+    def emit(self, count, field, center=(1.0, 1.0), radius=0.4):
+        """Adds up to `count` particles (as many as fit) at the emitter; field is the (ny, nx, 2) velocity stack."""
+        count = min(int(count), self.max_particles - self.count)
+        if count <= 0:
+            return 0
+        new = slice(self.count, self.count + count)
+        px, py = self._emit_positions(count, field, center, radius)
+        self.px[new] = np.clip(px, self.x_coords[0], self.x_coords[-1])
+        self.py[new] = np.clip(py, self.y_coords[0], self.y_coords[-1])
+        self.age[new] = 0.0
+        self.life[new] = self.lifetime * self.rng.uniform(0.75, 1.25, count)
+        velocity = self.sampler.sample(field, self.px[new], self.py[new])
+        self.speed[new] = np.hypot(velocity[:, 0], velocity[:, 1])
+        self.count += count
+        return count
+
+    def _cull(self):
+        n = self.count
+        px, py = self.px[:n], self.py[:n]
+        keep = ((self.age[:n] < self.life[:n]) &
+                (px >= self.x_coords[0]) & (px <= self.x_coords[-1]) &
+                (py >= self.y_coords[0]) & (py <= self.y_coords[-1]))
+        kept = int(np.count_nonzero(keep))
+        if kept < n:
+            for buffer in self._buffers():
+                buffer[:kept] = buffer[:n][keep]
+            self.count = kept
+
+    def step(self, u, v, dt, center=(1.0, 1.0), radius=0.4):
+        """
+        Advances the system by one simulation step: advect, age, cull, emit.
+
+        Args:
+            u, v (array): Velocity of the step, indexed [j, i].
+            dt (float): Time step.
+            center, radius: The 'shape' emitter's disc (the simulator passes its forcing shape).
+        """
+        field = np.stack([np.asarray(u, dtype=np.float32), np.asarray(v, dtype=np.float32)], axis=-1)
+        n = self.count
+        if n:
+            px, py = self.px[:n], self.py[:n]
+            k1 = self.sampler.sample(field, px, py)
+            k2 = self.sampler.sample(field, px + (0.5 * dt) * k1[:, 0], py + (0.5 * dt) * k1[:, 1])
+            px += dt * k2[:, 0]
+            py += dt * k2[:, 1]
+            np.hypot(k2[:, 0], k2[:, 1], out=self.speed[:n])
+            self.age[:n] += 1.0
+            self._cull()
+        self.emit(self.emit_rate, field, center, radius)
+
+    def save(self, path):
+        """
+        Writes the live particles as one compact, uncompressed frame buffer
+        (positions (N, 2), speed and age / lifetime, all float32), write-then-rename
+        like the simulator's frames.
+        """
+        n = self.count
+        positions = np.empty((n, 2), dtype=np.float32)
+        positions[:, 0] = self.px[:n]
+        positions[:, 1] = self.py[:n]
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, positions=positions, speed=self.speed[:n], age=self.age[:n] / self.life[:n])
+        os.replace(path + ".tmp", path)
+
+
+def load_particles(path):
+    """One frame's particle buffers: dict of positions (N, 2), speed (N,) and age (N,) in [0, 1] of the lifetime."""
+    with np.load(path) as data:
+        return {name: data[name] for name in ("positions", "speed", "age")}
+
+
+def particle_glyphs(particles, radius=0.004, z=0.0):
+    """
+    Instance transforms for one frame's particles: a dot at each position that
+    shrinks to nothing as the particle reaches the end of its life.
+
+    Returns:
+        src.glyphs.GlyphSet
+    """
+    count = len(particles["positions"])
+    positions = np.zeros((count, 3), dtype=np.float32)
+    positions[:, :2] = particles["positions"]
+    positions[:, 2] = z
+    scales = (radius * np.clip(1.0 - particles["age"], 0.0, 1.0)).astype(np.float32)
+    return GlyphSet(positions, np.zeros((count, 3), dtype=np.float32), scales,
+                    particles["speed"].astype(np.float32))
+
+
+# --- Blender side (only usable inside Blender) ---
+
+class ParticleAnimator:
+    """frame_change_pre handler that loads the current frame's particle file into a glyph point cloud."""
+
+    def __init__(self, object_name, data_dir, radius=0.004):
+        self.object_name = object_name
+        self.data_dir = data_dir
+        self.radius = radius
+        self._loaded_frame = None
+
+    def load(self, mesh, frame_idx):
+        from src.glyphs import update_glyph_points
+
+        path = particle_file(self.data_dir, frame_idx)
+        if frame_idx == self._loaded_frame or not os.path.exists(path):
+            return
+        update_glyph_points(mesh, particle_glyphs(load_particles(path), radius=self.radius))
+        self._loaded_frame = frame_idx
+
+    def __call__(self, scene, *args):
+        import bpy
+        obj = bpy.data.objects.get(self.object_name)
+        if obj is not None:
+            self.load(obj.data, scene.frame_current)
+
+
+def create_particle_object(name, material, subdivisions=1):
+    """A glyph point cloud (see src.glyphs.create_glyph_instancer) instancing a small icosphere per particle."""
+    import bpy
+    from src.glyphs import create_glyph_instancer
+
+    bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=subdivisions, radius=1.0)
+    dot = bpy.context.object
+    dot.name = f"{name}Dot"
+    dot.data.materials.append(material)
+    dot.hide_render = True
+    dot.hide_viewport = True
+    return create_glyph_instancer(name, dot)
+
+
+def remove_particle_handlers():
+    import bpy
+    handlers = bpy.app.handlers.frame_change_pre
+    for handler in list(handlers):
+        if isinstance(handler, ParticleAnimator):
+            handlers.remove(handler)
+
+
+def install_particle_handler(obj, data_dir, radius=0.004):
+    """Keeps `obj` showing the particles of the scene's current frame."""
+    import bpy
+    animator = ParticleAnimator(obj.name, data_dir, radius)
+    bpy.app.handlers.frame_change_pre.append(animator)
+    animator(bpy.context.scene)
+    return animator
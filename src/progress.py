@@ -0,0 +1,78 @@
+import json
+import sys
+import time
+
+# Every structured progress event is one line: PROGRESS_PREFIX followed by a JSON object.
+# Consumers can skip all other output with a cheap startswith() check.
+PROGRESS_PREFIX = "@@progress "
+
+
+def format_progress(stage, **fields):
+    event = {"stage": stage}
+    event.update(fields)
+    return PROGRESS_PREFIX + json.dumps(event, separators=(",", ":"))
+
+
+def emit_progress(stage, stream=None, **fields):
+    """Writes a single progress event line and flushes it immediately."""
+    stream = stream or sys.stdout
+    stream.write(format_progress(stage, **fields) + "\n")
+    stream.flush()
+
+
+def parse_progress_line(line):
+    """Returns the event dict for a progress line, or None for ordinary output."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(PROGRESS_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) and "stage" in event else None
+
+
+class ProgressReporter:
+    """
+    Emits progress events for one stage with an ETA estimate.
+
+    Events are rate-limited at the source (at most one per `min_interval`
+    seconds, plus the first and last step), so even a long solve writes only a
+    handful of lines per second.
+
+    Args:
+        stage (str): Stage name, e.g. "simulation" or "render".
+        total (int): Number of steps in the stage, if known up front.
+        stream: File object to write to. Defaults to sys.stdout.
+        min_interval (float): Minimum seconds between two emitted events.
+    """
+
+    def __init__(self, stage, total=None, stream=None, min_interval=0.25, clock=time.monotonic):
+        self.stage = stage
+        self.total = total
+        self.stream = stream
+        self.min_interval = min_interval
+        self.clock = clock
+        self.start_time = clock()
+        self._last_emit = None
+
+    def update(self, step, total=None, **fields):
+        """Reports that `step` (0-based) has finished. `total` may be supplied late by the caller."""
+        if total is not None:
+            self.total = total
+        now = self.clock()
+        done = step + 1
+        is_last = self.total is not None and done >= self.total
+        if self._last_emit is not None and not is_last and now - self._last_emit < self.min_interval:
+            return False
+        self._last_emit = now
+
+        elapsed = now - self.start_time
+        eta = None
+        if self.total:
+            eta = round(elapsed / done * (self.total - done), 2)
+        emit_progress(self.stage, stream=self.stream, step=done, total=self.total,
+                      elapsed=round(elapsed, 2), eta=eta, **fields)
+        return True
+
+    def __call__(self, step, total=None, **fields):
+        return self.update(step, total=total, **fields)
@@ -3,8 +3,16 @@ import os
 import subprocess
 import sys
 import shutil
-from llm_interface import LLMInterface
-from prompt_templates import PROMPT_TEMPLATES
+from src.llm_interface import LLMInterface
+from src.prompt_templates import PROMPT_TEMPLATES
+from src.frame_manifest import list_frame_files
+from src.parallel_render import ParallelRenderer, default_worker_count
+
+# blender_fluid_visualizer.py caps the animation at 3 seconds of 24 fps
+MAX_ANIMATION_FRAMES = 3 * 24
+# Lets several Blender processes share one output directory: each frame is claimed
+# with an empty placeholder file, and frames that already exist are skipped
+PLACEHOLDER_RENDER_EXPR = "import bpy; r = bpy.context.scene.render; r.use_placeholder = True; r.use_overwrite = False"
 
 class RenderAgent:
     def __init__(self, llm_type: str = "ollama", llm_model: str = "llama2", llm_base_url: str = "http://localhost:11434"):
@@ -17,7 +25,22 @@ class RenderAgent:
             self.project_root_in_docker = os.getcwd() # Assuming local execution, project root is current dir
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def _render_frames_to_images(self, blend_file_path: str, output_image_dir: str):
+    def _docker_command(self, blender_args):
+        return [
+            "docker", "run", "--rm", "--gpus", "all",
+            "-v", f"{os.getcwd()}:/app", # Mount project root
+            "-w", "/app", # Set working directory inside container to /app
+            "effect_stokes-blender_cuda_runner", # The image name of the blender_runner service
+        ] + blender_args
+
+    def _render_frames_to_images(self, blend_file_path: str, output_image_dir: str, frame_range=None, workers=None):
+        """
+        Renders the blend file's animation to PNG frames.
+
+        When the frame range is known, it is split across `workers` concurrent
+        Blender containers (see src.parallel_render); otherwise, or with a
+        single worker, one container renders the whole animation.
+        """
         print(f"[RenderAgent] Rendering frames from {blend_file_path} to {output_image_dir}")
         os.makedirs(output_image_dir, exist_ok=True)
 
@@ -26,9 +49,32 @@ class RenderAgent:
         blend_file_path_in_docker = os.path.join("/app", os.path.relpath(blend_file_path, os.getcwd()))
         output_image_dir_in_docker = os.path.join("/app", os.path.relpath(output_image_dir, os.getcwd()))
 
+        workers = workers or default_worker_count()
+        if frame_range and workers > 1:
+            def build_command(first, last, threads):
+                # The blend file comes first here: -s/-e only apply to a scene that is already loaded
+                return self._docker_command([
+                    "blender",
+                    "--background", "--enable-autoexec", blend_file_path_in_docker,
+                    "--threads", str(threads),
+                    "--render-output", os.path.join(output_image_dir_in_docker, "frame_####"),
+                    "--render-format", "PNG",
+                    "-s", str(first), "-e", str(last),
+                    "--python-expr", PLACEHOLDER_RENDER_EXPR,
+                    "-a",
+                ])
+            renderer = ParallelRenderer(build_command, frame_range[0], frame_range[1],
+                                        lambda frame: os.path.join(output_image_dir, f"frame_{frame:04d}.png"),
+                                        workers=workers)
+            renderer.run()
+            print(f"[RenderAgent] Frames rendered to {output_image_dir} by {workers} Blender workers")
+            return
+
         blender_render_command_args = [
             "blender",
             "--background",
+            # Lets the .blend's registered loader script re-attach vertex cache handlers
+            "--enable-autoexec",
             "--render-output", os.path.join(output_image_dir_in_docker, "frame_####"),
             "--render-format", "PNG",
             "-a", # Changed from --animation
@@ -36,12 +82,7 @@ class RenderAgent:
         ]
 
         # Construct the Docker command
-        docker_command = [
-            "docker", "run", "--rm", "--gpus", "all",
-            "-v", f"{os.getcwd()}:/app", # Mount project root
-            "-w", "/app", # Set working directory inside container to /app
-            "effect_stokes-blender_cuda_runner", # The image name of the blender_runner service
-        ] + blender_render_command_args
+        docker_command = self._docker_command(blender_render_command_args)
 
         print(f"[RenderAgent] Running Docker render command: {' '.join(docker_command)}")
         try:
@@ -125,8 +166,10 @@ class RenderAgent:
         gif_output_path = output_blend_file.replace(".blend", ".gif")
         image_sequence_dir = os.path.join(self.output_dir, "temp_frames", os.path.basename(output_blend_file).replace(".blend", ""))
         
-        # 1. Render frames from Blender
-        self._render_frames_to_images(output_blend_file, image_sequence_dir)
+        # 1. Render frames from Blender, split across workers when the frame range is known
+        fluid_frame_count = len(list_frame_files(fluid_data_path)) if os.path.isdir(fluid_data_path) else 0
+        frame_range = (0, min(fluid_frame_count - 1, MAX_ANIMATION_FRAMES)) if fluid_frame_count else None
+        self._render_frames_to_images(output_blend_file, image_sequence_dir, frame_range=frame_range)
 
         # 2. Use ffmpeg to combine frames into a GIF
         print(f"[RenderAgent] Converting image sequence to GIF: {gif_output_path}")
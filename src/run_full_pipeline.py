@@ -2,6 +2,18 @@ import subprocess
 import json
 import os
 import sys
+import shutil
+import threading
+
+# Make the project root importable when run as a script (python src/run_full_pipeline.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.progress import PROGRESS_PREFIX, emit_progress
+from src.stage_cache import StageCache
+from src.frame_manifest import mark_failed, remove_manifest
+from src.simulation_agent import validate_params
+from src.parallel_render import ParallelRenderer, default_worker_count
+from src.blender_worker import render_with_worker
+from src.lic_renderer import render_lic_frames
 
 # Define absolute paths
 PROJECT_ROOT = "/mnt/d/progress/Effect_Stokes"
@@ -10,6 +22,11 @@ RUN_SIMULATION_SCRIPT = os.path.join(SRC_DIR, "run_full_simulation.py")
 BLENDER_VISUALIZER_SCRIPT = os.path.join(SRC_DIR, "blender_fluid_visualizer.py")
 VERIFY_BLEND_SCRIPT = os.path.join(PROJECT_ROOT, "verify_blend_file.py")
 OUTPUTS_DIR = os.path.join(PROJECT_ROOT, "outputs")
+SIMULATION_RESULT_FILE = "simulation_result.json"
+BLEND_FILE_BASE_NAME = "my_custom_fluid_vfx"
+DEFAULT_GIF_FPS = 15
+# Visualization params that only affect GIF encoding; changing them must not trigger a re-render
+GIF_PARAM_KEYS = ("gif_fps",)
 
 # TODO: Set your Blender executable path here
 BLENDER_EXECUTABLE_PATH = "/snap/bin/blender"
@@ -26,7 +43,9 @@ def run_command(cmd, cwd=None):
                 break
             if output:
                 print(output.strip()) # Always print live output for debugging
-                lines.append(output)
+                # Progress events are forwarded to our caller but are not part of the command's result
+                if not output.startswith(PROGRESS_PREFIX):
+                    lines.append(output)
                 
         rc = process.poll()
         full_output = "".join(lines)
@@ -56,18 +75,23 @@ def create_gif_from_frames(input_frame_path, output_gif_path, fps=15):
         "-loop", "0",
         output_gif_path
     ]
+    emit_progress("gif", status="started")
     try:
         run_command(gif_command, cwd=PROJECT_ROOT) # Use run_command to execute FFmpeg
+        emit_progress("gif", status="finished")
         print(f"GIF created successfully at: {output_gif_path}")
     except subprocess.CalledProcessError as e:
         print(f"Error creating GIF: {e}")
         raise
 
-def main(simulation_params_json=None, visualization_params_json=None):
+def run_simulation_stage(simulation_params_json=None, visualization_params_json=None, output_dir=None):
     print("--- Step 1: Running Full Simulation ---")
+    emit_progress("simulation", status="started")
     
     # Pass simulation_params_json to run_full_simulation.py
     sim_command = [sys.executable, "-m", "src.run_full_simulation"]
+    if output_dir:
+        sim_command.extend(["--output_dir", os.path.join(output_dir, "fluid_data")])
     if simulation_params_json:
         sim_command.append(simulation_params_json)
     else:
@@ -81,27 +105,67 @@ def main(simulation_params_json=None, visualization_params_json=None):
     # Parse simulation output to get necessary parameters for Blender visualization
     try:
         result_data = json.loads(simulation_output)
-        fluid_data_path = result_data.get("output_data_path")
-        # The simulation_params and visualization_params returned by run_full_simulation.py
-        # are the *original* (potentially function-based) ones passed in.
-        # We need to pass these raw strings to blender_oneshot_cmd.
-        simulation_params_to_use_str = json.dumps(result_data.get("simulation_params", {}))
-        visualization_params_to_use_str = json.dumps(result_data.get("visualization_params", {}))
-
     except json.JSONDecodeError as e:
         print(f"Error parsing simulation result JSON: {e}")
         sys.exit(1)
-    
-    if not fluid_data_path:
+
+    if not result_data.get("output_data_path"):
         print("Error: Could not parse fluid data path from simulation output.")
         sys.exit(1)
 
-    # Ensure output directory for frames exists
-    blend_file_name_without_ext = "my_custom_fluid_vfx" # Set a base name
-    render_output_path = os.path.join(OUTPUTS_DIR, "temp_frames", blend_file_name_without_ext, "frame_####")
-    os.makedirs(os.path.dirname(render_output_path), exist_ok=True)
+    # Persist the result so the Blender stage can run as a separate process
+    if output_dir:
+        with open(os.path.join(output_dir, SIMULATION_RESULT_FILE), "w") as f:
+            json.dump(result_data, f, indent=2)
+    return result_data
+
+def load_simulation_result(output_dir):
+    result_path = os.path.join(output_dir, SIMULATION_RESULT_FILE)
+    if not os.path.exists(result_path):
+        print(f"Error: Simulation result not found at {result_path}. Run the simulation stage first.")
+        sys.exit(1)
+    with open(result_path) as f:
+        return json.load(f)
+
+def run_render_stage(result_data, visualization_params, render_output_path, stream=False, workers=None,
+                     blender_workers=None):
+    """
+    Builds the scene and renders the frames with Blender.
+
+    With `stream`, a single Blender process renders frames as the simulator
+    records them. Otherwise the job first goes to an idle warm worker among the
+    `blender_workers` addresses (blender_worker_server.py), which skips
+    Blender's startup. Without one, the frame range is split across `workers`
+    concurrent Blender processes (default: default_worker_count()); one worker
+    renders the whole animation in a single process as before.
+
+    With visualization_params renderer = "lic", Blender is not used at all:
+    src.lic_renderer draws the flow on the CPU into the same frame files
+    (spread over `workers` processes, default one per core).
+    """
+    fluid_data_path = result_data.get("output_data_path")
+    # The simulation_params returned by run_full_simulation.py are the *original*
+    # (potentially function-based) ones passed in.
+    # We need to pass these raw strings to blender_oneshot_cmd.
+    simulation_params_to_use_str = json.dumps(result_data.get("simulation_params", {}))
+    visualization_params_to_use_str = json.dumps(visualization_params)
+
+    # Start from an empty frame directory so a shorter re-render leaves no stale frames behind
+    frames_dir = os.path.dirname(render_output_path)
+    if os.path.isdir(frames_dir):
+        shutil.rmtree(frames_dir)
+    os.makedirs(frames_dir, exist_ok=True)
+
+    if visualization_params.get("renderer") == "lic":
+        print("\n--- Step 2: LIC rendering (no Blender) ---")
+        emit_progress("lic", status="started")
+        written = render_lic_frames(fluid_data_path, render_output_path, visualization_params,
+                                    result_data.get("simulation_params", {}), stream=stream, workers=workers)
+        print(f"Rendered {written} LIC frames to {frames_dir}.")
+        return
 
     print("\n--- Step 2: Blender Processing (Create, Verify, Render) ---")
+    emit_progress("blender", status="started")
     oneshot_script_path = os.path.join(PROJECT_ROOT, "run_blender_oneshot.py")
     blender_oneshot_cmd = [
         BLENDER_EXECUTABLE_PATH,
@@ -113,22 +177,192 @@ def main(simulation_params_json=None, visualization_params_json=None):
         simulation_params_to_use_str, # Pass raw sim params
         visualization_params_to_use_str # Pass raw viz params
     ]
-    run_command(blender_oneshot_cmd, cwd=PROJECT_ROOT)
+    if stream:
+        # Render each frame as soon as the simulator records it in the frame manifest
+        blender_oneshot_cmd.append("--stream")
+        run_command(blender_oneshot_cmd, cwd=PROJECT_ROOT)
+        return
+
+    if blender_workers:
+        job = {
+            "data_dir": fluid_data_path,
+            "render_output_path": render_output_path,
+            "simulation_params": result_data.get("simulation_params", {}),
+            "visualization_params": visualization_params,
+            # Lets the server tell when a cancelled job's worker has let go of it
+            "job_id": os.getenv("EFFECT_STOKES_JOB_ID"),
+        }
+        address = render_with_worker(blender_workers, job)
+        if address:
+            print(f"Rendered on warm Blender worker {address}.")
+            return
+        print("No idle warm Blender worker; starting a Blender process instead.")
+
+    workers = workers or default_worker_count()
+    if workers <= 1:
+        run_command(blender_oneshot_cmd, cwd=PROJECT_ROOT)
+        return
+
+    # Same range the oneshot script renders: Blender starts at frame 1 and the scene ends at time_steps - 1
+    frame_end = result_data.get("simulation_params", {}).get("time_steps", 30) - 1
+    def build_command(first, last, threads):
+        return (blender_oneshot_cmd[:2] + ["--threads", str(threads)] + blender_oneshot_cmd[2:]
+                + ["--frames", f"{first}-{last}"])
+    renderer = ParallelRenderer(build_command, 1, frame_end,
+                                lambda frame: render_output_path.replace("####", f"{frame:04d}") + ".png",
+                                workers=workers)
+    renderer.run()
+
+def run_streaming_stages(simulation_params_json, visualization_params_json, output_dir, render_params, render_output_path):
+    """
+    Runs the simulation and Blender at the same time: Blender builds and renders
+    frame k while the solver is computing later frames, so end-to-end time
+    approaches max(simulation, render) instead of their sum.
+    """
+    fluid_data_dir = os.path.join(output_dir, "fluid_data")
+    os.makedirs(fluid_data_dir, exist_ok=True)
+    # Blender must not replay the manifest of an earlier run before the simulator starts a new one
+    remove_manifest(fluid_data_dir)
+    # The same validated params run_full_simulation.py will report in its result
+    simulation_params, _ = validate_params(json.loads(simulation_params_json or "{}"), {})
 
-    # --- GIF Creation ---
-    gif_output_path = os.path.join(OUTPUTS_DIR, f"{blend_file_name_without_ext}.gif")
-    create_gif_from_frames(render_output_path, gif_output_path)
+    render_errors = []
+    def render():
+        try:
+            run_render_stage({"output_data_path": fluid_data_dir, "simulation_params": simulation_params},
+                             render_params, render_output_path, stream=True)
+        except BaseException as e:
+            render_errors.append(e)
 
-    print("\n--- Full pipeline completed successfully! ---")
-    print(f"Rendered frames are in: {os.path.dirname(render_output_path)}")
-    print(f"Generated GIF is at: {gif_output_path}")
+    render_thread = threading.Thread(target=render, name="blender-stream")
+    render_thread.start()
+    try:
+        run_simulation_stage(simulation_params_json, visualization_params_json, output_dir)
+    except BaseException as e:
+        # The simulator may have died before it could close its manifest; don't leave Blender waiting
+        mark_failed(fluid_data_dir, f"simulation stage failed: {e}")
+        raise
+    finally:
+        render_thread.join()
+    if render_errors:
+        raise render_errors[0]
+
+def build_stage_cache(simulation_params_json=None, visualization_params_json=None, output_dir=None, force=False,
+                      render_workers=None, blender_workers=None):
+    """
+    Declares the pipeline as cached stages: simulate -> render -> gif.
+
+    Each stage is keyed on the parameters it reads plus its upstream artifacts,
+    so it only re-runs when something it depends on changed. Without
+    `output_dir` the legacy shared locations under outputs/ are used.
+
+    Returns (cache, stream_simulate_and_render, render_output_path, gif_output_path);
+    the second item runs simulate and render overlapped for streaming mode.
+    """
+    base_dir = output_dir or OUTPUTS_DIR
+    simulation_params = json.loads(simulation_params_json or "{}")
+    # Same defaults/clamping the simulation stage applies, so an omitted key and its default render alike
+    _, visualization_params = validate_params({}, json.loads(visualization_params_json or "{}"))
+    render_params = {key: value for key, value in visualization_params.items() if key not in GIF_PARAM_KEYS}
+    gif_fps = visualization_params.get("gif_fps", DEFAULT_GIF_FPS)
+
+    if output_dir:
+        render_output_path = os.path.join(output_dir, "frames", "frame_####")
+    else:
+        render_output_path = os.path.join(OUTPUTS_DIR, "temp_frames", BLEND_FILE_BASE_NAME, "frame_####")
+    gif_output_path = os.path.join(base_dir, f"{BLEND_FILE_BASE_NAME}.gif")
+
+    cache = StageCache(base_dir, force=force)
+    cache.add_stage(
+        "simulate",
+        lambda: run_simulation_stage(simulation_params_json, visualization_params_json, base_dir),
+        outputs=[os.path.join(base_dir, "fluid_data"), os.path.join(base_dir, SIMULATION_RESULT_FILE)],
+        params={"simulation_params": simulation_params},
+    )
+    cache.add_stage(
+        "render",
+        # Where and how many workers render changes nothing in the frames, so neither is a cache param
+        lambda: run_render_stage(load_simulation_result(base_dir), render_params, render_output_path,
+                                 workers=render_workers, blender_workers=blender_workers),
+        outputs=[os.path.dirname(render_output_path)],
+        params={"visualization_params": render_params},
+        deps=["simulate"],
+    )
+    cache.add_stage(
+        "gif",
+        lambda: create_gif_from_frames(render_output_path, gif_output_path, fps=gif_fps),
+        outputs=[gif_output_path],
+        params={"fps": gif_fps},
+        deps=["render"],
+    )
+
+    def stream_simulate_and_render():
+        run_streaming_stages(simulation_params_json, visualization_params_json, base_dir, render_params, render_output_path)
+    return cache, stream_simulate_and_render, render_output_path, gif_output_path
+
+def main(simulation_params_json=None, visualization_params_json=None, stage="all", output_dir=None, force=False,
+         stream=False, render_workers=None, blender_workers=None):
+    """
+    Runs the pipeline. `stage` selects 'simulation', 'blender' or 'all'; the two
+    stages can run as separate processes when `output_dir` is given, which is how
+    the backend scheduler limits simulation and Blender concurrency independently.
+    Stages whose outputs are already up to date are skipped unless `force` is set.
+    With `stream` (stage 'all' only), Blender renders frames while the simulation
+    is still producing them. `render_workers` sets how many Blender processes
+    split the frame range otherwise, and `blender_workers` lists warm worker
+    addresses to try first.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    cache, stream_simulate_and_render, render_output_path, gif_output_path = build_stage_cache(
+        simulation_params_json, visualization_params_json, output_dir, force=force, render_workers=render_workers,
+        blender_workers=blender_workers)
+    stage_names = {
+        "simulation": ["simulate"],
+        "blender": ["render", "gif"],
+        "all": ["simulate", "render", "gif"],
+    }[stage]
+    on_skip = lambda name: emit_progress(name, status="cached")
+    try:
+        if stream and stage == "all" and (force or not cache.is_up_to_date("simulate")):
+            outcome = cache.run_together(["simulate", "render"], stream_simulate_and_render)
+            outcome.update(cache.run(["gif"], on_skip=on_skip))
+        else:
+            # Nothing to overlap when the simulation is already up to date
+            outcome = cache.run(stage_names, on_skip=on_skip)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if "gif" in outcome:
+        print("\n--- Full pipeline completed successfully! ---")
+        print(f"Rendered frames are in: {os.path.dirname(render_output_path)}")
+        print(f"Generated GIF is at: {gif_output_path}")
+    return outcome
 
 if __name__ == "__main__":
+    import argparse
+
     # Parse parameters from command line when run directly
-    sim_params_json_arg = "{}"
-    viz_params_json_arg = "{}"
-    if len(sys.argv) > 1:
-        sim_params_json_arg = sys.argv[1]
-    if len(sys.argv) > 2:
-        viz_params_json_arg = sys.argv[2]
-    main(sim_params_json_arg, viz_params_json_arg)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Effect Stokes full pipeline")
+    parser.add_argument("simulation_params_json", nargs="?", default="{}")
+    parser.add_argument("visualization_params_json", nargs="?", default="{}")
+    parser.add_argument("--stage", choices=["all", "simulation", "blender"], default="all",
+                        help="Pipeline stage to run. 'blender' requires a previous 'simulation' run with the same --output_dir.")
+    parser.add_argument("--output_dir", type=str, default=None,
+                        help="Per-job output directory for fluid data, frames and the GIF.")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run stages even if their outputs are up to date.")
+    parser.add_argument("--stream", action="store_true",
+                        help="With --stage all, render frames while the simulation is still producing them.")
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="Concurrent Blender processes for the render stage (default: EFFECT_STOKES_RENDER_WORKERS or one per 4 cores).")
+    parser.add_argument("--blender-workers", type=str, default=os.getenv("EFFECT_STOKES_BLENDER_WORKERS", ""),
+                        help="Comma-separated host:port list of warm Blender workers to render on.")
+    args = parser.parse_args()
+    if args.stage == "blender" and not args.output_dir:
+        parser.error("--stage blender requires --output_dir")
+    main(args.simulation_params_json, args.visualization_params_json, stage=args.stage, output_dir=args.output_dir,
+         force=args.force, stream=args.stream, render_workers=args.render_workers,
+         blender_workers=[address for address in args.blender_workers.split(",") if address])
@@ -3,6 +3,7 @@ import os
 import json
 
 from src.simulation_agent import SimulationAgent
+from src.progress import ProgressReporter
 
 if __name__ == "__main__":
     agent = SimulationAgent()
@@ -20,6 +21,15 @@ if __name__ == "__main__":
         infer_only = True
         sys.argv.remove("--infer_only") # Remove it so argparse doesn't complain
 
+    output_dir = None
+    if "--output_dir" in sys.argv:
+        flag_index = sys.argv.index("--output_dir")
+        if flag_index + 1 >= len(sys.argv):
+            print("Error: --output_dir requires a directory path.", file=sys.stderr)
+            sys.exit(1)
+        output_dir = sys.argv[flag_index + 1]
+        del sys.argv[flag_index:flag_index + 2]
+
     if infer_only:
         if len(sys.argv) > 1:
             try:
@@ -60,7 +70,10 @@ if __name__ == "__main__":
 
     result = agent.run_simulation(
         simulation_params=simulation_params_dict,
-        visualization_params=visualization_params_dict
+        visualization_params=visualization_params_dict,
+        output_dir=output_dir,
+        # Progress goes to stderr: stdout must stay a single JSON document
+        progress_callback=ProgressReporter("simulation", stream=sys.stderr)
     )
     # Ensure only the JSON output is printed for the full simulation run as well
     print(json.dumps(result, indent=2))
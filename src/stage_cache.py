@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+
+STAMP_DIR_NAME = ".stage_stamps"
+
+
+def fingerprint(value):
+    """Stable hash of a JSON-serializable value (dict key order does not matter)."""
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def path_signature(paths):
+    """
+    Hash of the current state of output files/directories, or None if any is missing.
+
+    Like make, it looks at file metadata (relative path, size, mtime) rather than
+    content, so checking a directory of thousands of frames stays cheap.
+    """
+    entries = []
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((path, stat.st_size, stat.st_mtime_ns))
+        elif os.path.isdir(path):
+            entries.append((path, "dir"))
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    stat = os.stat(file_path)
+                    entries.append((os.path.relpath(file_path, path), stat.st_size, stat.st_mtime_ns))
+        else:
+            return None
+    return fingerprint(entries)
+
+
+class StageCache:
+    """
+    Make-style executor that skips pipeline stages whose outputs are up to date.
+
+    Each stage declares the parameters it actually reads, the stages whose
+    artifacts it consumes, and the paths it writes. A stamp file per stage
+    records the fingerprint of those inputs (including the upstream stages'
+    output signatures) and the signature of the outputs it produced. A stage is
+    skipped when its input fingerprint is unchanged and its outputs still match
+    the stamp, so e.g. changing only a material color re-renders without
+    re-simulating, and changing only the GIF fps re-encodes without re-rendering.
+
+    Args:
+        stamp_root (str): Directory that holds the .stage_stamps folder.
+        force (bool): Run every requested stage regardless of its stamp.
+    """
+
+    def __init__(self, stamp_root, force=False):
+        self.stamp_dir = os.path.join(stamp_root, STAMP_DIR_NAME)
+        self.force = force
+        self.stages = {} # name -> {"func", "outputs", "params", "deps"}, in pipeline order
+        os.makedirs(self.stamp_dir, exist_ok=True)
+
+    def add_stage(self, name, func, outputs, params=None, deps=()):
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'.")
+        self.stages[name] = {"func": func, "outputs": list(outputs), "params": params or {}, "deps": tuple(deps)}
+        return self
+
+    def _stamp_path(self, name):
+        return os.path.join(self.stamp_dir, f"{name}.json")
+
+    def read_stamp(self, name):
+        try:
+            with open(self._stamp_path(name)) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_stamp(self, name, stamp):
+        tmp_path = self._stamp_path(name) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stamp, f, indent=2)
+        os.replace(tmp_path, self._stamp_path(name))
+
+    def input_fingerprint(self, name):
+        """
+        Fingerprint of a stage's parameters and its upstream artifacts.
+
+        Raises:
+            RuntimeError: If an upstream stage has never produced its outputs.
+        """
+        stage = self.stages[name]
+        upstream = {}
+        for dep in stage["deps"]:
+            stamp = self.read_stamp(dep)
+            if stamp is None:
+                raise RuntimeError(f"Stage '{name}' needs the outputs of '{dep}', which has not run yet.")
+            upstream[dep] = stamp["outputs"]
+        return fingerprint({"params": stage["params"], "upstream": upstream})
+
+    def is_up_to_date(self, name):
+        stamp = self.read_stamp(name)
+        if stamp is None or stamp.get("inputs") != self.input_fingerprint(name):
+            return False
+        return stamp.get("outputs") == path_signature(self.stages[name]["outputs"])
+
+    def invalidate(self, name):
+        """Forgets a stage's stamp, so a half-finished run is never mistaken for an up-to-date one."""
+        if os.path.exists(self._stamp_path(name)):
+            os.remove(self._stamp_path(name))
+
+    def record(self, name):
+        """Stamps a stage whose outputs were produced outside run()."""
+        outputs = path_signature(self.stages[name]["outputs"])
+        if outputs is None:
+            raise RuntimeError(f"Stage '{name}' finished without producing {self.stages[name]['outputs']}.")
+        self._write_stamp(name, {"inputs": self.input_fingerprint(name), "outputs": outputs, "finished_at": time.time()})
+
+    def run_together(self, names, func):
+        """
+        Runs `func` once to produce the outputs of several consecutive stages at
+        the same time (e.g. a simulator and a renderer consuming its frames as
+        they appear), then stamps each of them in order.
+
+        Returns:
+            dict: {stage name: "ran"}
+        """
+        for name in names:
+            self.invalidate(name)
+        func()
+        for name in names:
+            self.record(name)
+        return {name: "ran" for name in names}
+
+    def run(self, names=None, on_skip=None):
+        """
+        Runs the named stages (default: all) in pipeline order, skipping up-to-date ones.
+
+        Returns:
+            dict: {stage name: "ran" or "skipped"}
+        """
+        outcome = {}
+        for name in (names or list(self.stages)):
+            stage = self.stages[name]
+            if not self.force and self.is_up_to_date(name):
+                print(f"[StageCache] '{name}' is up to date, skipping.")
+                outcome[name] = "skipped"
+                if on_skip:
+                    on_skip(name)
+                continue
+
+            # Upstream outputs must exist before the stage starts
+            self.input_fingerprint(name)
+            self.invalidate(name)
+            stage["func"]()
+            self.record(name)
+            outcome[name] = "ran"
+        return outcome
@@ -0,0 +1,126 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class StageFailedError(Exception):
+    """A stage raised; the original exception is chained as __cause__."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class StageGraph:
+    """
+    Runs pipeline stages as a dependency graph on a thread pool.
+
+    A stage starts as soon as every stage it depends on has finished, so
+    independent stages (e.g. LLM styling and the fluid solve) overlap. Each
+    stage function receives a dict mapping its dependencies' names to their
+    results. After run(), `timings` holds each stage's start/end offsets and
+    critical_path() names the chain of stages that determined the total time.
+
+    Usage:
+        graph = StageGraph()
+        graph.add_stage("parse", lambda deps: parse(prompt))
+        graph.add_stage("simulate", lambda deps: simulate(deps["parse"]), deps=["parse"])
+        results = graph.run()
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.stages = {} # name -> (func, deps), in insertion order
+        self.timings = {} # name -> {"start": seconds, "end": seconds} relative to run() start
+        self.wall_time = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, func, deps=()):
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined.")
+        for dep in deps:
+            if dep not in self.stages:
+                # Dependencies must be added first, which also rules out cycles
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'.")
+        self.stages[name] = (func, tuple(deps))
+        return self
+
+    def _run_stage(self, name, func, dep_results, origin):
+        start = time.monotonic() - origin
+        try:
+            return func(dep_results)
+        finally:
+            with self._lock:
+                self.timings[name] = {"start": start, "end": time.monotonic() - origin}
+
+    def run(self):
+        """
+        Executes every stage and returns {stage name: result}.
+
+        Raises:
+            StageFailedError: For the first stage that raises. Stages not yet started are skipped.
+        """
+        self.timings = {}
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        origin = time.monotonic()
+        max_workers = self.max_workers or max(1, len(self.stages))
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        dep_results = {dep: results[dep] for dep in deps}
+                        running[executor.submit(self._run_stage, name, func, dep_results, origin)] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        self.wall_time = time.monotonic() - origin
+                        raise StageFailedError(name, error) from error
+                    results[name] = future.result()
+
+        self.wall_time = time.monotonic() - origin
+        return results
+
+    def critical_path(self):
+        """
+        Returns (stage names, seconds) of the longest dependency chain of the last run.
+
+        Walking back from the stage that finished last, each step follows the
+        dependency that finished latest, i.e. the one the stage actually waited for.
+        """
+        if not self.timings:
+            return [], 0.0
+        current = max(self.timings, key=lambda name: self.timings[name]["end"])
+        path = [current]
+        while True:
+            deps = [dep for dep in self.stages[current][1] if dep in self.timings]
+            if not deps:
+                break
+            current = max(deps, key=lambda name: self.timings[name]["end"])
+            path.append(current)
+        path.reverse()
+        total = sum(self.timings[name]["end"] - self.timings[name]["start"] for name in path)
+        return path, total
+
+    def report(self):
+        """Human-readable per-stage timings plus the critical path."""
+        lines = []
+        for name in self.stages:
+            timing = self.timings.get(name)
+            if timing is None:
+                lines.append(f"  {name:<12} skipped")
+                continue
+            lines.append(f"  {name:<12} {timing['start']:7.2f}s -> {timing['end']:7.2f}s  "
+                         f"({timing['end'] - timing['start']:.2f}s)")
+        path, total = self.critical_path()
+        lines.append(f"  critical path: {' -> '.join(path)} ({total:.2f}s of {self.wall_time or 0.0:.2f}s wall)")
+        return "\n".join(lines)
@@ -0,0 +1,275 @@
+import numpy as np
+from src.field_sampling import GridSampler, sample_cells, index_to_coords
+
+# The simulator's fixed time step, i.e. the time between two saved frames
+FRAME_DT = 0.01
+INTEGRATORS = ("rk2", "rk4")
+
+
+class PolylineSet:
+    """
+    Many polylines packed into two flat arrays.
+
+    Attributes:
+        points (np.ndarray): (M, 2) float32 vertices of every line, one line after another.
+        offsets (np.ndarray): (N + 1,) int64; line k is points[offsets[k]:offsets[k + 1]].
+    """
+
+    def __init__(self, points, offsets):
+        self.points = points
+        self.offsets = offsets
+
+    @classmethod
+    def from_tracks(cls, tracks, counts):
+        """
+        Packs (steps, N, 2) tracks, where line k is tracks[:counts[k], k], dropping the unused tail of each.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        valid = np.arange(tracks.shape[0])[:, None] < counts[None, :]
+        # Transposed so each line's vertices come out contiguous, in step order
+        points = np.ascontiguousarray(tracks.transpose(1, 0, 2)[valid.T], dtype=np.float32)
+        return cls(points, np.concatenate([[0], np.cumsum(counts)]))
+
+    @property
+    def count(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        """Number of vertices in each line."""
+        return np.diff(self.offsets)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.points[self.offsets[index]:self.offsets[index + 1]]
+
+    def segments(self, min_points=2):
+        """The lines as a list of (n, 2) arrays (e.g. for a matplotlib LineCollection), skipping shorter ones."""
+        return [self[k] for k in np.nonzero(self.lengths >= min_points)[0]]
+
+
+def seed_points(x_coords, y_coords, count, weights=None, seed=0):
+    """
+    `count` random seed positions, uniform over the grid or with density
+    proportional to `weights` (indexed [j, i], e.g. speed).
+
+    Returns:
+        np.ndarray: (count, 2) positions.
+    """
+    x_coords = np.asarray(x_coords, dtype=np.float64)
+    y_coords = np.asarray(y_coords, dtype=np.float64)
+    if weights is None:
+        weights = np.ones((len(y_coords), len(x_coords)))
+    fi, fj = sample_cells(weights, count, np.random.default_rng(seed))
+    return np.column_stack([index_to_coords(x_coords, fi), index_to_coords(y_coords, fj)])
+
+
+class FlowTracer:
+    """
+    Integrates many seeds through velocity fields at once.
+
+    Every step advances all live seeds together with a vectorized RK2 or RK4
+    update; velocity is bilinearly interpolated from the grid (u and v share
+    one set of cell lookups, see GridSampler). Seeds stop when they leave the
+    grid or reach still fluid, and stopped seeds drop out of later steps.
+
+    Fields are indexed [j, i] (rows along y), as in src.field_sampling.
+
+    Args:
+        x_coords, y_coords (array): Grid coordinates.
+        method (str): 'rk2' (midpoint) or 'rk4'.
+        min_speed (float): Speed below which a streamline ends.
+    """
+
+    def __init__(self, x_coords, y_coords, method="rk4", min_speed=1e-6):
+        if method not in INTEGRATORS:
+            raise ValueError(f"Unknown integrator '{method}'. Use one of {', '.join(INTEGRATORS)}.")
+        self.x_coords = np.asarray(x_coords, dtype=np.float64)
+        self.y_coords = np.asarray(y_coords, dtype=np.float64)
+        self.method = method
+        self.min_speed = min_speed
+        self.bounds = (self.x_coords[0], self.x_coords[-1], self.y_coords[0], self.y_coords[-1])
+        self.cell_size = min(np.diff(self.x_coords).min(), np.diff(self.y_coords).min())
+        self.sampler = GridSampler(self.x_coords, self.y_coords)
+
+    def sample(self, field, positions):
+        """
+        Bilinear interpolation of a (ny, nx, C) stack of fields at (N, 2) positions.
+
+        Returns:
+            np.ndarray: (N, C) values; outside the grid the edge value holds.
+        """
+        return self.sampler.sample(field, positions[:, 0], positions[:, 1])
+
+    def _inside(self, positions):
+        x_min, x_max, y_min, y_max = self.bounds
+        return ((positions[:, 0] >= x_min) & (positions[:, 0] <= x_max) &
+                (positions[:, 1] >= y_min) & (positions[:, 1] <= y_max))
+
+    def _advance(self, velocity, positions, h):
+        """One integrator step of size h; velocity(positions, stage) gives (N, 2), stage in [0, 1] of the step."""
+        k1 = velocity(positions, 0.0)
+        if self.method == "rk2":
+            return positions + h * velocity(positions + 0.5 * h * k1, 0.5)
+        k2 = velocity(positions + 0.5 * h * k1, 0.5)
+        k3 = velocity(positions + 0.5 * h * k2, 0.5)
+        k4 = velocity(positions + h * k3, 1.0)
+        return positions + (h / 6.0) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    def _integrate(self, seeds, steps, h, velocity_at_step):
+        """
+        Shared stepping loop. velocity_at_step(step) returns the velocity
+        function for that step (see _advance).
+
+        Returns:
+            tuple: ((steps + 1, N, 2) tracks, (N,) point counts); tracks past a
+                   seed's count repeat its last position.
+        """
+        seeds = np.asarray(seeds, dtype=np.float64).reshape(-1, 2)
+        tracks = np.empty((steps + 1, len(seeds), 2), dtype=np.float64)
+        tracks[0] = seeds
+        counts = np.where(self._inside(seeds), 1, 0)
+        live = np.nonzero(counts)[0]
+        positions = seeds.copy()
+        for step in range(steps):
+            if len(live):
+                moved = self._advance(velocity_at_step(step), positions[live], h)
+                ok = self._inside(moved)
+                live = live[ok]
+                positions[live] = moved[ok]
+                counts[live] += 1
+            tracks[step + 1] = positions
+            if not len(live):
+                return tracks[:step + 2], counts
+        return tracks, counts
+
+    def streamlines(self, u, v, seeds, steps=200, step_size=None, direction="both"):
+        """
+        Streamlines of one (steady) velocity field through each seed.
+
+        Lines follow the flow direction at a constant step_size (default half a
+        cell) in domain units, so their length does not depend on the speed.
+
+        Args:
+            u, v (array): Velocity indexed [j, i].
+            seeds (array): (N, 2) start positions.
+            steps (int): Maximum steps in each direction.
+            step_size (float): Distance per step.
+            direction (str): 'forward', 'backward' or 'both' (the seed ends up mid-line).
+
+        Returns:
+            PolylineSet: One line per seed; empty for seeds outside the grid, a single point in still fluid.
+        """
+        if direction not in ("forward", "backward", "both"):
+            raise ValueError(f"Unknown streamline direction '{direction}'. Use 'forward', 'backward' or 'both'.")
+        field = np.stack([np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64)], axis=-1)
+        h = step_size if step_size is not None else 0.5 * self.cell_size
+
+        def unit_velocity(sign):
+            def velocity(positions, stage):
+                sampled = self.sample(field, positions)
+                speed = np.hypot(sampled[:, 0], sampled[:, 1])[:, None]
+                # Still fluid gets a zero direction; the seed then stops moving and is cut below
+                return sign * np.divide(sampled, speed, out=np.zeros_like(sampled), where=speed > self.min_speed)
+            return velocity
+
+        def trace(sign):
+            tracks, counts = self._integrate(seeds, steps, h, lambda step: unit_velocity(sign))
+            # A line ends where the flow stops: drop the trailing points that no longer move
+            if len(tracks) > 1:
+                moving = np.any(tracks[1:] != tracks[:-1], axis=-1)
+                last_move = np.where(moving.any(axis=0), len(moving) - np.argmax(moving[::-1], axis=0), 0)
+                counts = np.minimum(counts, last_move + 1)
+            return tracks, counts
+
+        if direction != "both":
+            return PolylineSet.from_tracks(*trace(1.0 if direction == "forward" else -1.0))
+
+        forward, forward_counts = trace(1.0)
+        backward, backward_counts = trace(-1.0)
+        # Each line runs from the end of its backward half, through the seed, to the end of its forward half
+        rows = max(len(backward), 1) + len(forward) - 1
+        n = forward.shape[1]
+        tracks = np.empty((rows, n, 2), dtype=np.float64)
+        row = np.arange(rows)[:, None]
+        start = np.maximum(backward_counts, 1) - 1
+        back_index = np.clip(start[None, :] - row, 0, len(backward) - 1)
+        fwd_index = np.clip(row - start[None, :], 0, len(forward) - 1)
+        columns = np.arange(n)[None, :]
+        tracks[:] = np.where((row <= start[None, :])[..., None], backward[back_index, columns],
+                             forward[fwd_index, columns])
+        counts = np.where(forward_counts > 0, start + forward_counts, 0)
+        return PolylineSet.from_tracks(tracks, counts)
+
+    def pathlines(self, frames, seeds, start_frame=0, end_frame=None, substeps=4, frame_dt=FRAME_DT):
+        """
+        Paths of massless particles released at `seeds` in frame start_frame
+        and carried by the time-varying flow until end_frame.
+
+        Velocity is interpolated linearly in time between consecutive frames,
+        so only two frames are needed at once; `frames` can be a lazily loaded
+        src.frame_sequence.FrameSequence (or any indexable of dicts with u, v).
+
+        Args:
+            frames: Frame sequence; frames[k]["u"], frames[k]["v"] indexed [j, i].
+            seeds (array): (N, 2) release positions.
+            start_frame, end_frame (int): Frame range (end_frame defaults to the last frame).
+            substeps (int): Integrator steps per frame interval.
+            frame_dt (float): Simulation time between frames.
+
+        Returns:
+            PolylineSet: One path per seed, a vertex per substep, ending where the particle leaves the grid.
+        """
+        end_frame = len(frames) - 1 if end_frame is None else end_frame
+        substeps = max(1, int(substeps))
+        h = frame_dt / substeps
+        pair = {}
+
+        def stacked(frame_idx):
+            frame = frames[frame_idx]
+            return np.stack([np.asarray(frame["u"], dtype=np.float64), np.asarray(frame["v"], dtype=np.float64)], axis=-1)
+
+        def velocity_at_step(step):
+            frame_idx = start_frame + step // substeps
+            if pair.get("frame") != frame_idx:
+                # Both frames in one stack, so a single lookup samples the start and end of the interval
+                pair["frame"] = frame_idx
+                pair["field"] = np.concatenate([stacked(frame_idx), stacked(min(frame_idx + 1, end_frame))], axis=-1)
+            offset = (step % substeps) / substeps
+
+            def velocity(positions, stage):
+                sampled = self.sample(pair["field"], positions)
+                blend = offset + stage / substeps
+                return sampled[:, :2] * (1 - blend) + sampled[:, 2:] * blend
+            return velocity
+
+        steps = max(0, end_frame - start_frame) * substeps
+        return PolylineSet.from_tracks(*self._integrate(seeds, steps, h, velocity_at_step))
+
+
+# --- Blender side (only usable inside Blender) ---
+
+def update_polyline_curve(curve, polylines, z=0.0):
+    """Replaces a curve datablock's splines with one POLY spline per line of a PolylineSet."""
+    curve.splines.clear()
+    for points in polylines.segments():
+        spline = curve.splines.new('POLY')
+        spline.points.add(len(points) - 1)
+        co = np.empty((len(points), 4), dtype=np.float32)
+        co[:, :2] = points
+        co[:, 2] = z
+        co[:, 3] = 1.0 # Point weight
+        spline.points.foreach_set("co", co.ravel())
+
+
+def create_polyline_curve(name, polylines, bevel_depth=0.005, z=0.0):
+    """A curve object drawing each line of a PolylineSet as a thin tube."""
+    import bpy
+
+    curve = bpy.data.curves.new(name, 'CURVE')
+    curve.dimensions = '3D'
+    curve.bevel_depth = bevel_depth
+    update_polyline_curve(curve, polylines, z=z)
+    return bpy.data.objects.new(name, curve)
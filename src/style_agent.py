@@ -1,7 +1,7 @@
 import os
 import subprocess
-from llm_interface import LLMInterface
-from prompt_templates import PROMPT_TEMPLATES
+from src.llm_interface import LLMInterface
+from src.prompt_templates import PROMPT_TEMPLATES
 
 class StyleAgent:
     def __init__(self, llm_type: str = "ollama", llm_model: str = "llama2", llm_base_url: str = "http://localhost:11434"):
@@ -0,0 +1,253 @@
+import os
+import json
+import hashlib
+import numpy as np
+from src.getsuga_mesh import SurfaceMesh
+
+# A vertex cache is a directory holding flat binary arrays for every frame plus
+# an index.json describing where each frame lives in them:
+#   positions.f32     all frames' vertex positions, (sum V, 3) float32
+#   faces.i32         one face array per distinct topology, (sum F, 4) int32
+#   attr_<name>.f32   per-vertex attributes, (sum V,) float32
+# Frames whose faces are identical share one topology entry, so an animation
+# with a fixed topology stores its faces once.
+INDEX_FILE = "index.json"
+POSITIONS_FILE = "positions.f32"
+FACES_FILE = "faces.i32"
+CACHE_VERSION = 1
+
+
+def _attribute_file(name):
+    return f"attr_{name}.f32"
+
+
+class VertexCacheWriter:
+    """
+    Appends per-frame SurfaceMesh data to a vertex cache directory.
+
+    Frames are streamed to disk as they are added, so writing a long
+    animation needs no more memory than one frame. The index is written by
+    close() (or on leaving a with-block); readers ignore a cache without one.
+
+    Args:
+        path (str): Cache directory; an existing cache there is replaced.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            os.remove(os.path.join(path, INDEX_FILE))
+        self._positions = open(os.path.join(path, POSITIONS_FILE), "wb")
+        self._faces = open(os.path.join(path, FACES_FILE), "wb")
+        self._attributes = None # name -> file, fixed by the first frame
+        self._topology_ids = {} # faces hash -> topology id
+        self.frames = {}
+        self.topologies = []
+        self._vertex_offset = 0
+        self._face_offset = 0
+
+    def add_frame(self, frame, surface):
+        vertices = np.ascontiguousarray(surface.vertices, dtype=np.float32).reshape(-1, 3)
+        faces = np.ascontiguousarray(surface.faces, dtype=np.int32).reshape(-1, 4)
+        if self._attributes is None:
+            self._attributes = {name: open(os.path.join(self.path, _attribute_file(name)), "wb")
+                                for name in sorted(surface.attributes)}
+
+        key = hashlib.sha1(faces.tobytes() + str(len(vertices)).encode()).hexdigest()
+        if key not in self._topology_ids:
+            self._topology_ids[key] = len(self.topologies)
+            self.topologies.append({"face_offset": self._face_offset, "face_count": len(faces),
+                                    "vertex_count": len(vertices)})
+            self._faces.write(faces.tobytes())
+            self._face_offset += len(faces)
+
+        self._positions.write(vertices.tobytes())
+        for name, handle in self._attributes.items():
+            values = surface.attributes.get(name)
+            values = np.zeros(len(vertices), np.float32) if values is None else np.asarray(values, np.float32)
+            handle.write(values.tobytes())
+        self.frames[int(frame)] = {"topology": self._topology_ids[key], "vertex_offset": self._vertex_offset,
+                                   "vertex_count": len(vertices)}
+        self._vertex_offset += len(vertices)
+
+    def close(self):
+        for handle in [self._positions, self._faces] + list((self._attributes or {}).values()):
+            handle.close()
+        index = {
+            "version": CACHE_VERSION,
+            "frames": {str(frame): entry for frame, entry in sorted(self.frames.items())},
+            "topologies": self.topologies,
+            "attributes": sorted(self._attributes or {}),
+        }
+        tmp_path = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _map(path, dtype, columns=None):
+    """Memory-maps a flat binary array; an empty file maps to an empty array."""
+    if os.path.getsize(path) == 0:
+        return np.empty((0, columns) if columns else 0, dtype=dtype)
+    data = np.memmap(path, dtype=dtype, mode="r")
+    return data.reshape(-1, columns) if columns else data
+
+
+class VertexCacheReader:
+    """
+    Random access to the frames of a vertex cache.
+
+    The arrays are memory-mapped, so opening a cache is cheap and only the
+    frames actually read are paged in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("version") != CACHE_VERSION:
+            raise ValueError(f"Unsupported vertex cache version {index.get('version')} in {path}.")
+        self._frames = {int(frame): entry for frame, entry in index["frames"].items()}
+        self.frames = sorted(self._frames)
+        self.topologies = index["topologies"]
+        self.attribute_names = index["attributes"]
+        self._positions = _map(os.path.join(path, POSITIONS_FILE), np.float32, 3)
+        self._faces = _map(os.path.join(path, FACES_FILE), np.int32, 4)
+        self._attributes = {name: _map(os.path.join(path, _attribute_file(name)), np.float32)
+                            for name in self.attribute_names}
+
+    def nearest_frame(self, frame):
+        """The cached frame to show at `frame`: itself, else the closest one (holds the ends)."""
+        if frame in self._frames:
+            return frame
+        if not self.frames:
+            raise KeyError(f"Vertex cache {self.path} holds no frames.")
+        return min(self.frames, key=lambda cached: (abs(cached - frame), cached))
+
+    def topology_of(self, frame):
+        return self._frames[self.nearest_frame(frame)]["topology"]
+
+    def positions(self, frame):
+        entry = self._frames[self.nearest_frame(frame)]
+        start = entry["vertex_offset"]
+        return np.array(self._positions[start:start + entry["vertex_count"]])
+
+    def attributes(self, frame):
+        entry = self._frames[self.nearest_frame(frame)]
+        start, end = entry["vertex_offset"], entry["vertex_offset"] + entry["vertex_count"]
+        return {name: np.array(values[start:end]) for name, values in self._attributes.items()}
+
+    def faces(self, topology):
+        entry = self.topologies[topology]
+        return np.array(self._faces[entry["face_offset"]:entry["face_offset"] + entry["face_count"]])
+
+    def surface(self, frame):
+        return SurfaceMesh(self.positions(frame), self.faces(self.topology_of(frame)), self.attributes(frame))
+
+
+# --- Blender side (only usable inside Blender) ---
+
+# Custom properties that mark an object as driven by a vertex cache
+CACHE_PATH_PROPERTY = "vertex_cache"
+LOCATION_STEP_PROPERTY = "vertex_cache_location_step"
+LOADER_TEXT_NAME = "vertex_cache_loader.py"
+
+
+class VertexCacheAnimator:
+    """
+    frame_change_pre handler that streams one object's mesh from a vertex cache.
+
+    When the new frame has the topology already loaded, only vertex positions
+    and attributes are replaced; otherwise the mesh geometry is rebuilt. The
+    object is also moved to location_step * frame, which is where the
+    per-frame objects used to be placed.
+    """
+
+    def __init__(self, object_name, cache_path, location_step=(0.0, 0.0, 0.0)):
+        self.object_name = object_name
+        self.reader = VertexCacheReader(cache_path)
+        self.location_step = np.asarray(location_step, dtype=np.float64)
+        self._loaded_frame = None
+        self._loaded_topology = None
+
+    def __call__(self, scene, *args):
+        import bpy
+        from src.getsuga_mesh import fill_blender_mesh
+
+        obj = bpy.data.objects.get(self.object_name)
+        if obj is None:
+            return
+        obj.location = self.location_step * scene.frame_current
+        frame = self.reader.nearest_frame(scene.frame_current)
+        if frame == self._loaded_frame:
+            return
+        mesh = obj.data
+        topology = self.reader.topology_of(frame)
+        if topology == self._loaded_topology and len(mesh.vertices) == self.reader.topologies[topology]["vertex_count"]:
+            mesh.vertices.foreach_set("co", self.reader.positions(frame).ravel())
+            for name, values in self.reader.attributes(frame).items():
+                if name in mesh.attributes:
+                    mesh.attributes[name].data.foreach_set("value", values)
+            mesh.update()
+        else:
+            mesh.clear_geometry()
+            fill_blender_mesh(mesh, self.reader.surface(frame))
+            self._loaded_topology = topology
+        self._loaded_frame = frame
+
+
+def remove_frame_handlers(object_name=None):
+    """Unregisters vertex cache animators (all of them, or those of one object)."""
+    import bpy
+    handlers = bpy.app.handlers.frame_change_pre
+    for handler in list(handlers):
+        if isinstance(handler, VertexCacheAnimator) and object_name in (None, handler.object_name):
+            handlers.remove(handler)
+
+
+def install_frame_handler(obj, cache_path, location_step=(0.0, 0.0, 0.0)):
+    """
+    Drives `obj` from the cache at `cache_path` and records that on the object,
+    so register_cached_objects() can restore the handler after a .blend is reopened.
+    """
+    import bpy
+    obj[CACHE_PATH_PROPERTY] = os.path.abspath(cache_path)
+    obj[LOCATION_STEP_PROPERTY] = [float(value) for value in location_step]
+    remove_frame_handlers(obj.name)
+    animator = VertexCacheAnimator(obj.name, cache_path, location_step)
+    bpy.app.handlers.frame_change_pre.append(animator)
+    animator(bpy.context.scene)
+    return animator
+
+
+def register_cached_objects():
+    """Installs handlers for every object in the open file that carries a vertex cache path."""
+    import bpy
+    for obj in bpy.data.objects:
+        if CACHE_PATH_PROPERTY in obj and os.path.exists(os.path.join(obj[CACHE_PATH_PROPERTY], INDEX_FILE)):
+            install_frame_handler(obj, obj[CACHE_PATH_PROPERTY], tuple(obj.get(LOCATION_STEP_PROPERTY, (0, 0, 0))))
+
+
+def embed_loader(project_root):
+    """
+    Adds a registered text block that re-installs the handlers when the saved
+    .blend is opened (Blender runs it when scripts are trusted, e.g. `blender -y`).
+    """
+    import bpy
+    text = bpy.data.texts.get(LOADER_TEXT_NAME) or bpy.data.texts.new(LOADER_TEXT_NAME)
+    text.clear()
+    text.write(
+        "import sys\n"
+        f"sys.path.insert(0, {os.path.abspath(project_root)!r})\n"
+        "from src.vertex_cache import register_cached_objects\n"
+        "register_cached_objects()\n"
+    )
+    text.use_module = True
+    return text
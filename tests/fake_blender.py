@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Blender executable in parallel render tests.
+
+Understands the two command shapes the pipeline uses:
+  blender --background [--threads N] --python run_blender_oneshot.py -- <data> <render_path> <sim> <viz> --frames A-B
+  blender --background <file.blend> [--threads N] --render-output <path> ... -s A -e B ... -a
+and "renders" each frame the way Blender's placeholder mode does: a frame whose
+file exists is skipped, otherwise it is claimed with an empty file and written later.
+
+Behaviour is controlled through environment variables:
+  FAKE_BLENDER_DELAY       seconds per frame (default 0.01)
+  FAKE_BLENDER_SLOW_FRAMES comma-separated frames that take FAKE_BLENDER_SLOW_DELAY seconds
+  FAKE_BLENDER_FAIL_FRAME  frame at which the process exits with status 1
+  FAKE_BLENDER_DROP_FRAME  frame left as an empty placeholder the first time it is claimed
+"""
+import os
+import sys
+import json
+import time
+
+
+def _frame_set(name):
+    return {int(frame) for frame in os.getenv(name, "").split(",") if frame}
+
+
+def main(argv):
+    if "--" in argv:
+        script_args = argv[argv.index("--") + 1:]
+        render_path = script_args[1]
+        first, last = (int(frame) for frame in script_args[script_args.index("--frames") + 1].split("-"))
+    else:
+        render_path = argv[argv.index("--render-output") + 1]
+        first, last = int(argv[argv.index("-s") + 1]), int(argv[argv.index("-e") + 1])
+
+    delay = float(os.getenv("FAKE_BLENDER_DELAY", "0.01"))
+    slow_frames = _frame_set("FAKE_BLENDER_SLOW_FRAMES")
+    slow_delay = float(os.getenv("FAKE_BLENDER_SLOW_DELAY", "0.2"))
+    fail_frames = _frame_set("FAKE_BLENDER_FAIL_FRAME")
+    drop_frames = _frame_set("FAKE_BLENDER_DROP_FRAME")
+
+    print(f"Fake Blender rendering frames {first}-{last}", flush=True)
+    for step, frame in enumerate(range(first, last + 1)):
+        path = render_path.replace("####", f"{frame:04d}") + ".png"
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)) # Placeholder claims the frame
+        except FileExistsError:
+            continue
+        if frame in fail_frames:
+            print(f"Error: frame {frame} failed", flush=True)
+            return 1
+        time.sleep(slow_delay if frame in slow_frames else delay)
+        dropped_marker = os.path.join(os.path.dirname(path), f".dropped_{frame}")
+        if frame in drop_frames and not os.path.exists(dropped_marker):
+            open(dropped_marker, "w").close()
+            continue
+        with open(path, "w") as f:
+            f.write(f"frame {frame} by {os.getpid()}")
+        print("@@progress " + json.dumps({"stage": "render", "step": step + 1, "frame": frame}), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `blender --background --python blender_worker_server.py -- ...` in
+Blender worker pool tests. Serves jobs with the real BlenderWorkerServer, but
+"renders" by writing one text file per frame instead of using bpy.
+
+A job's visualization_params may hold "fail": true to raise inside the worker,
+or "crash": true to kill the whole process mid-job.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.blender_worker import BlenderWorkerServer
+from src.progress import ProgressReporter
+
+
+def render_job(job):
+    viz = job.get("visualization_params", {})
+    if viz.get("crash"):
+        os._exit(3)
+    if viz.get("fail"):
+        raise RuntimeError("No VFX objects created")
+    frame_end = job.get("simulation_params", {}).get("time_steps", 4) - 1
+    progress = ProgressReporter("render", total=frame_end, min_interval=0)
+    print(f"Rendering {job['data_dir']} in process {os.getpid()}")
+    for step, frame in enumerate(range(1, frame_end + 1)):
+        time.sleep(viz.get("frame_delay", 0))
+        with open(job["render_output_path"].replace("####", f"{frame:04d}") + ".png", "w") as f:
+            f.write(f"frame {frame} by {os.getpid()}")
+        progress.update(step, frame=frame)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--max-jobs", type=int, default=0)
+    args = parser.parse_args(sys.argv[sys.argv.index("--") + 1:])
+    BlenderWorkerServer(render_job, port=args.port, max_jobs=args.max_jobs or None).serve_forever()
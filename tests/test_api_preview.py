@@ -1,6 +1,10 @@
 import pytest
 import json
-from backend.app import app, param_evaluator # Import app and param_evaluator
+import numpy as np
+from matplotlib.axes import Axes
+from backend.app import app, param_evaluator, _create_frame_image # Import app and param_evaluator
+from src.glyph_placement import GlyphPlacer
+from src.streamlines import FlowTracer
 
 @pytest.fixture
 def client():
@@ -84,6 +88,17 @@ def test_run_preview_invalid_params(client):
     assert data['status'] == 'error'
     assert "Parameter 'viscosity' is a string but not a valid mathematical expression." in data['message']
 
+@pytest.mark.parametrize("simulation_params, message", [
+    ({"initial_shape_type": "bitmap"}, "'shape_params' needs a 'bitmap'"),
+    ({"initial_shape_type": "bitmap", "shape_params": {"bitmap": "missing.npy"}}, "was not found"),
+    ({"emitters": [{"type": "bitmap", "position": [1.0, 1.0]}]}, "'emitters[0]' needs a 'bitmap'"),
+])
+def test_run_preview_rejects_bitmaps_without_a_mask(client, simulation_params, message):
+    response = client.post('/api/run_preview', json={"simulation_params": simulation_params, "visualization_params": {},
+                                                     "preview_settings": {"duration_frames": 2}})
+    assert response.status_code == 400
+    assert message in json.loads(response.data)['message']
+
 def test_run_preview_missing_params(client):
     test_params = {
         "simulation_params": {},
@@ -120,3 +135,48 @@ def test_get_llm_inferred_params_function_based(client):
     # Optionally, check for some fixed parameters to ensure they are still numbers
     assert isinstance(sim_params.get("grid_resolution"), list)
     assert isinstance(viz_params.get("arrow_density"), int)
+
+def _captured_quiver(monkeypatch, u, v, x, y, **kwargs):
+    """Draws one preview frame and returns the arrays passed to ax.quiver."""
+    calls = []
+    monkeypatch.setattr(Axes, "quiver", lambda ax, *args, **kw: calls.append([np.asarray(a) for a in args]))
+    assert _create_frame_image(u, v, x, y, 0, **kwargs)
+    assert len(calls) == 1
+    return calls[0]
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_preview_arrows_follow_fields_indexed_j_i(monkeypatch, adaptive):
+    # Non-square (ny, nx) grid; the flow only moves right of x = 0.5
+    x, y = np.linspace(0, 1, 40), np.linspace(0, 2, 60)
+    X, Y = np.meshgrid(x, y)
+    u = np.where(X > 0.5, -(Y - 1.0), 0.0)
+    v = np.where(X > 0.5, X - 0.75, 0.0)
+    placer = GlyphPlacer(x, y, budget=100) if adaptive else None
+    px, py, pu, pv = _captured_quiver(monkeypatch, u, v, x, y, glyph_placer=placer)
+
+    px, py, pu, pv = px.ravel(), py.ravel(), pu.ravel(), pv.ravel()
+    fast = px > 0.55
+    np.testing.assert_allclose(pu[fast], -(py[fast] - 1.0), atol=1e-6)
+    np.testing.assert_allclose(pv[fast], px[fast] - 0.75, atol=1e-6)
+    np.testing.assert_array_equal(pu[px < 0.45], 0.0)
+    if adaptive:
+        # Glyphs go where the flow moves
+        assert np.count_nonzero(px > 0.5) > 3 * np.count_nonzero(px < 0.5)
+
+def test_preview_streamlines_trace_fields_indexed_j_i(client, monkeypatch):
+    traced = []
+    original = FlowTracer.streamlines
+    def streamlines(tracer, u, v, *args, **kwargs):
+        traced.append((tracer, u.shape, v.shape))
+        return original(tracer, u, v, *args, **kwargs)
+    monkeypatch.setattr(FlowTracer, "streamlines", streamlines)
+
+    response = client.post('/api/run_preview', json={
+        "simulation_params": {"grid_resolution": [40, 60], "initial_shape_type": "vortex"},
+        "preview_settings": {"duration_frames": 2, "streamlines": True},
+    })
+    assert response.status_code == 200
+    assert len(traced) == 2
+    for tracer, u_shape, v_shape in traced:
+        # (ny, nx), rows along y, as the tracer reads them
+        assert u_shape == v_shape == (len(tracer.y_coords), len(tracer.x_coords)) == (60, 40)
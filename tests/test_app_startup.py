@@ -0,0 +1,42 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_server_starts_in_a_fresh_interpreter(tmp_path):
+    # A fresh process, so import order relative to eventlet.monkey_patch() is the real one
+    port = _free_port()
+    env = dict(os.environ, EFFECT_STOKES_PORT=str(port), EFFECT_STOKES_BLENDER_POOL_SIZE="0",
+               EFFECT_STOKES_JOB_DB=str(tmp_path / "jobs.db"), EFFECT_STOKES_LLM_CACHE=str(tmp_path / "llm_cache.db"))
+    log_path = tmp_path / "server.out"
+    with open(log_path, "w") as log:
+        server = subprocess.Popen([sys.executable, os.path.join(PROJECT_ROOT, "backend", "app.py")], cwd=PROJECT_ROOT,
+                                  env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    try:
+        status = None
+        deadline = time.time() + 60
+        while status is None and server.poll() is None and time.time() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/jobs", timeout=2) as response:
+                    status = response.status
+            except OSError:
+                time.sleep(0.2)
+        output = log_path.read_text()
+        assert status == 200, output
+        assert "Traceback" not in output, output
+    finally:
+        # The debug reloader forks a child; stop the whole group
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=10)
@@ -0,0 +1,100 @@
+import json
+import asyncio
+import pytest
+from src.async_llm_interface import AsyncLLMInterface, LLMRequestError
+from src.llm_cache import LLMResponseCache
+from benchmarks.stub_llm_server import StubLLMServer, STUB_PARAMS
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.mark.parametrize("llm_type", ["ollama", "openai"])
+def test_streams_and_parses_parameters(llm_type):
+    with StubLLMServer(chunk_size=5) as stub:
+        async def infer():
+            async with AsyncLLMInterface(llm_type=llm_type, base_url=stub.base_url, timeout=5) as llm:
+                return await llm.infer_simulation_and_visualization_parameters("blue vortex")
+        assert _run(infer()) == STUB_PARAMS
+        assert stub.last_request["stream"] is True
+
+
+def test_returns_before_trailing_text_finishes_streaming():
+    content = json.dumps(STUB_PARAMS) + " Hope this helps!" * 50
+    with StubLLMServer(content=content, chunk_size=20, chunk_delay=0.01) as stub:
+        async def infer():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5) as llm:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                result = await llm.infer_simulation_and_visualization_parameters("blue vortex")
+                return result, loop.time() - start
+        result, elapsed = _run(infer())
+        assert result == STUB_PARAMS
+        # Streaming the whole completion would take len(content) / 20 * 0.01 seconds
+        assert elapsed < len(content) / 20 * 0.01 * 0.6
+
+
+def test_retries_transient_failures():
+    with StubLLMServer(fail_first=2) as stub:
+        async def infer():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5, max_retries=2, backoff=0.01) as llm:
+                return await llm.infer_simulation_and_visualization_parameters("blue vortex")
+        assert _run(infer()) == STUB_PARAMS
+        assert stub.request_count == 3
+
+
+def test_gives_up_after_max_retries():
+    with StubLLMServer(fail_first=10) as stub:
+        async def infer():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5, max_retries=1, backoff=0.01) as llm:
+                return await llm.infer_simulation_and_visualization_parameters("blue vortex")
+        with pytest.raises(LLMRequestError):
+            _run(infer())
+        assert stub.request_count == 2
+
+
+def test_deadline_bounds_the_whole_call():
+    with StubLLMServer(delay=1.0) as stub:
+        async def infer():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=0.2) as llm:
+                return await llm.infer_simulation_and_visualization_parameters("blue vortex")
+        with pytest.raises(asyncio.TimeoutError):
+            _run(infer())
+
+
+def test_concurrent_identical_calls_share_one_request():
+    with StubLLMServer(delay=0.1) as stub:
+        async def infer_many():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5, cache=LLMResponseCache()) as llm:
+                return await asyncio.gather(*[
+                    llm.infer_simulation_and_visualization_parameters("blue vortex") for _ in range(5)
+                ])
+        assert _run(infer_many()) == [STUB_PARAMS] * 5
+        assert stub.request_count == 1
+
+
+def test_malformed_json_raises_request_error():
+    with StubLLMServer(content='{"simulation_params": {"time_steps": 30 40}}') as stub:
+        async def infer():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5) as llm:
+                return await llm.infer_simulation_and_visualization_parameters("blue vortex")
+        with pytest.raises(LLMRequestError, match="Malformed JSON"):
+            _run(infer())
+
+
+def test_coalesced_async_callers_get_their_own_copies():
+    cache = LLMResponseCache()
+    with StubLLMServer(delay=0.2) as stub:
+        async def infer_many():
+            async with AsyncLLMInterface(base_url=stub.base_url, timeout=5, cache=cache) as llm:
+                results = await asyncio.gather(*[
+                    llm.infer_simulation_and_visualization_parameters("blue vortex") for _ in range(3)
+                ])
+                # Callers edit their results in place; each has its own copy
+                results[0]["simulation_params"].clear()
+                return results
+        results = _run(infer_many())
+        assert results[1:] == [STUB_PARAMS] * 2
+        assert stub.request_count == 1
+        assert cache.misses == 1 and cache.hits == 2
@@ -0,0 +1,201 @@
+import io
+import os
+import time
+import socket
+import threading
+import pytest
+from src.blender_worker import (BlenderWorkerServer, BlenderWorkerError, render_with_worker, ping_worker,
+                                send_message, read_message, parse_address)
+from backend.blender_pool import BlenderWorkerPool
+import src.run_full_pipeline as pipeline
+
+FAKE_BLENDER_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_blender_worker.py")
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(handler, **kwargs):
+        server = BlenderWorkerServer(handler, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"127.0.0.1:{server.port}"
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def make(size=2, **kwargs):
+        worker_pool = BlenderWorkerPool(FAKE_BLENDER_WORKER, size=size, script="blender_worker_server.py",
+                                        startup_timeout=10, monitor_interval=0.05, **kwargs)
+        pools.append(worker_pool)
+        return worker_pool
+    yield make
+    for worker_pool in pools:
+        worker_pool.shutdown()
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.05)
+
+
+def test_job_output_is_streamed_and_errors_are_reported(start_server):
+    def handler(job):
+        print(f"building {job['name']}")
+        if job.get("fail"):
+            raise RuntimeError("No camera set")
+
+    server, address = start_server(handler)
+    output = io.StringIO()
+    assert render_with_worker([address], {"name": "vortex"}, output=output) == address
+    assert output.getvalue() == "building vortex\n"
+
+    with pytest.raises(BlenderWorkerError, match="No camera set"):
+        render_with_worker([address], {"name": "burst", "fail": True}, output=io.StringIO())
+    # The worker survives a failed job
+    assert ping_worker(address) == {"event": "pong", "busy": False, "jobs_done": 2, "job_id": None}
+
+
+def test_busy_worker_is_skipped(start_server):
+    release = threading.Event()
+    _, busy_address = start_server(lambda job: release.wait(5))
+    _, idle_address = start_server(lambda job: None)
+
+    first = threading.Thread(target=render_with_worker, args=([busy_address], {}), kwargs={"output": io.StringIO()})
+    first.start()
+    _wait_for(lambda: ping_worker(busy_address)["busy"])
+
+    assert render_with_worker([busy_address], {}, output=io.StringIO()) is None
+    assert render_with_worker([busy_address, idle_address], {}, output=io.StringIO()) == idle_address
+    release.set()
+    first.join()
+    assert render_with_worker(["127.0.0.1:1"], {}, output=io.StringIO()) is None
+
+
+def test_pool_serves_jobs_from_warm_processes_and_replaces_dead_ones(pool, tmp_path):
+    worker_pool = pool(size=2)
+    assert worker_pool.start() == 2
+    addresses = worker_pool.addresses()
+
+    pids = set()
+    for run in range(3):
+        frames_dir = tmp_path / f"run{run}"
+        frames_dir.mkdir()
+        job = {"data_dir": "fluid", "render_output_path": str(frames_dir / "frame_####"),
+               "simulation_params": {"time_steps": 4}, "visualization_params": {}}
+        output = io.StringIO()
+        assert render_with_worker(addresses, job, output=output) in addresses
+        assert sorted(os.listdir(frames_dir)) == ["frame_0001.png", "frame_0002.png", "frame_0003.png"]
+        assert '"stage":"render"' in output.getvalue()
+        pids.add((frames_dir / "frame_0001.png").read_text().split(" by ")[1])
+    # Jobs reuse the same processes instead of starting one each
+    assert len(pids) == 1
+
+    with pytest.raises(BlenderWorkerError, match="closed the connection"):
+        render_with_worker(addresses, {"visualization_params": {"crash": True}}, output=io.StringIO())
+    _wait_for(lambda: worker_pool.restarts == 1 and len(worker_pool.addresses()) == 2)
+    assert all(worker["alive"] for worker in worker_pool.status())
+
+
+def test_workers_retire_after_max_jobs(pool, tmp_path):
+    worker_pool = pool(size=1, max_jobs_per_worker=1)
+    worker_pool.start()
+    job = {"data_dir": "fluid", "render_output_path": str(tmp_path / "frame_####"),
+           "simulation_params": {"time_steps": 2}, "visualization_params": {}}
+    assert render_with_worker(worker_pool.addresses(), job, output=io.StringIO())
+    _wait_for(lambda: worker_pool.restarts == 1 and worker_pool.addresses())
+    assert render_with_worker(worker_pool.addresses(), job, output=io.StringIO())
+
+
+def test_render_stage_prefers_warm_workers_and_falls_back(pool, tmp_path, monkeypatch):
+    worker_pool = pool(size=1)
+    worker_pool.start()
+    commands = []
+    monkeypatch.setattr(pipeline, "run_command", lambda cmd, cwd=None: commands.append(cmd))
+    result = {"output_data_path": str(tmp_path / "fluid"), "simulation_params": {"time_steps": 3}}
+    render_output_path = str(tmp_path / "frames" / "frame_####")
+
+    pipeline.run_render_stage(result, {}, render_output_path, workers=1, blender_workers=worker_pool.addresses())
+    assert commands == []
+    assert sorted(os.listdir(tmp_path / "frames")) == ["frame_0001.png", "frame_0002.png"]
+
+    pipeline.run_render_stage(result, {}, render_output_path, workers=1, blender_workers=["127.0.0.1:1"])
+    assert len(commands) == 1 and commands[0][0] == pipeline.BLENDER_EXECUTABLE_PATH
+
+
+def _start_render(address, job):
+    """Opens a render connection the way a pipeline stage does and returns it once the job was accepted."""
+    conn = socket.create_connection(parse_address(address), timeout=5)
+    sock_file = conn.makefile("rwb")
+    send_message(sock_file, {"command": "render", "job": job})
+    assert read_message(sock_file)["event"] == "accepted"
+    return conn, sock_file
+
+
+@pytest.mark.parametrize("how", ["disconnect", "cancel"])
+def test_cancelled_jobs_stop_at_their_next_print(start_server, how):
+    frames = []
+
+    def handler(job):
+        for frame in range(200):
+            frames.append(frame)
+            print(f"frame {frame}")
+            time.sleep(0.02)
+
+    server, address = start_server(handler)
+    conn, sock_file = _start_render(address, {"job_id": "job-1"})
+    assert read_message(sock_file)["event"] == "output"
+    assert ping_worker(address)["job_id"] == "job-1"
+    if how == "cancel":
+        send_message(sock_file, {"command": "cancel"})
+        while read_message(sock_file)["event"] == "output":
+            pass
+    # A killed stage just drops its connection
+    sock_file.close()
+    conn.close()
+
+    _wait_for(lambda: not ping_worker(address)["busy"])
+    assert len(frames) < 100
+    assert ping_worker(address)["job_id"] is None
+    # The worker takes the next job as usual
+    server.handler = lambda job: print("next job")
+    output = io.StringIO()
+    assert render_with_worker([address], {}, output=output) == address and output.getvalue() == "next job\n"
+
+
+def test_pool_holds_a_cancelled_job_until_its_worker_is_free(pool, tmp_path):
+    worker_pool = pool(size=1)
+    worker_pool.start()
+    address = worker_pool.addresses()[0]
+    job = {"job_id": "job-1", "data_dir": "fluid", "render_output_path": str(tmp_path / "frame_####"),
+           "simulation_params": {"time_steps": 200}, "visualization_params": {"frame_delay": 0.05}}
+
+    conn, sock_file = _start_render(address, job)
+    # Still rendering for a connected client: the drain gives up and replaces the worker
+    assert not worker_pool.wait_until_released("job-1", timeout=0.3)
+    _wait_for(lambda: worker_pool.restarts == 1 and worker_pool.addresses())
+    sock_file.close()
+    conn.close()
+
+    address = worker_pool.addresses()[0]
+    conn, sock_file = _start_render(address, job)
+    sock_file.close()
+    conn.close()
+    # The client went away: the worker drops the job by itself and stays warm
+    assert worker_pool.wait_until_released("job-1", timeout=10)
+    assert worker_pool.wait_until_released("another-job", timeout=0)
+    assert worker_pool.restarts == 1 and ping_worker(address)["jobs_done"] == 1
+
+
+def test_pool_without_a_blender_binary_starts_empty(tmp_path):
+    worker_pool = BlenderWorkerPool(str(tmp_path / "no-blender"), size=2)
+    assert worker_pool.start() == 0
+    assert worker_pool.addresses() == []
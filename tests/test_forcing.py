@@ -0,0 +1,233 @@
+import numpy as np
+import pytest
+
+from src.fluid_simulator import FluidSimulator
+from src import forcing as forcing_module
+from src.forcing import Emitter, ForcingField, validate_bitmap
+from src.param_evaluator import ParamEvaluator
+from src.simulation_agent import validate_params
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(0, 2, 101)
+    y = np.linspace(0, 2, 101)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+def dense_forcing(X, Y, emitter):
+    """The full-grid evaluation run_simulation used before emitters were windowed."""
+    center_x, center_y = emitter.position
+    envelope = np.exp(-(np.sqrt((X - center_x) ** 2 + (Y - center_y) ** 2) / emitter.radius) ** 2)
+    if emitter.shape_type == "vortex":
+        return emitter.strength * (Y - center_y) * envelope, -emitter.strength * (X - center_x) * envelope, envelope
+    return emitter.strength * (X - center_x) * envelope, emitter.strength * (Y - center_y) * envelope, envelope
+
+
+def placed_dense(x, y, X, Y, emitter):
+    """dense_forcing of the emitter moved to each of its four neighbouring grid points, blended bilinearly."""
+    fi = (emitter.position[0] - x[0]) / (x[1] - x[0])
+    fj = (emitter.position[1] - y[0]) / (y[1] - y[0])
+    base_i, base_j = int(np.floor(fi)), int(np.floor(fj))
+    blended = [np.zeros_like(X) for _ in range(3)]
+    for i, weight_i in ((base_i, 1 - (fi - base_i)), (base_i + 1, fi - base_i)):
+        for j, weight_j in ((base_j, 1 - (fj - base_j)), (base_j + 1, fj - base_j)):
+            node = Emitter(emitter.shape_type, (x[0] + i * (x[1] - x[0]), y[0] + j * (y[1] - y[0])),
+                           emitter.radius, emitter.strength)
+            for total, part in zip(blended, dense_forcing(X, Y, node)):
+                total += weight_i * weight_j * part
+    return blended
+
+
+@pytest.mark.parametrize("shape_type", ["vortex", "circle_burst"])
+@pytest.mark.parametrize("position", [(1.0, 1.0), (0.05, 1.9), (1.3, 0.4)])
+def test_windowed_forcing_matches_the_dense_evaluation(grid, shape_type, position):
+    x, y, X, Y = grid
+    emitter = Emitter(shape_type, position, 0.3, 1.5)
+    source_x, source_y, envelope = np.zeros_like(X), np.zeros_like(X), np.zeros_like(X)
+    ForcingField(x, y).apply([emitter], source_x, source_y, envelope=envelope)
+    dense_x, dense_y, dense_envelope = placed_dense(x, y, X, Y, emitter)
+    # Outside the 3-radius window the Gaussian is below exp(-9)
+    np.testing.assert_allclose(source_x, dense_x, atol=2e-4)
+    np.testing.assert_allclose(source_y, dense_y, atol=2e-4)
+    np.testing.assert_allclose(envelope, dense_envelope, atol=2e-4)
+    rows, columns = ForcingField(x, y).window(position, 0.3)
+    np.testing.assert_allclose(source_x[rows, columns], dense_x[rows, columns], rtol=1e-9, atol=1e-12)
+
+
+def test_gaussians_off_a_uniform_grid_are_evaluated_exactly(grid):
+    _, y, _, _ = grid
+    x = np.linspace(0, np.sqrt(2), 101) ** 2
+    X, Y = np.meshgrid(x, y)
+    emitter = Emitter("vortex", (0.95, 1.13), 0.3, 1.5)
+    source_x, source_y = np.zeros_like(X), np.zeros_like(X)
+    ForcingField(x, y).apply([emitter], source_x, source_y)
+    dense_x, dense_y, _ = dense_forcing(X, Y, emitter)
+    np.testing.assert_allclose(source_x, dense_x, atol=2e-4)
+    np.testing.assert_allclose(source_y, dense_y, atol=2e-4)
+
+
+def test_many_emitters_and_stamp_cache(grid):
+    x, y, X, Y = grid
+    rng = np.random.default_rng(0)
+    emitters = [Emitter(rng.choice(["vortex", "circle_burst"]), rng.uniform(0, 2, 2), rng.uniform(0.02, 0.1),
+                        rng.uniform(0.5, 2.0)) for _ in range(40)]
+    forcing = ForcingField(x, y, cache_size=64)
+    source_x, source_y = np.zeros_like(X), np.zeros_like(X)
+    forcing.apply(emitters, source_x, source_y)
+    expected_x = sum(placed_dense(x, y, X, Y, emitter)[0] for emitter in emitters)
+    np.testing.assert_allclose(source_x, expected_x, atol=1e-3)
+
+    # Stamps depend on the radius only: emitters of one size share a stamp wherever they are
+    first = forcing.stamp(emitters[0].radius)
+    assert forcing.stamp(emitters[0].radius) is first
+    forcing.apply([Emitter("vortex", (0.37, 1.61), emitters[0].radius, 1.0)], np.zeros_like(X), np.zeros_like(X))
+    assert forcing.stamp(emitters[0].radius) is first
+    small = ForcingField(x, y, cache_size=2)
+    for emitter in emitters[:3]:
+        small.stamp(emitter.radius)
+    assert len(small._stamps) == 2
+
+    # An emitter entirely off the grid adds nothing
+    off_grid = np.zeros_like(X)
+    forcing.apply([Emitter("vortex", (5.0, 5.0), 0.1, 1.0)], off_grid, off_grid)
+    assert not off_grid.any()
+    with pytest.raises(ValueError):
+        Emitter("crescent_moon", (1, 1), 0.2, 1.0)
+
+
+def test_simulator_applies_extra_emitters(tmp_path):
+    base = {"grid_resolution": [41, 41], "time_steps": 3, "vortex_strength": 0.0}
+    FluidSimulator().run_simulation(base, str(tmp_path / "still"))
+    with_emitters = dict(base, emitters=[
+        {"type": "vortex", "position": [0.5, 0.5], "size": 0.2, "strength": 2.0},
+        {"type": "circle_burst", "position": ["1.5", "1.0 + t"], "size": 0.2, "strength": 2.0},
+    ])
+    FluidSimulator().run_simulation(with_emitters, str(tmp_path / "forced"))
+    with np.load(tmp_path / "still" / "fluid_data_frame_0002.npz") as still:
+        assert not still["u"].any()
+    with np.load(tmp_path / "forced" / "fluid_data_frame_0002.npz") as forced:
+        x, y, u = forced["x"], forced["y"], forced["u"]
+        # Both emitters move fluid near their centres (u indexed [j, i]); the grid between them stays still
+        assert np.abs(u[np.abs(y - 0.5) < 0.2][:, np.abs(x - 0.5) < 0.2]).max() > 0
+        assert np.abs(u[np.abs(y - 1.0) < 0.2][:, np.abs(x - 1.5) < 0.3]).max() > 0
+        assert np.abs(u[np.abs(y - 1.7) < 0.2][:, np.abs(x - 0.3) < 0.2]).max() == 0
+
+
+def test_crescent_stamp_matches_the_cavity_reference(grid):
+    x, y, X, Y = grid
+    # The crescent mask tests/navier_stokes_test.py draws directly on the grid
+    center, size = (1.0, 1.0), 0.37  # Keep the edges between grid points
+    angle = np.arctan2(Y - center[1], X - center[0])
+    distance = np.hypot(X - center[0], Y - center[1])
+    reference = (distance <= size) & (distance >= 0.6 * size) & (angle >= np.pi / 4) & (angle <= 3 * np.pi / 4)
+
+    source_x, source_y, envelope = np.zeros_like(X), np.zeros_like(X), np.zeros_like(X)
+    ForcingField(x, y).apply([Emitter("crescent", center, size, 2.0)], source_x, source_y, envelope=envelope)
+    # The angular edges run through diagonal grid points, where rounding decides either way
+    on_edge = (np.abs(angle - np.pi / 4) < 1e-9) | (np.abs(angle - 3 * np.pi / 4) < 1e-9)
+    np.testing.assert_array_equal((envelope > 0.5)[~on_edge], reference[~on_edge])
+    # Pushed along the bisector: straight up
+    np.testing.assert_allclose(source_y[reference], 2.0)
+    np.testing.assert_allclose(source_x, 0.0, atol=1e-12)
+
+
+@pytest.mark.parametrize("shape_type, options", [
+    ("ring", {"width": 0.1}),
+    ("slash", {"angle": 0.3, "rotation": 0.2}),
+    ("bitmap", {"bitmap": [[1, 0], [0, 1]], "direction": [1, 0]}),
+])
+def test_shifted_stamps_match_a_direct_build(grid, shape_type, options):
+    x, y, X, Y = grid
+    forcing = ForcingField(x, y)
+    first = Emitter(shape_type, (0.7, 1.1), 0.3, 1.0, options)
+    stamp = forcing.shape(first)
+    # A moving shape reuses the cached stamp instead of rebuilding it
+    assert forcing.shape(Emitter(shape_type, (1.3, 0.4), 0.3, 1.0, dict(options))) is stamp
+    assert stamp.mask.any()
+
+    # On grid points the placement is exact
+    on_grid = np.zeros_like(X)
+    forcing.apply([first], on_grid, np.zeros_like(X))
+    j, i = np.argmin(np.abs(y - 1.1)), np.argmin(np.abs(x - 0.7))
+    height, width = stamp.mask.shape
+    expected = np.zeros_like(X)
+    expected[j - stamp.center[0]:j - stamp.center[0] + height, i - stamp.center[1]:i - stamp.center[1] + width] = stamp.force_x
+    np.testing.assert_allclose(on_grid, expected, atol=1e-12)
+
+    # Between grid points the force is split bilinearly and its total is kept
+    between = np.zeros_like(X)
+    forcing.apply([Emitter(shape_type, (0.7 + 0.3 * (x[1] - x[0]), 1.1), 0.3, 1.0, options)], between, np.zeros_like(X))
+    assert between.sum() == pytest.approx(stamp.force_x.sum())
+
+
+def test_shape_errors_and_simulator_crescent(grid, tmp_path):
+    x, y, X, Y = grid
+    with pytest.raises(ValueError):
+        ForcingField(x, y).apply([Emitter("bitmap", (1, 1), 0.2, 1.0)], np.zeros_like(X), np.zeros_like(X))
+    with pytest.raises(ValueError):
+        ForcingField(x ** 2, y).apply([Emitter("ring", (1, 1), 0.2, 1.0)], np.zeros_like(X), np.zeros_like(X))
+
+    # "crescent" was accepted by the agent and the API but never forced the flow
+    params = {"grid_resolution": [41, 41], "time_steps": 2, "initial_shape_type": "crescent",
+              "initial_shape_size": 0.5, "shape_params": {"inner_ratio": 0.5}}
+    FluidSimulator().run_simulation(params, str(tmp_path))
+    with np.load(tmp_path / "fluid_data_frame_0001.npz") as frame:
+        v = frame["v"]
+        assert v.max() > 0 and v[frame["y"] < 0.8].max() == 0
+
+
+def test_shape_options_are_functions_of_t(grid, tmp_path):
+    x, y, X, Y = grid
+    emitter = Emitter.from_params({"type": "bitmap", "size": "0.2 + t", "rotation": "0.5 * t",
+                                   "direction": ["t", 1], "bitmap": [[1, 0], [0, 1]]},
+                                  lambda value: ParamEvaluator().evaluate(value, t=2.0))
+    assert emitter.radius == pytest.approx(2.2)
+    assert emitter.options == {"rotation": 1.0, "direction": [2.0, 1], "bitmap": [[1, 0], [0, 1]]}
+
+    # A turning slash: float("0.4 * t") used to fail inside shape_stamp
+    params = {"grid_resolution": [41, 41], "time_steps": 3, "initial_shape_type": "slash",
+              "shape_params": {"rotation": "0.4 * t", "angle": 0}}
+    assert FluidSimulator().run_simulation(params, str(tmp_path))["status"] == "success"
+
+
+def test_bitmap_paths_stay_inside_the_assets_directory(grid, tmp_path, monkeypatch):
+    x, y, X, Y = grid
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    np.save(assets / "slash.npy", np.eye(4))
+    np.save(tmp_path / "secret.npy", np.eye(4))
+    monkeypatch.setattr(forcing_module, "ASSETS_DIR", str(assets))
+
+    source_y = np.zeros_like(X)
+    ForcingField(x, y).apply([Emitter("bitmap", (1, 1), 0.3, 1.0, {"bitmap": "slash.npy"})], np.zeros_like(X), source_y)
+    assert source_y.max() > 0
+    for outside in ("../secret.npy", str(tmp_path / "secret.npy"), "/etc/passwd"):
+        with pytest.raises(ValueError, match="outside the assets directory"):
+            ForcingField(x, y).apply([Emitter("bitmap", (1, 1), 0.3, 1.0, {"bitmap": outside})],
+                                     np.zeros_like(X), np.zeros_like(X))
+
+
+def test_bitmap_shapes_are_validated_up_front(grid):
+    x, y, X, Y = grid
+    # The shipped sample mask resolves and draws
+    assert validate_bitmap({"bitmap": "star.npy"}, "shape_params") == (True, None)
+    source_y = np.zeros_like(X)
+    ForcingField(x, y).apply([Emitter("bitmap", (1, 1), 0.3, 1.0, {"bitmap": "star.npy"})], np.zeros_like(X), source_y)
+    assert source_y.max() > 0
+
+    assert validate_bitmap({"bitmap": [[0, 1], [1, 0]]}, "shape_params") == (True, None)
+    for options, problem in [(None, "needs a 'bitmap'"), ({"rotation": 1.0}, "needs a 'bitmap'"),
+                             ({"bitmap": "missing.npy"}, "was not found"),
+                             ({"bitmap": "../secret.npy"}, "outside the assets directory"),
+                             ({"bitmap": [1, 0, 1]}, "2-D list"), ({"bitmap": [["a"]]}, "2-D list")]:
+        is_valid, message = validate_bitmap(options, "emitters[0]")
+        assert not is_valid and problem in message and "emitters[0]" in message
+
+    # The agent falls back to the default shape and drops bitmap emitters it could not draw
+    sim_params = {"initial_shape_type": "bitmap", "emitters": [
+        {"type": "bitmap", "position": [1, 1]}, {"type": "bitmap", "bitmap": "star.npy"}, {"type": "vortex"}]}
+    validate_params(sim_params, {})
+    assert sim_params["initial_shape_type"] == "vortex"
+    assert sim_params["emitters"] == [{"type": "bitmap", "bitmap": "star.npy"}, {"type": "vortex"}]
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pytest
+from src.frame_manifest import (
+    FrameManifestWriter, FrameManifestReader, ManifestError, list_frame_files, manifest_path,
+)
+from src.fluid_simulator import FluidSimulator
+import src.run_full_pipeline as pipeline
+
+
+def _produce(directory, frames, delay, fail_at=None):
+    writer = FrameManifestWriter(directory, total=frames)
+    for i in range(frames):
+        time.sleep(delay)
+        if i == fail_at:
+            writer.fail("solver diverged")
+            return
+        np.savez_compressed(os.path.join(directory, f"fluid_data_frame_{i:04d}.npz"), p=np.full((2, 2), i))
+        writer.add_frame(i, f"fluid_data_frame_{i:04d}.npz")
+    writer.close()
+
+
+def test_reader_yields_frames_while_producer_runs(tmp_path):
+    directory = str(tmp_path)
+    producer = threading.Thread(target=_produce, args=(directory, 5, 0.05))
+    producer.start()
+
+    seen = []
+    for index, path in FrameManifestReader(directory, poll_interval=0.01).frames():
+        seen.append((index, producer.is_alive()))
+        assert np.load(path)["p"][0, 0] == index
+    producer.join()
+
+    assert [index for index, _ in seen] == list(range(5))
+    assert seen[0][1], "the first frame should be consumed before the producer finishes"
+
+
+def test_reader_stops_on_failure_and_stall(tmp_path):
+    _produce(str(tmp_path), 5, 0.0, fail_at=2)
+    with pytest.raises(ManifestError, match="solver diverged"):
+        list(FrameManifestReader(str(tmp_path), poll_interval=0.01).frames())
+
+    with pytest.raises(ManifestError, match="No new frames"):
+        list(FrameManifestReader(str(tmp_path / "never"), poll_interval=0.01, stall_timeout=0.1).frames())
+
+
+def test_list_frame_files_uses_manifest_or_file_names(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    for step in (20, 0, 10):
+        (legacy / f"fluid_data_{step:04d}.npz").touch()
+    (legacy / "notes.txt").touch()
+    assert [os.path.basename(p) for p in list_frame_files(str(legacy))] == [
+        "fluid_data_0000.npz", "fluid_data_0010.npz", "fluid_data_0020.npz"]
+
+    simulated = tmp_path / "simulated"
+    FluidSimulator().run_simulation({"grid_resolution": [21, 21], "time_steps": 4}, str(simulated))
+    frames = list_frame_files(str(simulated))
+    assert [os.path.basename(p) for p in frames] == [f"fluid_data_frame_{i:04d}.npz" for i in range(4)]
+    assert not any(name.endswith(".tmp") for name in os.listdir(simulated))
+    with open(manifest_path(str(simulated))) as f:
+        assert json.loads(f.readlines()[-1]) == {"event": "end", "frames": 4}
+
+
+def test_streaming_pipeline_overlaps_simulation_and_render(tmp_path, monkeypatch):
+    frames, delay = 6, 0.05
+    rendered = []
+
+    def fake_simulation(sim_json, viz_json, output_dir):
+        fluid_dir = os.path.join(output_dir, "fluid_data")
+        _produce(fluid_dir, frames, delay)
+        with open(os.path.join(output_dir, pipeline.SIMULATION_RESULT_FILE), "w") as f:
+            json.dump({"output_data_path": fluid_dir, "simulation_params": {}}, f)
+
+    def fake_render(result_data, visualization_params, render_output_path, stream=False):
+        assert stream
+        os.makedirs(os.path.dirname(render_output_path), exist_ok=True)
+        for index, _ in FrameManifestReader(result_data["output_data_path"], poll_interval=0.01).frames():
+            time.sleep(delay) # Rendering a frame costs as much as solving it
+            rendered.append(index)
+            open(render_output_path.replace("####", f"{index:04d}") + ".png", "w").close()
+
+    monkeypatch.setattr(pipeline, "run_simulation_stage", fake_simulation)
+    monkeypatch.setattr(pipeline, "run_render_stage", fake_render)
+    monkeypatch.setattr(pipeline, "create_gif_from_frames", lambda frames_path, gif_path, fps=15: open(gif_path, "w").close())
+    monkeypatch.setattr(pipeline, "emit_progress", lambda *args, **kwargs: None)
+    output_dir = str(tmp_path / "job")
+
+    start = time.monotonic()
+    outcome = pipeline.main("{}", "{}", output_dir=output_dir, stream=True)
+    elapsed = time.monotonic() - start
+
+    assert outcome == {"simulate": "ran", "render": "ran", "gif": "ran"}
+    assert rendered == list(range(frames))
+    # Sequential would take 2 * frames * delay
+    assert elapsed < 1.6 * frames * delay
+    # Both stages were stamped, so an identical rerun does nothing
+    assert set(pipeline.main("{}", "{}", output_dir=output_dir, stream=True).values()) == {"skipped"}
+
+
+def test_streaming_render_is_released_when_simulation_dies(tmp_path, monkeypatch):
+    def dying_simulation(sim_json, viz_json, output_dir):
+        FrameManifestWriter(os.path.join(output_dir, "fluid_data"), total=3)
+        raise RuntimeError("simulator crashed")
+
+    def fake_render(result_data, visualization_params, render_output_path, stream=False):
+        list(FrameManifestReader(result_data["output_data_path"], poll_interval=0.01, stall_timeout=5).frames())
+
+    monkeypatch.setattr(pipeline, "run_simulation_stage", dying_simulation)
+    monkeypatch.setattr(pipeline, "run_render_stage", fake_render)
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="simulator crashed"):
+        pipeline.run_streaming_stages("{}", "{}", str(tmp_path), {}, str(tmp_path / "frames" / "frame_####"))
+    assert time.monotonic() - start < 2
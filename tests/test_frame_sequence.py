@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.frame_sequence import FrameSequence, load_frame
+from src.marching_squares import mesh_fields
+
+
+@pytest.fixture
+def frame_dir(tmp_path):
+    x = np.linspace(0, 1, 8)
+    for frame in range(12):
+        field = np.full((8, 8), float(frame))
+        np.savez_compressed(tmp_path / f"fluid_data_frame_{frame:04d}.npz", u=field, v=-field, p=field * 2, x=x, y=x)
+    return tmp_path
+
+
+def test_frames_load_in_order_with_requested_fields(frame_dir):
+    frames = FrameSequence.from_dir(str(frame_dir), fields=("x", "y", "p"))
+    assert len(frames) == 12
+    assert set(frames[3]) == {"x", "y", "p"}
+    assert [frame["p"][0, 0] for frame in frames] == [2.0 * n for n in range(12)]
+    assert frames[-1]["p"][0, 0] == 22.0
+    with pytest.raises(IndexError):
+        frames[12]
+
+
+def test_cache_is_bounded_and_reused(frame_dir):
+    frames = FrameSequence.from_dir(str(frame_dir), cache_size=2)
+    for _ in frames:
+        pass
+    assert frames.loads == 12
+    assert len(frames._cache) == 2
+
+    frames[11], frames[10], frames[11]
+    assert frames.loads == 12 # Both still cached
+    frames[0]
+    assert frames.loads == 13
+    assert list(frames._cache) == [11, 0] # 10 was the least recently used
+
+
+def test_load_frame_reads_only_listed_fields(frame_dir):
+    frame = load_frame(str(frame_dir / "fluid_data_frame_0005.npz"), ("u",))
+    assert list(frame) == ["u"]
+    assert set(load_frame(str(frame_dir / "fluid_data_frame_0005.npz"))) == {"u", "v", "p", "x", "y"}
+
+
+def test_mesh_fields():
+    assert mesh_fields({}) == ("x", "y", "p")
+    assert mesh_fields({"mesh_mode": "ribbon"}) == ("x", "y", "p")
+    assert mesh_fields({"mesh_mode": "ribbon", "contour_field": "vorticity"}) == ("x", "y", "u", "v")
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from src.getsuga_mesh import build_getsuga_surface
+
+
+def _reference_surface(x_coords, y_coords, pressure, threshold, extrusion, scale_x=1.0, scale_y=1.0):
+    """The per-cell loops create_getsuga_mesh used to run with bmesh, with plain lists."""
+    vertices, index = [], {}
+    for i in range(len(x_coords)):
+        for j in range(len(y_coords)):
+            if pressure[j, i] > threshold:
+                index[(i, j)] = len(vertices)
+                vertices.append((x_coords[i] * scale_x, y_coords[j] * scale_y, pressure[j, i] * extrusion))
+    faces = []
+    for i in range(len(x_coords) - 1):
+        for j in range(len(y_coords) - 1):
+            corners = [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)]
+            if all(corner in index for corner in corners):
+                faces.append([index[corner] for corner in corners])
+    return np.array(vertices, dtype=np.float32).reshape(-1, 3), np.array(faces, dtype=np.int32).reshape(-1, 4)
+
+
+@pytest.mark.parametrize("nx, ny", [(21, 21), (17, 9)])
+def test_matches_per_cell_loops(nx, ny):
+    rng = np.random.default_rng(nx * ny)
+    x_coords, y_coords = np.linspace(0, 2, nx), np.linspace(0, 2, ny)
+    pressure = rng.normal(0.2, 0.3, size=(ny, nx))
+
+    surface = build_getsuga_surface(x_coords, y_coords, pressure, pressure_threshold=0.1, extrusion_scale=0.5,
+                                    scale_x=2.0, scale_y=0.5)
+    vertices, faces = _reference_surface(x_coords, y_coords, pressure, 0.1, 0.5, 2.0, 0.5)
+
+    assert surface.vertices.dtype == np.float32 and surface.faces.dtype == np.int32
+    np.testing.assert_allclose(surface.vertices, vertices, rtol=1e-6)
+    np.testing.assert_array_equal(surface.faces, faces)
+    np.testing.assert_allclose(surface.attributes["pressure"] * 0.5, surface.vertices[:, 2], rtol=1e-6)
+    assert surface.face_count > 0
+
+
+def test_empty_and_full_fields():
+    x_coords = y_coords = np.linspace(0, 1, 5)
+    empty = build_getsuga_surface(x_coords, y_coords, np.zeros((5, 5)))
+    assert empty.vertices.shape == (0, 3) and empty.faces.shape == (0, 4)
+
+    full = build_getsuga_surface(x_coords, y_coords, np.ones((5, 5)))
+    assert full.vertex_count == 25 and full.face_count == 16
+    # Every quad is a grid cell: corners (i, j), (i+1, j), (i+1, j+1), (i, j+1) with j varying fastest
+    np.testing.assert_array_equal(full.faces[0], [0, 5, 6, 1])
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.field_sampling import bilinear
+from src.glyph_placement import GlyphPlacer, poisson_disk_filter, importance_map
+from src.glyphs import glyphs_at_points
+
+
+@pytest.fixture
+def vortex():
+    """A Gaussian vortex at (0.5, 0.5) on a 64x64 grid, fields indexed [j, i]."""
+    x = np.linspace(-1, 1, 64)
+    y = np.linspace(-1, 1, 64)
+    X, Y = np.meshgrid(x, y)
+    envelope = np.exp(-((X - 0.5) ** 2 + (Y - 0.5) ** 2) / 0.02)
+    return x, y, -(Y - 0.5) * envelope, (X - 0.5) * envelope
+
+
+def test_bilinear_is_exact_on_linear_fields():
+    x = np.linspace(0, 2, 5)
+    y = np.array([0.0, 0.3, 1.0, 1.5]) # Non-uniform spacing
+    X, Y = np.meshgrid(x, y)
+    px, py = np.array([0.1, 1.7, 2.0]), np.array([0.2, 1.2, 1.5])
+    np.testing.assert_allclose(bilinear(x, y, 3 * X - 2 * Y + 1, px, py), 3 * px - 2 * py + 1)
+    # Outside the grid the edge value holds
+    np.testing.assert_allclose(bilinear(x, y, 3 * X, np.array([5.0]), np.array([0.5])), [6.0])
+
+
+def test_poisson_disk_filter_keeps_spacing_and_priority():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 1, (4000, 2))
+    kept = poisson_disk_filter(points, 0.05)
+    assert kept[0] == 0 # The first point always survives
+    accepted = points[kept]
+    gaps = np.linalg.norm(accepted[:, None] - accepted[None], axis=-1)
+    np.fill_diagonal(gaps, np.inf)
+    assert gaps.min() >= 0.05
+    # Same result as sequential dart throwing in array order
+    greedy = []
+    for index, point in enumerate(points[:600]):
+        if all(np.linalg.norm(point - points[other]) >= 0.05 for other in greedy):
+            greedy.append(index)
+    assert poisson_disk_filter(points[:600], 0.05).tolist() == greedy
+
+
+def test_glyphs_concentrate_where_the_flow_is(vortex):
+    x, y, u, v = vortex
+    placer = GlyphPlacer(x, y, budget=150, seed=3)
+    points = placer.place(u, v)
+    assert 0 < len(points) <= 150
+
+    weights = importance_map(x, y, u, v)
+    placed = bilinear(x, y, weights, points[:, 0], points[:, 1]).mean()
+    assert placed > 4 * weights.mean()
+    near_core = np.hypot(points[:, 0] - 0.5, points[:, 1] - 0.5) < 0.4
+    assert near_core.mean() > 0.5
+
+
+def test_positions_persist_across_similar_frames(vortex):
+    x, y, u, v = vortex
+    placer = GlyphPlacer(x, y, budget=150, seed=3)
+    first = placer.place(u, v)
+    second = placer.place(u * 1.05, v * 1.05)
+    kept = (first[:, None] == second[None]).all(axis=-1).any(axis=1)
+    assert kept.mean() > 0.6
+
+
+def test_vorticity_importance_and_glyph_transforms(vortex):
+    x, y, u, v = vortex
+    placer = GlyphPlacer(x, y, budget=80, importance="vorticity", seed=0)
+    points = placer.place(u, v)
+    vel_u, vel_v = placer.velocities(u, v)
+    glyphs = glyphs_at_points(points, vel_u, vel_v, arrow_scale_factor=2.0)
+    moving = np.hypot(vel_u, vel_v) > 1e-6
+    assert glyphs.count == np.count_nonzero(moving)
+    np.testing.assert_allclose(glyphs.positions[:, :2], points[moving], atol=1e-6)
+    np.testing.assert_allclose(glyphs.scales, 2.0 * np.hypot(vel_u, vel_v)[moving], rtol=1e-5)
+    with pytest.raises(ValueError):
+        GlyphPlacer(x, y, importance="pressure").place(u, v)
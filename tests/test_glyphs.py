@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.glyphs import arrow_glyphs
+
+
+@pytest.fixture
+def vortex():
+    # Non-square: fields are (ny, nx), indexed [j, i]
+    x = np.linspace(-1, 1, 40)
+    y = np.linspace(-1.5, 1.5, 60)
+    X, Y = np.meshgrid(x, y)
+    u, v = -Y, X
+    u[:, 20] = 0.0 # A column of still points that must not get arrows
+    v[:, 20] = 0.0
+    return x, y, u, v
+
+
+def _loop_glyphs(x, y, u, v, arrow_density, arrow_scale_factor):
+    """The per-arrow loop the visualizer ran before glyphs were vectorized, on [i, j] fields."""
+    positions, angles, scales = [], [], []
+    step_x = max(1, u.shape[0] // arrow_density)
+    step_y = max(1, u.shape[1] // arrow_density)
+    for i_x in range(0, u.shape[0], step_x):
+        for i_y in range(0, u.shape[1], step_y):
+            speed = np.sqrt(u[i_x, i_y] ** 2 + v[i_x, i_y] ** 2)
+            if speed > 1e-6:
+                positions.append((x[i_x], y[i_y], 0))
+                angles.append(np.arctan2(v[i_x, i_y] / speed, u[i_x, i_y] / speed))
+                scales.append(arrow_scale_factor * speed)
+    return np.array(positions), np.array(angles), np.array(scales)
+
+
+@pytest.mark.parametrize("arrow_density", [1, 7, 15, 100])
+def test_matches_per_arrow_loop(vortex, arrow_density):
+    x, y, u, v = vortex
+    glyphs = arrow_glyphs(x, y, u, v, arrow_density=arrow_density, arrow_scale_factor=2.5)
+    positions, angles, scales = _loop_glyphs(x, y, u.T, v.T, arrow_density, 2.5)
+
+    assert glyphs.count == len(positions)
+    np.testing.assert_allclose(glyphs.positions, positions, atol=1e-6)
+    np.testing.assert_allclose(glyphs.rotations[:, 2], angles, atol=1e-6)
+    np.testing.assert_array_equal(glyphs.rotations[:, :2], 0.0)
+    np.testing.assert_allclose(glyphs.scales, scales, rtol=1e-6)
+
+
+def test_arrows_follow_the_flow_at_their_position(vortex):
+    x, y, u, v = vortex
+    glyphs = arrow_glyphs(x, y, u, v, arrow_density=15)
+    px, py = glyphs.positions[:, 0].astype(np.float64), glyphs.positions[:, 1].astype(np.float64)
+    assert glyphs.count > 0
+    # Counter-clockwise vortex: velocity (-y, x) at every arrow
+    np.testing.assert_allclose(glyphs.rotations[:, 2], np.arctan2(px, -py), atol=1e-5)
+    np.testing.assert_allclose(glyphs.speeds, np.hypot(px, py), rtol=1e-5)
+    assert np.ptp(py) > 2.5 # Arrows span the whole (longer) y range
+
+
+def test_still_fluid_has_no_arrows():
+    x = y = np.linspace(0, 1, 8)
+    glyphs = arrow_glyphs(x, y, np.zeros((8, 8)), np.zeros((8, 8)))
+    assert glyphs.count == 0
+    assert glyphs.positions.shape == (0, 3)
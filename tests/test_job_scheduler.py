@@ -0,0 +1,217 @@
+import sys
+import time
+import pytest
+from backend.job_scheduler import JobScheduler
+
+
+def _python_stage(code):
+    return lambda job: [sys.executable, "-c", code]
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    schedulers = []
+
+    def _make(stages, **kwargs):
+        scheduler = JobScheduler(stages=stages, output_root=str(tmp_path / "jobs"), **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield _make
+    for scheduler in schedulers:
+        for job in scheduler.list_jobs():
+            scheduler.cancel(job.job_id)
+        scheduler.shutdown()
+
+
+def test_jobs_get_ids_output_dirs_and_logs(make_scheduler):
+    scheduler = make_scheduler([("simulation", _python_stage("print('hello from stage')"))])
+    job = scheduler.submit({"time_steps": 10}, {}, priority=0)
+
+    assert _wait_for(lambda: job.status == "completed")
+    assert job.returncode == 0
+    assert job.output_dir.endswith(job.job_id)
+    assert "hello from stage" in job.read_log()
+
+
+def test_failed_stage_stops_the_job(make_scheduler):
+    scheduler = make_scheduler([
+        ("simulation", _python_stage("import sys; sys.exit(3)")),
+        ("blender", _python_stage("print('should not run')")),
+    ])
+    job = scheduler.submit({}, {})
+
+    assert _wait_for(lambda: job.status == "failed")
+    assert job.returncode == 3
+    assert "should not run" not in job.read_log()
+
+
+def test_priority_order_with_single_worker(make_scheduler):
+    started = []
+    scheduler = make_scheduler([("simulation", _python_stage("import time; time.sleep(0.2)"))], max_workers=1)
+    scheduler.on_event = lambda name, payload: (
+        started.append(payload["job_id"]) if payload.get("current_step") == "simulation" else None
+    )
+
+    first = scheduler.submit({}, {})
+    assert _wait_for(lambda: first.status == "running")
+    low = scheduler.submit({}, {}, priority=0)
+    high = scheduler.submit({}, {}, priority=5)
+
+    assert _wait_for(lambda: all(j.status == "completed" for j in (first, low, high)))
+    assert started == [first.job_id, high.job_id, low.job_id]
+
+
+def test_stage_limit_serializes_stage(make_scheduler):
+    running = []
+    peak = []
+
+    def on_event(name, payload):
+        if name != "pipeline_status":
+            return
+        if payload["current_step"] == "blender":
+            running.append(payload["job_id"])
+            peak.append(len(running))
+        elif payload["job_id"] in running and payload["status"] in ("completed", "failed"):
+            running.remove(payload["job_id"])
+
+    scheduler = make_scheduler(
+        [("blender", _python_stage("import time; time.sleep(0.2)"))],
+        max_workers=3,
+        stage_limits={"blender": 1},
+        on_event=on_event,
+    )
+    jobs = [scheduler.submit({}, {}) for _ in range(3)]
+
+    assert _wait_for(lambda: all(j.status == "completed" for j in jobs))
+    assert max(peak) == 1
+
+
+def test_cancel_queued_and_running_jobs(make_scheduler):
+    scheduler = make_scheduler([("simulation", _python_stage("import time; time.sleep(30)"))], max_workers=1)
+    running = scheduler.submit({}, {})
+    queued = scheduler.submit({}, {})
+
+    assert _wait_for(lambda: running.process is not None)
+    assert scheduler.queue_position(queued.job_id) == 1
+
+    assert scheduler.cancel(queued.job_id)
+    assert queued.status == "cancelled"
+    assert scheduler.cancel(running.job_id)
+    assert _wait_for(lambda: running.status == "cancelled")
+    assert not scheduler.cancel(running.job_id)
+
+
+def test_cancel_emits_outside_the_scheduler_lock(make_scheduler):
+    lock_free = []
+    scheduler = make_scheduler([("simulation", _python_stage("import time; time.sleep(30)"))], max_workers=1)
+    running = scheduler.submit({}, {})
+    queued = scheduler.submit({}, {})
+    assert _wait_for(lambda: running.process is not None)
+
+    def on_event(name, payload):
+        if payload["job_id"] == queued.job_id and payload["status"] == "cancelled":
+            # Listeners may call back into the scheduler, so the lock must be free while emitting
+            acquired = scheduler._lock.acquire(blocking=False)
+            if acquired:
+                scheduler._lock.release()
+            lock_free.append(acquired)
+
+    scheduler.on_event = on_event
+    assert scheduler.cancel(queued.job_id)
+    assert lock_free == [True]
+    assert queued.status == "cancelled"
+
+
+def test_cancel_before_or_between_stages_is_not_completed(make_scheduler):
+    statuses = {}
+    scheduler = make_scheduler([
+        ("simulation", _python_stage("print('simulation ran')")),
+        ("blender", _python_stage("print('blender ran')")),
+    ])
+
+    def on_event(name, payload):
+        statuses.setdefault(payload["job_id"], []).append(payload["status"])
+        # Cancelled right after dequeue, before the first stage starts
+        if payload["message"] == "Pipeline started." and payload["job_id"] == early.job_id:
+            scheduler.cancel(payload["job_id"])
+
+    scheduler.on_event = on_event
+    stage_succeeded = scheduler._stage_succeeded
+
+    def cancel_after_simulation(job, stage_name, returncode):
+        succeeded = stage_succeeded(job, stage_name, returncode)
+        if job.job_id == between.job_id and stage_name == "simulation":
+            scheduler.cancel(job.job_id)
+        return succeeded
+
+    scheduler._stage_succeeded = cancel_after_simulation
+    early = scheduler.submit({}, {})
+    assert _wait_for(lambda: early.status == "cancelled")
+    between = scheduler.submit({}, {})
+    assert _wait_for(lambda: between.status == "cancelled")
+
+    time.sleep(0.2)
+    assert "completed" not in statuses[early.job_id] + statuses[between.job_id]
+    assert "simulation ran" not in early.read_log()
+    assert "simulation ran" in between.read_log() and "blender ran" not in between.read_log()
+
+
+def test_stage_slot_is_released_only_after_the_drain(make_scheduler):
+    order = []
+
+    def drain(job):
+        # e.g. a warm Blender worker still finishing the frame of a cancelled job
+        time.sleep(0.3)
+        order.append(("drained", job.job_id))
+
+    code = "import os, time; print('job', os.environ['EFFECT_STOKES_JOB_ID']); time.sleep(30)"
+    scheduler = make_scheduler([("blender", _python_stage(code))], max_workers=2, stage_limits={"blender": 1},
+                               stage_drains={"blender": drain})
+    scheduler.on_event = lambda name, payload: (
+        order.append(("started", payload["job_id"])) if payload.get("current_step") == "blender" else None
+    )
+    first = scheduler.submit({}, {})
+    assert _wait_for(lambda: first.process is not None)
+    second = scheduler.submit({}, {})
+    assert _wait_for(lambda: f"job {first.job_id}" in "".join(first.read_log()))
+    scheduler.cancel(first.job_id)
+
+    assert _wait_for(lambda: second.process is not None)
+    assert order[:3] == [("started", first.job_id), ("drained", first.job_id), ("started", second.job_id)]
+    assert first.status == "cancelled"
+
+
+def test_progress_events_are_coalesced(make_scheduler):
+    events = []
+    code = (
+        "from src.progress import emit_progress\n"
+        "for i in range(2000):\n"
+        "    emit_progress('render', step=i + 1, total=2000, frame=i)\n"
+        "    print(f'log line {i}')\n"
+    )
+    scheduler = make_scheduler(
+        [("blender", _python_stage(code))],
+        update_interval=0.2,
+        on_event=lambda name, payload: events.append((name, dict(payload))),
+    )
+    job = scheduler.submit({}, {})
+
+    assert _wait_for(lambda: job.status == "completed")
+    status_updates = [p for name, p in events if name == "pipeline_status"]
+    log_updates = [p for name, p in events if name == "pipeline_log"]
+    assert len(status_updates) < 50
+    assert len(log_updates) < 50
+    assert all("@@progress" not in p["message"] for p in log_updates)
+    assert job.progress_stage == "render"
+    assert job.current_frame == 1999
+    assert len(job.read_log(limit=10000)) >= 4000
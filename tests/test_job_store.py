@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+import pytest
+from backend.job_store import JobStore
+from backend.job_scheduler import Job, JobScheduler, STAGE_RUNNER_SCRIPT
+
+
+def _python_stage(code):
+    return lambda job: [sys.executable, "-c", code]
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / "jobs.db"))
+    yield job_store
+    job_store.close()
+
+
+def _stored_job(store, tmp_path, job_id, status, **fields):
+    output_dir = tmp_path / "jobs" / job_id
+    output_dir.mkdir(parents=True)
+    job = Job(job_id, {"time_steps": 10}, {"arrow_density": 5}, 0, str(output_dir))
+    job.status = status
+    store.insert_job(job)
+    if fields:
+        store.update_job(job_id, **fields)
+    return job
+
+
+def test_store_round_trip_and_queries(store, tmp_path):
+    _stored_job(store, tmp_path, "a", "completed")
+    _stored_job(store, tmp_path, "b", "queued")
+    _stored_job(store, tmp_path, "c", "completed")
+
+    record = store.get_job("b")
+    assert record["simulation_params"] == {"time_steps": 10}
+    assert record["visualization_params"] == {"arrow_density": 5}
+    assert store.count_jobs() == 3
+    assert store.count_jobs(status="completed") == 2
+    assert [r["job_id"] for r in store.list_jobs(status="completed")] == ["c", "a"]
+    assert len(store.list_jobs(limit=1, offset=1)) == 1
+
+    store.record_stage_start("a", "simulation")
+    store.record_stage_end("a", "simulation", 0)
+    store.set_artifact("a", "gif", "/tmp/a.gif")
+    assert store.get_stages("a")[0]["exit_code"] == 0
+    assert store.get_artifacts("a") == {"gif": "/tmp/a.gif"}
+
+    with pytest.raises(ValueError):
+        store.update_job("a", simulation_params="{}")
+
+
+def test_scheduler_persists_stage_timings_and_artifacts(store, tmp_path):
+    scheduler = JobScheduler(
+        stages=[("simulation", _python_stage("print('sim')")), ("blender", _python_stage("print('render')"))],
+        output_root=str(tmp_path / "jobs"),
+        store=store,
+        collect_artifacts=lambda job: {"log": job.log_path},
+    )
+    job = scheduler.submit({}, {})
+    assert _wait_for(lambda: (store.get_job(job.job_id) or {}).get("status") == "completed")
+    scheduler.shutdown()
+
+    stages = store.get_stages(job.job_id)
+    assert [s["stage"] for s in stages] == ["simulation", "blender"]
+    assert all(s["exit_code"] == 0 and s["finished_at"] >= s["started_at"] for s in stages)
+    assert store.get_artifacts(job.job_id) == {"log": job.log_path}
+    # Finished jobs are served from the store rather than kept in memory
+    assert job.job_id not in scheduler.jobs
+    assert scheduler.get(job.job_id).status == "completed"
+
+
+def test_recover_requeues_reattaches_and_orphans(store, tmp_path):
+    _stored_job(store, tmp_path, "queued1", "queued")
+    _stored_job(store, tmp_path, "lost1", "running", current_stage="simulation", pid=2 ** 22 + 1)
+
+    # A stage process that outlived the previous server instance
+    survivor = _stored_job(store, tmp_path, "alive1", "running", current_stage="simulation")
+    with open(survivor.log_path, "a") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, STAGE_RUNNER_SCRIPT, survivor.exit_code_path("simulation"), "--",
+             sys.executable, "-c", "import time; time.sleep(0.5)"],
+            stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+    store.update_job("alive1", pid=process.pid)
+
+    scheduler = JobScheduler(
+        stages=[("simulation", _python_stage("pass")), ("blender", _python_stage("print('render')"))],
+        output_root=str(tmp_path / "jobs"),
+        store=store,
+    )
+    summary = scheduler.recover()
+    assert summary == {"requeued": 1, "reattached": 1, "orphaned": 1}
+    assert store.get_job("lost1")["status"] == "orphaned"
+
+    assert _wait_for(lambda: store.get_job("queued1")["status"] == "completed")
+    assert _wait_for(lambda: process.poll() is not None)
+    assert _wait_for(lambda: store.get_job("alive1")["status"] == "completed")
+    # The re-attached job continued with the stage after the one it survived
+    assert "render" in scheduler.get("alive1").read_log()
+    scheduler.shutdown()
+
+
+def test_reattached_stage_holds_its_stage_slot(store, tmp_path):
+    _stored_job(store, tmp_path, "queued1", "queued")
+    survivor = _stored_job(store, tmp_path, "alive1", "running", current_stage="simulation")
+    with open(survivor.log_path, "a") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, STAGE_RUNNER_SCRIPT, survivor.exit_code_path("simulation"), "--",
+             sys.executable, "-c", "import time; time.sleep(0.5)"],
+            stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True,
+        )
+    store.update_job("alive1", pid=process.pid)
+    # Reap the survivor as its real parent would, so it does not linger as a zombie
+    threading.Thread(target=process.wait, daemon=True).start()
+
+    survivor_running = []
+    scheduler = JobScheduler(
+        stages=[("simulation", _python_stage("pass"))],
+        output_root=str(tmp_path / "jobs"),
+        stage_limits={"simulation": 1},
+        store=store,
+        on_event=lambda name, payload: (
+            survivor_running.append(process.poll() is None)
+            if payload["job_id"] == "queued1" and payload.get("current_step") == "simulation" else None
+        ),
+    )
+    assert scheduler.recover() == {"requeued": 1, "reattached": 1, "orphaned": 0}
+
+    assert _wait_for(lambda: store.get_job("queued1")["status"] == "completed")
+    assert _wait_for(lambda: store.get_job("alive1")["status"] == "completed")
+    # The requeued job's simulation waited for the surviving one to give up the only slot
+    assert survivor_running == [False]
+    scheduler.shutdown()
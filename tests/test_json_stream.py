@@ -0,0 +1,38 @@
+import json
+import pytest
+from src.json_stream import IncrementalJSONExtractor
+
+
+def _feed_in_chunks(text, size):
+    extractor = IncrementalJSONExtractor()
+    for i in range(0, len(text), size):
+        result = extractor.feed(text[i:i + size])
+        if result is not None:
+            return result, i + size
+    return None, len(text)
+
+
+def test_returns_once_top_level_object_closes():
+    obj = {"a": {"b": [1, 2, {"c": "}"}]}, "d": "quote \" and brace {"}
+    text = "Sure! Here you go:\n```json\n" + json.dumps(obj) + "\n```\nLet me know if you need anything else."
+    result, consumed = _feed_in_chunks(text, 3)
+    assert result == obj
+    # Nothing after the closing brace had to be read
+    assert consumed < text.index("Let me know")
+
+
+def test_repairs_python_literals_and_ignores_later_input():
+    extractor = IncrementalJSONExtractor()
+    assert extractor.feed('{"enabled": True, "x": ') is None
+    assert extractor.feed('False}{"second": 1}') == {"enabled": True, "x": False}
+    assert extractor.feed('{"third": 2}') == {"enabled": True, "x": False}
+
+
+def test_incomplete_object_yields_nothing():
+    result, _ = _feed_in_chunks('no json here {"a": 1', 4)
+    assert result is None
+
+
+def test_malformed_object_raises():
+    with pytest.raises(json.JSONDecodeError):
+        IncrementalJSONExtractor().feed('{"a": 1,}')
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.keyframe_curves import dissipation_curve, visibility_schedule
+
+
+def _loop_dissipation(frame, start, end, full_value):
+    """The per-frame branch animate_getsuga_vfx evaluated before the curves were vectorized."""
+    if start <= frame <= end:
+        return full_value * (1 - (frame - start) / (end - start))
+    if frame < start:
+        return full_value
+    return 0.0
+
+
+@pytest.mark.parametrize("start,end", [(10, 40), (-20, 29), (0, 1)])
+def test_dissipation_matches_per_frame_loop(start, end):
+    frames = np.arange(0, 60)
+    expected = [_loop_dissipation(frame, start, end, 5.0) for frame in frames]
+    np.testing.assert_allclose(dissipation_curve(frames, start, end, 5.0), expected)
+
+
+def test_zero_length_dissipation_is_a_step():
+    np.testing.assert_array_equal(dissipation_curve(np.arange(5), 2, 2, 1.0), [1, 1, 0, 0, 0])
+
+
+def _loop_visibility(frame_idx, frame_start, frame_end):
+    keys = []
+    if frame_idx > frame_end:
+        return keys
+    if frame_idx > frame_start:
+        keys.append((frame_idx - 1, 1.0))
+    keys.append((frame_idx, 0.0))
+    if frame_idx < frame_end:
+        keys.append((frame_idx + 1, 1.0))
+    return keys
+
+
+def test_visibility_schedule_matches_per_object_keys():
+    object_frames = np.arange(3, 15)
+    frames, hidden, valid = visibility_schedule(object_frames, frame_start=3, frame_end=10)
+    for row, frame_idx in enumerate(object_frames):
+        keys = list(zip(frames[row][valid[row]].tolist(), hidden[row][valid[row]].tolist()))
+        assert keys == _loop_visibility(frame_idx, 3, 10)
+
+
+def test_each_frame_shows_exactly_one_object():
+    object_frames = np.arange(0, 20)
+    frames, hidden, valid = visibility_schedule(object_frames, 0, 19)
+    for frame in range(20):
+        # Evaluate each object's constant-interpolated visibility at this frame
+        shown = []
+        for row in range(len(object_frames)):
+            key_frames, key_hidden = frames[row][valid[row]], hidden[row][valid[row]]
+            before = key_frames <= frame
+            value = key_hidden[before][-1] if before.any() else key_hidden[0]
+            shown.append(value == 0.0)
+        assert np.nonzero(shown)[0].tolist() == [frame]
+
+
+def test_empty_schedule():
+    frames, hidden, valid = visibility_schedule([], 0, 10)
+    assert frames.shape == hidden.shape == valid.shape == (0, 3)
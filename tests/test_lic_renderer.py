@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.lic_renderer import LICRenderer, render_lic_frames
+from src.run_full_pipeline import run_render_stage
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(0, 2, 41)
+    y = np.linspace(0, 1, 21)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+@pytest.fixture
+def frame_dir(tmp_path, grid):
+    x, y, X, Y = grid
+    data_dir = tmp_path / "fluid_data"
+    data_dir.mkdir()
+    for frame in range(6):
+        u = np.cos(frame * 0.3) * np.ones_like(X)
+        v = np.sin(frame * 0.3) * np.ones_like(X)
+        np.savez_compressed(data_dir / f"fluid_data_frame_{frame:04d}.npz", u=u, v=v, p=X * 0, x=x, y=y)
+    return data_dir
+
+
+def _correlation(a, b):
+    return np.corrcoef(a.ravel(), b.ravel())[0, 1]
+
+
+def test_texture_is_smeared_along_the_flow(grid):
+    x, y, X, Y = grid
+    renderer = LICRenderer(x, y, resolution=128, length=8)
+    assert (renderer.height, renderer.width) == (64, 128) # Keeps the 2:1 domain aspect ratio
+    texture, speed = renderer.convolve(np.ones_like(X), np.zeros_like(X)) # Flow along +x
+    along = _correlation(texture[:, :-1], texture[:, 1:])
+    across = _correlation(texture[:-1, :], texture[1:, :])
+    assert along > 0.8
+    assert abs(across) < 0.2
+    np.testing.assert_allclose(speed, 1.0, rtol=1e-6)
+
+
+def test_colour_and_emission_drive_the_image(grid):
+    x, y, X, Y = grid
+    renderer = LICRenderer(x, y, resolution=64, length=4)
+    u, v = np.ones_like(X) * X, np.zeros_like(X)
+    blue = renderer.render(u, v, arrow_color=[0.0, 0.0, 1.0], emission_strength=50.0)
+    assert blue.shape == (32, 64, 3) and blue.dtype == np.uint8
+    assert blue[..., 2].mean() > 3 * blue[..., 0].mean()
+    # Faster flow (larger x) is brighter
+    assert blue[:, -16:].mean() > blue[:, :16].mean()
+    assert renderer.render(u, v, emission_strength=0.0).max() == 0
+    brighter = renderer.render(u, v, arrow_color=[0.0, 0.0, 1.0], emission_strength=100.0)
+    assert brighter.mean() > blue.mean()
+    # An intensity field (e.g. dye) replaces speed as the brightness source
+    smoke = renderer.render(u, v, arrow_color=[0.0, 0.0, 1.0], intensity=(X < 1.0).astype(float))
+    assert smoke[:, :16].mean() > smoke[:, -16:].mean()
+
+
+def test_render_lic_frames_writes_the_blender_frame_files(tmp_path, frame_dir):
+    out_dir = tmp_path / "frames"
+    out_dir.mkdir()
+    viz = {"arrow_color": ["0.5 + 0.5 * sin(t)", 0.2, 0.9], "lic_resolution": 48, "lic_length": 4}
+    written = render_lic_frames(str(frame_dir), str(out_dir / "frame_####"), viz, {"time_steps": 8}, workers=1)
+    # Frames 1..time_steps-1; those past the data hold the last frame
+    assert written == 7
+    assert sorted(os.listdir(out_dir)) == [f"frame_{frame:04d}.png" for frame in range(1, 8)]
+    assert np.array_equal(np.asarray(Image.open(out_dir / "frame_0006.png"))[..., 2],
+                          np.asarray(Image.open(out_dir / "frame_0007.png"))[..., 2])
+
+    pooled_dir = tmp_path / "pooled"
+    pooled_dir.mkdir()
+    render_lic_frames(str(frame_dir), str(pooled_dir / "frame_####"), viz, {"time_steps": 8}, workers=2)
+    for frame in range(1, 8):
+        name = f"frame_{frame:04d}.png"
+        assert np.array_equal(np.asarray(Image.open(out_dir / name)), np.asarray(Image.open(pooled_dir / name)))
+
+
+def test_render_stage_uses_lic_without_blender(tmp_path, frame_dir, monkeypatch):
+    monkeypatch.setattr("src.run_full_pipeline.run_command",
+                        lambda *args, **kwargs: pytest.fail("Blender must not be launched"))
+    render_output_path = str(tmp_path / "frames" / "frame_####")
+    run_render_stage({"output_data_path": str(frame_dir), "simulation_params": {"time_steps": 5}},
+                     {"renderer": "lic", "lic_resolution": 32}, render_output_path, workers=1)
+    assert sorted(os.listdir(tmp_path / "frames")) == [f"frame_{frame:04d}.png" for frame in range(1, 5)]
@@ -0,0 +1,130 @@
+import time
+import asyncio
+import threading
+import pytest
+from src.llm_cache import LLMResponseCache, make_cache_key
+from src import llm_interface
+from src.llm_interface import LLMInterface
+from benchmarks.stub_llm_server import StubLLMServer, STUB_PARAMS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm_cache.db"), ttl=60, max_entries=3)
+
+
+def test_keys_ignore_whitespace_but_not_case():
+    assert make_cache_key("m", "t", "blue  vortex\n") == make_cache_key("m", "t", "blue vortex")
+    # Prompts embed parameter JSON, where case is significant
+    assert make_cache_key("m", "t", '{"colors": ["Red"]}') != make_cache_key("m", "t", '{"colors": ["red"]}')
+    assert make_cache_key("m", "t", "blue vortex") != make_cache_key("m", "other", "blue vortex")
+    assert make_cache_key("m", "t", {"b": 1, "a": 2}) == make_cache_key("m", "t", {"a": 2, "b": 1})
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    clock = FakeClock()
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), ttl=60, max_entries=2, clock=clock)
+    cache.put("a", {"v": 1})
+    clock.now += 1
+    cache.put("b", {"v": 2})
+    clock.now += 1
+    assert cache.get("a") == {"v": 1} # Touching "a" makes "b" the least recently used
+    clock.now += 1
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and len(cache) == 2
+
+    clock.now += 61
+    assert cache.get("a") is None
+
+
+def test_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    LLMResponseCache(path).get_or_compute("m", "t", "prompt", lambda: {"v": 1})
+    assert LLMResponseCache(path).get_or_compute("m", "t", "prompt", lambda: {"v": 2}) == {"v": 1}
+
+
+def test_concurrent_identical_requests_are_coalesced(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"v": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("m", "t", "p", compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"v": 1}] * 5
+    # Callers may edit their results in place (validate_params does), so none are shared
+    assert len({id(result) for result in results}) == 5
+    results[0]["v"] = 2
+    assert cache.get_or_compute("m", "t", "p", compute) == {"v": 1}
+
+
+def test_coroutines_join_a_call_made_on_another_thread(cache):
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        time.sleep(0.2)
+        return {"v": 1}
+
+    async def not_called():
+        raise AssertionError("the in-flight call should have been shared")
+
+    leader = threading.Thread(target=lambda: cache.get_or_compute("m", "t", "p", compute))
+    leader.start()
+    started.wait()
+    assert asyncio.run(cache.get_or_compute_async("m", "t", "p", not_called)) == {"v": 1}
+    leader.join()
+    assert cache.misses == 1 and cache.hits == 1
+
+
+def test_errors_and_rejected_values_are_not_cached(cache):
+    def fail():
+        raise RuntimeError("model down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("m", "t", "p", fail)
+    cache.get_or_compute("m", "t", "p", lambda: {"error": "bad"}, should_cache=lambda r: "error" not in r)
+    assert len(cache) == 0
+
+
+def test_llm_interface_serves_repeated_prompts_from_cache(cache):
+    with StubLLMServer() as stub:
+        llm = LLMInterface(base_url=stub.base_url, cache=cache, deterministic=True)
+        first = llm.infer_simulation_and_visualization_parameters("blue vortex")
+        second = llm.infer_simulation_and_visualization_parameters("blue   vortex")
+        assert first == second == STUB_PARAMS
+        assert stub.request_count == 1
+        assert stub.last_request["options"] == {"temperature": 0.0, "seed": 0}
+
+        # Sampled answers are cached separately from deterministic ones
+        LLMInterface(base_url=stub.base_url, cache=cache).infer_simulation_and_visualization_parameters("blue vortex")
+        assert stub.request_count == 2
+
+
+def test_prompt_template_changes_miss_the_cache(cache, monkeypatch):
+    with StubLLMServer() as stub:
+        llm = LLMInterface(base_url=stub.base_url, cache=cache, deterministic=True)
+        llm.infer_simulation_and_visualization_parameters("blue vortex")
+        build = llm_interface.build_inference_messages
+        monkeypatch.setattr(llm_interface, "build_inference_messages",
+                            lambda keywords: build(keywords) + [{"role": "user", "content": "Also: a new option."}])
+        llm.infer_simulation_and_visualization_parameters("blue vortex")
+        assert stub.request_count == 2
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from backend.llm_service import LLMInferenceService, LLMInferenceError, LLMInferenceTimeout
+from src.async_llm_interface import LLMRequestError
+from src.llm_cache import LLMResponseCache
+from benchmarks.stub_llm_server import StubLLMServer, STUB_PARAMS
+
+
+class FakeLLM:
+    instances = 0
+
+    def __init__(self, response=None, delay=0.0, error=None):
+        FakeLLM.instances += 1
+        self.response = response if response is not None else {
+            "simulation_params": {"time_steps": 30},
+            "visualization_params": {"arrow_density": 15},
+        }
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.peak = 0
+        self.timeouts = []
+
+    async def infer_simulation_and_visualization_parameters(self, effect_keywords, timeout=None):
+        self.timeouts.append(timeout)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.wait_for(asyncio.sleep(self.delay), timeout)
+        finally:
+            self.active -= 1
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+    async def aclose(self):
+        pass
+
+
+def test_concurrent_calls_share_one_client():
+    FakeLLM.instances = 0
+    llm = FakeLLM(delay=0.2)
+    service = LLMInferenceService(timeout=5, client_factory=lambda: llm)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: service.infer("blue vortex"), range(6)))
+    elapsed = time.monotonic() - start
+    service.shutdown()
+
+    assert FakeLLM.instances == 1
+    assert results == [({"time_steps": 30}, {"arrow_density": 15})] * 6
+    # The calls overlap on the client's event loop instead of queueing behind each other
+    assert llm.peak == 6 and elapsed < 1.0
+    assert llm.timeouts == [5] * 6
+
+
+def test_infer_times_out():
+    service = LLMInferenceService(timeout=0.05, client_factory=lambda: FakeLLM(delay=0.5))
+    with pytest.raises(LLMInferenceTimeout):
+        service.infer("slow effect")
+    service.shutdown()
+
+
+@pytest.mark.parametrize("fake", [
+    FakeLLM(response={"error": "Could not extract valid JSON from LLM inference response.", "raw_content": "hello"}),
+    FakeLLM(error=LLMRequestError("Could not extract valid JSON from LLM response.")),
+])
+def test_unparseable_response_raises(fake):
+    service = LLMInferenceService(client_factory=lambda: fake)
+    with pytest.raises(LLMInferenceError, match="Could not extract valid JSON"):
+        service.infer("anything")
+    service.shutdown()
+
+
+def test_streams_from_the_llm_server_through_the_cache():
+    cache = LLMResponseCache()
+    with StubLLMServer(delay=0.2) as stub:
+        service = LLMInferenceService(base_url=stub.base_url, timeout=5, cache=cache)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: service.infer("blue vortex"), range(4)))
+        service.shutdown()
+    assert results == [(STUB_PARAMS["simulation_params"], STUB_PARAMS["visualization_params"])] * 4
+    assert stub.request_count == 1 and stub.last_request["stream"] is True
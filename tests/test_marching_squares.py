@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from src.marching_squares import ContourExtractor, build_contour_ribbons, scalar_field, ribbons_for_frame
+from src.getsuga_mesh import build_getsuga_surface
+
+
+def _bump(n=81, radius=0.5):
+    x = np.linspace(0, 2, n)
+    X, Y = np.meshgrid(x, x)
+    # Equals 0.5 exactly on the circle of `radius` around (1, 1)
+    return x, x, np.exp(-((X - 1.0) ** 2 + (Y - 1.0) ** 2) / radius ** 2 * np.log(2))
+
+
+def _left_offset(direction, distance=0.01):
+    normal = np.column_stack([-direction[:, 1], direction[:, 0]])
+    return normal / np.linalg.norm(normal, axis=1, keepdims=True) * distance
+
+
+def _bilinear(x, y, f, px, py):
+    i = np.clip(np.searchsorted(x, px) - 1, 0, len(x) - 2)
+    j = np.clip(np.searchsorted(y, py) - 1, 0, len(y) - 2)
+    tx = (px - x[i]) / (x[i + 1] - x[i])
+    ty = (py - y[j]) / (y[j + 1] - y[j])
+    return ((1 - tx) * (1 - ty) * f[j, i] + tx * (1 - ty) * f[j, i + 1]
+            + tx * ty * f[j + 1, i + 1] + (1 - tx) * ty * f[j + 1, i])
+
+
+def test_closed_contour_is_welded_oriented_and_accurate():
+    x, y, f = _bump()
+    vertices, segments = ContourExtractor(x, y, f).iso_lines(0.5)
+
+    # A closed loop: every vertex starts exactly one segment and ends exactly one
+    assert sorted(segments[:, 0]) == sorted(segments[:, 1]) == list(range(len(vertices)))
+    radii = np.hypot(vertices[:, 0] - 1.0, vertices[:, 1] - 1.0)
+    np.testing.assert_allclose(radii, 0.5, atol=0.01)
+    length = np.linalg.norm(vertices[segments[:, 1]] - vertices[segments[:, 0]], axis=1).sum()
+    assert length == pytest.approx(2 * np.pi * 0.5, rel=0.01)
+
+    # Higher values on the left of every segment
+    start, end = vertices[segments[:, 0]], vertices[segments[:, 1]]
+    middle, direction = (start + end) / 2, end - start
+    left = _left_offset(direction)
+    assert np.all(_bilinear(x, y, f, *(middle + left).T) > 0.5)
+    assert np.all(_bilinear(x, y, f, *(middle - left).T) < 0.5)
+
+
+def test_saddle_cells_use_the_cell_centre():
+    x = y = np.array([0.0, 1.0])
+    # Corners c0 and c2 above 0.5; the centre decides whether they are joined
+    joined = np.array([[1.0, 0.0], [0.2, 1.0]]) # centre 0.55
+    split = np.array([[1.0, 0.0], [0.0, 0.9]]) # centre 0.475
+    for field, corner_cut in ((joined, (1.0, 0.0)), (split, (0.0, 0.0))):
+        vertices, segments = ContourExtractor(x, y, field).iso_lines(0.5)
+        assert len(segments) == 2
+        cut_points = {tuple(np.round(vertices[s], 3)) for s in segments[0]} | {tuple(np.round(vertices[s], 3)) for s in segments[1]}
+        # One of the two segments cuts off `corner_cut`: both of its points lie on edges meeting there
+        assert any(all(abs(px - corner_cut[0]) < 1e-9 or abs(py - corner_cut[1]) < 1e-9
+                       for px, py in (vertices[a], vertices[b])) for a, b in segments)
+        assert len(cut_points) == 4
+
+
+def test_band_outline_and_level_cache():
+    x, y, f = _bump()
+    extractor = ContourExtractor(x, y, f)
+    vertices, segments = extractor.iso_band_outline(0.3, 0.7)
+    _, low_segments = extractor.iso_lines(0.3)
+    _, high_segments = extractor.iso_lines(0.7)
+    assert len(segments) == len(low_segments) + len(high_segments)
+    assert set(extractor._cache) == {0.3, 0.7}
+    # The band lies on the left of its outline
+    start, end = vertices[segments[:, 0]], vertices[segments[:, 1]]
+    middle, direction = (start + end) / 2, end - start
+    inside = _bilinear(x, y, f, *(middle + _left_offset(direction)).T)
+    assert np.all((inside > 0.3) & (inside <= 0.7))
+
+
+def test_ribbons_need_far_fewer_faces_than_the_thresholded_surface():
+    x, y, f = _bump(n=101)
+    surface = build_getsuga_surface(x, y, f, pressure_threshold=0.5)
+    ribbons = build_contour_ribbons(x, y, f, [0.5], extrusion_scale=0.5, ribbon_height=0.1)
+
+    assert ribbons.face_count * 5 < surface.face_count
+    assert ribbons.vertices.shape[1] == 3
+    np.testing.assert_allclose(sorted(set(ribbons.vertices[:, 2].round(6))), [0.2, 0.3])
+    assert ribbons.faces.max() < ribbons.vertex_count
+    assert build_contour_ribbons(x, y, f, [2.0]).face_count == 0
+
+
+def test_fields_and_frame_params():
+    x = y = np.linspace(0, 2, 41)
+    X, Y = np.meshgrid(x, y)
+    # Solid-body rotation: speed grows with radius, vorticity is 2 everywhere
+    frame = {"x": x, "y": y, "u": -(Y - 1.0), "v": X - 1.0, "p": np.zeros_like(X)}
+    np.testing.assert_allclose(scalar_field(frame, "vorticity"), 2.0)
+    np.testing.assert_allclose(scalar_field(frame, "speed"), np.hypot(X - 1.0, Y - 1.0))
+    with pytest.raises(ValueError):
+        scalar_field(frame, "density")
+
+    ribbons = ribbons_for_frame(frame, {"contour_field": "speed", "ribbon_levels": [0.25, 0.5]})
+    assert sorted(set(ribbons.attributes["level"])) == [0.25, 0.5]
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+from src.parallel_render import ParallelRenderer, split_frame_range, default_worker_count
+import src.run_full_pipeline as pipeline
+from src.render_agent import RenderAgent
+
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_blender.py")
+
+
+def _frame_path(frames_dir):
+    return lambda frame: os.path.join(frames_dir, f"frame_{frame:04d}.png")
+
+
+def _fake_command(frames_dir):
+    def build_command(first, last, threads):
+        return [sys.executable, FAKE_BLENDER, "--background", "--threads", str(threads), "--python", "oneshot.py",
+                "--", "data", os.path.join(frames_dir, "frame_####"), "{}", "{}", "--frames", f"{first}-{last}"]
+    return build_command
+
+
+def _rendered_by(frames_dir, frames):
+    contents = {}
+    for frame in frames:
+        with open(_frame_path(frames_dir)(frame)) as f:
+            contents[frame] = f.read()
+    return contents
+
+
+def test_split_frame_range_covers_range_in_chunks():
+    chunks = split_frame_range(1, 29, 3)
+    assert chunks[0][0] == 1 and chunks[-1][1] == 29
+    assert all(nxt[0] == prev[1] + 1 for prev, nxt in zip(chunks, chunks[1:]))
+    assert len(chunks) == 8 # ceil(29 / (3 workers * 3 chunks)) = 4 frames per chunk
+    assert split_frame_range(1, 5, 2, chunk_size=2) == [(1, 2), (3, 4), (5, 5)]
+    assert split_frame_range(3, 2, 4) == []
+
+
+def test_default_worker_count(monkeypatch):
+    monkeypatch.delenv("EFFECT_STOKES_RENDER_WORKERS", raising=False)
+    assert default_worker_count(cpu_count=16) == 4
+    assert default_worker_count(cpu_count=2) == 1
+    monkeypatch.setenv("EFFECT_STOKES_RENDER_WORKERS", "3")
+    assert default_worker_count(cpu_count=2) == 3
+
+
+def test_render_stage_splits_frames_across_blender_workers(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(pipeline, "BLENDER_EXECUTABLE_PATH", FAKE_BLENDER)
+    frames_dir = tmp_path / "frames"
+    render_output_path = str(frames_dir / "frame_####")
+
+    pipeline.run_render_stage({"output_data_path": str(tmp_path / "fluid"), "simulation_params": {"time_steps": 13}},
+                              {}, render_output_path, workers=3)
+
+    # Frames 1..time_steps-1, as a single oneshot process renders them
+    assert sorted(os.listdir(frames_dir)) == [f"frame_{frame:04d}.png" for frame in range(1, 13)]
+    assert all(content.startswith(f"frame {frame} by") for frame, content in _rendered_by(str(frames_dir), range(1, 13)).items())
+    out = capsys.readouterr().out
+    assert len({line.split("]")[0] for line in out.splitlines() if line.startswith("[render worker")}) > 1
+    # Workers' own progress lines are replaced by one combined stream
+    progress = [line for line in out.splitlines() if line.startswith("@@progress ")]
+    assert progress and all('"total":12' in line for line in progress if '"stage":"render"' in line)
+
+
+def test_idle_worker_shares_a_straggling_range(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_SLOW_FRAMES", "1,2,3,4,5,6")
+    monkeypatch.setenv("FAKE_BLENDER_SLOW_DELAY", "0.15")
+    frames_dir = str(tmp_path)
+    renderer = ParallelRenderer(_fake_command(frames_dir), 1, 12, _frame_path(frames_dir), workers=2, chunk_size=6,
+                                poll_interval=0.02)
+
+    start = time.monotonic()
+    renderer.run()
+    elapsed = time.monotonic() - start
+
+    assert all(os.path.getsize(_frame_path(frames_dir)(frame)) > 0 for frame in range(1, 13))
+    # The worker that finished frames 7-12 joined the slow first range instead of waiting
+    shared = [(first, last) for worker, first, last in renderer.assignments if 1 < first <= 6]
+    assert shared
+    renderers = {content.split(" by ")[1] for content in _rendered_by(frames_dir, range(1, 7)).values()}
+    assert len(renderers) == 2
+    assert elapsed < 6 * 0.15 # A static split would take all six slow frames on one worker
+
+
+def test_failed_worker_fails_the_render(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_FAIL_FRAME", "5")
+    frames_dir = str(tmp_path)
+    renderer = ParallelRenderer(_fake_command(frames_dir), 1, 8, _frame_path(frames_dir), workers=2, poll_interval=0.02)
+    with pytest.raises(subprocess.CalledProcessError):
+        renderer.run()
+
+
+def test_merge_rerenders_empty_placeholders(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_DROP_FRAME", "4")
+    frames_dir = str(tmp_path)
+    renderer = ParallelRenderer(_fake_command(frames_dir), 1, 8, _frame_path(frames_dir), workers=2, poll_interval=0.02)
+    paths = renderer.run()
+    assert len(paths) == 8 and all(os.path.getsize(path) > 0 for path in paths)
+    assert (4, 4) in [(first, last) for _, first, last in renderer.assignments]
+
+
+def test_render_agent_renders_blend_file_in_parallel(tmp_path, monkeypatch):
+    fluid_dir = tmp_path / "fluid"
+    fluid_dir.mkdir()
+    for step in range(6):
+        (fluid_dir / f"fluid_data_frame_{step:04d}.npz").touch()
+    commands = []
+
+    def fake_docker_command(self, blender_args):
+        commands.append(blender_args)
+        # Stand in for the container's /app mount of the working directory
+        return [sys.executable, FAKE_BLENDER] + [arg.replace("/app", str(tmp_path)) for arg in blender_args[1:]]
+
+    monkeypatch.setattr(RenderAgent, "_docker_command", fake_docker_command)
+    monkeypatch.chdir(tmp_path)
+    agent = RenderAgent.__new__(RenderAgent)
+    frames_dir = tmp_path / "frames"
+    agent._render_frames_to_images(str(tmp_path / "scene.blend"), str(frames_dir), frame_range=(0, 5), workers=2)
+
+    assert sorted(os.listdir(frames_dir)) == [f"frame_{frame:04d}.png" for frame in range(6)]
+    assert all("-s" in command and "--python-expr" in command for command in commands)
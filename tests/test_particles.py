@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pytest
+
+from src.fluid_simulator import FluidSimulator
+from src.particles import ParticleSystem, load_particles, particle_file, particle_glyphs
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(0, 2, 41)
+    y = np.linspace(0, 2, 41)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+def test_particles_follow_the_flow(grid):
+    x, y, X, Y = grid
+    system = ParticleSystem(x, y, max_particles=1000, emit_rate=100, emitter="uniform", lifetime=1000)
+    u, v = np.full_like(X, 2.0), np.full_like(X, -1.0)
+    system.step(u, v, dt=0.01)
+    start_x, start_y = system.px[:100].copy(), system.py[:100].copy()
+    system.step(u, v, dt=0.01)
+    system.step(u, v, dt=0.01)
+    # Particles that stayed inside moved by 2 * dt * velocity; the ones that left the grid are gone
+    inside = (start_x + 0.04 <= 2.0) & (start_y - 0.02 >= 0.0)
+    # Compaction keeps order, so the first batch's survivors come first
+    assert np.count_nonzero(inside) + 100 < system.count <= np.count_nonzero(inside) + 200
+    np.testing.assert_allclose(system.px[:np.count_nonzero(inside)], start_x[inside] + 0.04, atol=1e-5)
+    np.testing.assert_allclose(system.py[:np.count_nonzero(inside)], start_y[inside] - 0.02, atol=1e-5)
+
+
+def test_aging_culling_and_capacity(grid):
+    x, y, X, Y = grid
+    still = np.zeros_like(X)
+    system = ParticleSystem(x, y, max_particles=250, emit_rate=100, lifetime=4, seed=1,
+                            emitter="shape")
+    counts = []
+    for _ in range(12):
+        system.step(still, still, dt=0.01, center=(0.5, 1.5), radius=0.2)
+        counts.append(system.count)
+        # Compacted buffers: every live particle is young enough and inside the emitter disc
+        assert (system.age[:system.count] < system.life[:system.count]).all()
+    assert counts[:3] == [100, 200, 250] # Emission stops while the buffer is full
+    # Old particles expire (life is 4 +- 25% frames) and make room for new ones
+    assert system.age[:system.count].max() < 5
+    assert (system.age[:system.count] == 0).any()
+    radius = np.hypot(system.px[:system.count] - 0.5, system.py[:system.count] - 1.5)
+    assert radius.max() <= 0.2 + 1e-6
+
+    with pytest.raises(ValueError):
+        ParticleSystem(x, y, emitter="fountain")
+
+
+def test_speed_emitter_favours_fast_flow(grid):
+    x, y, X, Y = grid
+    u = np.where(X > 1.0, 1.0, 0.0)
+    system = ParticleSystem(x, y, max_particles=2000, emit_rate=2000, emitter="speed")
+    system.step(u, np.zeros_like(X), dt=0.0)
+    assert (system.px[:system.count] > 0.95).all()
+
+
+def test_simulator_writes_particle_frames(tmp_path, grid):
+    x, y, X, Y = grid
+    params = {"grid_resolution": [21, 21], "time_steps": 4,
+              "particles": {"max_particles": 500, "emit_rate": 50, "emitter": "shape"}}
+    FluidSimulator().run_simulation(params, str(tmp_path))
+    counts = []
+    for frame in range(4):
+        particles = load_particles(particle_file(str(tmp_path), frame))
+        counts.append(len(particles["positions"]))
+        assert particles["positions"].dtype == np.float32
+        assert ((particles["age"] >= 0) & (particles["age"] <= 1)).all()
+    assert counts == [50, 100, 150, 200]
+
+    glyphs = particle_glyphs(particles, radius=0.01)
+    assert glyphs.count == 200
+    assert glyphs.scales.max() <= 0.01
+    np.testing.assert_allclose(glyphs.scales, 0.01 * (1 - particles["age"]), rtol=1e-6)
+
+    FluidSimulator().run_simulation({"grid_resolution": [21, 21], "time_steps": 2}, str(tmp_path / "plain"))
+    assert not any(name.startswith("particles_") for name in os.listdir(tmp_path / "plain"))
@@ -0,0 +1,50 @@
+import io
+from src.progress import ProgressReporter, emit_progress, format_progress, parse_progress_line
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress_lines_round_trip():
+    line = format_progress("simulation", step=3, total=10, eta=1.5)
+    assert parse_progress_line(line) == {"stage": "simulation", "step": 3, "total": 10, "eta": 1.5}
+    assert parse_progress_line("Fra:1 Mem:12M | Sample 1/128") is None
+    assert parse_progress_line("@@progress {not json") is None
+    assert parse_progress_line('@@progress {"step": 1}') is None
+
+
+def test_emit_progress_writes_one_line():
+    stream = io.StringIO()
+    emit_progress("gif", stream=stream, status="started")
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    assert parse_progress_line(lines[0]) == {"stage": "gif", "status": "started"}
+
+
+def test_reporter_throttles_and_estimates_eta():
+    stream = io.StringIO()
+    clock = FakeClock()
+    reporter = ProgressReporter("simulation", total=100, stream=stream, min_interval=1.0, clock=clock)
+
+    for step in range(100):
+        clock.now = step * 0.1
+        reporter.update(step)
+
+    events = [parse_progress_line(line) for line in stream.getvalue().splitlines()]
+    # First step, roughly one per simulated second, and always the last step
+    assert 10 <= len(events) <= 12
+    assert events[-1]["step"] == 100
+    assert events[-1]["eta"] == 0
+    assert events[0]["step"] == 1
+
+
+def test_reporter_accepts_late_total():
+    stream = io.StringIO()
+    reporter = ProgressReporter("simulation", stream=stream, min_interval=0.0, clock=FakeClock())
+    reporter(0, 4)
+    assert parse_progress_line(stream.getvalue().strip())["total"] == 4
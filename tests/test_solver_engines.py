@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from src.fluid_simulator import FluidSimulator
+from src.glyph_placement import GlyphPlacer
+from src.glyphs import arrow_glyphs
+from src.streamlines import FlowTracer, seed_points
+from src.solver_engines import (FlowState, PlaceholderEngine, ProjectionEngine, SolverEngine, SOLVER_ENGINES,
+                                create_engine, register_engine)
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(0, 2, 41)
+    y = np.linspace(0, 2, 31)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+def vortex_source(X, Y):
+    envelope = np.exp(-((X - 1.0) ** 2 + (Y - 1.0) ** 2) / 0.1)
+    return 5.0 * (Y - 1.0) * envelope, -5.0 * (X - 1.0) * envelope
+
+
+def divergence(state, engine):
+    return (np.gradient(state.u, engine.dx, axis=1) + np.gradient(state.v, engine.dy, axis=0))[2:-2, 2:-2]
+
+
+def test_registry_and_common_contract(grid):
+    x, y, X, Y = grid
+    assert set(SOLVER_ENGINES) >= {"placeholder", "projection"}
+    source_x, source_y = vortex_source(X, Y)
+    for name in SOLVER_ENGINES:
+        engine = create_engine(name, x, y)
+        state = engine.initial_state()
+        assert state.u.shape == X.shape
+        state = engine.step(state, 0.01, 0.02, source_x, source_y)
+        assert set(state.fields()) == {"u", "v", "p"}
+        assert all(field.shape == X.shape for field in state.fields().values())
+        # No-slip walls
+        assert not state.u[0].any() and not state.v[:, -1].any()
+
+    assert isinstance(create_engine("projection", x, y, options={"nit": 5}), ProjectionEngine)
+    assert create_engine("projection", x, y, options={"nit": 5}).nit == 5
+    with pytest.raises(ValueError):
+        create_engine("lattice_boltzmann", x, y)
+    with pytest.raises(ValueError):
+        create_engine("placeholder", x, y, boundary_conditions="periodic")
+
+
+def test_placeholder_engine_takes_x_along_axis_1():
+    # Non-square with dx != dy, so swapped axes or spacings show up
+    x, y = np.linspace(0, 2, 41), np.linspace(0, 1, 21)
+    X, Y = np.meshgrid(x, y)
+    engine = PlaceholderEngine(x, y)
+    zeros = np.zeros_like(X)
+
+    # A pressure gradient along x pushes u only
+    state = engine.step(FlowState(zeros, zeros, X.copy()), 0.01, 0.0, zeros, zeros)
+    np.testing.assert_allclose(state.u[1:-1, 1:-1], -0.01)
+    assert not state.v.any()
+
+    # The divergence du/dx of u = x lowers the pressure by dt * 1 away from the walls
+    state = engine.step(FlowState(X.copy(), zeros, zeros.copy()), 0.01, 0.0, zeros, zeros)
+    np.testing.assert_allclose(state.p[2:-2, 2:-2], -0.01)
+
+
+def test_projection_engine_is_stable_and_nearly_divergence_free(grid):
+    x, y, X, Y = grid
+    source_x, source_y = vortex_source(X, Y)
+    projection, placeholder = ProjectionEngine(x, y), PlaceholderEngine(x, y)
+    # At the simulator's dt the explicit scheme needs substeps (viscous limit 0.2 dx^2 / nu)
+    assert projection.substeps(projection.initial_state(), 0.01, 0.1) > 1
+
+    swirl, rough = projection.initial_state(), placeholder.initial_state()
+    for _ in range(40):
+        swirl = projection.step(swirl, 0.01, 0.1, source_x, source_y)
+        rough = placeholder.step(rough, 0.01, 0.1, source_x, source_y)
+    assert np.isfinite(swirl.u).all() and np.abs(swirl.u).max() > 0.01
+    # The pressure projection removes most of the divergence the placeholder leaves in
+    speed = np.abs(swirl.u).max() / projection.dx
+    assert np.abs(divergence(swirl, projection)).max() < 0.1 * speed
+    assert np.abs(divergence(swirl, projection)).max() < np.abs(divergence(rough, placeholder)).max()
+
+
+def test_simulator_runs_registered_engines_by_name(grid, tmp_path):
+    class StillEngine(SolverEngine):
+        """Ignores every force: the flow never moves."""
+
+        name = "still"
+
+        def step(self, state, dt, viscosity, source_x, source_y):
+            return FlowState(np.zeros(self.shape), np.zeros(self.shape), np.ones(self.shape))
+
+    register_engine(StillEngine)
+    try:
+        params = {"grid_resolution": [31, 31], "time_steps": 3, "solver": "still"}
+        FluidSimulator().run_simulation(params, str(tmp_path / "still"))
+        with np.load(tmp_path / "still" / "fluid_data_frame_0002.npz") as frame:
+            assert not frame["u"].any() and (frame["p"] == 1).all()
+    finally:
+        del SOLVER_ENGINES["still"]
+
+    params = {"grid_resolution": [31, 31], "time_steps": 3, "solver": "projection", "solver_options": {"nit": 10}}
+    FluidSimulator().run_simulation(params, str(tmp_path / "projection"))
+    with np.load(tmp_path / "projection" / "fluid_data_frame_0002.npz") as frame:
+        assert np.abs(frame["u"]).max() > 0
+    with pytest.raises(ValueError):
+        register_engine(type("Nameless", (SolverEngine,), {}))
+
+
+def test_non_square_frames_feed_the_flow_consumers(tmp_path):
+    # grid_resolution is [nx, ny]; frames hold (ny, nx) fields indexed [j, i]
+    params = {"grid_resolution": [40, 60], "time_steps": 2, "initial_shape_type": "vortex"}
+    FluidSimulator().run_simulation(params, str(tmp_path))
+    with np.load(tmp_path / "fluid_data_frame_0001.npz") as frame:
+        x, y, u, v = frame["x"], frame["y"], frame["u"], frame["v"]
+    assert u.shape == v.shape == (len(y), len(x)) == (60, 40)
+    X, Y = np.meshgrid(x, y)
+
+    glyphs = arrow_glyphs(x, y, u, v, arrow_density=10)
+    assert glyphs.count > 0
+    i = np.searchsorted(x, glyphs.positions[:, 0] - 1e-6)
+    j = np.searchsorted(y, glyphs.positions[:, 1] - 1e-6)
+    np.testing.assert_allclose(glyphs.speeds, np.hypot(u, v)[j, i], rtol=1e-5)
+
+    placer = GlyphPlacer(x, y, budget=50)
+    points = placer.place(u, v)
+    vel_u, _ = placer.velocities(u, v)
+    assert len(points) and np.isfinite(vel_u).all()
+
+    lines = FlowTracer(x, y).streamlines(u, v, seed_points(x, y, 30), steps=20)
+    assert lines.count == 30
@@ -0,0 +1,104 @@
+import os
+import json
+import pytest
+from src.stage_cache import StageCache
+import src.run_full_pipeline as pipeline
+
+
+def _writer(path, calls, name):
+    def run():
+        calls.append(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"{name} {len(calls)}")
+    return run
+
+
+def _build(tmp_path, calls, color="blue", fps=15):
+    cache = StageCache(str(tmp_path))
+    cache.add_stage("simulate", _writer(str(tmp_path / "fluid" / "data.npz"), calls, "simulate"),
+                    outputs=[str(tmp_path / "fluid")], params={"viscosity": 0.02})
+    cache.add_stage("render", _writer(str(tmp_path / "frames" / "frame_0001.png"), calls, "render"),
+                    outputs=[str(tmp_path / "frames")], params={"color": color}, deps=["simulate"])
+    cache.add_stage("gif", _writer(str(tmp_path / "out.gif"), calls, "gif"),
+                    outputs=[str(tmp_path / "out.gif")], params={"fps": fps}, deps=["render"])
+    return cache
+
+
+def test_skips_up_to_date_stages_and_reruns_downstream(tmp_path):
+    calls = []
+    assert _build(tmp_path, calls).run() == {"simulate": "ran", "render": "ran", "gif": "ran"}
+    assert _build(tmp_path, calls).run() == {"simulate": "skipped", "render": "skipped", "gif": "skipped"}
+
+    calls.clear()
+    _build(tmp_path, calls, color="red").run()
+    assert calls == ["render", "gif"]
+
+    calls.clear()
+    _build(tmp_path, calls, color="red", fps=24).run()
+    assert calls == ["gif"]
+
+
+def test_missing_or_modified_outputs_are_rebuilt(tmp_path):
+    calls = []
+    _build(tmp_path, calls).run()
+    os.remove(tmp_path / "out.gif")
+    calls.clear()
+    _build(tmp_path, calls).run()
+    assert calls == ["gif"]
+
+    # A frame changed outside the pipeline no longer matches the render stamp
+    calls.clear()
+    with open(tmp_path / "frames" / "frame_0001.png", "a") as f:
+        f.write(" retouched")
+    _build(tmp_path, calls).run()
+    assert calls == ["render", "gif"]
+
+    calls.clear()
+    cache = _build(tmp_path, calls)
+    cache.force = True
+    cache.run(["gif"])
+    assert calls == ["gif"]
+
+
+def test_stage_needs_upstream_outputs(tmp_path):
+    cache = _build(tmp_path, [])
+    with pytest.raises(RuntimeError, match="has not run yet"):
+        cache.run(["render"])
+
+
+def test_pipeline_rerenders_without_resimulating(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_simulation(sim_json, viz_json, output_dir):
+        calls.append("simulate")
+        os.makedirs(os.path.join(output_dir, "fluid_data"), exist_ok=True)
+        with open(os.path.join(output_dir, pipeline.SIMULATION_RESULT_FILE), "w") as f:
+            json.dump({"output_data_path": os.path.join(output_dir, "fluid_data"), "simulation_params": {}}, f)
+
+    def fake_render(result_data, visualization_params, render_output_path, workers=None, blender_workers=None):
+        calls.append(("render", visualization_params["emission_strength"]))
+        os.makedirs(os.path.dirname(render_output_path), exist_ok=True)
+        open(render_output_path.replace("####", "0001") + ".png", "w").close()
+
+    def fake_gif(render_output_path, gif_output_path, fps=15):
+        calls.append(("gif", fps))
+        open(gif_output_path, "w").close()
+
+    monkeypatch.setattr(pipeline, "run_simulation_stage", fake_simulation)
+    monkeypatch.setattr(pipeline, "run_render_stage", fake_render)
+    monkeypatch.setattr(pipeline, "create_gif_from_frames", fake_gif)
+    monkeypatch.setattr(pipeline, "emit_progress", lambda *args, **kwargs: None)
+    output_dir = str(tmp_path / "job")
+    sim = json.dumps({"time_steps": 30})
+
+    pipeline.main(sim, json.dumps({"emission_strength": 50.0}), output_dir=output_dir)
+    assert calls == ["simulate", ("render", 50.0), ("gif", 15)]
+
+    calls.clear()
+    pipeline.main(sim, json.dumps({"emission_strength": 80.0}), output_dir=output_dir)
+    assert calls == [("render", 80.0), ("gif", 15)]
+
+    calls.clear()
+    pipeline.main(sim, json.dumps({"emission_strength": 80.0, "gif_fps": 24}), output_dir=output_dir)
+    assert calls == [("gif", 24)]
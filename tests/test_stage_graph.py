@@ -0,0 +1,124 @@
+import time
+import pytest
+from src.stage_graph import StageGraph, StageFailedError
+
+
+def _sleeper(seconds, value=None):
+    def run(deps):
+        time.sleep(seconds)
+        return value if value is not None else dict(deps)
+    return run
+
+
+def test_independent_stages_run_concurrently():
+    graph = StageGraph()
+    graph.add_stage("parse", _sleeper(0.05, "params"))
+    graph.add_stage("simulate", _sleeper(0.3, "fluid"), deps=["parse"])
+    graph.add_stage("style", _sleeper(0.1, "viz"), deps=["parse"])
+    graph.add_stage("render", lambda deps: (deps["simulate"], deps["style"]), deps=["simulate", "style"])
+
+    results = graph.run()
+
+    assert results["render"] == ("fluid", "viz")
+    # Sequential execution would take 0.45s
+    assert graph.wall_time < 0.42
+    assert graph.timings["style"]["start"] < graph.timings["simulate"]["end"]
+    path, total = graph.critical_path()
+    assert path == ["parse", "simulate", "render"]
+    assert total == pytest.approx(0.35, abs=0.05)
+    assert "critical path: parse -> simulate -> render" in graph.report()
+
+
+def test_failure_stops_dependents():
+    def explode(deps):
+        raise RuntimeError("solver diverged")
+
+    ran = []
+    graph = StageGraph()
+    graph.add_stage("parse", _sleeper(0.0, "params"))
+    graph.add_stage("simulate", explode, deps=["parse"])
+    graph.add_stage("render", lambda deps: ran.append("render"), deps=["simulate"])
+
+    with pytest.raises(StageFailedError, match="simulate") as excinfo:
+        graph.run()
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+    assert ran == []
+    assert "render" not in graph.timings
+
+
+def test_rejects_unknown_or_duplicate_stages():
+    graph = StageGraph()
+    graph.add_stage("parse", _sleeper(0.0))
+    with pytest.raises(ValueError):
+        graph.add_stage("render", _sleeper(0.0), deps=["simulate"])
+    with pytest.raises(ValueError):
+        graph.add_stage("parse", _sleeper(0.0))
+
+
+def test_orchestrator_styles_while_simulating(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src.main import EffectStokesOrchestrator
+
+    class FakeSimAgent:
+        def run_simulation(self, simulation_params, visualization_params, output_dir=None):
+            time.sleep(0.2)
+            return {"output_data_path": output_dir}
+
+    class FakeStyleAgent:
+        def generate_viz_params(self, parsed_params, initial_viz_params=None):
+            time.sleep(0.2)
+            return {"mesh_params": {"mesh_type": "ribbon"}}
+
+    class FakeRenderAgent:
+        def render_vfx(self, fluid_data_path, output_blend_file, viz_params):
+            return {"status": "success", "fluid_data_path": fluid_data_path, "viz_params": viz_params}
+
+    orchestrator = EffectStokesOrchestrator()
+    orchestrator.parse_prompt = lambda prompt: {"vfx_type": "vortex"}
+    orchestrator.sim_agent = FakeSimAgent()
+    orchestrator.style_agent = FakeStyleAgent()
+    orchestrator.render_agent = FakeRenderAgent()
+
+    output = orchestrator.run_pipeline("blue vortex", fluid_data_dir=str(tmp_path / "fluid"), output_blend_file="out.blend")
+
+    assert output["fluid_data_path"] == str(tmp_path / "fluid")
+    assert output["viz_params"] == {"mesh_params": {"mesh_type": "ribbon"}}
+    assert output["critical_path"][0] == "parse" and output["critical_path"][-1] == "render"
+    assert orchestrator.last_stage_graph.wall_time < 0.38
+
+
+def test_orchestrator_stages_get_their_own_parsed_params(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src.main import EffectStokesOrchestrator
+
+    parsed = {"vfx_type": "vortex", "grid_resolution": [64, 64], "emitters": [{"position": [0.5, 0.5]}]}
+    seen = {}
+
+    class FakeSimAgent:
+        def run_simulation(self, simulation_params, visualization_params, output_dir=None):
+            # Validation fills in defaults in place, nested lists included
+            simulation_params["grid_resolution"].append(1)
+            simulation_params["emitters"][0]["position"][0] = 0.0
+            return {"output_data_path": output_dir}
+
+    class FakeStyleAgent:
+        def generate_viz_params(self, parsed_params, initial_viz_params=None):
+            time.sleep(0.1)
+            seen["style"] = parsed_params
+            return {}
+
+    class FakeRenderAgent:
+        def render_vfx(self, fluid_data_path, output_blend_file, viz_params):
+            return {"status": "success"}
+
+    orchestrator = EffectStokesOrchestrator()
+    orchestrator.parse_prompt = lambda prompt: parsed
+    orchestrator.sim_agent = FakeSimAgent()
+    orchestrator.style_agent = FakeStyleAgent()
+    orchestrator.render_agent = FakeRenderAgent()
+
+    orchestrator.run_pipeline("blue vortex", fluid_data_dir=str(tmp_path / "fluid"), output_blend_file="out.blend")
+
+    expected = {"vfx_type": "vortex", "grid_resolution": [64, 64], "emitters": [{"position": [0.5, 0.5]}]}
+    assert seen["style"] == expected
+    assert parsed == expected
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.field_sampling import bilinear
+from src.streamlines import FlowTracer, PolylineSet, seed_points
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(-1, 1, 81)
+    y = np.linspace(-1, 1, 81)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+def test_polyline_set_packs_tracks():
+    tracks = np.arange(4 * 3 * 2, dtype=np.float64).reshape(4, 3, 2)
+    lines = PolylineSet.from_tracks(tracks, [4, 0, 2])
+    assert lines.count == 3 and lines.lengths.tolist() == [4, 0, 2]
+    np.testing.assert_array_equal(lines[0], tracks[:, 0])
+    np.testing.assert_array_equal(lines[2], tracks[:2, 2])
+    assert len(lines.segments()) == 2
+
+
+@pytest.mark.parametrize("method", ["rk2", "rk4"])
+def test_streamlines_of_solid_rotation_are_circles(grid, method):
+    x, y, X, Y = grid
+    tracer = FlowTracer(x, y, method=method)
+    seeds = np.array([[0.3, 0.0], [0.0, 0.6], [-0.5, 0.0]])
+    lines = tracer.streamlines(-Y, X, seeds, steps=300, step_size=0.01, direction="forward")
+    for k, seed in enumerate(seeds):
+        radius = np.hypot(*lines[k].T)
+        np.testing.assert_allclose(radius, np.hypot(*seed), atol=2e-3)
+        assert len(lines[k]) == 301
+    # Counter-clockwise: the first step from (0.3, 0) goes up
+    assert lines[0][1, 1] > 0
+
+
+def test_streamlines_stop_at_the_border_and_in_still_fluid(grid):
+    x, y, X, Y = grid
+    tracer = FlowTracer(x, y)
+    u = np.where(X < 0.5, 1.0, 0.0)
+    seeds = np.array([[-0.9, 0.0], [0.8, 0.2], [2.0, 0.0]])
+    lines = tracer.streamlines(u, np.zeros_like(X), seeds, steps=400, step_size=0.05, direction="both")
+    first = lines[0]
+    # Backward to the left wall, forward until the flow dies out around x = 0.5
+    assert first[0, 0] == pytest.approx(-1.0, abs=0.05)
+    assert 0.4 < first[-1, 0] < 0.6
+    assert np.all(np.diff(first[:, 0]) > 0)
+    assert len(lines[1]) == 1 # Seeded in still fluid
+    assert len(lines[2]) == 0 # Seeded outside the grid
+
+
+def test_pathlines_follow_the_flow_in_time(grid):
+    x, y, X, Y = grid
+    # Uniform flow whose speed grows linearly with the frame index: x(t) = x0 + sum of the interpolated speeds
+    frames = [{"u": np.full_like(X, float(k)), "v": np.full_like(X, 0.5)} for k in range(6)]
+    tracer = FlowTracer(x, y, method="rk2")
+    lines = tracer.pathlines(frames, np.array([[-0.9, -0.9]]), start_frame=1, end_frame=5, substeps=3, frame_dt=0.1)
+    path = lines[0]
+    assert len(path) == 4 * 3 + 1
+    # Speed goes 1 -> 5 linearly over 0.4 time units: distance 0.4 * 3
+    np.testing.assert_allclose(path[-1], [-0.9 + 1.2, -0.9 + 0.2], atol=1e-6)
+
+
+def test_seeds_follow_weights(grid):
+    x, y, X, Y = grid
+    seeds = seed_points(x, y, 2000, weights=(X > 0).astype(float), seed=4)
+    assert seeds.shape == (2000, 2)
+    assert (seeds[:, 0] > -0.05).all()
+    with pytest.raises(ValueError):
+        FlowTracer(x, y, method="euler")
+
+
+def test_sampling_matches_bilinear_on_non_uniform_grids():
+    x = np.array([0.0, 0.1, 0.5, 1.0, 2.0])
+    y = np.linspace(0, 1, 6)
+    X, Y = np.meshgrid(x, y)
+    field = np.stack([np.sin(3 * X) * Y, X * X - Y], axis=-1)
+    positions = np.random.default_rng(0).uniform([-0.2, -0.2], [2.2, 1.2], (50, 2))
+    sampled = FlowTracer(x, y).sample(field, positions)
+    for channel in range(2):
+        np.testing.assert_allclose(sampled[:, channel],
+                                   bilinear(x, y, field[..., channel], positions[:, 0], positions[:, 1]), atol=1e-12)
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pytest
+
+from src.getsuga_mesh import build_getsuga_surface, SurfaceMesh
+from src.vertex_cache import VertexCacheWriter, VertexCacheReader, POSITIONS_FILE, FACES_FILE
+
+
+@pytest.fixture
+def grid():
+    x = np.linspace(-1, 1, 24)
+    y = np.linspace(-1, 1, 24)
+    X, Y = np.meshgrid(x, y)
+    return x, y, X, Y
+
+
+def _frame_surface(grid, t):
+    x, y, X, Y = grid
+    pressure = np.exp(-((X - 0.3 * np.sin(t)) ** 2 + Y ** 2) * 4)
+    return build_getsuga_surface(x, y, pressure, pressure_threshold=0.2)
+
+
+def _breathing_quad(scale):
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=np.float32) * scale
+    return SurfaceMesh(vertices, np.array([[0, 1, 2, 3]], dtype=np.int32), {"pressure": np.full(4, scale, np.float32)})
+
+
+def test_round_trip_matches_each_frame(tmp_path, grid):
+    surfaces = {frame: _frame_surface(grid, frame * 0.4) for frame in range(6)}
+    with VertexCacheWriter(str(tmp_path / "cache")) as writer:
+        for frame, surface in surfaces.items():
+            writer.add_frame(frame, surface)
+
+    reader = VertexCacheReader(str(tmp_path / "cache"))
+    assert reader.frames == list(range(6))
+    for frame, surface in surfaces.items():
+        cached = reader.surface(frame)
+        np.testing.assert_array_equal(cached.vertices, surface.vertices)
+        np.testing.assert_array_equal(cached.faces, surface.faces)
+        np.testing.assert_array_equal(cached.attributes["pressure"], surface.attributes["pressure"])
+
+
+def test_fixed_topology_stores_faces_once(tmp_path):
+    path = str(tmp_path / "cache")
+    with VertexCacheWriter(path) as writer:
+        for frame in range(50):
+            writer.add_frame(frame, _breathing_quad(1.0 + frame * 0.1))
+
+    reader = VertexCacheReader(path)
+    assert len(reader.topologies) == 1
+    assert {reader.topology_of(frame) for frame in reader.frames} == {0}
+    # Faces are written once; only positions grow with the animation length
+    assert os.path.getsize(os.path.join(path, FACES_FILE)) == 4 * 4
+    assert os.path.getsize(os.path.join(path, POSITIONS_FILE)) == 50 * 4 * 3 * 4
+    np.testing.assert_allclose(reader.positions(49)[2], [5.9, 5.9, 0], rtol=1e-6)
+
+
+def test_changing_topologies_are_bucketed(tmp_path, grid):
+    path = str(tmp_path / "cache")
+    first, second = _frame_surface(grid, 0.0), _frame_surface(grid, 1.5)
+    assert first.face_count != second.face_count
+    with VertexCacheWriter(path) as writer:
+        for frame, surface in enumerate([first, second, first, second]):
+            writer.add_frame(frame, surface)
+
+    reader = VertexCacheReader(path)
+    assert [reader.topology_of(frame) for frame in range(4)] == [0, 1, 0, 1]
+    np.testing.assert_array_equal(reader.faces(reader.topology_of(3)), second.faces)
+
+
+def test_frames_outside_the_cache_hold_the_nearest(tmp_path):
+    path = str(tmp_path / "cache")
+    with VertexCacheWriter(path) as writer:
+        for frame in (5, 6, 8):
+            writer.add_frame(frame, _breathing_quad(float(frame)))
+
+    reader = VertexCacheReader(path)
+    assert reader.nearest_frame(0) == 5
+    assert reader.nearest_frame(7) == 6
+    assert reader.nearest_frame(100) == 8
+    np.testing.assert_array_equal(reader.positions(100), reader.positions(8))
+
+
+def test_unfinished_cache_is_not_readable(tmp_path):
+    path = str(tmp_path / "cache")
+    writer = VertexCacheWriter(path)
+    writer.add_frame(0, _breathing_quad(1.0))
+    with pytest.raises(FileNotFoundError):
+        VertexCacheReader(path)
+    writer.close()
+    assert VertexCacheReader(path).frames == [0]